@@ -0,0 +1,77 @@
+# scripts/bench_binds.py
+
+"""
+Compara los parses de Oracle (v$sysstat) al ejecutar la misma consulta con
+valores distintos: primero con los literales en el texto y después con los
+valores como binds (src/data/sql_binds.py).
+
+Con literales, cada valor nuevo es un hard parse; con binds, la primera
+ejecución hace el hard parse y las demás reutilizan el cursor. Los números
+son de toda la instancia: mejor con la base de datos sin otra carga.
+
+Uso:
+    python scripts/bench_binds.py [consultas]
+
+Requiere permiso de lectura sobre v$sysstat (p.ej. SELECT_CATALOG_ROLE).
+"""
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Sin caché de resultados: cada consulta tiene que llegar a Oracle
+os.environ.setdefault("QUERY_CACHE_ENABLED", "false")
+os.environ.setdefault("REPLICA_ENABLED", "false")
+
+from src.data.db import get_parse_stats, parse_stats_delta, run_query
+from src.data.sql_binds import parametrize_sql
+
+TEMPLATE = (
+    "SELECT t.ciudad, SUM(v.total) AS total FROM ventas v JOIN tiendas t ON t.id = v.tienda_id "
+    "WHERE v.fecha >= DATE '{day}' AND v.tienda_id = {store} AND v.total > {amount} "
+    "GROUP BY t.ciudad FETCH FIRST 50 ROWS ONLY"
+)
+
+
+def _queries(n: int):
+    # Sin semilla: con literales, ningún texto está ya en la shared pool de
+    # una ejecución anterior del script
+    rng = random.Random()
+    for _ in range(n):
+        day = f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        yield TEMPLATE.format(day=day, store=rng.randint(1, 20), amount=round(rng.uniform(0, 100), 4))
+
+
+def _measure(label: str, queries, bind: bool):
+    before = get_parse_stats()
+    start = time.perf_counter()
+    for sql in queries:
+        if bind:
+            sql, params = parametrize_sql(sql)
+            run_query(sql, params)
+        else:
+            run_query(sql)
+    elapsed = time.perf_counter() - start
+    delta = parse_stats_delta(before, get_parse_stats())
+    print(
+        f"{label:<10} {len(queries):>5} consultas  {elapsed:6.2f} s  "
+        f"parses {delta.get('parse_total', 0):>6}  hard {delta.get('parse_hard', 0):>6}  "
+        f"soft {delta.get('parse_soft', 0):>6}"
+    )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if get_parse_stats() is None:
+        sys.exit("❌ v$sysstat no disponible: hace falta Oracle y permiso sobre las vistas v$")
+    queries = list(_queries(n))
+    _measure("literales", queries, bind=False)
+    _measure("binds", queries, bind=True)
+
+
+if __name__ == "__main__":
+    main()
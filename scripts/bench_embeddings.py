@@ -0,0 +1,91 @@
+# scripts/bench_embeddings.py
+
+"""
+Compara los backends de embeddings (torch fp32, onnx, int8):
+
+- throughput: preguntas/s (embed_query una a una) y fragmentos/s
+  (embed_documents en lote) sobre los fragmentos de docs/;
+- coincidencia con torch: similitud coseno media entre los vectores de cada
+  pregunta y solape del top-k de fragmentos recuperados (recall@k respecto
+  al top-k de torch);
+- efecto de la caché LRU de preguntas repitiendo la misma tanda.
+
+Las preguntas son las de data/intent_examples.csv.
+
+Uso:
+    python scripts/bench_embeddings.py [k]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config.embeddings import CachedQueryEmbeddings, _build_embeddings
+from src.config.settings import get_settings
+from src.data.docs_index import load_file
+from src.graphs.intent_classifier import load_examples
+
+BACKENDS = ["torch", "onnx", "int8"]
+
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> list[set]:
+    scores = queries @ chunks.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    settings = get_settings()
+    questions = [q for q, _ in load_examples(settings.intent_examples_path)]
+    chunks = [
+        doc.page_content
+        for path in sorted(Path("docs").glob("*.md"))
+        for doc in load_file(path, settings.docs_chunk_size, settings.docs_chunk_overlap)
+    ]
+    print(f"{len(questions)} preguntas, {len(chunks)} fragmentos, k={k}\n")
+
+    reference = None
+    print("backend | preguntas/s | fragmentos/s | coseno vs torch | recall@k vs torch")
+    for backend in BACKENDS:
+        model, loaded = _build_embeddings(backend)
+        if loaded != backend:
+            print(f"{backend:<7} | no disponible (se cargó {loaded})")
+            continue
+
+        start = time.perf_counter()
+        query_vectors = _normalize([model.embed_query(q) for q in questions])
+        qps = len(questions) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        chunk_vectors = _normalize(model.embed_documents(chunks))
+        dps = len(chunks) / (time.perf_counter() - start)
+
+        top = _top_k(query_vectors, chunk_vectors, k)
+        if reference is None:
+            reference = (query_vectors, top)
+        cosine = float(np.mean(np.sum(query_vectors * reference[0], axis=1)))
+        recall = float(np.mean([len(a & b) / k for a, b in zip(top, reference[1])]))
+        print(f"{backend:<7} | {qps:>11.1f} | {dps:>12.1f} | {cosine:>15.4f} | {recall:>17.1%}")
+
+    cached = CachedQueryEmbeddings(_build_embeddings("torch")[0])
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        for q in questions:
+            cached.embed_query(q)
+        timings.append(len(questions) / (time.perf_counter() - start))
+    print(f"\ncaché LRU: {timings[0]:.1f} preguntas/s en frío, {timings[1]:.1f} con caché")
+    print(cached.cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# scripts/bench_physical_design.py
+
+"""
+Compara consultas representativas del agente SQL antes y después del perfil
+de diseño físico (src/data/physical_design.py): tiempo (mediana de varias
+ejecuciones) y plan de EXPLAIN PLAN (coste, tablas recorridas enteras,
+índices usados y particiones leídas de ventas).
+
+Uso:
+    # Todo seguido: medir, aplicar el perfil y las estadísticas, volver a medir
+    python scripts/bench_physical_design.py full --out data/bench
+
+    # O por pasos, p.ej. para medir en otra máquina o con otro volumen
+    python scripts/bench_physical_design.py run antes --out data/bench/antes.json
+    python scripts/create_schema.py --physical && python scripts/create_schema.py --gather-stats
+    python scripts/bench_physical_design.py run despues --out data/bench/despues.json
+    python scripts/bench_physical_design.py compare data/bench/antes.json data/bench/despues.json
+
+Con las 8000 ventas de seed_oracle.py todo cabe en memoria y las diferencias
+son pequeñas; tiene sentido con millones de filas (scripts/bulk_load_ventas.py
+o scripts/synthetic_data.py).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import oracledb
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.physical_design import (
+    PLAN_SQL,
+    apply_physical_design,
+    gather_stats,
+    summarize_plan,
+)
+
+QUERIES = {
+    "ventas_mes": (
+        "SELECT SUM(total) AS total, COUNT(*) AS num_ventas FROM ventas "
+        "WHERE fecha >= DATE '2023-03-01' AND fecha < DATE '2023-04-01'"
+    ),
+    "tienda_trimestre": (
+        "SELECT SUM(total) AS total FROM ventas "
+        "WHERE tienda_id = 3 AND fecha >= DATE '2023-04-01' AND fecha < DATE '2023-07-01'"
+    ),
+    "ventas_por_tienda": (
+        "SELECT t.nombre, SUM(v.total) AS total FROM ventas v JOIN tiendas t ON t.id = v.tienda_id "
+        "WHERE v.fecha >= DATE '2023-07-01' AND v.fecha < DATE '2023-10-01' "
+        "GROUP BY t.nombre ORDER BY total DESC"
+    ),
+    "top_productos_tienda": (
+        "SELECT p.nombre, SUM(v.cantidad) AS unidades FROM ventas v JOIN productos p ON p.id = v.producto_id "
+        "WHERE v.tienda_id = 5 AND v.fecha >= DATE '2023-01-01' AND v.fecha < DATE '2024-01-01' "
+        "GROUP BY p.nombre ORDER BY unidades DESC FETCH FIRST 10 ROWS ONLY"
+    ),
+    "categoria_mes": (
+        "SELECT c.nombre, TRUNC(v.fecha, 'MM') AS mes, SUM(v.total) AS total FROM ventas v "
+        "JOIN productos p ON p.id = v.producto_id JOIN categorias c ON c.id = p.categoria_id "
+        "WHERE v.fecha >= DATE '2023-07-01' AND v.fecha < DATE '2024-01-01' "
+        "GROUP BY c.nombre, TRUNC(v.fecha, 'MM') ORDER BY mes, c.nombre"
+    ),
+    "producto_semana": (
+        "SELECT fecha, SUM(cantidad) AS unidades FROM ventas "
+        "WHERE producto_id = 12 AND fecha BETWEEN DATE '2023-11-20' AND DATE '2023-11-26' "
+        "GROUP BY fecha ORDER BY fecha"
+    ),
+}
+
+load_dotenv()
+
+
+def _connect():
+    return oracledb.connect(
+        user=os.getenv("ORACLE_USER", "retail"),
+        password=os.getenv("ORACLE_PASSWORD", "retail"),
+        dsn=os.getenv("ORACLE_DSN", "localhost:1521/XEPDB1"),
+    )
+
+
+def _plan(cur, sql: str) -> dict:
+    statement_id = f"bp{uuid.uuid4().hex[:24]}"
+    cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+    cur.execute(PLAN_SQL, {"sid": statement_id})
+    return summarize_plan(cur.fetchall()).to_dict()
+
+
+def _median_ms(cur, sql: str, repeat: int) -> float:
+    # Una ejecución de calentamiento: parse y bloques en la caché
+    cur.execute(sql)
+    cur.fetchall()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(sql)
+        cur.fetchall()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def measure(conn, label: str, repeat: int) -> dict:
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM ventas")
+    (ventas,) = cur.fetchone()
+    results = {}
+    for name, sql in QUERIES.items():
+        results[name] = {"median_ms": _median_ms(cur, sql, repeat), **_plan(cur, sql)}
+        print(f"  {name:<22} {results[name]['median_ms']:9.1f} ms")
+    conn.rollback()
+    cur.close()
+    return {"label": label, "ventas": ventas, "repeat": repeat, "queries": results}
+
+
+def _save(result: dict, path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"✅ {path}")
+
+
+def _access(query: dict) -> str:
+    parts = [f"FULL {name}" for name in query["full_scans"]] + query["indexes"]
+    if query["partitions"]:
+        parts.append(f"particiones {query['partitions']}")
+    return ", ".join(parts) or "-"
+
+
+def compare(before: dict, after: dict) -> None:
+    print(f"\n{before['label']} ({before['ventas']:,} ventas) → {after['label']} ({after['ventas']:,} ventas)\n")
+    print(f"{'consulta':<22} {'ms antes':>10} {'ms después':>11} {'x':>6} {'coste':>17}")
+    for name, b in before["queries"].items():
+        a = after["queries"].get(name)
+        if a is None:
+            continue
+        speedup = b["median_ms"] / a["median_ms"] if a["median_ms"] else 0.0
+        cost = f"{b['cost']:,.0f} → {a['cost']:,.0f}"
+        print(f"{name:<22} {b['median_ms']:10.1f} {a['median_ms']:11.1f} {speedup:6.1f} {cost:>17}")
+        print(f"{'':<22} antes:   {_access(b)}")
+        print(f"{'':<22} después: {_access(a)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas antes y después del diseño físico")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="medir el esquema tal como está")
+    run.add_argument("label")
+    run.add_argument("--out", required=True, help="fichero JSON de resultados")
+    run.add_argument("--repeat", type=int, default=5, help="ejecuciones por consulta (5)")
+
+    full = commands.add_parser("full", help="medir, aplicar el perfil y las estadísticas, y volver a medir")
+    full.add_argument("--out", default="data/bench", help="directorio de resultados (data/bench)")
+    full.add_argument("--repeat", type=int, default=5)
+    full.add_argument("--no-partition", action="store_true", help="solo índices, sin particionar ventas")
+
+    comp = commands.add_parser("compare", help="comparar dos ficheros de resultados")
+    comp.add_argument("before")
+    comp.add_argument("after")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.command == "compare":
+        before, after = (json.loads(Path(p).read_text(encoding="utf-8")) for p in (args.before, args.after))
+        compare(before, after)
+        return
+
+    conn = _connect()
+    if args.command == "run":
+        _save(measure(conn, args.label, args.repeat), args.out)
+        conn.close()
+        return
+
+    print("⏱️ Antes")
+    before = measure(conn, "antes", args.repeat)
+    _save(before, f"{args.out}/antes.json")
+
+    cur = conn.cursor()
+    start = time.perf_counter()
+    apply_physical_design(cur, partition=not args.no_partition)
+    gather_stats(cur)
+    cur.close()
+    print(f"✅ Perfil y estadísticas aplicados en {time.perf_counter() - start:.1f} s")
+
+    print("⏱️ Después")
+    after = measure(conn, "después", args.repeat)
+    _save(after, f"{args.out}/despues.json")
+    conn.close()
+    compare(before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# scripts/bench_startup.py
+
+"""
+Mide el tiempo de arranque del master graph en procesos limpios:
+
+- import: solo importar src.graphs.master_graph (los recursos pesados se
+  cargan en el primer uso).
+- import + warmup SQL: lo que paga un proceso que solo responde preguntas
+  SQL (grafos, LLM, engine de BD; sin modelo de embeddings ni FAISS).
+- import + warmup(): precarga completa, equivalente al arranque anterior en
+  el que todo se construía al importar.
+
+Uso:
+    python scripts/bench_startup.py [repeticiones]
+"""
+
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_TIMED = """
+import time
+start = time.perf_counter()
+from src.graphs import master_graph
+{extra}
+print(time.perf_counter() - start)
+"""
+
+SCENARIOS = {
+    "import": "",
+    "import + warmup SQL": "master_graph.warmup(['intent_classifier', 'llm', 'graphs', 'db_engine'])",
+    "import + warmup()": "master_graph.warmup()",
+}
+
+
+def _run(extra: str) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-c", _TIMED.format(extra=extra)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{'escenario':<22} | mediana (s) | min (s)")
+    for name, extra in SCENARIOS.items():
+        try:
+            times = [_run(extra) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"{name:<22} | error: {e}")
+            continue
+        print(f"{name:<22} | {statistics.median(times):>11.2f} | {min(times):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# scripts/bench_table_format.py
+
+"""
+Micro-benchmark de las tablas markdown de resultados: la implementación
+anterior (str() y row.get() por celda, copiada aquí como referencia)
+frente a src/data/table_format.py con filas-dict, filas-tupla desde un
+iterador y ColumnarResult, con el formato por defecto y con locale "es" y
+ancho máximo.
+
+No necesita base de datos.
+
+Uso:
+    python scripts/bench_table_format.py [filas] [repeticiones]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.columnar import ColumnarResult
+from src.data.table_format import TableFormat, iter_markdown, rows_to_markdown
+
+COLUMNS = ["tienda", "ciudad", "fecha", "num_ventas", "cantidad", "total"]
+LOCALE = TableFormat(locale="es", max_width=30)
+
+
+def legacy_rows_to_markdown(rows):
+    if not rows:
+        return "No hay resultados."
+    headers = list(rows[0].keys())
+    header_line = "| " + " | ".join(headers) + " |"
+    separator_line = "| " + " | ".join(["---"] * len(headers)) + " |"
+    row_lines = []
+    for row in rows:
+        values = [str(row.get(h, "")) for h in headers]
+        row_lines.append("| " + " | ".join(values) + " |")
+    return "\n".join([header_line, separator_line] + row_lines)
+
+
+def _tuples(n: int):
+    # Como lo que devuelve Oracle: NUMBER como int/Decimal, DATE como fecha
+    for i in range(n):
+        yield (
+            f"Tienda {i % 12}",
+            f"Ciudad {i % 7}",
+            date(2023, 1, 1) + timedelta(days=i % 450),
+            i % 900,
+            (i * 7) % 1000,
+            Decimal(f"{(i * 7919) % 1_000_000}.{i % 100:02d}"),
+        )
+
+
+def _time(fn, repeat: int) -> float:
+    # El mejor de `repeat`: menos sensible a la carga de la máquina que la media
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def _consume(lines) -> None:
+    # Como escribir a un fichero o a un socket línea a línea
+    for _ in lines:
+        pass
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    tuples = list(_tuples(n))
+    dicts = [dict(zip(COLUMNS, row)) for row in tuples]
+    columnar = ColumnarResult.from_tuples(COLUMNS, tuples)
+
+    cases = {
+        "anterior (dicts)": lambda: legacy_rows_to_markdown(dicts),
+        "rows_to_markdown (dicts)": lambda: rows_to_markdown(dicts),
+        "ColumnarResult": lambda: columnar.to_markdown(),
+        "rows_to_markdown es+ancho": lambda: rows_to_markdown(dicts, LOCALE),
+        "ColumnarResult es+ancho": lambda: columnar.to_markdown(fmt=LOCALE),
+        "iter_markdown (iterador)": lambda: _consume(iter_markdown(COLUMNS, iter(tuples))),
+    }
+    print(f"{n:,} filas x {len(COLUMNS)} columnas, {repeat} repeticiones\n")
+    print(f"{'implementación':<28} {'ms':>9} {'x':>6} {'pico KiB':>10}")
+    base = None
+    for name, fn in cases.items():
+        ms = _time(fn, repeat)
+        base = base or ms
+        print(f"{name:<28} {ms:9.2f} {base / ms:6.2f} {_peak_kib(fn):10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
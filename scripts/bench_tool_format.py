@@ -0,0 +1,71 @@
+# scripts/bench_tool_format.py
+
+"""
+Compara el tamaño y el tiempo de codificación de la respuesta de
+query_retail_database (src/tools/sql_tool.py) en sus formatos: legacy
+(filas como dicts + tabla markdown), compact (columnas una vez, filas como
+arrays, orjson) y compact con la tabla markdown.
+
+No necesita base de datos: codifica un resultado sintético de 50 filas
+(el máximo de la tool) con columnas numéricas, de texto y fechas.
+
+Uso:
+    python scripts/bench_tool_format.py [columnas] [repeticiones]
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.columnar import ColumnarResult
+from src.tools.sql_tool import _response
+
+FORMATS = {
+    "legacy": SimpleNamespace(sql_tool_format="legacy", sql_tool_markdown=True),
+    "compact": SimpleNamespace(sql_tool_format="compact", sql_tool_markdown=False),
+    "compact+md": SimpleNamespace(sql_tool_format="compact", sql_tool_markdown=True),
+}
+
+
+def _result(columns: int, rows: int = 50) -> ColumnarResult:
+    # Como lo que devuelve Oracle: NUMBER como Decimal, DATE como fecha
+    kinds = ("importe", "unidades", "tienda", "fecha")
+    names = [f"{kinds[i % len(kinds)]}_{i}" for i in range(columns)]
+    values = {
+        "importe": lambda r, c: Decimal(f"{(r * 7919 + c * 104729) % 1_000_000}.{r % 100:02d}"),
+        "unidades": lambda r, c: (r * 31 + c) % 500,
+        "tienda": lambda r, c: f"Tienda {(r + c) % 12} - Centro Comercial",
+        "fecha": lambda r, c: date(2023, 1, 1) + timedelta(days=(r * 3 + c) % 450),
+    }
+    tuples = [tuple(values[kinds[c % len(kinds)]](r, c) for c in range(columns)) for r in range(rows)]
+    return ColumnarResult.from_tuples(names, tuples)
+
+
+def _measure(result: ColumnarResult, settings, repeat: int):
+    payload = _response(result, settings)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _response(result, settings)
+    return len(payload.encode("utf-8")), (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    columns = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    result = _result(columns)
+    print(f"50 filas x {columns} columnas, {repeat} repeticiones\n")
+    print(f"{'formato':<12} {'bytes':>9} {'µs':>9} {'bytes %':>8} {'tiempo %':>9}")
+    base = None
+    for name, settings in FORMATS.items():
+        size, micros = _measure(result, settings, repeat)
+        base = base or (size, micros)
+        print(f"{name:<12} {size:9,} {micros:9.0f} {size / base[0]:8.0%} {micros / base[1]:9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# scripts/bulk_load_ventas.py
+
+"""
+Carga masiva de ventas sintéticas para reproducir problemas de escala
+(decenas de millones de filas). Ver src/data/bulk_load.py.
+
+Las ventas usan los productos y tiendas que ya existen: primero
+scripts/create_schema.py y scripts/seed_oracle.py.
+
+Uso:
+    python scripts/bulk_load_ventas.py --rows 50000000 --workers 8 --processes --disable-indexes
+
+Al terminar muestra filas insertadas, filas rechazadas y filas por segundo
+(por worker y en total).
+"""
+
+import argparse
+import functools
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import oracledb
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.bulk_load import (
+    LoadStats,
+    VentasSpec,
+    disable_indexes,
+    parallel_load,
+    plan_tasks,
+    rebuild_indexes,
+)
+
+load_dotenv()
+
+ORACLE_USER = os.getenv("ORACLE_USER", "retail")
+ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD", "retail")
+ORACLE_DSN = os.getenv("ORACLE_DSN", "localhost:1521/XEPDB1")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de ventas sintéticas en Oracle")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="filas a insertar (1.000.000)")
+    parser.add_argument("--workers", type=int, default=4, help="conexiones en paralelo (4)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="filas por executemany y commit (10.000)")
+    parser.add_argument("--processes", action="store_true", help="un proceso por worker en vez de hilos")
+    parser.add_argument(
+        "--disable-indexes", action="store_true", help="índices no únicos UNUSABLE durante la carga y REBUILD al final"
+    )
+    parser.add_argument("--rebuild-parallel", type=int, default=0, help="grado de paralelismo del REBUILD (= workers)")
+    parser.add_argument("--truncate", action="store_true", help="vaciar ventas antes de cargar")
+    parser.add_argument("--seed", type=int, default=None, help="semilla para repetir la misma carga")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2023, 1, 1), help="primera fecha")
+    parser.add_argument("--days", type=int, default=450, help="días de ventas desde --start (450)")
+    return parser.parse_args(argv)
+
+
+def _spec(cur, args) -> VentasSpec:
+    cur.execute("SELECT MIN(id), MAX(id) FROM productos")
+    productos = cur.fetchone()
+    cur.execute("SELECT MIN(id), MAX(id) FROM tiendas")
+    tiendas = cur.fetchone()
+    if None in productos or None in tiendas:
+        sys.exit("❌ No hay productos o tiendas: ejecuta antes scripts/seed_oracle.py")
+    return VentasSpec(productos=tuple(productos), tiendas=tuple(tiendas), start=args.start, days=args.days)
+
+
+def _report(label: str, stats: LoadStats) -> None:
+    print(
+        f"{label:<10} {stats.rows:>12,} filas  {stats.errors:>8,} rechazadas  "
+        f"{stats.seconds:8.1f} s  {stats.rows_per_second:>10,.0f} filas/s"
+    )
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    connect = functools.partial(oracledb.connect, user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
+
+    conn = connect()
+    cur = conn.cursor()
+    spec = _spec(cur, args)
+    if args.truncate:
+        cur.execute("TRUNCATE TABLE ventas")
+        print("🧹 ventas vaciada")
+    disabled = disable_indexes(cur) if args.disable_indexes else []
+    if disabled:
+        print(f"ℹ️ Índices UNUSABLE durante la carga: {', '.join(disabled)}")
+
+    tasks = plan_tasks(
+        args.rows,
+        args.workers,
+        spec,
+        connect,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        skip_unusable_indexes=bool(disabled),
+    )
+    start = time.perf_counter()
+    try:
+        stats = parallel_load(tasks, processes=args.processes)
+        load_seconds = time.perf_counter() - start
+    finally:
+        # También si la carga falla: los índices no se quedan UNUSABLE
+        if disabled:
+            rebuild_start = time.perf_counter()
+            rebuild_indexes(cur, disabled, parallel=args.rebuild_parallel or args.workers)
+            print(f"✅ Índices reconstruidos en {time.perf_counter() - rebuild_start:.1f} s")
+        cur.close()
+        conn.close()
+    total = LoadStats.total(stats, load_seconds)
+
+    for s in stats:
+        _report(f"worker {s.worker}", s)
+    _report("total", total)
+    for sample in total.error_samples:
+        print(f"⚠️ {sample}")
+
+
+if __name__ == "__main__":
+    main()
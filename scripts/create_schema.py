@@ -1,9 +1,30 @@
 # scripts/create_schema.py
 
+"""
+Crea las tablas del esquema retail.
+
+Uso:
+    python scripts/create_schema.py [--physical] [--no-partition]
+    python scripts/create_schema.py --gather-stats      # tras poblar o cargar ventas
+
+Con --physical se aplica además el perfil de diseño físico
+(src/data/physical_design.py): ventas particionada por mes de fecha e
+índices por fecha, tienda, producto y categoría. Se puede aplicar sobre un
+esquema ya poblado.
+"""
+
+import argparse
 import os
+import sys
+from pathlib import Path
+
 import oracledb
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.physical_design import apply_physical_design, gather_stats
+
 load_dotenv()
 
 ORACLE_USER = os.getenv("ORACLE_USER", "retail")
@@ -41,24 +62,29 @@ DDL_STATEMENTS = [
         cantidad NUMBER NOT NULL,
         total NUMBER(10,2) NOT NULL
     )
-    """
+    """,
 ]
 
 
-def main():
-    conn = oracledb.connect(
-        user=ORACLE_USER,
-        password=ORACLE_PASSWORD,
-        dsn=ORACLE_DSN,
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crea el esquema retail")
+    parser.add_argument("--physical", action="store_true", help="aplicar el perfil de diseño físico")
+    parser.add_argument(
+        "--no-partition", action="store_true", help="con --physical: solo los índices, sin particionar ventas"
     )
-    cur = conn.cursor()
+    parser.add_argument(
+        "--gather-stats", action="store_true", help="solo recoger las estadísticas del optimizador (DBMS_STATS)"
+    )
+    return parser.parse_args(argv)
+
 
+def create_tables(cur):
     for ddl in DDL_STATEMENTS:
         try:
             cur.execute(ddl)
             print("✅ Tabla creada")
         except oracledb.DatabaseError as e:
-            error_obj, = e.args
+            (error_obj,) = e.args
             # ORA-00955: name is already used by an existing object
             if error_obj.code == 955:
                 print("ℹ️ Tabla ya existe, se omite")
@@ -66,10 +92,30 @@ def main():
                 print(f"❌ Error creando tabla: {error_obj.message}")
                 raise
 
+
+def main():
+    args = parse_args()
+    conn = oracledb.connect(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        dsn=ORACLE_DSN,
+    )
+    cur = conn.cursor()
+
+    if args.gather_stats:
+        gather_stats(cur)
+        print("✅ Estadísticas recogidas")
+    else:
+        create_tables(cur)
+        if args.physical:
+            for statement in apply_physical_design(cur, partition=not args.no_partition):
+                print(f"✅ {statement.split(' (')[0]}")
+
     conn.commit()
     cur.close()
     conn.close()
     print("✅ Esquema listo")
 
+
 if __name__ == "__main__":
     main()
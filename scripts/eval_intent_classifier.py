@@ -0,0 +1,45 @@
+# scripts/eval_intent_classifier.py
+
+"""
+Evalúa el clasificador local de intención con leave-one-out sobre el fichero
+etiquetado y muestra, para cada umbral, qué porcentaje de preguntas se
+resolvería sin LLM y con qué precisión. Sirve para elegir
+ROUTER_CONFIDENCE_THRESHOLD.
+
+Uso:
+    python scripts/eval_intent_classifier.py [ruta_csv]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config.settings import get_settings
+from src.graphs.intent_classifier import IntentClassifier, load_examples
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99]
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else get_settings().intent_examples_path
+    examples = load_examples(path)
+
+    results = []
+    for i, (question, intent) in enumerate(examples):
+        classifier = IntentClassifier().fit(examples[:i] + examples[i + 1 :])
+        prediction = classifier.predict(question)
+        results.append((prediction.confidence, prediction.intent == intent))
+
+    print(f"Ejemplos: {len(examples)} ({path})")
+    print(f"Precisión global: {sum(ok for _, ok in results) / len(results):.1%}\n")
+    print("umbral | sin LLM | precisión")
+    for threshold in THRESHOLDS:
+        selected = [ok for confidence, ok in results if confidence >= threshold]
+        coverage = len(selected) / len(results)
+        precision = sum(selected) / len(selected) if selected else 0.0
+        print(f"{threshold:6.2f} | {coverage:7.1%} | {precision:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
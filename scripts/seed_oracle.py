@@ -1,11 +1,17 @@
 # scripts/seed_oracle.py
 
 import random
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 
 import oracledb
 from faker import Faker
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.physical_design import gather_stats
+
 fake = Faker("es_ES")
 
 # -----------------------------
@@ -25,21 +31,14 @@ NUM_VENTAS = 8000
 # CONEXIÓN
 # -----------------------------
 def get_conn():
-    return oracledb.connect(
-        user=ORACLE_USER,
-        password=ORACLE_PASSWORD,
-        dsn=ORACLE_DSN
-    )
+    return oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
 
 
 # -----------------------------
 # INSERT CATEGORIAS
 # -----------------------------
 def insert_categorias(cur):
-    categorias = [
-        "Bebidas", "Comida", "Limpieza",
-        "Higiene", "Snacks", "Mascotas"
-    ]
+    categorias = ["Bebidas", "Comida", "Limpieza", "Higiene", "Snacks", "Mascotas"]
 
     for c in categorias:
         cur.execute("INSERT INTO categorias (nombre) VALUES (:1)", [c])
@@ -54,15 +53,9 @@ def insert_tiendas(cur):
     tiendas = []
 
     for _ in range(NUM_TIENDAS):
-        tiendas.append((
-            fake.company(),
-            fake.city()
-        ))
+        tiendas.append((fake.company(), fake.city()))
 
-    cur.executemany(
-        "INSERT INTO tiendas (nombre, ciudad) VALUES (:1, :2)",
-        tiendas
-    )
+    cur.executemany("INSERT INTO tiendas (nombre, ciudad) VALUES (:1, :2)", tiendas)
 
     print(f"✅ {len(tiendas)} tiendas insertadas")
 
@@ -74,16 +67,11 @@ def insert_productos(cur):
     productos = []
 
     for _ in range(NUM_PRODUCTOS):
-        productos.append((
-            fake.word().capitalize(),
-            random.randint(1, 6),  # categorias
-            round(random.uniform(0.5, 25), 2)
-        ))
+        productos.append(
+            (fake.word().capitalize(), random.randint(1, 6), round(random.uniform(0.5, 25), 2))  # categorias
+        )
 
-    cur.executemany(
-        "INSERT INTO productos (nombre, categoria_id, precio) VALUES (:1, :2, :3)",
-        productos
-    )
+    cur.executemany("INSERT INTO productos (nombre, categoria_id, precio) VALUES (:1, :2, :3)", productos)
 
     print(f"✅ {len(productos)} productos insertados")
 
@@ -104,20 +92,14 @@ def insert_ventas(cur):
         precio = round(random.uniform(1, 30), 2)
         total = round(cantidad * precio, 2)
 
-        ventas.append((
-            fecha,
-            producto_id,
-            tienda_id,
-            cantidad,
-            total
-        ))
+        ventas.append((fecha, producto_id, tienda_id, cantidad, total))
 
     cur.executemany(
         """
         INSERT INTO ventas (fecha, producto_id, tienda_id, cantidad, total)
         VALUES (:1, :2, :3, :4, :5)
         """,
-        ventas
+        ventas,
     )
 
     print(f"✅ {len(ventas)} ventas insertadas")
@@ -142,6 +124,11 @@ def main():
     insert_ventas(cur)
 
     conn.commit()
+
+    # Sin estadísticas, el optimizador estima a ciegas (muestreo dinámico)
+    gather_stats(cur)
+    print("✅ Estadísticas del optimizador recogidas")
+
     cur.close()
     conn.close()
 
@@ -0,0 +1,103 @@
+# scripts/summary_tables.py
+
+"""
+Crea y refresca las tablas resumen de ventas (src/data/summary_tables.py).
+
+Cada pasada solo agrega las ventas nuevas (id > marca de agua de la tabla);
+con --full se vacían y se reconstruyen desde cero (tras borrar o modificar
+ventas).
+
+Uso:
+    python scripts/summary_tables.py [--full]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import oracledb
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.summary_tables import (
+    SUMMARY_TABLES,
+    WATERMARK_TABLE,
+    create_index_sql,
+    create_table_sql,
+    create_watermark_sql,
+    merge_sql,
+    watermark_sql,
+)
+
+load_dotenv()
+
+ORACLE_USER = os.getenv("ORACLE_USER", "retail")
+ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD", "retail")
+ORACLE_DSN = os.getenv("ORACLE_DSN", "localhost:1521/XEPDB1")
+
+
+def _create(cur, ddl: str, label: str) -> None:
+    try:
+        cur.execute(ddl)
+        print(f"✅ {label} creado")
+    except oracledb.DatabaseError as e:
+        (error_obj,) = e.args
+        # ORA-00955: name is already used by an existing object
+        if error_obj.code != 955:
+            print(f"❌ Error creando {label}: {error_obj.message}")
+            raise
+
+
+def create_objects(cur) -> None:
+    _create(cur, create_watermark_sql(), WATERMARK_TABLE)
+    for table in SUMMARY_TABLES:
+        _create(cur, create_table_sql(table), table.name)
+        _create(cur, create_index_sql(table), f"índice de {table.name}")
+
+
+def refresh(conn, full: bool = False) -> None:
+    cur = conn.cursor()
+    cur.execute("SELECT NVL(MAX(id), 0) FROM ventas")
+    (hasta,) = cur.fetchone()
+
+    for table in SUMMARY_TABLES:
+        start = time.perf_counter()
+        if full:
+            cur.execute(f"TRUNCATE TABLE {table.name}")
+            desde = 0
+        else:
+            cur.execute(f"SELECT ultimo_id FROM {WATERMARK_TABLE} WHERE tabla = :tabla", {"tabla": table.name})
+            row = cur.fetchone()
+            desde = row[0] if row else 0
+        if hasta <= desde:
+            print(f"ℹ️ {table.name} al día (id {desde})")
+            continue
+        # Delta y marca de agua en la misma transacción
+        cur.execute(merge_sql(table), {"desde": desde, "hasta": hasta})
+        merged = cur.rowcount
+        cur.execute(watermark_sql(), {"tabla": table.name, "hasta": hasta})
+        conn.commit()
+        print(f"✅ {table.name}: ventas ({desde}, {hasta}] -> {merged} filas en {time.perf_counter() - start:.2f} s")
+    cur.close()
+
+
+def main():
+    full = "--full" in sys.argv[1:]
+    conn = oracledb.connect(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        dsn=ORACLE_DSN,
+    )
+    cur = conn.cursor()
+    create_objects(cur)
+    cur.close()
+
+    refresh(conn, full=full)
+    conn.close()
+    print("✅ Tablas resumen listas")
+
+
+if __name__ == "__main__":
+    main()
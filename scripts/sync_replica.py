@@ -0,0 +1,40 @@
+# scripts/sync_replica.py
+
+"""
+Sincroniza la réplica local (SQLite) con Oracle: copia las filas con id
+mayor que la marca de agua de cada tabla. Con --full la vacía y la copia
+entera (tras borrar o modificar filas en Oracle).
+
+Uso:
+    python scripts/sync_replica.py [--full]
+
+Para usarla desde el agente: REPLICA_ENABLED=true (ver README).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config.settings import get_settings
+from src.data.db import get_engine
+from src.data.replica import get_replica
+
+
+def main():
+    full = "--full" in sys.argv[1:]
+    settings = get_settings()
+    replica = get_replica()
+
+    start = time.perf_counter()
+    copied = replica.sync(get_engine(), batch_size=settings.db_fetch_arraysize, full=full)
+    elapsed = time.perf_counter() - start
+
+    for table, rows in copied.items():
+        print(f"✅ {table}: {rows} filas nuevas")
+    print(f"✅ Réplica {settings.replica_path} sincronizada en {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# scripts/synthetic_data.py
+
+"""
+Conjunto retail sintético y reproducible (src/data/synthetic.py): exportarlo
+a ficheros y cargarlo en Oracle o en la réplica local (SQLite).
+
+Uso:
+    # Generar una vez (por trozos) y guardar la definición en dataset.json
+    python scripts/synthetic_data.py export data/synthetic --ventas 50000000 --format parquet
+
+    # Cargar esos ficheros: mismos datos en cualquier máquina
+    python scripts/synthetic_data.py load oracle --from data/synthetic
+    python scripts/synthetic_data.py load replica --from data/synthetic
+
+    # O generar y cargar directamente (misma semilla, mismos datos)
+    python scripts/synthetic_data.py load replica --ventas 1000000 --seed 42
+
+Cargar en la réplica sustituye su contenido y la deja como sincronizada;
+cargar en Oracle vacía las tablas retail.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config.settings import get_settings
+from src.data.replica import Replica
+from src.data.synthetic import (
+    DatasetFiles,
+    DatasetSpec,
+    SyntheticDataset,
+    export_dataset,
+    load_oracle,
+    load_replica,
+)
+
+
+def _add_spec_args(parser) -> None:
+    defaults = DatasetSpec()
+    parser.add_argument("--seed", type=int, default=defaults.seed, help=f"semilla ({defaults.seed})")
+    parser.add_argument("--ventas", type=int, default=defaults.ventas, help=f"filas de ventas ({defaults.ventas})")
+    parser.add_argument("--productos", type=int, default=defaults.productos)
+    parser.add_argument("--tiendas", type=int, default=defaults.tiendas)
+    parser.add_argument("--start", type=date.fromisoformat, default=defaults.start, help="primera fecha")
+    parser.add_argument("--days", type=int, default=defaults.days, help=f"días de ventas ({defaults.days})")
+
+
+def _spec(args) -> DatasetSpec:
+    return DatasetSpec(
+        seed=args.seed,
+        ventas=args.ventas,
+        productos=args.productos,
+        tiendas=args.tiendas,
+        start=args.start,
+        days=args.days,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Conjunto retail sintético reproducible")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="generar y escribir en ficheros")
+    export.add_argument("directory")
+    export.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    export.add_argument("--rows-per-file", type=int, default=1_000_000, help="filas de ventas por fichero")
+    _add_spec_args(export)
+
+    load = commands.add_parser("load", help="cargar en Oracle o en la réplica local")
+    load.add_argument("target", choices=("oracle", "replica"))
+    load.add_argument("--from", dest="source", help="directorio exportado (si no, se genera)")
+    load.add_argument("--replica-path", help="fichero SQLite (por defecto REPLICA_PATH)")
+    load.add_argument("--batch-size", type=int, default=10_000, help="filas por executemany en Oracle")
+    _add_spec_args(load)
+    return parser.parse_args(argv)
+
+
+def _report(rows: dict, elapsed: float) -> None:
+    for table, n in rows.items():
+        print(f"✅ {table}: {n:,} filas")
+    ventas = rows.get("ventas", 0)
+    print(f"✅ {elapsed:.1f} s ({ventas / elapsed if elapsed else 0:,.0f} ventas/s)")
+
+
+def _connect_oracle():
+    import oracledb
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return oracledb.connect(
+        user=os.getenv("ORACLE_USER", "retail"),
+        password=os.getenv("ORACLE_PASSWORD", "retail"),
+        dsn=os.getenv("ORACLE_DSN", "localhost:1521/XEPDB1"),
+    )
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    if args.command == "export":
+        dataset = SyntheticDataset(_spec(args))
+        rows = export_dataset(dataset, args.directory, fmt=args.format, rows_per_file=args.rows_per_file)
+        _report(rows, time.perf_counter() - start)
+        return
+
+    source = DatasetFiles(args.source) if args.source else SyntheticDataset(_spec(args))
+    if args.target == "replica":
+        replica = Replica(args.replica_path or get_settings().replica_path)
+        rows = load_replica(source, replica)
+        replica.close()
+    else:
+        conn = _connect_oracle()
+        rows = load_oracle(source, conn, batch_size=args.batch_size)
+        conn.close()
+    _report(rows, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
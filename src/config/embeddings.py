@@ -0,0 +1,148 @@
+# src/config/embeddings.py
+
+"""
+Modelo de embeddings local compartido (RAG y caché semántica del LLM).
+
+- Backend configurable (EMBEDDINGS_BACKEND): 'torch' (PyTorch fp32, el de
+  siempre), 'onnx' (ONNX Runtime vía sentence-transformers; requiere
+  `optimum[onnxruntime]`) o 'int8' (cuantización dinámica int8 de las capas
+  lineales con PyTorch, sin dependencias extra).
+- Caché LRU de embeddings de preguntas (EMBEDDINGS_QUERY_CACHE_SIZE),
+  con la clave normalizada: la misma pregunta con otras mayúsculas o espacios
+  no vuelve a pasar por el modelo.
+"""
+
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from src.config.lazy import thread_safe_cache
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+EMBEDDINGS_BACKENDS = ("torch", "onnx", "int8")
+
+# Backend con el que cargó de verdad el modelo de get_embeddings(): si ONNX
+# o la cuantización int8 fallan se usa PyTorch fp32, y el id del índice
+# tiene que decirlo.
+_loaded_backend: Optional[str] = None
+
+
+def normalize_query(text: str) -> str:
+    """
+    Clave de la caché: NFC, minúsculas y espacios colapsados. El modelo es
+    uncased, así que el embedding no cambia.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Envuelve un modelo de embeddings con una caché LRU de embed_query.
+    embed_documents (indexado) pasa directo al modelo.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_entries: int = 1024):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(key)
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return list(vector)
+
+    def cache_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._cache),
+        }
+
+
+def _quantize_int8(embeddings) -> None:
+    import torch
+
+    torch.ao.quantization.quantize_dynamic(embeddings.client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _build_embeddings(backend: str = "torch") -> Tuple[Embeddings, str]:
+    """
+    Devuelve el modelo y el backend con el que se cargó finalmente.
+    """
+    # Import diferido: langchain_community + sentence-transformers tardan
+    # varios segundos en importarse y solo hacen falta al usar el modelo.
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if backend == "onnx":
+        try:
+            return HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL, model_kwargs={"backend": "onnx"}), "onnx"
+        except (ImportError, OSError, RuntimeError, ValueError) as e:
+            logger.warning("Backend ONNX no disponible, se usa PyTorch: %s", e)
+            return HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL), "torch"
+
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDINGS_MODEL)
+    if backend == "int8":
+        try:
+            _quantize_int8(embeddings)
+            return embeddings, "int8"
+        except (ImportError, AttributeError, RuntimeError) as e:
+            logger.warning("No se pudo cuantizar a int8, se usa fp32: %s", e)
+    return embeddings, "torch"
+
+
+def get_embeddings_id() -> str:
+    """
+    Identifica modelo + backend para el manifiesto del índice de docs: los
+    vectores de un backend no se mezclan con los de otro. Es el backend que
+    llegó a cargar, no el pedido: carga el modelo si aún no lo está.
+    """
+    get_embeddings()
+    backend = _loaded_backend
+    return EMBEDDINGS_MODEL if backend == "torch" else f"{EMBEDDINGS_MODEL}:{backend}"
+
+
+@thread_safe_cache
+def get_embeddings() -> Embeddings:
+    """
+    Devuelve el modelo de embeddings local compartido (RAG y caché semántica).
+    Se carga en la primera llamada.
+    """
+    settings = get_settings()
+    if settings.embeddings_backend not in EMBEDDINGS_BACKENDS:
+        raise ValueError(
+            f"EMBEDDINGS_BACKEND desconocido: {settings.embeddings_backend!r}. " f"Válidos: {EMBEDDINGS_BACKENDS}"
+        )
+    global _loaded_backend
+    embeddings, _loaded_backend = _build_embeddings(settings.embeddings_backend)
+    if settings.embeddings_query_cache_size > 0:
+        embeddings = CachedQueryEmbeddings(embeddings, settings.embeddings_query_cache_size)
+    return embeddings
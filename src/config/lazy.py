@@ -0,0 +1,86 @@
+# src/config/lazy.py
+
+"""
+Utilidades para inicializar recursos pesados bajo demanda (modelo de
+embeddings, índice FAISS, grafos compilados, engine de BD...), una sola vez
+aunque varios hilos lo pidan a la vez.
+"""
+
+import threading
+from functools import wraps
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+_KWARGS_MARK = object()
+
+
+def thread_safe_cache(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Como functools.lru_cache (con cache_clear), pero serializa la primera
+    construcción: si dos hilos llegan a la vez, el segundo espera y reutiliza
+    el resultado en vez de cargar el recurso otra vez.
+
+    Doble comprobación con un lock por función: una vez construido, leer el
+    valor no toma ningún lock, y construir un recurso no bloquea a los demás.
+    """
+    cache: dict = {}
+    lock = threading.RLock()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with lock:
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = cache[key] = func(*args, **kwargs)
+            return value
+
+    def cache_clear() -> None:
+        with lock:
+            cache.clear()
+
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+class LazyResource(Generic[T]):
+    """
+    Proxy que construye el objeto real la primera vez que se usa.
+
+    `recurso.invoke(...)` funciona igual que con el objeto real, así que los
+    globals de módulo (p.ej. `_sql_app`) pueden pasar a ser perezosos sin
+    cambiar el código que los usa.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str = ""):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "resource")
+        self._value: T | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = "inicializado" if self.initialized else "pendiente"
+        return f"<LazyResource {self._name} ({state})>"
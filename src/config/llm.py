@@ -1,17 +1,57 @@
 # src/config/llm.py
 
-from functools import lru_cache
 from langchain_ollama import ChatOllama
 
+from src.config.embeddings import get_embeddings
+from src.config.lazy import thread_safe_cache
+from src.config.llm_cache import LLMResponseCache, CachedChatModel
+from src.config.settings import get_settings
 
-@lru_cache
-def get_llm():
+
+@thread_safe_cache
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Caché de respuestas compartida por todos los nodos.
+    """
+    settings = get_settings()
+    return LLMResponseCache(
+        path=settings.llm_cache_path,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+    )
+
+
+def get_llm_cache_stats() -> dict:
+    """
+    Aciertos/fallos de la caché y segundos de LLM ahorrados en este proceso.
+    """
+    return get_llm_cache().stats.as_dict()
+
+
+@thread_safe_cache
+def get_llm(node: str | None = None):
     """
     Devuelve un LLM local usando Ollama.
+
+    Si la caché está activa, el modelo va envuelto en un CachedChatModel.
+    `node` identifica al nodo que llama (para las métricas y para poder
+    desactivar la caché por nodo con LLM_CACHE_DISABLED_NODES).
     """
     llm = ChatOllama(
-        model="mistral",              # o el modelo que tengas realmente en ollama list
+        model="mistral",  # o el modelo que tengas realmente en ollama list
         base_url="http://localhost:11434",
         temperature=0,
     )
-    return llm
+
+    settings = get_settings()
+    if not settings.llm_cache_enabled or node in settings.llm_cache_disabled_nodes:
+        return llm
+
+    return CachedChatModel(
+        llm,
+        cache=get_llm_cache(),
+        node=node or "default",
+        semantic=node in settings.llm_cache_semantic_nodes,
+        similarity_threshold=settings.llm_cache_similarity_threshold,
+        embeddings=get_embeddings,
+    )
@@ -0,0 +1,364 @@
+# src/config/llm_cache.py
+
+"""
+Caché de respuestas del LLM.
+
+Se coloca delante del ChatOllama que devuelve get_llm():
+- Aciertos exactos: mismo modelo + mismos mensajes (hash del prompt).
+- Aciertos semánticos: mismo nodo y mismo contexto (mensajes de sistema),
+  con la última pregunta del usuario parecida por embeddings. Solo en los
+  nodos de LLM_CACHE_SEMANTIC_NODES (por defecto el router): dos preguntas
+  que solo cambian en una fecha, una tienda o un importe son casi iguales
+  por embeddings y no tienen la misma respuesta.
+
+invoke/ainvoke y stream/astream pasan por la caché; el resto de métodos del
+modelo (batch, bind_tools...) se delegan tal cual, sin caché.
+
+Las respuestas se guardan en un SQLite en disco, con expiración por TTL y
+un número máximo de entradas (se expulsan las menos usadas recientemente).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+import numpy as np
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    BaseMessageChunk,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    # Latencia original (segundos) de las respuestas servidas desde caché
+    saved_seconds: float = 0.0
+    by_node: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def record(self, node: str, outcome: str, saved: float = 0.0) -> None:
+        if outcome == "exact":
+            self.exact_hits += 1
+        elif outcome == "semantic":
+            self.semantic_hits += 1
+        else:
+            self.misses += 1
+        self.saved_seconds += saved
+        per_node = self.by_node.setdefault(node, {"exact": 0, "semantic": 0, "miss": 0})
+        per_node[outcome] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "by_node": {k: dict(v) for k, v in self.by_node.items()},
+        }
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    response: str
+    latency: float
+
+
+def _message_payload(messages: Sequence[BaseMessage]) -> List[List[str]]:
+    return [[m.type, str(m.content)] for m in messages]
+
+
+def prompt_key(model: str, messages: Sequence[BaseMessage]) -> str:
+    raw = json.dumps([model, _message_payload(messages)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def context_key(model: str, messages: Sequence[BaseMessage]) -> str:
+    """
+    Hash de todo menos el último mensaje: dos prompts solo son candidatos a
+    acierto semántico si comparten instrucciones de sistema.
+    """
+    return prompt_key(model, messages[:-1])
+
+
+class LLMResponseCache:
+    """
+    Almacén persistente (SQLite) de respuestas del LLM.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Índice semántico en memoria: context_key -> (keys, matriz normalizada)
+        self._vectors: Dict[str, tuple] = {}
+
+    # ---- conexión ----
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    node TEXT NOT NULL,
+                    context TEXT NOT NULL,
+                    embedding BLOB,
+                    response TEXT NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_context ON llm_cache(context)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._vectors.clear()
+
+    # ---- lectura ----
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get_exact(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, latency, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, latency, created_at = row
+            if self._is_expired(created_at, now):
+                self._delete(conn, [key])
+                return None
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return CacheEntry(key=key, response=response, latency=latency)
+
+    def get_similar(self, context: str, vector: np.ndarray, threshold: float) -> Optional[CacheEntry]:
+        with self._lock:
+            keys, matrix = self._load_vectors(context)
+        if not keys:
+            return None
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return self.get_exact(keys[best])
+
+    def _load_vectors(self, context: str) -> tuple:
+        if context not in self._vectors:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT key, embedding FROM llm_cache WHERE context = ? AND embedding IS NOT NULL",
+                    (context,),
+                )
+                .fetchall()
+            )
+            keys = [r[0] for r in rows]
+            vectors = [np.frombuffer(r[1], dtype=np.float32) for r in rows]
+            matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+            self._vectors[context] = (keys, matrix)
+        return self._vectors[context]
+
+    # ---- escritura ----
+
+    def put(
+        self,
+        key: str,
+        node: str,
+        context: str,
+        response: str,
+        latency: float,
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        now = time.time()
+        blob = vector.astype(np.float32).tobytes() if vector is not None else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, node, context, blob, response, latency, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+            self._vectors.pop(context, None)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = 0
+        if self.ttl_seconds > 0:
+            cur = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            removed += cur.rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cur = conn.execute(
+                "DELETE FROM llm_cache WHERE key IN " "(SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+            removed += cur.rowcount
+        if removed:
+            self._vectors.clear()
+
+    def _delete(self, conn: sqlite3.Connection, keys: List[str]) -> None:
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in keys])
+        conn.commit()
+        # El índice semántico se reconstruye en la próxima consulta
+        self._vectors.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return count
+
+
+class CachedChatModel:
+    """
+    Envoltorio de un chat model (ChatOllama) que consulta la caché antes de
+    llamar al modelo. El resto de atributos se delegan al modelo original.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache: LLMResponseCache,
+        node: str = "default",
+        semantic: bool = False,
+        similarity_threshold: float = 0.95,
+        embeddings: Optional[Callable[[], Any]] = None,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.node = node
+        self.semantic = semantic and embeddings is not None
+        self.similarity_threshold = similarity_threshold
+        self._get_embeddings = embeddings
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    @property
+    def _model_name(self) -> str:
+        return str(getattr(self.llm, "model", "llm"))
+
+    def _embed(self, messages: Sequence[BaseMessage]) -> Optional[np.ndarray]:
+        if not self.semantic or not messages:
+            return None
+        try:
+            vector = np.asarray(self._get_embeddings().embed_query(str(messages[-1].content)), dtype=np.float32)
+        except Exception as e:  # noqa: BLE001
+            # Sin modelo de embeddings (falle como falle) seguimos con aciertos exactos
+            logger.warning("Caché semántica desactivada: %s", e)
+            self.semantic = False
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup(self, messages: Sequence[BaseMessage]):
+        key = prompt_key(self._model_name, messages)
+        context = context_key(self._model_name, messages)
+        entry = self.cache.get_exact(key)
+        if entry is not None:
+            self.cache.stats.record(self.node, "exact", entry.latency)
+            return key, context, None, entry, "exact"
+        vector = self._embed(messages)
+        if vector is not None:
+            entry = self.cache.get_similar(context, vector, self.similarity_threshold)
+            if entry is not None:
+                self.cache.stats.record(self.node, "semantic", entry.latency)
+                return key, context, vector, entry, "semantic"
+        self.cache.stats.record(self.node, "miss")
+        return key, context, vector, None, "miss"
+
+    def invoke(self, messages: Sequence[BaseMessage], config: Any = None, **kwargs: Any) -> BaseMessage:
+        key, context, vector, entry, outcome = self._lookup(messages)
+        if entry is not None:
+            return AIMessage(content=entry.response, response_metadata={"cache": outcome})
+
+        start = time.perf_counter()
+        resp = self.llm.invoke(messages, config=config, **kwargs)
+        latency = time.perf_counter() - start
+        self.cache.put(key, self.node, context, str(resp.content), latency, vector)
+        return resp
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], config: Any = None, **kwargs: Any) -> BaseMessage:
+        # Embedding + SQLite fuera del event loop
+        key, context, vector, entry, outcome = await asyncio.to_thread(self._lookup, messages)
+        if entry is not None:
+            return AIMessage(content=entry.response, response_metadata={"cache": outcome})
+
+        start = time.perf_counter()
+        resp = await self.llm.ainvoke(messages, config=config, **kwargs)
+        latency = time.perf_counter() - start
+        await asyncio.to_thread(self.cache.put, key, self.node, context, str(resp.content), latency, vector)
+        return resp
+
+    def stream(self, messages: Sequence[BaseMessage], config: Any = None, **kwargs: Any) -> Iterator[BaseMessageChunk]:
+        """
+        Un acierto sale en un solo trozo; un fallo se emite tal como llega
+        del modelo y se guarda al terminar (si se corta antes, no se guarda).
+        """
+        key, context, vector, entry, outcome = self._lookup(messages)
+        if entry is not None:
+            yield AIMessageChunk(content=entry.response, response_metadata={"cache": outcome})
+            return
+
+        start = time.perf_counter()
+        parts: List[str] = []
+        for chunk in self.llm.stream(messages, config=config, **kwargs):
+            parts.append(str(chunk.content))
+            yield chunk
+        self.cache.put(key, self.node, context, "".join(parts), time.perf_counter() - start, vector)
+
+    async def astream(
+        self, messages: Sequence[BaseMessage], config: Any = None, **kwargs: Any
+    ) -> AsyncIterator[BaseMessageChunk]:
+        key, context, vector, entry, outcome = await asyncio.to_thread(self._lookup, messages)
+        if entry is not None:
+            yield AIMessageChunk(content=entry.response, response_metadata={"cache": outcome})
+            return
+
+        start = time.perf_counter()
+        parts: List[str] = []
+        async for chunk in self.llm.astream(messages, config=config, **kwargs):
+            parts.append(str(chunk.content))
+            yield chunk
+        latency = time.perf_counter() - start
+        await asyncio.to_thread(self.cache.put, key, self.node, context, "".join(parts), latency, vector)
@@ -1,4 +1,5 @@
 # src/config/settings.py
+from typing import Any, Dict, List
 from pydantic import BaseModel
 from functools import lru_cache
 from dotenv import load_dotenv
@@ -12,6 +13,116 @@ class Settings(BaseModel):
     oracle_password: str
     oracle_dsn: str  # del estilo "localhost:1521/XEPDB1"
 
+    # Pool de conexiones a Oracle. Con db_native_pool se usa el pool de
+    # sesiones de python-oracledb (SQLAlchemy con NullPool por encima).
+    db_pool_size: int = 5
+    db_pool_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Conexiones que se abren al arrancar (warmup) para no pagarlas en la
+    # primera pregunta; en el pool nativo es su tamaño mínimo.
+    db_pool_warm: int = 2
+    db_native_pool: bool = False
+    # Filas que el driver trae por viaje de red (cursor.arraysize)
+    db_fetch_arraysize: int = 500
+
+    # Límites de las consultas del agente SQL: se deja de leer al superar
+    # estas filas o bytes (aprox.) y el resultado se marca como truncado.
+    sql_max_rows: int = 1000
+    sql_max_bytes: int = 2_000_000
+    # Consultas desbocadas: timeout por llamada (0 = sin límite) y guarda de
+    # coste con EXPLAIN PLAN antes de ejecutar (0 = desactivada). Las
+    # consultas por encima se rechazan con un "demasiado costosa".
+    sql_timeout_seconds: float = 30.0
+    sql_max_cost: float = 1_000_000
+    sql_max_cardinality: int = 1_000_000
+    # SQL que falla (error de Oracle o de validación): reparaciones con el
+    # LLM a partir del error (0 = ninguna) y reparaciones buenas recordadas
+    # por firma del error para no volver a llamar al LLM
+    sql_repair_attempts: int = 2
+    sql_repair_cache_entries: int = 256
+    # Valores de los predicados (WHERE, HAVING, ON) como variables de enlace
+    # para que Oracle comparta el cursor entre preguntas que solo cambian en
+    # los valores (src/data/sql_binds.py)
+    sql_bind_literals: bool = True
+    # Respuesta de la tool query_retail_database: "legacy" (filas como dicts
+    # + tabla markdown) o "compact" (columnas una vez, filas como arrays,
+    # números tipados); en compact la tabla markdown solo si se pide
+    sql_tool_format: str = "legacy"
+    sql_tool_markdown: bool = False
+    # Tablas markdown de resultados (src/data/table_format.py): locale de
+    # los números ("es": 1.234,56 €; vacío = str() sin más) y caracteres
+    # por celda (0 = sin límite)
+    table_locale: str = ""
+    table_max_width: int = 0
+
+    # Caché de resultados de run_query: memoria (LRU) + disco (SQLite, vacío
+    # = solo memoria). Solo consultas sobre query_cache_tables, invalidadas
+    # por la versión de datos (MAX(id)) de cada tabla; la sonda se
+    # reutiliza durante query_cache_probe_ttl segundos.
+    query_cache_enabled: bool = True
+    query_cache_memory_entries: int = 256
+    query_cache_disk_path: str = ".cache/query_cache.sqlite"
+    query_cache_disk_entries: int = 5000
+    query_cache_ttl_seconds: int = 24 * 3600
+    query_cache_probe_ttl: float = 2.0
+    query_cache_tables: List[str] = ["ventas", "productos", "categorias", "tiendas"]
+
+    # Reescritura de consultas agregadas a las tablas resumen (agregados
+    # diarios de ventas, scripts/summary_tables.py) si están al día
+    summary_rewrite_enabled: bool = True
+
+    # Réplica local (SQLite) de las tablas retail, sincronizada por marca de
+    # agua de id (scripts/sync_replica.py). run_query le manda las consultas
+    # analíticas si la última sincronización tiene menos de
+    # replica_max_staleness_seconds (0 = sin límite: tests, benchmarks).
+    replica_enabled: bool = False
+    replica_path: str = ".cache/replica.sqlite"
+    replica_max_staleness_seconds: float = 300.0
+
+    # Caché de respuestas del LLM (exacta + semántica)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = ".cache/llm_cache.sqlite"
+    llm_cache_ttl_seconds: int = 24 * 3600
+    llm_cache_max_entries: int = 5000
+    llm_cache_similarity_threshold: float = 0.95
+    # Nodos que nunca usan la caché (p.ej. "explain_sql")
+    llm_cache_disabled_nodes: List[str] = []
+    # Nodos en los que se permiten aciertos por similitud semántica. Solo el
+    # router por defecto: "ventas de la tienda 3 en marzo" y "...tienda 5"
+    # superan 0.95 de similitud, y en generate_sql o en los nodos de texto
+    # libre (answer_from_docs...) la segunda recibiría la respuesta de la
+    # primera. Añadir otros nodos es opcional y bajo esa condición.
+    llm_cache_semantic_nodes: List[str] = ["router"]
+
+    # Clasificador local de intención por delante del router LLM
+    router_classifier_enabled: bool = True
+    router_confidence_threshold: float = 0.95
+    intent_examples_path: str = "data/intent_examples.csv"
+
+    # Índice FAISS de docs/ persistido (con manifiesto de hashes por fichero)
+    docs_index_dir: str = ".cache/docs_index"
+
+    # Modelo de embeddings: backend 'torch', 'onnx' o 'int8' y tamaño de la
+    # caché LRU de embeddings de preguntas (0 = sin caché)
+    embeddings_backend: str = "torch"
+    embeddings_query_cache_size: int = 1024
+
+    # Troceado de docs/ por encabezados markdown y luego por tamaño
+    # (caracteres). Con docs_chunk_size=0 solo se parte por secciones.
+    docs_chunk_size: int = 1000
+    docs_chunk_overlap: int = 150
+
+    # Recuperación de docs: 'lexical' (BM25), 'dense' (FAISS) o 'hybrid'
+    # (ambos fusionados con RRF). Se devuelven docs_retrieval_k fragmentos.
+    docs_retrieval_mode: str = "hybrid"
+    docs_retrieval_k: int = 4
+    docs_retrieval_candidates: int = 20
+
+    # Hilos para la recuperación de documentos (CPU) en la ruta async
+    retrieval_executor_workers: int = 4
+
     @property
     def oracle_sqlalchemy_url(self) -> str:
         # Formato para Oracle + oracledb con service_name
@@ -24,6 +135,81 @@ class Settings(BaseModel):
             f"@{host}:{port}/?service_name={service_name}"
         )
 
+    @property
+    def oracle_async_sqlalchemy_url(self) -> str:
+        # Mismo DSN con el driver asíncrono de python-oracledb
+        return self.oracle_sqlalchemy_url.replace("oracle+oracledb://", "oracle+oracledb_async://", 1)
+
+
+# Campos opcionales que se pueden sobreescribir desde el entorno.
+# Pydantic se encarga de convertir "true"/"10"/"0.9" al tipo del campo;
+# las listas se pasan separadas por comas.
+_ENV_OVERRIDES = {
+    "db_pool_size": "DB_POOL_SIZE",
+    "db_pool_max_overflow": "DB_POOL_MAX_OVERFLOW",
+    "db_pool_timeout": "DB_POOL_TIMEOUT",
+    "db_pool_recycle": "DB_POOL_RECYCLE",
+    "db_pool_pre_ping": "DB_POOL_PRE_PING",
+    "db_pool_warm": "DB_POOL_WARM",
+    "db_native_pool": "DB_NATIVE_POOL",
+    "db_fetch_arraysize": "DB_FETCH_ARRAYSIZE",
+    "sql_max_rows": "SQL_MAX_ROWS",
+    "sql_max_bytes": "SQL_MAX_BYTES",
+    "sql_timeout_seconds": "SQL_TIMEOUT_SECONDS",
+    "sql_max_cost": "SQL_MAX_COST",
+    "sql_max_cardinality": "SQL_MAX_CARDINALITY",
+    "sql_repair_attempts": "SQL_REPAIR_ATTEMPTS",
+    "sql_repair_cache_entries": "SQL_REPAIR_CACHE_ENTRIES",
+    "sql_bind_literals": "SQL_BIND_LITERALS",
+    "sql_tool_format": "SQL_TOOL_FORMAT",
+    "sql_tool_markdown": "SQL_TOOL_MARKDOWN",
+    "table_locale": "TABLE_LOCALE",
+    "table_max_width": "TABLE_MAX_WIDTH",
+    "query_cache_enabled": "QUERY_CACHE_ENABLED",
+    "query_cache_memory_entries": "QUERY_CACHE_MEMORY_ENTRIES",
+    "query_cache_disk_path": "QUERY_CACHE_DISK_PATH",
+    "query_cache_disk_entries": "QUERY_CACHE_DISK_ENTRIES",
+    "query_cache_ttl_seconds": "QUERY_CACHE_TTL_SECONDS",
+    "query_cache_probe_ttl": "QUERY_CACHE_PROBE_TTL",
+    "query_cache_tables": "QUERY_CACHE_TABLES",
+    "summary_rewrite_enabled": "SUMMARY_REWRITE_ENABLED",
+    "replica_enabled": "REPLICA_ENABLED",
+    "replica_path": "REPLICA_PATH",
+    "replica_max_staleness_seconds": "REPLICA_MAX_STALENESS_SECONDS",
+    "llm_cache_enabled": "LLM_CACHE_ENABLED",
+    "llm_cache_path": "LLM_CACHE_PATH",
+    "llm_cache_ttl_seconds": "LLM_CACHE_TTL_SECONDS",
+    "llm_cache_max_entries": "LLM_CACHE_MAX_ENTRIES",
+    "llm_cache_similarity_threshold": "LLM_CACHE_SIMILARITY_THRESHOLD",
+    "llm_cache_disabled_nodes": "LLM_CACHE_DISABLED_NODES",
+    "llm_cache_semantic_nodes": "LLM_CACHE_SEMANTIC_NODES",
+    "retrieval_executor_workers": "RETRIEVAL_EXECUTOR_WORKERS",
+    "docs_index_dir": "DOCS_INDEX_DIR",
+    "embeddings_backend": "EMBEDDINGS_BACKEND",
+    "embeddings_query_cache_size": "EMBEDDINGS_QUERY_CACHE_SIZE",
+    "docs_chunk_size": "DOCS_CHUNK_SIZE",
+    "docs_chunk_overlap": "DOCS_CHUNK_OVERLAP",
+    "docs_retrieval_mode": "DOCS_RETRIEVAL_MODE",
+    "docs_retrieval_k": "DOCS_RETRIEVAL_K",
+    "docs_retrieval_candidates": "DOCS_RETRIEVAL_CANDIDATES",
+    "router_classifier_enabled": "ROUTER_CLASSIFIER_ENABLED",
+    "router_confidence_threshold": "ROUTER_CONFIDENCE_THRESHOLD",
+    "intent_examples_path": "INTENT_EXAMPLES_PATH",
+}
+
+
+def _env_overrides() -> Dict[str, Any]:
+    overrides: Dict[str, Any] = {}
+    for field, env_var in _ENV_OVERRIDES.items():
+        value = os.getenv(env_var)
+        if value is None:
+            continue
+        if Settings.model_fields[field].annotation == List[str]:
+            overrides[field] = [item.strip() for item in value.split(",") if item.strip()]
+        else:
+            overrides[field] = value
+    return overrides
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -31,4 +217,5 @@ def get_settings() -> Settings:
         oracle_user=os.getenv("ORACLE_USER", "retail"),
         oracle_password=os.getenv("ORACLE_PASSWORD", "retail"),
         oracle_dsn=os.getenv("ORACLE_DSN", "localhost:1521/XEPDB1"),
+        **_env_overrides(),
     )
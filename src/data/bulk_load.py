@@ -0,0 +1,247 @@
+# src/data/bulk_load.py
+
+"""
+Carga masiva de ventas sintéticas en Oracle (scripts/bulk_load_ventas.py).
+
+Las filas se generan e insertan por lotes de tamaño acotado, así que la
+memoria no crece con el número de filas. Cada worker (hilo o proceso) usa
+su propia conexión e inserta sus lotes con array DML (executemany con
+batcherrors=True): una fila que falla (p.ej. una clave ajena que no existe)
+se cuenta y se descarta sin perder el resto del lote. Cada lote se confirma
+al insertarlo, así que el undo tampoco crece con la carga.
+
+Con disable_indexes() / rebuild_indexes() los índices no únicos de la tabla
+se marcan UNUSABLE antes de la carga y se reconstruyen al final: mantenerlos
+fila a fila es lo más caro de una carga grande. Los únicos (la clave
+primaria) se mantienen: con un índice único UNUSABLE los INSERT fallan.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INSERT_VENTAS_SQL = "INSERT INTO ventas (fecha, producto_id, tienda_id, cantidad, total) VALUES (:1, :2, :3, :4, :5)"
+
+NONUNIQUE_INDEXES_SQL = (
+    "SELECT index_name FROM user_indexes " "WHERE table_name = :tabla AND uniqueness = 'NONUNIQUE' ORDER BY index_name"
+)
+INDEX_PARTITIONS_SQL = (
+    "SELECT partition_name FROM user_ind_partitions WHERE index_name = :indice ORDER BY partition_position"
+)
+
+# Muestras de errores de fila que se guardan por worker
+_ERROR_SAMPLES = 5
+
+
+@dataclass(frozen=True)
+class VentasSpec:
+    """
+    Rango de valores de las ventas generadas: ids de productos y tiendas
+    existentes (mín, máx) y fechas desde `start` durante `days` días.
+    """
+
+    productos: Tuple[int, int]
+    tiendas: Tuple[int, int]
+    start: datetime = datetime(2023, 1, 1)
+    days: int = 450
+
+
+def generate_ventas(rows: int, spec: VentasSpec, seed: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Filas (fecha, producto_id, tienda_id, cantidad, total) como las de
+    scripts/seed_oracle.py; reproducibles con `seed`.
+    """
+    rng = random.Random(seed)
+    for _ in range(rows):
+        cantidad = rng.randint(1, 12)
+        precio = round(rng.uniform(1, 30), 2)
+        yield (
+            spec.start + timedelta(days=rng.randint(0, spec.days)),
+            rng.randint(*spec.productos),
+            rng.randint(*spec.tiendas),
+            cantidad,
+            round(cantidad * precio, 2),
+        )
+
+
+def batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def split_rows(total: int, parts: int) -> List[int]:
+    """
+    Reparto de `total` filas entre `parts` workers (los primeros, una más).
+    """
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+@dataclass
+class LoadStats:
+    worker: int
+    rows: int = 0
+    errors: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    error_samples: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @classmethod
+    def total(cls, stats: Sequence["LoadStats"], seconds: float) -> "LoadStats":
+        """
+        Suma de los workers; `seconds` es el tiempo de pared de toda la carga.
+        """
+        result = cls(worker=-1, seconds=seconds)
+        for s in stats:
+            result.rows += s.rows
+            result.errors += s.errors
+            result.batches += s.batches
+            result.error_samples.extend(s.error_samples[: _ERROR_SAMPLES - len(result.error_samples)])
+        return result
+
+
+@dataclass(frozen=True)
+class LoadTask:
+    """
+    Trabajo de un worker. `connect` abre una conexión de python-oracledb;
+    para workers en procesos tiene que poder serializarse (pickle), p.ej.
+    functools.partial(oracledb.connect, user=..., password=..., dsn=...).
+    """
+
+    worker: int
+    rows: int
+    spec: VentasSpec
+    connect: Callable[[], Any]
+    batch_size: int = 10_000
+    seed: Optional[int] = None
+    # Con índices UNUSABLE: que los INSERT no fallen por ellos
+    skip_unusable_indexes: bool = False
+    progress_every: int = 100
+
+
+def plan_tasks(
+    rows: int,
+    workers: int,
+    spec: VentasSpec,
+    connect: Callable[[], Any],
+    batch_size: int = 10_000,
+    seed: Optional[int] = None,
+    skip_unusable_indexes: bool = False,
+) -> List[LoadTask]:
+    return [
+        LoadTask(
+            worker=i,
+            rows=n,
+            spec=spec,
+            connect=connect,
+            batch_size=batch_size,
+            # Semilla distinta por worker: si no, todos insertarían las mismas filas
+            seed=None if seed is None else seed + i,
+            skip_unusable_indexes=skip_unusable_indexes,
+        )
+        for i, n in enumerate(split_rows(rows, workers))
+        if n
+    ]
+
+
+def load_worker(task: LoadTask) -> LoadStats:
+    """
+    Genera e inserta las filas de un worker, lote a lote, con su conexión.
+    """
+    stats = LoadStats(worker=task.worker)
+    start = time.perf_counter()
+    conn = task.connect()
+    try:
+        cur = conn.cursor()
+        if task.skip_unusable_indexes:
+            cur.execute("ALTER SESSION SET skip_unusable_indexes = TRUE")
+        for batch in batches(generate_ventas(task.rows, task.spec, task.seed), task.batch_size):
+            cur.executemany(INSERT_VENTAS_SQL, batch, batcherrors=True)
+            errors = cur.getbatcherrors()
+            conn.commit()
+            stats.batches += 1
+            stats.errors += len(errors)
+            stats.rows += len(batch) - len(errors)
+            for error in errors[: _ERROR_SAMPLES - len(stats.error_samples)]:
+                stats.error_samples.append(f"fila {error.offset} del lote {stats.batches}: {error.message}")
+            if task.progress_every and stats.batches % task.progress_every == 0:
+                elapsed = time.perf_counter() - start
+                logger.info("worker %d: %d filas (%.0f filas/s)", task.worker, stats.rows, stats.rows / elapsed)
+        cur.close()
+    finally:
+        conn.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def parallel_load(tasks: Sequence[LoadTask], processes: bool = False) -> List[LoadStats]:
+    """
+    Ejecuta los workers a la vez (hilos o procesos) y devuelve sus
+    estadísticas. Con hilos, la generación de filas (Python) compite por el
+    GIL; con procesos cada worker usa su propia CPU.
+    """
+    if not tasks:
+        return []
+    executor_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_cls(max_workers=len(tasks)) as executor:
+        return list(executor.map(load_worker, tasks))
+
+
+# ---- índices ----
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def disable_indexes(cur, table: str = "ventas") -> List[str]:
+    """
+    Marca UNUSABLE los índices no únicos de `table` y devuelve sus nombres.
+    """
+    cur.execute(NONUNIQUE_INDEXES_SQL, {"tabla": table.upper()})
+    names = [row[0] for row in cur.fetchall()]
+    for name in names:
+        cur.execute(f"ALTER INDEX {_quote(name)} UNUSABLE")
+    return names
+
+
+def rebuild_statements(cur, name: str, parallel: int = 1) -> List[str]:
+    """
+    Sentencias para reconstruir un índice: los particionados (índices
+    locales), partición a partición.
+    """
+    degree = f" PARALLEL {parallel}" if parallel > 1 else ""
+    cur.execute(INDEX_PARTITIONS_SQL, {"indice": name})
+    partitions = [row[0] for row in cur.fetchall()]
+    if partitions:
+        statements = [f"ALTER INDEX {_quote(name)} REBUILD PARTITION {_quote(p)}{degree}" for p in partitions]
+    else:
+        statements = [f"ALTER INDEX {_quote(name)} REBUILD{degree}"]
+    if degree:
+        # El grado de paralelismo se queda en el índice: las consultas no
+        # deberían heredarlo
+        statements.append(f"ALTER INDEX {_quote(name)} NOPARALLEL")
+    return statements
+
+
+def rebuild_indexes(cur, names: Iterable[str], parallel: int = 1) -> None:
+    for name in names:
+        start = time.perf_counter()
+        for statement in rebuild_statements(cur, name, parallel):
+            cur.execute(statement)
+        logger.info("índice %s reconstruido en %.1fs", name, time.perf_counter() - start)
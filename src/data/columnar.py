@@ -0,0 +1,249 @@
+# src/data/columnar.py
+
+"""
+Resultado de consulta en formato columnar: nombres de columna + un array de
+NumPy tipado por columna.
+
+Frente a List[Dict] no repite los nombres de columna en cada fila ni crea un
+objeto Python por celda numérica, y las conversiones (markdown, JSON,
+DataFrame) trabajan columna a columna. to_compact_json() mantiene esa forma
+en la salida: nombres de columna una vez y filas como arrays.
+
+Tipos: enteros -> int64, floats -> float64 (NULL = NaN), fechas ->
+datetime64 (NULL = NaT), booleanos -> bool; el resto se queda en arrays de
+objetos: texto, columnas con tipos mezclados, enteros con NULL (int64 no
+tiene NULL y en float64 se verían como 3.0) y Decimal (los NUMBER con
+decimales de Oracle), que se mantienen exactos en vez de pasar por float.
+"""
+
+import datetime as dt
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+from src.data.table_format import (
+    BLOCK_ROWS,
+    TableFormat,
+    block_lines,
+    format_cells,
+    format_column,
+    header_lines,
+    interleave,
+    marker_line,
+)
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _to_array(values: Sequence[Any]) -> np.ndarray:
+    non_null = [v for v in values if v is not None]
+    has_null = len(non_null) != len(values)
+    if not non_null:
+        return _object_array(values)
+
+    if all(isinstance(v, bool) for v in non_null):
+        return np.array(values, dtype=object if has_null else bool)
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in non_null):
+        if has_null:
+            return _object_array(values)
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return _object_array(values)
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in non_null):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if all(isinstance(v, dt.datetime) for v in non_null):
+        return np.array(
+            [np.datetime64("NaT") if v is None else np.datetime64(v.replace(tzinfo=None), "us") for v in values],
+            dtype="datetime64[us]",
+        )
+    if all(isinstance(v, dt.date) and not isinstance(v, dt.datetime) for v in non_null):
+        return np.array(
+            [np.datetime64("NaT") if v is None else np.datetime64(v, "D") for v in values],
+            dtype="datetime64[D]",
+        )
+
+    return _object_array(values)
+
+
+def _to_list(array: np.ndarray) -> List[Any]:
+    # tolist() convierte a tipos Python (int, float, datetime) de una vez
+    values = array.tolist()
+    if array.dtype.kind == "f":
+        nulls = np.isnan(array)
+        if nulls.any():
+            for i in np.flatnonzero(nulls):
+                values[i] = None
+    return values
+
+
+def _json_default(value: Any) -> Any:
+    # Lo que orjson no sabe serializar: Decimal como número JSON con todas
+    # sus cifras (sin pasar por float) y el resto como texto
+    if isinstance(value, Decimal):
+        return orjson.Fragment(str(value)) if value.is_finite() else None
+    return str(value)
+
+
+def _format_column(array: np.ndarray, name: str, fmt: TableFormat) -> List[str]:
+    kind = array.dtype.kind
+    if fmt.locale and kind in "iufO":
+        # Separadores del locale y € en importes (src/data/table_format.py);
+        # en arrays de objetos, Decimal y enteros con NULL
+        return format_column(_to_list(array), name, fmt)
+    if kind in "iub":
+        # str() de Python sobre tolist() es más rápido que astype(str)
+        return list(map(str, array.tolist()))
+    if kind == "f":
+        text = list(map(str, array.tolist()))
+        nulls = np.isnan(array)
+        if nulls.any():
+            for i in np.flatnonzero(nulls):
+                text[i] = ""
+        return text
+    if kind == "M":
+        if array.dtype == "datetime64[D]":
+            text = np.datetime_as_string(array, unit="D")
+        else:
+            text = np.char.replace(np.datetime_as_string(array, unit="s"), "T", " ")
+        text[np.isnat(array)] = ""
+        return text.tolist()
+    return format_cells(array.tolist())
+
+
+@dataclass
+class ColumnarResult:
+    columns: List[str]
+    arrays: List[np.ndarray]
+    truncated: bool = False
+
+    @classmethod
+    def from_tuples(
+        cls, columns: Sequence[str], rows: Sequence[Sequence[Any]], truncated: bool = False
+    ) -> "ColumnarResult":
+        """
+        Construye el resultado a partir de filas-tupla (lo que da el cursor).
+        """
+        columns = list(columns)
+        if rows:
+            by_column = list(zip(*rows))
+        else:
+            by_column = [()] * len(columns)
+        return cls(columns, [_to_array(list(values)) for values in by_column], truncated)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]], truncated: bool = False) -> "ColumnarResult":
+        """
+        Construye el resultado a partir de la forma antigua (lista de dicts).
+        Las claves que falten en alguna fila quedan como NULL.
+        """
+        columns: Dict[str, None] = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        names = list(columns)
+        tuples = [tuple(row.get(name) for name in names) for row in rows]
+        return cls.from_tuples(names, tuples, truncated)
+
+    def __len__(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[self.columns.index(name)]
+
+    def head(self, n: int) -> "ColumnarResult":
+        """
+        Primeras n filas (vistas sobre los mismos arrays, sin copiar).
+        """
+        if n >= len(self):
+            return self
+        return ColumnarResult(self.columns, [array[:n] for array in self.arrays], self.truncated)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        Lista de dicts con tipos Python (para compatibilidad con run_query).
+        """
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in zip(*(_to_list(a) for a in self.arrays))]
+
+    def to_tuples(self) -> List[tuple]:
+        """
+        Filas-tupla con tipos Python, en el orden de `columns` (executemany).
+        """
+        return list(zip(*(_to_list(a) for a in self.arrays)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Forma columnar serializable: {"columns": [...], "data": {col: [...]}}.
+        """
+        return {
+            "columns": list(self.columns),
+            "data": {name: _to_list(array) for name, array in zip(self.columns, self.arrays)},
+            "truncated": self.truncated,
+        }
+
+    def to_json(self) -> str:
+        # Decimal como número exacto y el resto de objetos como texto
+        return orjson.dumps(self.to_dict(), default=_json_default).decode()
+
+    def to_compact_json(self, **extra: Any) -> str:
+        """
+        Forma compacta: {"columns": [...], "rows": [[...], ...], "truncated":
+        ...}, con los números como números JSON y las fechas en ISO 8601.
+        `extra` añade claves al objeto (p.ej. la tabla markdown).
+        """
+        payload = {"columns": list(self.columns), "rows": self.to_tuples(), "truncated": self.truncated, **extra}
+        return orjson.dumps(payload, default=_json_default).decode()
+
+    def iter_markdown(self, fmt: Optional[TableFormat] = None) -> Iterator[str]:
+        """
+        Tabla markdown por trozos de líneas, como table_format.iter_markdown,
+        formateando cada columna con NumPy por bloques de filas.
+        """
+        fmt = fmt or TableFormat()
+        if not self.columns or not len(self):
+            yield fmt.empty
+            return
+        shown = len(self) if fmt.max_rows is None else min(len(self), fmt.max_rows)
+        yield header_lines(self.columns, fmt)
+        for start in range(0, shown, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, shown)
+            texts = [_format_column(array[start:stop], name, fmt) for name, array in zip(self.columns, self.arrays)]
+            yield block_lines(interleave(texts), len(self.columns), fmt)
+        if shown < len(self):
+            yield marker_line(len(self.columns))
+
+    def to_markdown(
+        self, max_rows: int | None = None, empty: Optional[str] = None, fmt: Optional[TableFormat] = None
+    ) -> str:
+        fmt = fmt or TableFormat()
+        if max_rows is not None:
+            fmt = replace(fmt, max_rows=max_rows)
+        if empty is not None:
+            fmt = replace(fmt, empty=empty)
+        return "\n".join(self.iter_markdown(fmt))
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame({name: array for name, array in zip(self.columns, self.arrays)}, columns=self.columns)
+
+
+def as_columnar(result: "ColumnarResult | Iterable[Dict[str, Any]]") -> ColumnarResult:
+    """
+    Acepta un ColumnarResult o una lista de dicts (p.ej. de código antiguo).
+    """
+    if isinstance(result, ColumnarResult):
+        return result
+    rows = list(result)
+    return ColumnarResult.from_rows(rows, truncated=getattr(result, "truncated", False))
@@ -1,33 +1,577 @@
 # src/data/db.py
-from typing import Any, Dict, List
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
 
-from src.config.settings import get_settings
+from src.config.settings import Settings, get_settings
+from src.data.columnar import ColumnarResult
+from src.data.query_cache import (
+    QueryResultCache,
+    cache_key,
+    cacheable_tables,
+    canonicalize_sql,
+    get_query_cache,
+    parse_versions,
+    version_probe_sql,
+)
+from src.data.query_guard import (
+    QueryTimeoutError,
+    acall_timeout,
+    aguard_cost,
+    call_timeout,
+    cost_guard_enabled,
+    guard_cost,
+)
+from src.data.replica import get_replica, replica_params, replica_route
 
-_settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Los engines se crean en el primer uso (no al importar el módulo), una sola
+# vez aunque varios hilos lleguen a la vez.
 _engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+# Pools nativos de python-oracledb (solo con DB_NATIVE_POOL)
+_native_pool = None
+_native_async_pool = None
+
+
+@dataclass
+class PoolStats:
+    """
+    Esperas al pedir una conexión al pool (checkout) y timeouts.
+    """
+
+    checkouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, elapsed: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "avg_wait_ms": 1000 * self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+            "max_wait_ms": 1000 * self.max_wait_seconds,
+            "timeouts": self.timeouts,
+        }
+
+
+_pool_stats = PoolStats()
+
+
+def _pool_kwargs(settings: Settings, url: str) -> Dict[str, Any]:
+    # SQLite (tests) usa sus propios pools, que no admiten estos parámetros
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "arraysize": settings.db_fetch_arraysize,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_pool_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _native_pool_kwargs(settings: Settings) -> Dict[str, Any]:
+    import oracledb
+
+    return {
+        "user": settings.oracle_user,
+        "password": settings.oracle_password,
+        "dsn": settings.oracle_dsn,
+        "min": settings.db_pool_warm,
+        "max": settings.db_pool_size + settings.db_pool_max_overflow,
+        "increment": 1,
+        "getmode": oracledb.POOL_GETMODE_TIMEDWAIT,
+        "wait_timeout": int(settings.db_pool_timeout * 1000),
+        "max_lifetime_session": settings.db_pool_recycle,
+        # El pool comprueba las sesiones ociosas antes de entregarlas
+        "ping_interval": 60 if settings.db_pool_pre_ping else -1,
+    }
+
+
+def _use_native_pool(settings: Settings, url: str) -> bool:
+    return url.startswith("oracle") and settings.db_native_pool
 
 
 def get_engine() -> Engine:
-    global _engine
+    global _engine, _native_pool
     if _engine is None:
-        db_url = _settings.oracle_sqlalchemy_url
-        _engine = create_engine(db_url, echo=False, future=True)
+        with _engine_lock:
+            if _engine is None:
+                settings = get_settings()
+                db_url = settings.oracle_sqlalchemy_url
+                if _use_native_pool(settings, db_url):
+                    import oracledb
+
+                    # El pool de oracledb gestiona las sesiones; SQLAlchemy
+                    # solo pide y devuelve conexiones (NullPool).
+                    _native_pool = oracledb.create_pool(**_native_pool_kwargs(settings))
+                    _engine = create_engine(
+                        "oracle+oracledb://",
+                        creator=_native_pool.acquire,
+                        poolclass=NullPool,
+                        arraysize=settings.db_fetch_arraysize,
+                        echo=False,
+                        future=True,
+                    )
+                else:
+                    _engine = create_engine(db_url, echo=False, future=True, **_pool_kwargs(settings, db_url))
     return _engine
 
 
-def run_query(sql: str, params: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+def get_async_engine() -> AsyncEngine:
     """
-    Ejecuta una query SQL (SELECT) contra Oracle y devuelve lista de dicts.
+    Engine asíncrono (python-oracledb en modo async) para los nodos async.
+    """
+    global _async_engine, _native_async_pool
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                settings = get_settings()
+                db_url = settings.oracle_async_sqlalchemy_url
+                if _use_native_pool(settings, db_url):
+                    import oracledb
+
+                    _native_async_pool = oracledb.create_pool_async(**_native_pool_kwargs(settings))
+                    _async_engine = create_async_engine(
+                        "oracle+oracledb_async://",
+                        async_creator=_native_async_pool.acquire,
+                        poolclass=NullPool,
+                        arraysize=settings.db_fetch_arraysize,
+                        echo=False,
+                    )
+                else:
+                    _async_engine = create_async_engine(db_url, echo=False, **_pool_kwargs(settings, db_url))
+    return _async_engine
+
+
+def warm_pool(connections: int | None = None) -> int:
+    """
+    Abre conexiones por adelantado para que las primeras consultas no paguen
+    el coste de conectar. Devuelve cuántas conexiones quedan abiertas.
     """
     engine = get_engine()
-    params = params or {}
+    if _native_pool is not None:
+        # El pool nativo ya abre `min` sesiones al crearse
+        return _native_pool.opened
+
+    settings = get_settings()
+    n = settings.db_pool_warm if connections is None else connections
+    n = min(n, settings.db_pool_size)
+    # Se piden todas a la vez (si no, el pool reutilizaría la misma)
+    conns = []
+    try:
+        for _ in range(n):
+            conns.append(engine.connect())
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def _pool_occupancy() -> Dict[str, Any]:
+    if _native_pool is not None:
+        return {
+            "mode": "native",
+            "in_use": _native_pool.busy,
+            "open": _native_pool.opened,
+            "max": _native_pool.max,
+        }
+    pool = _engine.pool if _engine is not None else None
+    if pool is None or not hasattr(pool, "checkedout"):
+        return {"mode": "none"}
+    return {
+        "mode": "sqlalchemy",
+        "in_use": pool.checkedout(),
+        "open": pool.checkedout() + pool.checkedin(),
+        "max": pool.size() + max(getattr(pool, "_max_overflow", 0), 0),
+    }
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Métricas del pool: esperas de checkout, timeouts y ocupación actual.
+    """
+    stats = _pool_stats.as_dict()
+    stats.update(_pool_occupancy())
+    return stats
+
+
+# Contadores de la instancia desde su arranque. Leer v$sysstat requiere
+# permiso sobre las vistas v$ (p.ej. SELECT_CATALOG_ROLE).
+PARSE_STATS_SQL = (
+    "SELECT name, value FROM v$sysstat WHERE name IN "
+    "('parse count (total)', 'parse count (hard)', 'execute count', 'session cursor cache hits')"
+)
+_PARSE_STAT_NAMES = {
+    "parse count (total)": "parse_total",
+    "parse count (hard)": "parse_hard",
+    "execute count": "executions",
+    "session cursor cache hits": "session_cursor_cache_hits",
+}
+
+
+def get_parse_stats() -> Dict[str, int] | None:
+    """
+    Parses totales, hard y soft (total - hard), ejecuciones y aciertos de
+    la caché de cursores de la sesión, según v$sysstat. None si la base de
+    datos no es Oracle o el usuario no puede leer las vistas v$.
+
+    Para ver si los binds mejoran el uso compartido de cursores, comparar
+    dos lecturas con parse_stats_delta: con binds, parse_hard crece mucho
+    menos que parse_total.
+    """
+    engine = get_engine()
+    if engine.dialect.name != "oracle":
+        return None
     try:
         with engine.connect() as conn:
-            result = conn.execute(text(sql), params)
-            rows = result.mappings().all()
-            return [dict(r) for r in rows]
+            rows = conn.execute(text(PARSE_STATS_SQL)).fetchall()
+    except SQLAlchemyError as e:
+        logger.debug("parse stats no disponibles: %s", e)
+        return None
+    stats = {_PARSE_STAT_NAMES[name]: int(value) for name, value in rows if name in _PARSE_STAT_NAMES}
+    if "parse_total" in stats and "parse_hard" in stats:
+        stats["parse_soft"] = stats["parse_total"] - stats["parse_hard"]
+    return stats
+
+
+def parse_stats_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """
+    Diferencia entre dos lecturas de get_parse_stats.
+    """
+    return {name: after[name] - before[name] for name in after if name in before}
+
+
+class QueryRows(list):
+    """
+    Filas (dicts) de una consulta. `truncated` indica que se dejó de leer al
+    llegar al límite de filas o bytes; `approx_bytes` es el tamaño aproximado
+    (texto de los valores) de lo leído, solo si hay límite de bytes.
+    """
+
+    truncated: bool = False
+    approx_bytes: int = 0
+
+
+class _RowCollector:
+    """
+    Acumula lotes de filas (Row de SQLAlchemy) hasta el límite; compartido
+    por la versión sync y la async. En modo columnar guarda tuplas en vez de
+    dicts.
+    """
+
+    def __init__(self, max_rows: int | None, max_bytes: int | None, arraysize: int, columnar: bool = False):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.arraysize = arraysize
+        self.columnar = columnar
+        self.rows = QueryRows()
+
+    def batch_size(self) -> int:
+        # Con límite de filas basta con leer una de más para saber si se corta
+        if self.max_rows is None:
+            return self.arraysize
+        return max(1, min(self.arraysize, self.max_rows + 1 - len(self.rows)))
+
+    def add(self, batch) -> bool:
+        """
+        Añade un lote; devuelve False cuando hay que dejar de leer.
+        """
+        rows = self.rows
+        for row in batch:
+            if self.max_rows is not None and len(rows) >= self.max_rows:
+                rows.truncated = True
+                return False
+            if self.max_bytes is not None:
+                size = sum(len(str(v)) for v in row)
+                if rows.approx_bytes + size > self.max_bytes:
+                    rows.truncated = True
+                    return False
+                rows.approx_bytes += size
+            rows.append(tuple(row) if self.columnar else dict(row._mapping))
+        return bool(batch)
+
+    def result(self, columns: List[str]) -> QueryRows | ColumnarResult:
+        if self.columnar:
+            return ColumnarResult.from_tuples(columns, self.rows, truncated=self.rows.truncated)
+        return self.rows
+
+
+def _default_arraysize() -> int:
+    return get_settings().db_fetch_arraysize
+
+
+def _cache_plan(
+    sql: str, params: Dict[str, Any], options: Dict[str, Any]
+) -> Tuple[QueryResultCache, str, List[str]] | None:
+    """
+    (caché, clave, tablas a sondear) si el resultado de la consulta se puede
+    cachear; None si la caché está desactivada o la consulta no es cacheable.
+    """
+    settings = get_settings()
+    if not settings.query_cache_enabled:
+        return None
+    canonical = canonicalize_sql(sql)
+    tables = cacheable_tables(canonical, settings.query_cache_tables)
+    if tables is None:
+        return None
+    return get_query_cache(), cache_key(canonical, params, options), tables
+
+
+def _probe_failed(tables: List[str], e: SQLAlchemyError) -> None:
+    # Sin versión no se puede cachear, pero la consulta se ejecuta igual
+    logger.warning("No se pudo sondear la versión de %s, se ejecuta sin caché: %s", tables, e)
+
+
+def _replica_failed(replica, e: Exception) -> None:
+    # SQL que SQLite no entiende aunque la traducción pareciera válida
+    replica.stats.count("fallbacks")
+    logger.warning("La réplica no pudo ejecutar la consulta, se repite en Oracle: %s", e)
+
+
+def iter_query(
+    sql: str, params: Dict[str, Any] | None = None, arraysize: int | None = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Ejecuta la query con cursor de servidor y va devolviendo lotes de filas
+    (fetchmany) sin cargar el resultado entero en memoria. Si se deja de
+    iterar, la consulta se cierra sin leer el resto.
+    """
+    engine = get_engine()
+    arraysize = arraysize or _default_arraysize()
+    try:
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            _pool_stats.record(time.perf_counter() - start)
+            result = conn.execution_options(stream_results=True).execute(text(sql), params or {})
+            mappings = result.mappings()
+            while batch := mappings.fetchmany(arraysize):
+                yield [dict(r) for r in batch]
+    except SQLAlchemyError as e:
+        if isinstance(e, PoolTimeoutError):
+            _pool_stats.record_timeout()
+        raise RuntimeError(f"Database error: {e}") from e
+
+
+def run_query(
+    sql: str,
+    params: Dict[str, Any] | None = None,
+    max_rows: int | None = None,
+    max_bytes: int | None = None,
+    arraysize: int | None = None,
+    columnar: bool = False,
+    timeout: float | None = None,
+    max_cost: float | None = None,
+    max_cardinality: int | None = None,
+) -> QueryRows | ColumnarResult:
+    """
+    Ejecuta una query SQL (SELECT) contra Oracle y devuelve lista de dicts
+    (o un ColumnarResult con `columnar=True`).
+
+    Las filas se leen por lotes de `arraysize` (fetchmany); con `max_rows` o
+    `max_bytes` se deja de leer al superar el límite y el resultado queda
+    marcado con `truncated=True`.
+
+    Si la consulta es cacheable (ver src/data/query_cache.py) se sondea la
+    versión de datos de sus tablas y, si coincide con la de un resultado
+    guardado, se devuelve ese resultado sin ejecutarla.
+
+    Con `timeout` (segundos) la llamada se cancela al vencer
+    (QueryTimeoutError); con `max_cost` / `max_cardinality` se estima el
+    plan antes de ejecutar y se rechazan las consultas que los superan
+    (QueryTooExpensiveError). Ver src/data/query_guard.py.
+
+    Con REPLICA_ENABLED, las consultas de solo lectura sobre las tablas
+    retail se ejecutan en la réplica local (src/data/replica.py) si está al
+    día; si la réplica falla, se repite en Oracle. Ojo con los tipos: desde
+    la réplica los importes llegan como float y las fechas como texto
+    'YYYY-MM-DD HH:MM:SS' (en Oracle, Decimal y datetime). Por eso sus
+    resultados no pasan por la caché de consultas, que solo guarda los de
+    Oracle.
+    """
+    params = params or {}
+    options = (params, max_rows, max_bytes, arraysize, columnar, timeout, max_cost, max_cardinality)
+    routed = replica_route(sql)
+    if routed is not None:
+        replica = get_replica()
+        try:
+            rows = _execute(
+                replica.engine, routed, replica_params(params), *options[1:], pool_stats=None, cacheable=False
+            )
+        except QueryTimeoutError:
+            raise
+        except RuntimeError as e:
+            _replica_failed(replica, e)
+        else:
+            replica.stats.count("routed")
+            return rows
+    return _execute(get_engine(), sql, *options, pool_stats=_pool_stats)
+
+
+def _execute(
+    engine: Engine,
+    sql: str,
+    params: Dict[str, Any],
+    max_rows: int | None,
+    max_bytes: int | None,
+    arraysize: int | None,
+    columnar: bool,
+    timeout: float | None,
+    max_cost: float | None,
+    max_cardinality: int | None,
+    pool_stats: PoolStats | None,
+    cacheable: bool = True,
+) -> QueryRows | ColumnarResult:
+    # Los resultados de la réplica (float, fechas en texto) no se mezclan en
+    # la caché con los de Oracle (Decimal, datetime)
+    options = {"max_rows": max_rows, "max_bytes": max_bytes, "columnar": columnar}
+    plan = _cache_plan(sql, params, options) if cacheable else None
+    collector = _RowCollector(max_rows, max_bytes, arraysize or _default_arraysize(), columnar)
+    try:
+        start = time.perf_counter()
+        with engine.connect() as conn, call_timeout(conn, timeout):
+            if pool_stats is not None:
+                pool_stats.record(time.perf_counter() - start)
+            if plan is not None:
+                cache, key, tables = plan
+                versions = cache.known_versions(tables)
+                try:
+                    if versions is None:
+                        versions = parse_versions(conn.execute(text(version_probe_sql(tables))).fetchall())
+                        cache.remember_versions(versions)
+                except SQLAlchemyError as e:
+                    _probe_failed(tables, e)
+                    plan = None
+                else:
+                    cached = cache.get(key, versions)
+                    if cached is not None:
+                        return cached
+            start = time.perf_counter()
+            if cost_guard_enabled(conn, max_cost, max_cardinality):
+                sql = guard_cost(conn, sql, max_cost, max_cardinality, max_rows and max_rows + 1)
+            result = conn.execution_options(stream_results=True).execute(text(sql), params)
+            while collector.add(result.fetchmany(collector.batch_size())):
+                pass
+            rows = collector.result(list(result.keys()))
+            if plan is not None:
+                cache.put(key, versions, rows, time.perf_counter() - start)
+            return rows
+    except SQLAlchemyError as e:
+        if isinstance(e, PoolTimeoutError) and pool_stats is not None:
+            pool_stats.record_timeout()
+        raise RuntimeError(f"Database error: {e}") from e
+
+
+async def arun_query(
+    sql: str,
+    params: Dict[str, Any] | None = None,
+    max_rows: int | None = None,
+    max_bytes: int | None = None,
+    arraysize: int | None = None,
+    columnar: bool = False,
+    timeout: float | None = None,
+    max_cost: float | None = None,
+    max_cardinality: int | None = None,
+) -> QueryRows | ColumnarResult:
+    """
+    Versión asíncrona de run_query: no bloquea el event loop mientras Oracle
+    ejecuta la consulta. La réplica (SQLite) se consulta en un hilo aparte.
+    """
+    params = params or {}
+    options = (params, max_rows, max_bytes, arraysize, columnar, timeout, max_cost, max_cardinality)
+    routed = replica_route(sql)
+    if routed is not None:
+        replica = get_replica()
+        try:
+            rows = await asyncio.to_thread(
+                _execute,
+                replica.engine,
+                routed,
+                replica_params(params),
+                *options[1:],
+                pool_stats=None,
+                cacheable=False,
+            )
+        except QueryTimeoutError:
+            raise
+        except RuntimeError as e:
+            _replica_failed(replica, e)
+        else:
+            replica.stats.count("routed")
+            return rows
+    return await _aexecute(get_async_engine(), sql, *options)
+
+
+async def _aexecute(
+    engine: AsyncEngine,
+    sql: str,
+    params: Dict[str, Any],
+    max_rows: int | None,
+    max_bytes: int | None,
+    arraysize: int | None,
+    columnar: bool,
+    timeout: float | None,
+    max_cost: float | None,
+    max_cardinality: int | None,
+) -> QueryRows | ColumnarResult:
+    plan = _cache_plan(sql, params, {"max_rows": max_rows, "max_bytes": max_bytes, "columnar": columnar})
+    collector = _RowCollector(max_rows, max_bytes, arraysize or _default_arraysize(), columnar)
+    try:
+        start = time.perf_counter()
+        async with engine.connect() as conn, acall_timeout(conn, timeout):
+            _pool_stats.record(time.perf_counter() - start)
+            if plan is not None:
+                cache, key, tables = plan
+                versions = cache.known_versions(tables)
+                try:
+                    if versions is None:
+                        probe = await conn.execute(text(version_probe_sql(tables)))
+                        versions = parse_versions(probe.fetchall())
+                        cache.remember_versions(versions)
+                except SQLAlchemyError as e:
+                    _probe_failed(tables, e)
+                    plan = None
+                else:
+                    # El nivel de disco es SQLite: fuera del event loop
+                    cached = await asyncio.to_thread(cache.get, key, versions)
+                    if cached is not None:
+                        return cached
+            start = time.perf_counter()
+            if cost_guard_enabled(conn, max_cost, max_cardinality):
+                sql = await aguard_cost(conn, sql, max_cost, max_cardinality, max_rows and max_rows + 1)
+            result = await conn.stream(text(sql), params)
+            while collector.add(await result.fetchmany(collector.batch_size())):
+                pass
+            columns = list(result.keys())
+            await result.close()
+            rows = collector.result(columns)
+            if plan is not None:
+                await asyncio.to_thread(cache.put, key, versions, rows, time.perf_counter() - start)
+            return rows
     except SQLAlchemyError as e:
+        if isinstance(e, PoolTimeoutError):
+            _pool_stats.record_timeout()
         raise RuntimeError(f"Database error: {e}") from e
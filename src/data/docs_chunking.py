@@ -0,0 +1,102 @@
+# src/data/docs_chunking.py
+
+"""
+Troceado de la documentación markdown para el RAG.
+
+Primero se parte cada fichero por sus encabezados (#, ##, ###), de modo que
+un fragmento nunca mezcla dos secciones; después, las secciones largas se
+dividen por tamaño con solape. Cada fragmento lleva en sus metadatos el
+fichero de origen y la ruta de encabezados de su sección.
+"""
+
+import re
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCES = ("```", "~~~")
+
+SECTION_SEPARATOR = " > "
+
+
+def split_markdown_sections(text: str, max_level: int = 3) -> List[Tuple[str, str]]:
+    """
+    Divide un markdown en (sección, texto) por sus encabezados de nivel
+    <= max_level. La sección es la ruta de títulos, p.ej. "Spec > 3. Alcance".
+    El texto se conserva tal cual, encabezado incluido. Un encabezado sin
+    contenido propio (seguido directamente de un subapartado) se une al
+    subapartado en vez de quedarse como fragmento suelto.
+    """
+    sections: List[Tuple[str, str]] = []
+    headings: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    has_body = False
+    in_fence = False
+
+    def flush():
+        content = "".join(lines).strip()
+        if content:
+            sections.append((SECTION_SEPARATOR.join(title for _, title in headings), content))
+
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith(_FENCES):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match and len(match.group(1)) <= max_level:
+            if has_body:
+                flush()
+                lines, has_body = [], False
+            level = len(match.group(1))
+            headings = [h for h in headings if h[0] < level] + [(level, match.group(2))]
+        elif line.strip():
+            has_body = True
+        lines.append(line)
+    flush()
+    return sections
+
+
+def _split_section(content: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    if chunk_size <= 0 or len(content) <= chunk_size:
+        return [content]
+
+    # Los encabezados se repiten al principio de cada trozo de la sección,
+    # así ningún fragmento pierde su contexto ni queda un título suelto.
+    lines = content.splitlines(keepends=True)
+    n_heading = 0
+    while n_heading < len(lines) and (_HEADING_RE.match(lines[n_heading]) or not lines[n_heading].strip()):
+        n_heading += 1
+    header = "".join(lines[:n_heading])
+    body = "".join(lines[n_heading:])
+
+    body_size = max(chunk_size - len(header), chunk_size // 2)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=body_size,
+        chunk_overlap=min(chunk_overlap, body_size // 2),
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+    return [header + piece for piece in splitter.split_text(body)]
+
+
+def chunk_markdown(
+    text: str,
+    source: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+) -> List[Document]:
+    """
+    Fragmentos de un markdown con metadatos source/section/chunk.
+    `chunk_size` y `chunk_overlap` van en caracteres; con chunk_size <= 0
+    solo se parte por secciones.
+    """
+    docs: List[Document] = []
+    for section, content in split_markdown_sections(text):
+        for piece in _split_section(content, chunk_size, chunk_overlap):
+            docs.append(
+                Document(
+                    page_content=piece,
+                    metadata={"source": source, "section": section, "chunk": len(docs)},
+                )
+            )
+    return docs
@@ -0,0 +1,166 @@
+# src/data/docs_index.py
+
+"""
+Índice FAISS de la documentación, persistido en disco.
+
+Junto al índice se guarda un manifiesto con el hash (sha256) de cada fichero
+y los ids de sus fragmentos en el vectorstore. Al arrancar se carga el índice
+guardado y solo se re-embeben los ficheros añadidos o modificados; los
+eliminados (o la versión anterior de los modificados) se borran por id.
+Cambiar el modelo de embeddings o los parámetros de troceado reconstruye todo.
+
+El manifiesto es lo que da por bueno el índice: se borra antes de tocar los
+ficheros de FAISS y se escribe el último. Si el proceso muere a medias, el
+siguiente arranque reconstruye en vez de cargar vectores que no cuadran.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.data.docs_chunking import chunk_markdown
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+@dataclass
+class IndexUpdate:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    rebuilt: bool = False
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed or self.rebuilt)
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def load_file(path: Path, chunk_size: int = 1000, chunk_overlap: int = 150) -> List[Document]:
+    """
+    Fragmentos de un fichero markdown (ver src/data/docs_chunking.py).
+    """
+    text = path.read_text(encoding="utf-8")
+    return chunk_markdown(text, source=path.as_posix(), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _read_manifest(index_dir: Path) -> Dict:
+    try:
+        return json.loads((index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(index_dir: Path, manifest: Dict) -> None:
+    # Escritura atómica: si el proceso muere a medias no queda un JSON roto
+    tmp_path = index_dir / f"{MANIFEST_FILE}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, index_dir / MANIFEST_FILE)
+
+
+def _save_index(vectorstore: "FAISS", index_dir: Path, manifest: Dict) -> None:
+    index_dir.mkdir(parents=True, exist_ok=True)
+    (index_dir / MANIFEST_FILE).unlink(missing_ok=True)
+    # save_local escribe index.faiss e index.pkl por separado: se guardan en
+    # un directorio temporal y se mueven ya completos
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".faiss-", dir=index_dir))
+    try:
+        vectorstore.save_local(str(tmp_dir))
+        for name in ("index.faiss", "index.pkl"):
+            os.replace(tmp_dir / name, index_dir / name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _write_manifest(index_dir, manifest)
+
+
+def load_or_update_index(
+    docs_dir: Path,
+    index_dir: Path,
+    embeddings: Embeddings,
+    embeddings_id: str,
+    pattern: str = "*.md",
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+) -> tuple["FAISS", IndexUpdate]:
+    """
+    Carga el índice de `index_dir` y lo sincroniza con los ficheros de
+    `docs_dir`. `embeddings_id` identifica el modelo: si cambia, los vectores
+    guardados no sirven y se reconstruye todo (igual si cambia el troceado).
+    """
+    # Import diferido: langchain_community.vectorstores es lento de importar
+    from langchain_community.vectorstores import FAISS
+
+    current = {path.as_posix(): file_sha256(path) for path in sorted(docs_dir.glob(pattern))}
+    manifest = _read_manifest(index_dir)
+    chunking = {"size": chunk_size, "overlap": chunk_overlap}
+    update = IndexUpdate()
+
+    vectorstore = None
+    known: Dict[str, Dict] = {}
+    if (
+        manifest.get("embeddings") == embeddings_id
+        and manifest.get("chunking") == chunking
+        and (index_dir / "index.faiss").exists()
+    ):
+        try:
+            vectorstore = FAISS.load_local(str(index_dir), embeddings, allow_dangerous_deserialization=True)
+            known = manifest.get("files", {})
+        except Exception as e:  # noqa: BLE001
+            # Un índice ilegible (truncado, de otra versión...) se reconstruye
+            logger.warning("No se pudo cargar el índice de %s, se reconstruye: %s", index_dir, e)
+    if vectorstore is None:
+        update.rebuilt = True
+
+    update.removed = [p for p in known if p not in current]
+    update.changed = [p for p in known if p in current and known[p]["sha256"] != current[p]]
+    update.added = [p for p in current if p not in known]
+
+    stale_ids = [doc_id for p in update.removed + update.changed for doc_id in known[p]["ids"]]
+    if vectorstore is not None and stale_ids:
+        vectorstore.delete(stale_ids)
+
+    files = {p: info for p, info in known.items() if p not in update.removed}
+    new_docs: List[Document] = []
+    new_ids: List[str] = []
+    for path in update.changed + update.added:
+        docs = load_file(Path(path), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        ids = [f"{path}#{i}" for i in range(len(docs))]
+        files[path] = {"sha256": current[path], "ids": ids}
+        new_docs.extend(docs)
+        new_ids.extend(ids)
+
+    if new_docs:
+        if vectorstore is None:
+            vectorstore = FAISS.from_documents(new_docs, embeddings, ids=new_ids)
+        else:
+            vectorstore.add_documents(new_docs, ids=new_ids)
+    if vectorstore is None:
+        raise ValueError(f"No hay documentos que indexar en {docs_dir}")
+
+    if update.has_changes:
+        _save_index(vectorstore, index_dir, {"embeddings": embeddings_id, "chunking": chunking, "files": files})
+        logger.info(
+            "Índice de docs actualizado: +%d ~%d -%d (reconstruido=%s)",
+            len(update.added),
+            len(update.changed),
+            len(update.removed),
+            update.rebuilt,
+        )
+    return vectorstore, update
@@ -0,0 +1,228 @@
+# src/data/hybrid_retrieval.py
+
+"""
+Recuperación híbrida para el RAG de documentación: índice invertido BM25 en
+memoria + búsqueda densa FAISS, fusionadas con reciprocal rank fusion (RRF).
+
+BM25 encuentra los términos exactos (nombres de KPI como "ticket medio",
+tablas como "ventas") que los embeddings a veces pasan por alto; la búsqueda
+densa cubre las paráfrasis. El índice BM25 se construye a partir de los
+mismos fragmentos que hay en el vectorstore, así que no necesita persistencia
+propia.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from src.data.text_tokens import tokenize as _tokenize
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+RETRIEVAL_MODES = ("lexical", "dense", "hybrid")
+
+# Constante estándar de RRF: amortigua el peso de las primeras posiciones
+RRF_K = 60
+
+_STOPWORDS = {
+    "el",
+    "la",
+    "los",
+    "las",
+    "un",
+    "una",
+    "unos",
+    "unas",
+    "de",
+    "del",
+    "a",
+    "al",
+    "en",
+    "y",
+    "o",
+    "que",
+    "por",
+    "para",
+    "con",
+    "se",
+    "lo",
+    "es",
+    "su",
+    "sus",
+    "como",
+    "cual",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens de BM25 (src/data/text_tokens.py) con las stopwords de la
+    documentación.
+    """
+    return _tokenize(text, _STOPWORDS)
+
+
+class BM25Index:
+    """
+    Índice invertido con puntuación Okapi BM25.
+    """
+
+    def __init__(self, docs: Sequence[Tuple[str, Document]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.docs: Dict[str, Document] = {}
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        for doc_id, doc in docs:
+            pos = len(self.ids)
+            self.ids.append(doc_id)
+            self.docs[doc_id] = doc
+            counts = Counter(tokenize(doc.page_content))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term].append((pos, tf))
+
+        n = len(self.ids)
+        self._avg_len = sum(self._lengths) / n if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for pos, tf in self._postings[term]:
+                norm = 1 - self.b + self.b * self._lengths[pos] / (self._avg_len or 1)
+                scores[pos] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(self.ids[pos], score) for pos, score in best]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fusiona varias listas ordenadas de ids: score = sum(1 / (k + posición)).
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+@dataclass
+class RetrievalStats:
+    """
+    Latencia acumulada por etapa (lexical, dense, fusion) de la recuperación.
+    """
+
+    queries: int = 0
+    seconds: Dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, timings: Dict[str, float]) -> None:
+        with self._lock:
+            self.queries += 1
+            for stage, elapsed in timings.items():
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+
+    def as_dict(self) -> Dict[str, object]:
+        n = self.queries or 1
+        return {
+            "queries": self.queries,
+            "avg_ms": {stage: 1000 * total / n for stage, total in self.seconds.items()},
+        }
+
+
+_stats = RetrievalStats()
+
+
+def get_retrieval_stats() -> Dict[str, object]:
+    """
+    Latencia media por etapa de las búsquedas de este proceso.
+    """
+    return _stats.as_dict()
+
+
+class HybridRetriever:
+    """
+    Retriever con tres modos: 'lexical' (solo BM25), 'dense' (solo FAISS) o
+    'hybrid' (ambos + RRF). Cada etapa busca `candidates` resultados y se
+    devuelven los `k` mejores.
+    """
+
+    def __init__(
+        self,
+        vectorstore: "FAISS",
+        mode: str = "hybrid",
+        k: int = 4,
+        candidates: int = 20,
+        stats: RetrievalStats | None = None,
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de recuperación desconocido: {mode!r}. Válidos: {RETRIEVAL_MODES}")
+        self.vectorstore = vectorstore
+        self.mode = mode
+        self.k = k
+        self.candidates = max(candidates, k)
+        self.stats = stats or _stats
+        self.bm25 = None
+        if mode != "dense":
+            # Mismos fragmentos (y mismos ids) que el vectorstore, leídos una
+            # vez al construir el retriever con su API pública
+            docs = {
+                doc_id: doc
+                for doc_id in vectorstore.index_to_docstore_id.values()
+                for doc in vectorstore.get_by_ids([doc_id])
+            }
+            self.bm25 = BM25Index(list(docs.items()))
+
+    def search(self, question: str) -> Tuple[List[Document], Dict[str, float]]:
+        """
+        Devuelve los documentos y los segundos de cada etapa.
+        """
+        timings: Dict[str, float] = {}
+        rankings: List[List[str]] = []
+        found: Dict[str, Document] = {}
+
+        if self.mode in ("lexical", "hybrid"):
+            start = time.perf_counter()
+            lexical = self.bm25.search(question, self.candidates)
+            rankings.append([doc_id for doc_id, _ in lexical])
+            found.update({doc_id: self.bm25.docs[doc_id] for doc_id, _ in lexical})
+            timings["lexical"] = time.perf_counter() - start
+
+        if self.mode in ("dense", "hybrid"):
+            start = time.perf_counter()
+            dense = self.vectorstore.similarity_search(question, k=self.candidates)
+            rankings.append([doc.id for doc in dense])
+            found.update({doc.id: doc for doc in dense})
+            timings["dense"] = time.perf_counter() - start
+
+        if self.mode == "hybrid":
+            start = time.perf_counter()
+            ranked = [doc_id for doc_id, _ in reciprocal_rank_fusion(rankings)]
+            timings["fusion"] = time.perf_counter() - start
+        else:
+            ranked = rankings[0]
+
+        self.stats.record(timings)
+        return [found[doc_id] for doc_id in ranked[: self.k]], timings
+
+    def invoke(self, question: str) -> List[Document]:
+        docs, _ = self.search(question)
+        return docs
@@ -0,0 +1,184 @@
+# src/data/physical_design.py
+
+"""
+Perfil de diseño físico del esquema retail (opcional, scripts/create_schema.py
+--physical) y recogida de estadísticas del optimizador.
+
+Sin él, ventas no tiene más índice que la clave primaria: cualquier pregunta
+por rango de fechas o por tienda recorre la tabla entera. El perfil añade:
+
+- Particionado de ventas por rango de fecha, una partición por mes
+  (INTERVAL): un filtro por fechas solo lee las particiones del rango.
+- Índices locales (uno por partición) sobre ventas: por fecha y los
+  compuestos (tienda_id, fecha, total) y (producto_id, fecha, cantidad,
+  total). Empiezan por la clave ajena, así que también sirven de índice de
+  las FK, y llevan las medidas: los agregados por tienda o producto en un
+  rango de fechas se resuelven solo con el índice.
+- Índice de la FK productos.categoria_id.
+
+Las estadísticas se recogen con DBMS_STATS tras poblar las tablas; en
+ventas particionada, de forma incremental (solo se analizan las particiones
+que cambian).
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Las ventas anteriores caen en la partición inicial; a partir de esa
+# fecha Oracle crea una partición por mes al insertar
+PARTITION_START = "2023-01-01"
+
+PARTITION_CLAUSE = (
+    "PARTITION BY RANGE (fecha) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH')) "
+    f"(PARTITION p_inicial VALUES LESS THAN (DATE '{PARTITION_START}'))"
+)
+
+PARTITIONED_SQL = "SELECT partitioned FROM user_tables WHERE table_name = :tabla"
+
+STATS_TABLES = ("categorias", "productos", "tiendas", "ventas")
+
+# ORA-00955: el nombre ya existe; ORA-01408: esas columnas ya tienen índice
+IGNORED_ERRORS = (955, 1408)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    # Índice local (particionado como la tabla); solo si la tabla lo está
+    local: bool = False
+
+    def create_sql(self, partitioned: bool = True) -> str:
+        local = " LOCAL" if self.local and partitioned else ""
+        return f"CREATE INDEX {self.name} ON {self.table} ({', '.join(self.columns)}){local}"
+
+
+INDEXES = (
+    IndexSpec("ix_ventas_fecha", "ventas", ("fecha",), local=True),
+    IndexSpec("ix_ventas_tienda_fecha", "ventas", ("tienda_id", "fecha", "total"), local=True),
+    IndexSpec("ix_ventas_producto_fecha", "ventas", ("producto_id", "fecha", "cantidad", "total"), local=True),
+    IndexSpec("ix_productos_categoria", "productos", ("categoria_id",)),
+)
+
+
+def partition_sql() -> str:
+    """
+    Convierte ventas (ya creada y quizá con datos) en particionada, sin
+    bloquearla y manteniendo sus índices (Oracle 12.2+).
+    """
+    return f"ALTER TABLE ventas MODIFY {PARTITION_CLAUSE} ONLINE UPDATE INDEXES"
+
+
+def is_partitioned(cur, table: str = "ventas") -> bool:
+    cur.execute(PARTITIONED_SQL, {"tabla": table.upper()})
+    row = cur.fetchone()
+    return bool(row) and row[0] == "YES"
+
+
+def design_statements(partitioned: bool, partition: bool = True) -> List[str]:
+    """
+    Sentencias del perfil, en orden: primero el particionado (así los
+    índices de ventas se crean ya locales) y después los índices.
+    """
+    statements = []
+    if partition and not partitioned:
+        statements.append(partition_sql())
+        partitioned = True
+    statements += [index.create_sql(partitioned) for index in INDEXES]
+    return statements
+
+
+def apply_physical_design(cur, partition: bool = True) -> List[str]:
+    """
+    Aplica el perfil y devuelve las sentencias ejecutadas. Se puede repetir:
+    los índices que ya existen se omiten.
+    """
+    import oracledb
+
+    executed = []
+    for statement in design_statements(is_partitioned(cur), partition):
+        try:
+            cur.execute(statement)
+        except oracledb.DatabaseError as e:
+            (error_obj,) = e.args
+            if error_obj.code not in IGNORED_ERRORS:
+                raise
+            continue
+        executed.append(statement)
+    return executed
+
+
+# ---- estadísticas ----
+
+
+def gather_stats_statements(
+    tables: Sequence[str], partitioned: bool, degree: Optional[int] = None
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Bloques PL/SQL (con sus binds) para recoger las estadísticas de
+    `tables`, con histogramas donde el optimizador los considere útiles.
+    """
+    statements: List[Tuple[str, Dict[str, Any]]] = []
+    if partitioned and "ventas" in tables:
+        statements.append(("BEGIN DBMS_STATS.SET_TABLE_PREFS(USER, 'VENTAS', 'INCREMENTAL', 'TRUE'); END;", {}))
+    for table in tables:
+        statements.append(
+            (
+                (
+                    "BEGIN DBMS_STATS.GATHER_TABLE_STATS(ownname => USER, tabname => :tabla, cascade => TRUE, "
+                    "method_opt => 'FOR ALL COLUMNS SIZE AUTO', degree => :grado); END;"
+                ),
+                {"tabla": table.upper(), "grado": degree},
+            )
+        )
+    return statements
+
+
+def gather_stats(cur, tables: Iterable[str] = STATS_TABLES, degree: Optional[int] = None) -> None:
+    """
+    Recoge las estadísticas del optimizador (tras poblar o cargar ventas).
+    `degree` None deja que Oracle elija el paralelismo.
+    """
+    tables = list(tables)
+    for statement, params in gather_stats_statements(tables, is_partitioned(cur), degree):
+        cur.execute(statement, params)
+
+
+# ---- planes ----
+
+PLAN_SQL = (
+    "SELECT operation, options, object_name, cost, partition_start, partition_stop "
+    "FROM plan_table WHERE statement_id = :sid ORDER BY id"
+)
+
+
+@dataclass
+class PlanSummary:
+    cost: float
+    full_scans: List[str]
+    indexes: List[str]
+    # Particiones leídas de ventas ("1-3", "KEY", "ALL"...) si está particionada
+    partitions: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def summarize_plan(rows: Sequence[Sequence[Any]]) -> PlanSummary:
+    """
+    Resumen de las filas de PLAN_TABLE (en el orden de PLAN_SQL): coste
+    total, tablas recorridas enteras, índices usados y poda de particiones.
+    """
+    cost = float(rows[0][3] or 0) if rows else 0.0
+    full_scans: List[str] = []
+    indexes: List[str] = []
+    partitions = None
+    for operation, options, name, _, start, stop in rows:
+        if operation == "TABLE ACCESS" and options and options.startswith("FULL") and name not in full_scans:
+            full_scans.append(name)
+        elif operation == "INDEX" and name not in indexes:
+            indexes.append(name)
+        elif operation == "PARTITION RANGE" and partitions is None:
+            partitions = f"{options} {start}-{stop}" if start != stop else f"{options} {start}"
+    return PlanSummary(cost, full_scans, indexes, partitions)
@@ -0,0 +1,363 @@
+# src/data/query_cache.py
+
+"""
+Caché de resultados de consultas SQL, por debajo de run_query.
+
+- Clave: texto SQL canónico (sin comentarios, minúsculas y espacios
+  colapsados fuera de literales) + binds + opciones de lectura.
+- Cada entrada guarda la "versión de datos" de las tablas que consulta
+  (MAX(id)); si al leerla la versión actual no coincide (han entrado ventas
+  nuevas), la entrada se descarta. MAX(id) se resuelve leyendo un extremo
+  del índice de la clave primaria; un COUNT(*) recorrería el índice entero
+  en cada sonda. Los borrados y las correcciones de filas ya existentes no
+  cambian la versión: esas entradas duran hasta QUERY_CACHE_TTL_SECONDS.
+- Solo se cachean consultas sobre tablas con versión conocida
+  (QUERY_CACHE_TABLES) y sin funciones no deterministas (SYSDATE...).
+- Dos niveles: memoria (LRU por número de entradas) y disco (SQLite, LRU +
+  TTL). Un acierto en disco se sube a memoria. Los dos guardan el resultado
+  serializado (pickle): cada acierto devuelve una copia propia, sin dicts
+  ni arrays compartidos con otras llamadas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config.lazy import thread_safe_cache
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Literales '...' y "...", comentarios y el resto del texto
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/|[^'\"/-]+|.", re.DOTALL)
+_SPACE_AROUND_PUNCT = re.compile(r"\s*([(),])\s*")
+_FROM_CLAUSE = re.compile(
+    r"\bfrom\s+(.*?)(?=\bwhere\b|\bgroup\b|\border\b|\bhaving\b|\bunion\b|\bintersect\b|\bminus\b"
+    r"|\bfetch\b|\bjoin\b|\binner\b|\bleft\b|\bright\b|\bfull\b|\bcross\b|\)|$)"
+)
+_JOIN_TABLE = re.compile(r"\bjoin\s+([\w$#.\"]+)")
+_NON_DETERMINISTIC = re.compile(
+    r"\b(sysdate|systimestamp|current_date|current_timestamp|localtimestamp|dbms_random|sys_guid|rownum)\b"
+)
+
+
+def _is_quoted(token: str) -> bool:
+    return len(token) > 1 and token[0] in "'\"" and token[-1] == token[0]
+
+
+def canonicalize_sql(sql: str) -> str:
+    """
+    Forma canónica de la consulta: quita comentarios y el ';' final, pasa a
+    minúsculas y colapsa espacios, sin tocar literales ni identificadores
+    entre comillas.
+    """
+    out: List[str] = []
+    code: List[str] = []
+
+    def flush() -> None:
+        if code:
+            chunk = re.sub(r"\s+", " ", "".join(code).lower())
+            out.append(_SPACE_AROUND_PUNCT.sub(r"\1", chunk))
+            code.clear()
+
+    for token in _SQL_TOKENS.findall(sql):
+        if _is_quoted(token):
+            flush()
+            out.append(token)
+        elif token.startswith(("--", "/*")):
+            code.append(" ")
+        else:
+            code.append(token)
+    flush()
+    return "".join(out).strip().rstrip(";").strip()
+
+
+def _strip_literals(canonical: str) -> str:
+    return re.sub(r"'(?:[^']|'')*'", "''", canonical)
+
+
+def _table_name(reference: str) -> str:
+    # "retail.ventas" -> ventas ; "VENTAS" entre comillas -> ventas
+    return reference.split(".")[-1].strip('"').lower()
+
+
+def referenced_tables(canonical: str) -> List[str]:
+    """
+    Tablas que aparecen en FROM (incluidas listas con comas) y JOIN.
+    """
+    text = _strip_literals(canonical)
+    tables = set()
+    for clause in _FROM_CLAUSE.findall(text):
+        for item in clause.split(","):
+            name = item.strip().split(" ")[0]
+            if name and not name.startswith("("):
+                tables.add(_table_name(name))
+    for name in _JOIN_TABLE.findall(text):
+        tables.add(_table_name(name))
+    return sorted(tables)
+
+
+def cacheable_tables(canonical: str, versioned: Iterable[str]) -> Optional[List[str]]:
+    """
+    Tablas cuya versión hay que sondear si se puede cachear la consulta;
+    None si no (sin tablas, con tablas sin versión conocida o con funciones
+    no deterministas).
+
+    Además de las tablas de FROM/JOIN se incluye cualquier tabla conocida
+    que aparezca como identificador (subconsultas, listas con comas): sondear
+    de más no cambia el resultado, sondear de menos sí.
+    """
+    text = _strip_literals(canonical)
+    if not text.startswith(("select", "with")) or _NON_DETERMINISTIC.search(text):
+        return None
+    tables = referenced_tables(canonical)
+    versioned = {t.lower() for t in versioned}
+    if not tables or any(t not in versioned for t in tables):
+        return None
+    words = set(re.findall(r"[\w$#]+", text.lower()))
+    return sorted(set(tables) | (versioned & words))
+
+
+def cache_key(canonical: str, params: Dict[str, Any] | None, options: Dict[str, Any]) -> str:
+    raw = json.dumps([canonical, params or {}, options], sort_keys=True, default=repr)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def version_probe_sql(tables: Sequence[str]) -> str:
+    """
+    Una sola consulta (un viaje) con MAX(id) de cada tabla: las ventas nuevas
+    lo suben. Cada rama es un INDEX FULL SCAN (MIN/MAX) de la clave primaria,
+    unos pocos bloques sea cual sea el tamaño de la tabla.
+    """
+    return " UNION ALL ".join(f"SELECT '{table}' AS tabla, MAX(id) AS max_id FROM {table}" for table in tables)
+
+
+def parse_versions(rows: Iterable[Sequence[Any]]) -> Dict[str, Optional[int]]:
+    return {str(table): None if max_id is None else int(max_id) for table, max_id in rows}
+
+
+@dataclass
+class QueryCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    # Entradas descartadas porque cambió la versión de datos
+    invalidated: int = 0
+    # Segundos de base de datos ahorrados con los aciertos
+    saved_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+class QueryResultCache:
+    """
+    Resultados de consultas en memoria (LRU) y, opcionalmente, en disco
+    (SQLite). Los valores se guardan con pickle en los dos niveles.
+    """
+
+    def __init__(
+        self,
+        memory_entries: int = 256,
+        disk_path: str = "",
+        disk_entries: int = 5000,
+        ttl_seconds: int = 24 * 3600,
+        probe_ttl: float = 2.0,
+    ):
+        self.memory_entries = memory_entries
+        self.disk_path = disk_path
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.probe_ttl = probe_ttl
+        self.stats = QueryCacheStats()
+        self._lock = threading.Lock()
+        # key -> (versions, created_at, latency, valor serializado)
+        self._memory: OrderedDict[str, tuple] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        # tabla -> (instante de la sonda, versión)
+        self._versions: Dict[str, Tuple[float, Any]] = {}
+
+    # ---- versiones de datos ----
+
+    def known_versions(self, tables: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """
+        Versiones sondeadas hace menos de probe_ttl segundos (None si falta
+        alguna): una ráfaga de consultas comparte una sola sonda.
+        """
+        now = time.monotonic()
+        with self._lock:
+            found = {t: self._versions.get(t) for t in tables}
+        if any(v is None or now - v[0] > self.probe_ttl for v in found.values()):
+            return None
+        return {t: v[1] for t, v in found.items()}
+
+    def remember_versions(self, versions: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for table, version in versions.items():
+                self._versions[table] = (now, version)
+
+    # ---- disco ----
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.disk_path:
+            return None
+        if self._conn is None:
+            if self.disk_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    versions TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """)
+            self._conn.commit()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._memory.clear()
+            self._versions.clear()
+
+    # ---- lectura / escritura ----
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key: str, versions: Dict[str, Any]) -> Optional[Any]:
+        """
+        Devuelve una copia propia del resultado si existe, no ha caducado y
+        se guardó con las mismas versiones de datos.
+        """
+        versions_json = json.dumps(versions, sort_keys=True)
+        now = time.time()
+        stale = False
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored, created_at, latency, blob = entry
+                if stored == versions_json and not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    self.stats.saved_seconds += latency
+                    return pickle.loads(blob)
+                # Obsoleta o caducada; la copia de disco (si hay) se descarta abajo
+                del self._memory[key]
+                stale = stored != versions_json
+
+            conn = self._connect()
+            row = None
+            if conn is not None:
+                row = conn.execute(
+                    "SELECT versions, value, latency, created_at FROM query_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None:
+                stored, blob, latency, created_at = row
+                if stored != versions_json or self._is_expired(created_at, now):
+                    conn.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    stale = stale or stored != versions_json
+                    row = None
+            if row is None:
+                self.stats.invalidated += stale
+                self.stats.misses += 1
+                return None
+            conn.execute("UPDATE query_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._put_memory(key, (stored, created_at, latency, blob))
+            self.stats.disk_hits += 1
+            self.stats.saved_seconds += latency
+            return pickle.loads(blob)
+
+    def put(self, key: str, versions: Dict[str, Any], value: Any, latency: float = 0.0) -> None:
+        versions_json = json.dumps(versions, sort_keys=True)
+        # Una foto del resultado: lo que haga después quien llamó no la cambia
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, (versions_json, now, latency, blob))
+            conn = self._connect()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, versions_json, blob, latency, now, now),
+            )
+            self._evict_disk(conn, now)
+            conn.commit()
+
+    def _put_memory(self, key: str, entry: tuple) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM query_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()
+        overflow = count - self.disk_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM query_cache WHERE key IN " "(SELECT key FROM query_cache ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+
+    def sizes(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connect()
+            disk = conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0] if conn else 0
+            return {"memory": len(self._memory), "disk": disk}
+
+
+@thread_safe_cache
+def get_query_cache() -> QueryResultCache:
+    """
+    Caché de resultados compartida por run_query y arun_query.
+    """
+    settings = get_settings()
+    return QueryResultCache(
+        memory_entries=settings.query_cache_memory_entries,
+        disk_path=settings.query_cache_disk_path,
+        disk_entries=settings.query_cache_disk_entries,
+        ttl_seconds=settings.query_cache_ttl_seconds,
+        probe_ttl=settings.query_cache_probe_ttl,
+    )
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    """
+    Aciertos (memoria/disco), fallos, invalidaciones y tamaño de la caché.
+    """
+    cache = get_query_cache()
+    stats = cache.stats.as_dict()
+    stats.update(cache.sizes())
+    return stats
@@ -0,0 +1,215 @@
+# src/data/query_guard.py
+
+"""
+Protecciones de run_query frente a consultas desbocadas (p.ej. un producto
+cartesiano sobre ventas generado por el LLM):
+
+- Timeout por llamada: en python-oracledb `call_timeout` (ms por viaje de
+  red). Al vencer, el driver interrumpe la llamada en el servidor y la
+  sesión se descarta del pool. En SQLite (tests, réplica local) se
+  interrumpe con un progress handler.
+- Guarda de coste: antes de ejecutar se pide a Oracle el plan (EXPLAIN
+  PLAN) y se rechaza la consulta si el coste o las filas estimadas superan
+  el umbral. Si solo sobran filas y la consulta no tiene límite, se reescribe
+  con FETCH FIRST (Oracle puede usar un plan con parada anticipada) y se
+  vuelve a estimar. EXPLAIN PLAN no admite valores para los binds (:b1...):
+  se explica la SQL sin ellos y Oracle los trata como desconocidos.
+"""
+
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.data.sql_sanitizer import SQLValidationError, has_row_limit, parse_select
+
+# DPY-4024: call timeout (thin); ORA-03156/ORA-01013: timeout/cancelación (thick)
+_TIMEOUT_MARKERS = ("DPY-4024", "ORA-03156", "ORA-01013", "interrupted")
+
+
+class QueryTimeoutError(RuntimeError):
+    """
+    La consulta superó el tiempo máximo y se canceló.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"La consulta superó el tiempo máximo de {timeout:g} s y se canceló")
+
+
+class QueryTooExpensiveError(RuntimeError):
+    """
+    El plan estimado de la consulta supera el coste o las filas permitidas.
+    """
+
+    def __init__(self, estimate: "PlanEstimate", max_cost: float | None, max_cardinality: int | None):
+        self.estimate = estimate
+        self.max_cost = max_cost
+        self.max_cardinality = max_cardinality
+        super().__init__(
+            f"Consulta demasiado costosa: coste estimado {estimate.cost:.0f} "
+            f"(máximo {max_cost or 0:.0f}), ~{estimate.cardinality} filas "
+            f"(máximo {max_cardinality or 0})"
+        )
+
+
+@dataclass
+class PlanEstimate:
+    cost: float
+    cardinality: int
+
+
+def is_timeout_error(error: Exception) -> bool:
+    message = str(error)
+    return any(marker in message for marker in _TIMEOUT_MARKERS)
+
+
+# ---- timeout por llamada ----
+
+
+@contextmanager
+def call_timeout(conn, timeout: float | None) -> Iterator[None]:
+    """
+    Aplica el timeout a la conexión (SQLAlchemy) mientras dura el bloque y
+    lo restaura al salir. Si vence, lanza QueryTimeoutError.
+    """
+    raw = conn.connection.driver_connection if timeout else None
+    if hasattr(raw, "call_timeout"):
+        previous = raw.call_timeout
+        raw.call_timeout = int(timeout * 1000)
+        restore = lambda: setattr(raw, "call_timeout", previous)
+    elif isinstance(raw, sqlite3.Connection):
+        deadline = time.monotonic() + timeout
+        # Devolver True desde el handler aborta la sentencia en curso
+        raw.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+        restore = lambda: raw.set_progress_handler(None, 0)
+    else:
+        yield
+        return
+    try:
+        yield
+    except SQLAlchemyError as e:
+        if is_timeout_error(e):
+            # La sesión interrumpida no vuelve al pool
+            conn.invalidate()
+            raise QueryTimeoutError(timeout) from e
+        raise
+    finally:
+        if not conn.invalidated:
+            restore()
+
+
+@asynccontextmanager
+async def acall_timeout(conn, timeout: float | None):
+    """
+    Versión async: solo python-oracledb (AsyncConnection.call_timeout).
+    """
+    raw = (await conn.get_raw_connection()).driver_connection if timeout else None
+    if not hasattr(raw, "call_timeout"):
+        yield
+        return
+    previous = raw.call_timeout
+    raw.call_timeout = int(timeout * 1000)
+    try:
+        yield
+    except SQLAlchemyError as e:
+        if is_timeout_error(e):
+            await conn.invalidate()
+            raise QueryTimeoutError(timeout) from e
+        raise
+    finally:
+        if not conn.invalidated:
+            raw.call_timeout = previous
+
+
+# ---- guarda de coste ----
+
+
+def cost_guard_enabled(conn, max_cost: float | None, max_cardinality: int | None) -> bool:
+    # EXPLAIN PLAN ... / PLAN_TABLE son de Oracle
+    return conn.dialect.name == "oracle" and bool(max_cost or max_cardinality)
+
+
+def _explain_statements(sql: str) -> tuple:
+    statement_id = f"ra{uuid.uuid4().hex[:24]}"
+    # Las filas de PLAN_TABLE (tabla temporal de sesión) desaparecen con el
+    # rollback al devolver la conexión al pool. Sin pasar por text(): los
+    # binds de `sql` se quedan como marcadores, sin valores.
+    explain = f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}"
+    read = f"SELECT cost, cardinality FROM plan_table WHERE statement_id = '{statement_id}' AND id = 0"
+    return explain, read
+
+
+def _estimate(row) -> PlanEstimate:
+    if row is None:
+        return PlanEstimate(0.0, 0)
+    cost, cardinality = row
+    return PlanEstimate(float(cost or 0), int(cardinality or 0))
+
+
+def explain_plan(conn, sql: str) -> PlanEstimate:
+    """
+    Coste y filas estimadas de la operación raíz del plan (sin ejecutarla).
+    """
+    explain, read = _explain_statements(sql)
+    conn.exec_driver_sql(explain)
+    return _estimate(conn.exec_driver_sql(read).fetchone())
+
+
+async def aexplain_plan(conn, sql: str) -> PlanEstimate:
+    explain, read = _explain_statements(sql)
+    await conn.exec_driver_sql(explain)
+    return _estimate((await conn.exec_driver_sql(read)).fetchone())
+
+
+def limit_rewrite(estimate: PlanEstimate, sql: str, max_cardinality: int | None, row_limit: int | None) -> str | None:
+    """
+    SQL con FETCH FIRST si devolvería más filas de las permitidas y se puede
+    acotar; None si no hay que reescribir.
+    """
+    if not max_cardinality or estimate.cardinality <= max_cardinality:
+        return None
+    if not row_limit:
+        return None
+    # Con sqlglot, como el saneado: añadir el texto al final fallaría si la
+    # consulta termina en un comentario de línea
+    try:
+        tree = parse_select(sql)
+    except SQLValidationError:
+        return None
+    if has_row_limit(tree):
+        return None
+    return tree.limit(row_limit, copy=False).sql(dialect="oracle")
+
+
+def check_estimate(estimate: PlanEstimate, max_cost: float | None, max_cardinality: int | None) -> None:
+    if (max_cost and estimate.cost > max_cost) or (max_cardinality and estimate.cardinality > max_cardinality):
+        raise QueryTooExpensiveError(estimate, max_cost, max_cardinality)
+
+
+def guard_cost(conn, sql: str, max_cost: float | None, max_cardinality: int | None, row_limit: int | None) -> str:
+    """
+    Devuelve la SQL a ejecutar (quizá con FETCH FIRST) o lanza
+    QueryTooExpensiveError.
+    """
+    estimate = explain_plan(conn, sql)
+    rewritten = limit_rewrite(estimate, sql, max_cardinality, row_limit)
+    if rewritten is not None:
+        sql, estimate = rewritten, explain_plan(conn, rewritten)
+    check_estimate(estimate, max_cost, max_cardinality)
+    return sql
+
+
+async def aguard_cost(
+    conn, sql: str, max_cost: float | None, max_cardinality: int | None, row_limit: int | None
+) -> str:
+    estimate = await aexplain_plan(conn, sql)
+    rewritten = limit_rewrite(estimate, sql, max_cardinality, row_limit)
+    if rewritten is not None:
+        sql, estimate = rewritten, await aexplain_plan(conn, rewritten)
+    check_estimate(estimate, max_cost, max_cardinality)
+    return sql
@@ -0,0 +1,386 @@
+# src/data/replica.py
+
+"""
+Réplica local (SQLite) de las tablas retail para consultas analíticas.
+
+- sync_replica() copia de Oracle las filas con id mayor que la marca de agua
+  de cada tabla (en `_replica_sync`, junto con el instante de la última
+  sincronización). Se asume que las tablas solo reciben inserciones; tras
+  borrados o cambios hay que sincronizar con full=True.
+- replica_sql() traduce una consulta de solo lectura del dialecto de Oracle
+  al de SQLite (FETCH FIRST -> LIMIT, NVL -> COALESCE, TO_CHAR de fechas ->
+  STRFTIME...). Devuelve None si la consulta no es apta: escribe, lee otras
+  tablas o usa algo que SQLite no resolvería igual (ROWNUM, SYSDATE,
+  outer joins con (+), formatos numéricos de TO_CHAR...).
+- run_query (src/data/db.py) manda a la réplica las consultas aptas si la
+  última sincronización es reciente; si la réplica falla al ejecutarla, se
+  repite en Oracle.
+
+Las fechas se guardan como texto 'YYYY-MM-DD HH:MM:SS': los literales de
+fecha (DATE '...', TO_DATE) se traducen a ese mismo formato, con la hora
+00:00:00, para que =, BETWEEN y TRUNC comparen igual que en Oracle.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import sqlglot
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlglot import exp
+from sqlglot.dialects.oracle import Oracle
+from sqlglot.errors import ErrorLevel, ParseError, UnsupportedError
+from sqlglot.time import format_time
+
+from src.config.lazy import thread_safe_cache
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SYNC_TABLE = "_replica_sync"
+
+# En orden de dependencias (claves ajenas)
+REPLICA_TABLES: Dict[str, Sequence[str]] = {
+    "categorias": ("id", "nombre"),
+    "productos": ("id", "nombre", "categoria_id", "precio"),
+    "tiendas": ("id", "nombre", "ciudad"),
+    "ventas": ("id", "fecha", "producto_id", "tienda_id", "cantidad", "total"),
+}
+
+_DDL = {
+    "categorias": "id INTEGER PRIMARY KEY, nombre TEXT NOT NULL",
+    "productos": "id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, categoria_id INTEGER, precio REAL NOT NULL",
+    "tiendas": "id INTEGER PRIMARY KEY, nombre TEXT, ciudad TEXT",
+    "ventas": (
+        "id INTEGER PRIMARY KEY, fecha TEXT NOT NULL, producto_id INTEGER, tienda_id INTEGER, "
+        "cantidad INTEGER NOT NULL, total REAL NOT NULL"
+    ),
+}
+
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_ventas_fecha ON ventas (fecha)",
+    "CREATE INDEX IF NOT EXISTS ix_ventas_producto ON ventas (producto_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ventas_tienda ON ventas (tienda_id)",
+)
+
+# Pseudocolumnas de Oracle sin equivalente en SQLite
+_PSEUDO_COLUMNS = {"rownum", "rowid", "level", "sysdate", "systimestamp"}
+
+_EXTRACT_FORMATS = {"YEAR": "%Y", "MONTH": "%m", "DAY": "%d"}
+_TRUNC_FORMATS = {"YYYY": "%Y-01-01", "YEAR": "%Y-01-01", "MM": "%Y-%m-01", "MONTH": "%Y-%m-01", "DD": "%Y-%m-%d"}
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# ---- traducción Oracle -> SQLite ----
+
+
+def _date_format(oracle_format: str) -> Optional[str]:
+    """
+    Formato strftime equivalente a un formato de fecha de TO_CHAR; None si
+    tiene elementos que no son de fecha (p.ej. formatos numéricos).
+    """
+    converted = format_time(oracle_format.upper(), Oracle.TIME_MAPPING)
+    if re.sub(r"%\w", "", converted).strip("-/ :.,"):
+        return None
+    return converted
+
+
+def _strftime(value: exp.Expression, fmt: str) -> exp.Expression:
+    return exp.TimeToStr(this=value, format=exp.Literal.string(fmt))
+
+
+def _translate_node(node: exp.Expression) -> Optional[exp.Expression]:
+    """
+    Equivalente en SQLite de un nodo del árbol; el propio nodo si no hace
+    falta cambiarlo y None si no se puede traducir.
+    """
+    if isinstance(node, (exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Connect)):
+        return None
+    if isinstance(node, (exp.CurrentTimestamp, exp.CurrentDate)):
+        return None
+    if isinstance(node, exp.Column):
+        if node.args.get("join_mark") or (not node.table and node.name.lower() in _PSEUDO_COLUMNS):
+            return None
+        return node
+    if isinstance(node, exp.Table):
+        return node if node.name.lower() in REPLICA_TABLES else None
+    if isinstance(node, exp.ToChar):
+        fmt = node.args.get("format")
+        if fmt is None:
+            return node
+        converted = _date_format(fmt.name) if isinstance(fmt, exp.Literal) and fmt.is_string else None
+        return _strftime(node.this, converted) if converted else None
+    if isinstance(node, exp.Extract):
+        fmt = _EXTRACT_FORMATS.get(node.this.name.upper())
+        if fmt is None:
+            return None
+        return exp.Cast(this=_strftime(node.expression, fmt), to=exp.DataType.build("INT"))
+    if isinstance(node, exp.DateTrunc):
+        unit = node.args.get("unit")
+        fmt = _TRUNC_FORMATS.get(unit.name.upper()) if unit is not None else None
+        return _strftime(node.this, f"{fmt} 00:00:00") if fmt else None
+    if isinstance(node, (exp.StrToDate, exp.StrToTime)):
+        # TO_DATE('2023-01-01', 'YYYY-MM-DD') -> '2023-01-01 00:00:00'
+        fmt = node.args.get("format")
+        if not (isinstance(node.this, exp.Literal) and isinstance(fmt, exp.Literal)):
+            return None
+        try:
+            value = datetime.strptime(node.this.name, fmt.name)
+        except ValueError:
+            return None
+        return exp.Literal.string(value.strftime(_DATE_FORMAT))
+    if isinstance(node, exp.DateStrToDate) and isinstance(node.this, exp.Literal):
+        # DATE '2023-01-01' -> '2023-01-01 00:00:00', como las fechas guardadas
+        try:
+            value = datetime.strptime(node.this.name, "%Y-%m-%d")
+        except ValueError:
+            return None
+        return exp.Literal.string(value.strftime(_DATE_FORMAT))
+    return node
+
+
+class _Untranslatable(Exception):
+    pass
+
+
+def _strict(node: exp.Expression) -> exp.Expression:
+    translated = _translate_node(node)
+    if translated is None:
+        raise _Untranslatable(node.sql(dialect="oracle"))
+    return translated
+
+
+def replica_sql(sql: str) -> Optional[str]:
+    """
+    La consulta en el dialecto de SQLite si se puede responder desde la
+    réplica; None si no.
+    """
+    try:
+        statements = sqlglot.parse(sql, read="oracle")
+    except ParseError:
+        return None
+    if len(statements) != 1 or not isinstance(statements[0], (exp.Select, exp.Union)):
+        return None
+    tree = statements[0]
+    # Los nombres de las CTE no son tablas de la réplica
+    ctes = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    try:
+        for table in tree.find_all(exp.Table):
+            if table.name.lower() not in ctes:
+                _strict(table)
+                # retail.ventas -> ventas
+                table.set("db", None)
+                table.set("catalog", None)
+        tree = tree.transform(lambda node: node if isinstance(node, exp.Table) else _strict(node))
+        return tree.sql(dialect="sqlite", unsupported_level=ErrorLevel.RAISE)
+    except (_Untranslatable, UnsupportedError):
+        return None
+
+
+# ---- réplica ----
+
+
+def _trunc(value: Any) -> Any:
+    # TRUNC(fecha) sobre fechas en texto y TRUNC(n) sobre números
+    if isinstance(value, str):
+        return value[:10] + " 00:00:00"
+    if value is None:
+        return None
+    return math.trunc(value)
+
+
+def _to_replica(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime(_DATE_FORMAT)
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d 00:00:00")
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+@dataclass
+class ReplicaStats:
+    """
+    Consultas servidas por la réplica, repetidas en Oracle tras un error de
+    la réplica y no enviadas por estar desactualizada.
+    """
+
+    routed: int = 0
+    fallbacks: int = 0
+    stale: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"routed": self.routed, "fallbacks": self.fallbacks, "stale": self.stale}
+
+
+class Replica:
+    """
+    Fichero SQLite con copia de las tablas retail y sus marcas de agua.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = ReplicaStats()
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    if self.path != ":memory:":
+                        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    engine = create_engine(f"sqlite:///{self.path}", future=True)
+                    event.listen(engine, "connect", self._on_connect)
+                    self._create_schema(engine)
+                    self._engine = engine
+        return self._engine
+
+    @staticmethod
+    def _on_connect(dbapi_conn, _record) -> None:
+        dbapi_conn.create_function("TRUNC", 1, _trunc, deterministic=True)
+
+    @staticmethod
+    def _create_schema(engine: Engine) -> None:
+        with engine.begin() as conn:
+            for table, columns in _DDL.items():
+                conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table} ({columns})"))
+            for ddl in _INDEXES:
+                conn.execute(text(ddl))
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {SYNC_TABLE} "
+                    "(tabla TEXT PRIMARY KEY, ultimo_id INTEGER NOT NULL, sincronizado REAL NOT NULL)"
+                )
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+    # ---- marcas de agua ----
+
+    def watermarks(self) -> Dict[str, tuple]:
+        """
+        tabla -> (último id copiado, instante de la última sincronización).
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT tabla, ultimo_id, sincronizado FROM {SYNC_TABLE}")).fetchall()
+        return {tabla: (ultimo_id, sincronizado) for tabla, ultimo_id, sincronizado in rows}
+
+    def is_fresh(self, max_staleness: float) -> bool:
+        """
+        Todas las tablas sincronizadas alguna vez y, con max_staleness > 0,
+        hace menos de max_staleness segundos.
+        """
+        marks = self.watermarks()
+        if set(marks) != set(REPLICA_TABLES):
+            return False
+        oldest = min(synced for _, synced in marks.values())
+        return max_staleness <= 0 or time.time() - oldest <= max_staleness
+
+    # ---- escritura ----
+
+    def write(self, table: str, rows: Iterable[Sequence[Any]], conn=None) -> int:
+        """
+        Inserta (o reemplaza por id) filas con las columnas de REPLICA_TABLES.
+        """
+        columns = REPLICA_TABLES[table]
+        placeholders = ", ".join(f":{c}" for c in columns)
+        batch = [{c: _to_replica(v) for c, v in zip(columns, row)} for row in rows]
+        if not batch:
+            return 0
+        statement = text(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})")
+        if conn is not None:
+            conn.execute(statement, batch)
+        else:
+            with self.engine.begin() as own:
+                own.execute(statement, batch)
+        return len(batch)
+
+    def mark_synced(self, table: str, last_id: int, conn=None) -> None:
+        statement = text(f"INSERT OR REPLACE INTO {SYNC_TABLE} VALUES (:tabla, :ultimo_id, :sincronizado)")
+        params = {"tabla": table, "ultimo_id": last_id, "sincronizado": time.time()}
+        if conn is not None:
+            conn.execute(statement, params)
+        else:
+            with self.engine.begin() as own:
+                own.execute(statement, params)
+
+    def sync(self, source: Engine, batch_size: int = 5000, full: bool = False) -> Dict[str, int]:
+        """
+        Copia de `source` (Oracle) las filas nuevas de cada tabla. Devuelve
+        las filas copiadas por tabla.
+        """
+        copied: Dict[str, int] = {}
+        marks = {} if full else self.watermarks()
+        for table, columns in REPLICA_TABLES.items():
+            start = time.perf_counter()
+            since = marks.get(table, (0, 0))[0]
+            last_id, copied[table] = since, 0
+            query = text(f"SELECT {', '.join(columns)} FROM {table} WHERE id > :desde ORDER BY id")
+            # Una transacción por tabla: filas y marca de agua van juntas
+            with source.connect() as src, self.engine.begin() as dst:
+                if full:
+                    dst.execute(text(f"DELETE FROM {table}"))
+                result = src.execution_options(stream_results=True).execute(query, {"desde": since})
+                while batch := result.fetchmany(batch_size):
+                    copied[table] += self.write(table, batch, conn=dst)
+                    last_id = batch[-1][0]
+                self.mark_synced(table, last_id, conn=dst)
+            logger.info(
+                "réplica %s: %d filas (id > %s) en %.2fs", table, copied[table], since, time.perf_counter() - start
+            )
+        return copied
+
+
+@thread_safe_cache
+def get_replica() -> Replica:
+    return Replica(get_settings().replica_path)
+
+
+def get_replica_stats() -> Dict[str, Any]:
+    return get_replica().stats.as_dict()
+
+
+def replica_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Binds de una consulta de Oracle con los tipos que guarda la réplica
+    (fechas como texto, Decimal como float).
+    """
+    return {name: _to_replica(value) for name, value in params.items()}
+
+
+def replica_route(sql: str) -> Optional[str]:
+    """
+    SQL traducida si la consulta debe ir a la réplica (activada, al día y
+    consulta apta); None si va a Oracle.
+    """
+    settings = get_settings()
+    if not settings.replica_enabled:
+        return None
+    translated = replica_sql(sql)
+    if translated is None:
+        return None
+    replica = get_replica()
+    if not replica.is_fresh(settings.replica_max_staleness_seconds):
+        replica.stats.count("stale")
+        return None
+    return translated
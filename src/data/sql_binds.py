@@ -0,0 +1,141 @@
+# src/data/sql_binds.py
+
+"""
+Literales de la SQL generada -> variables de enlace (:b1, :b2...).
+
+Cada pregunta con otra fecha, tienda o importe genera un texto de SQL
+distinto, y Oracle lo analiza desde cero (hard parse) y guarda un cursor
+más en la shared pool. Con los valores como binds, las consultas que solo
+cambian en los valores comparten cursor (soft parse).
+
+Solo se enlazan los valores de los predicados del WHERE, del HAVING y del
+ON de los joins: operandos de una comparación, elementos de un IN y límites
+de un BETWEEN. El resto se deja como está porque forma parte de la forma de
+la consulta:
+- SELECT, GROUP BY y ORDER BY: Oracle exige que la expresión del SELECT sea
+  idéntica a la del GROUP BY (SUBSTR(nombre, 1, 3)), y ORDER BY 2 es una
+  posición, no un valor;
+- formatos de TO_CHAR/TO_DATE, unidades de TRUNC/EXTRACT e INTERVAL;
+- FETCH FIRST n y ROWNUM <= n: el límite de filas lo fija el saneado.
+
+Las fechas (DATE '2023-01-01', TO_DATE('2023-01-01', 'YYYY-MM-DD')) se
+enlazan enteras como datetime.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, TokenError
+
+_PREDICATES = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Like, exp.ILike, exp.In, exp.Between)
+# Cláusula más cercana hacia arriba: solo en estas se enlaza
+_BIND_CLAUSES = (exp.Where, exp.Having)
+_STOP = (exp.Select, exp.SetOperation, exp.Group, exp.Order, exp.Fetch, exp.Limit, exp.Offset)
+
+
+def _number(text: str) -> int | Decimal:
+    # Decimal y no float: el valor llega a Oracle (NUMBER) sin redondeos
+    return int(text) if text.isdigit() else Decimal(text)
+
+
+def _date_value(node: exp.Expression) -> Optional[datetime]:
+    if isinstance(node, exp.DateStrToDate) and isinstance(node.this, exp.Literal):
+        fmt = "%Y-%m-%d"
+    elif isinstance(node, (exp.StrToDate, exp.StrToTime)) and isinstance(node.this, exp.Literal):
+        fmt_node = node.args.get("format")
+        if not isinstance(fmt_node, exp.Literal):
+            return None
+        fmt = fmt_node.name
+    else:
+        return None
+    try:
+        return datetime.strptime(node.this.name, fmt)
+    except ValueError:
+        return None
+
+
+def _value(node: exp.Expression) -> Tuple[bool, Any]:
+    """
+    (True, valor) si el nodo es un valor constante que se puede enlazar.
+    """
+    if isinstance(node, exp.Literal):
+        return True, node.name if node.is_string else _number(node.name)
+    value = _date_value(node)
+    return (value is not None), value
+
+
+def _in_bind_clause(node: exp.Expression) -> bool:
+    child, parent = node, node.parent
+    while parent is not None:
+        if isinstance(parent, _BIND_CLAUSES):
+            return True
+        if isinstance(parent, exp.Join):
+            return child.arg_key == "on"
+        if isinstance(parent, _STOP):
+            return False
+        child, parent = parent, parent.parent
+    return False
+
+
+def _is_rownum(node: exp.Expression) -> bool:
+    return isinstance(node, exp.Column) and not node.table and node.name.upper() == "ROWNUM"
+
+
+def _operands(predicate: exp.Expression):
+    """
+    Operandos de un predicado que pueden ser valores.
+    """
+    if isinstance(predicate, exp.In):
+        return list(predicate.expressions)
+    if isinstance(predicate, exp.Between):
+        return [predicate.args.get("low"), predicate.args.get("high")]
+    if _is_rownum(predicate.this) or _is_rownum(predicate.expression):
+        return []
+    return [predicate.this, predicate.expression]
+
+
+def bind_literals(tree: exp.Expression) -> Dict[str, Any]:
+    """
+    Sustituye los valores de los predicados por :b1, :b2... (modifica
+    `tree`) y devuelve los valores por nombre. El mismo valor reutiliza el
+    mismo bind.
+    """
+    params: Dict[str, Any] = {}
+    names: Dict[Tuple[type, Any], str] = {}
+    for predicate in list(tree.find_all(*_PREDICATES, bfs=False)):
+        if not _in_bind_clause(predicate):
+            continue
+        for operand in _operands(predicate):
+            if operand is None:
+                continue
+            ok, value = _value(operand)
+            if not ok:
+                continue
+            key = (type(value), value)
+            name = names.get(key)
+            if name is None:
+                name = names[key] = f"b{len(names) + 1}"
+                params[name] = value
+            operand.replace(exp.Placeholder(this=name))
+    return params
+
+
+def parametrize_sql(sql: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    (SQL con binds, valores) para ejecutar con run_query(sql, params). La
+    SQL se devuelve tal cual, sin binds, si no se puede analizar o ya trae
+    sus propios binds.
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read="oracle")
+    except (ParseError, TokenError):
+        return sql, {}
+    if tree.find(exp.Placeholder) is not None:
+        return sql, {}
+    params = bind_literals(tree)
+    if not params:
+        return sql, {}
+    return tree.sql(dialect="oracle"), params
@@ -0,0 +1,155 @@
+# src/data/sql_sanitizer.py
+
+"""
+Validación y saneado de la SQL generada por el LLM antes de ejecutarla.
+
+La consulta se analiza con sqlglot (dialecto Oracle), así que sin abrir
+ninguna conexión se detecta:
+- SQL que no se puede analizar (errores de sintaxis);
+- más de una sentencia ("SELECT ...; DELETE ...");
+- cualquier cosa que no sea una consulta de lectura: DML/DDL, también
+  dentro de una CTE, y SELECT ... FOR UPDATE.
+
+El límite de filas se aplica a la consulta exterior: si ya tiene FETCH
+FIRST o un ROWNUM <= n en su WHERE se respeta (rebajado al límite si es
+mayor); si no, se añade FETCH FIRST n ROWS ONLY. Para saber si el resultado
+está cortado, quien muestra n filas pide n + 1 y lee n con run_query
+(max_rows=n): si hay una más, el resultado sale con truncated=True.
+"""
+
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, TokenError
+
+DEFAULT_ROW_LIMIT = 50
+
+_WRITES = (
+    exp.Insert,
+    exp.Update,
+    exp.Delete,
+    exp.Merge,
+    exp.Create,
+    exp.Drop,
+    exp.Alter,
+    exp.TruncateTable,
+    exp.Command,
+    exp.Lock,
+)
+
+
+class SQLValidationError(ValueError):
+    """
+    SQL rechazada antes de ejecutarla. `kind`: "syntax", "multiple",
+    "not_select".
+    """
+
+    def __init__(self, kind: str, message: str):
+        self.kind = kind
+        super().__init__(message)
+
+
+def _syntax_message(error: Exception) -> str:
+    # ParseError trae la posición; su str() lleva códigos ANSI de resaltado
+    details = getattr(error, "errors", None)
+    if details:
+        first = details[0]
+        return f"{first.get('description')} (línea {first.get('line')}, columna {first.get('col')})"
+    return str(error)
+
+
+def _keyword(tree: exp.Expression) -> str:
+    return tree.sql(dialect="oracle").split(maxsplit=1)[0].upper()
+
+
+def parse_select(sql: str) -> exp.Expression:
+    """
+    Árbol de la única consulta de lectura de `sql`, o SQLValidationError.
+    """
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="oracle") if s is not None]
+    except (ParseError, TokenError) as e:
+        raise SQLValidationError("syntax", f"Error de sintaxis en la consulta: {_syntax_message(e)}") from e
+    if not statements:
+        raise SQLValidationError("syntax", "La consulta está vacía")
+    if len(statements) > 1:
+        raise SQLValidationError("multiple", "Solo se permite una sentencia SQL")
+    tree = statements[0]
+    if not isinstance(tree, (exp.Select, exp.SetOperation)):
+        raise SQLValidationError("not_select", f"Solo se permiten consultas SELECT (recibido {_keyword(tree)})")
+    write = tree.find(*_WRITES)
+    if write is not None:
+        name = write.sql(dialect="oracle").upper() if isinstance(write, exp.Lock) else _keyword(write)
+        raise SQLValidationError("not_select", f"La consulta contiene una operación no permitida ({name})")
+    return tree
+
+
+def _rownum_limit(tree: exp.Expression) -> Optional[exp.Binary]:
+    """
+    Condición ROWNUM <= n / ROWNUM < n del WHERE exterior (en un AND de
+    primer nivel), si la hay.
+    """
+    where = tree.args.get("where")
+    if where is None:
+        return None
+    for condition in where.this.flatten() if isinstance(where.this, exp.And) else [where.this]:
+        if (
+            isinstance(condition, (exp.LTE, exp.LT))
+            and isinstance(condition.this, exp.Column)
+            and not condition.this.table
+            and condition.this.name.upper() == "ROWNUM"
+        ):
+            return condition
+    return None
+
+
+def has_row_limit(tree: exp.Expression) -> bool:
+    """
+    True si la consulta exterior ya limita las filas (FETCH FIRST o ROWNUM).
+    """
+    return tree.args.get("limit") is not None or _rownum_limit(tree) is not None
+
+
+def _literal_int(node: exp.Expression) -> Optional[int]:
+    if isinstance(node, exp.Literal) and not node.is_string and node.name.isdigit():
+        return int(node.name)
+    return None
+
+
+def push_row_limit(tree: exp.Expression, row_limit: int) -> exp.Expression:
+    """
+    Aplica el límite de filas a la consulta exterior (modifica `tree`).
+    """
+    limit = tree.args.get("limit")
+    if isinstance(limit, (exp.Fetch, exp.Limit)):
+        count = limit.args.get("count") if isinstance(limit, exp.Fetch) else limit.expression
+        options = limit.args.get("limit_options")
+        # FETCH FIRST :n / n PERCENT / WITH TIES se dejan como están: las
+        # filas que se leen siguen acotadas por max_rows en run_query
+        if options is not None and (options.args.get("percent") or options.args.get("with_ties")):
+            return tree
+        value = _literal_int(count) if count is not None else None
+        if value is not None and value > row_limit:
+            limit.set("count" if isinstance(limit, exp.Fetch) else "expression", exp.Literal.number(row_limit))
+        return tree
+
+    rownum = _rownum_limit(tree)
+    if rownum is not None:
+        value = _literal_int(rownum.expression)
+        if value is not None and value > row_limit:
+            rownum.replace(exp.LTE(this=rownum.this, expression=exp.Literal.number(row_limit)))
+        return tree
+
+    return tree.limit(row_limit, copy=False)
+
+
+def sanitize_select(sql: str, row_limit: Optional[int] = DEFAULT_ROW_LIMIT) -> str:
+    """
+    Valida la consulta y devuelve la SQL (Oracle) a ejecutar, con el límite
+    de filas aplicado; SQLValidationError si no se puede ejecutar.
+    """
+    tree = parse_select(sql)
+    if row_limit:
+        tree = push_row_limit(tree, row_limit)
+    return tree.sql(dialect="oracle")
@@ -0,0 +1,303 @@
+# src/data/summary_rewrite.py
+
+"""
+Reescritura de consultas agregadas sobre ventas a la tabla resumen más
+pequeña que las cubre (ver src/data/summary_tables.py).
+
+Una consulta es elegible si:
+- es un único SELECT (sin CTE, subconsultas, UNION ni funciones de ventana)
+  con agregados;
+- lee ventas y, como mucho, productos / categorias / tiendas unidas con
+  INNER JOIN por sus claves (v.producto_id = p.id, p.categoria_id = c.id,
+  v.tienda_id = t.id);
+- de ventas solo usa fecha, producto_id y tienda_id fuera de los agregados,
+  y las medidas como SUM/AVG(total | cantidad) y COUNT(*) / COUNT(id).
+
+Las tablas resumen agregan por día; ventas.fecha guarda días (sin hora),
+así que filtrar o agrupar por fecha da lo mismo en ambas.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import sqlglot
+from sqlglot import exp
+
+from src.data.summary_tables import SUMMARY_TABLES, SummaryTable
+
+_COLUMNS = {
+    "ventas": {"id", "fecha", "producto_id", "tienda_id", "cantidad", "total"},
+    "productos": {"id", "nombre", "categoria_id", "precio"},
+    "categorias": {"id", "nombre"},
+    "tiendas": {"id", "nombre", "ciudad"},
+}
+
+# Joins permitidos: (tabla, columna) = (tabla, columna)
+_JOIN_KEYS = {
+    frozenset({("ventas", "producto_id"), ("productos", "id")}),
+    frozenset({("ventas", "tienda_id"), ("tiendas", "id")}),
+    frozenset({("productos", "categoria_id"), ("categorias", "id")}),
+}
+
+_MEASURES = {"total", "cantidad"}
+
+
+@dataclass
+class SummaryPlan:
+    """
+    Consulta analizada: dimensiones que necesita y tablas que la cubren.
+    """
+
+    tree: exp.Select
+    aliases: Dict[str, str]
+    # exp.Column (por id) -> tabla real a la que pertenece
+    resolved: Dict[int, str]
+    dims: Set[str]
+    drop_productos: bool
+    candidates: List[SummaryTable] = field(default_factory=list)
+
+    def choose(self, available: Optional[Iterable[str]] = None) -> Optional[SummaryTable]:
+        if available is None:
+            return self.candidates[0] if self.candidates else None
+        available = {name.lower() for name in available}
+        return next((t for t in self.candidates if t.name in available), None)
+
+    def apply(self, table: SummaryTable) -> str:
+        return _apply(self, table)
+
+
+def _parse(sql: str) -> Optional[exp.Select]:
+    try:
+        tree = sqlglot.parse_one(sql, read="oracle")
+    except sqlglot.errors.ParseError:
+        return None
+    if not isinstance(tree, exp.Select):
+        return None
+    if tree.find(exp.With) or tree.find(exp.Window) or len(list(tree.find_all(exp.Select))) > 1:
+        return None
+    return tree
+
+
+def _tables(tree: exp.Select) -> Optional[Dict[str, str]]:
+    """
+    alias -> tabla; None si hay tablas no admitidas o repetidas.
+    """
+    from_ = tree.args.get("from_")
+    if from_ is None:
+        return None
+    tables = [from_.this] + [join.this for join in tree.args.get("joins") or []]
+    aliases: Dict[str, str] = {}
+    for table in tables:
+        if not isinstance(table, exp.Table) or table.name.lower() not in _COLUMNS:
+            return None
+        name = table.name.lower()
+        alias = (table.alias or table.name).lower()
+        if alias in aliases or name in aliases.values():
+            return None
+        aliases[alias] = name
+    if "ventas" not in aliases.values():
+        return None
+    return aliases
+
+
+def _resolve(column: exp.Column, aliases: Dict[str, str], select_aliases: Set[str]) -> Optional[str]:
+    """
+    Tabla de una columna; "" si es un alias del SELECT; None si no se sabe.
+    """
+    name = column.name.lower()
+    if column.table:
+        table = aliases.get(column.table.lower())
+        return table if table and name in _COLUMNS[table] else None
+    # En ORDER BY, Oracle busca antes entre los alias del SELECT
+    if name in select_aliases and column.find_ancestor(exp.Order) is not None:
+        return ""
+    owners = [t for t in aliases.values() if name in _COLUMNS[t]]
+    if len(owners) == 1:
+        return owners[0]
+    if not owners and name in select_aliases:
+        return ""
+    return None
+
+
+def _join_edges(tree: exp.Select, aliases: Dict[str, str], select_aliases: Set[str]) -> Optional[List[frozenset]]:
+    edges = []
+    for join in tree.args.get("joins") or []:
+        on = join.args.get("on")
+        if on is None or join.args.get("using") or join.side or join.kind not in ("", "INNER"):
+            return None
+        if not isinstance(on, exp.EQ) or not all(isinstance(side, exp.Column) for side in (on.this, on.expression)):
+            return None
+        edge = frozenset(
+            (_resolve(side, aliases, select_aliases), side.name.lower()) for side in (on.this, on.expression)
+        )
+        if edge not in _JOIN_KEYS:
+            return None
+        edges.append(edge)
+    return edges
+
+
+def _aggregate_ok(agg: exp.Expression, table: str, name: str, column: exp.Column) -> bool:
+    """
+    ¿Se puede calcular este uso de la columna desde la tabla resumen?
+    """
+    distinct = isinstance(agg.this, exp.Distinct)
+    direct = column.parent is agg or (distinct and column.parent is agg.this)
+    if table == "ventas" and name in _MEASURES:
+        return isinstance(agg, (exp.Sum, exp.Avg)) and direct and not distinct
+    if table == "ventas" and name == "id":
+        return isinstance(agg, exp.Count) and direct and not distinct
+    if isinstance(agg, (exp.Min, exp.Max)):
+        return True
+    # COUNT(DISTINCT dimensión): la tabla resumen conserva la dimensión
+    return isinstance(agg, exp.Count) and distinct and direct
+
+
+def plan_summary_rewrite(sql: str) -> Optional[SummaryPlan]:
+    """
+    Analiza la consulta; None si no se puede responder desde una tabla resumen.
+    """
+    tree = _parse(sql)
+    if tree is None:
+        return None
+    aliases = _tables(tree)
+    if aliases is None:
+        return None
+
+    aggregates = list(tree.find_all(exp.AggFunc))
+    allowed = (exp.Count, exp.Sum, exp.Avg, exp.Min, exp.Max)
+    if not aggregates or any(not isinstance(agg, allowed) for agg in aggregates):
+        return None
+    for agg in aggregates:
+        if isinstance(agg, exp.Count) and isinstance(agg.this, exp.Star):
+            continue
+        if isinstance(agg, (exp.Sum, exp.Avg)) and not isinstance(agg.this, exp.Column):
+            return None
+
+    select_aliases = {e.alias.lower() for e in tree.expressions if isinstance(e, exp.Alias)}
+    edges = _join_edges(tree, aliases, select_aliases)
+    if edges is None:
+        return None
+    join_columns = {
+        id(side) for join in tree.args.get("joins") or [] for side in (join.args["on"].this, join.args["on"].expression)
+    }
+
+    joined = set(aliases.values())
+    if "categorias" in joined and "productos" not in joined:
+        return None
+
+    resolved: Dict[int, str] = {}
+    used: Set[Tuple[str, str]] = set()
+    for column in tree.find_all(exp.Column):
+        table = _resolve(column, aliases, select_aliases)
+        if id(column) in join_columns:
+            resolved[id(column)] = table
+            continue
+        if table is None:
+            return None
+        if table == "":
+            continue
+        name = column.name.lower()
+        agg = column.find_ancestor(exp.AggFunc)
+        if agg is not None:
+            if not _aggregate_ok(agg, table, name, column):
+                return None
+        elif table == "ventas" and name not in ("fecha", "producto_id", "tienda_id"):
+            return None
+        resolved[id(column)] = table
+        used.add((table, name))
+
+    dims: Set[str] = set()
+    if ("ventas", "producto_id") in used or any(t == "productos" and n != "categoria_id" for t, n in used):
+        dims.add("producto_id")
+    if ("ventas", "tienda_id") in used or "tiendas" in joined:
+        dims.add("tienda_id")
+    if "categorias" in joined or ("productos", "categoria_id") in used:
+        dims.add("categoria_id")
+    # productos solo como puente a categorias (o para leer categoria_id):
+    # la tabla resumen ya trae categoria_id y el join sobra
+    drop_productos = "productos" in joined and "producto_id" not in dims and "categoria_id" in dims
+    if "productos" in joined and not drop_productos:
+        dims.add("producto_id")
+
+    candidates = [t for t in SUMMARY_TABLES if dims <= set(t.dims)]
+    if not candidates:
+        return None
+    return SummaryPlan(tree, aliases, resolved, dims, drop_productos, candidates)
+
+
+def _ventas_alias(aliases: Dict[str, str]) -> str:
+    return next(alias for alias, table in aliases.items() if table == "ventas")
+
+
+def _changes(select: exp.Expression) -> bool:
+    # COUNT(*) / COUNT(id) / AVG(...) se reescriben; COUNT(DISTINCT ...) no
+    return any(
+        isinstance(agg, exp.Avg) or not isinstance(agg.this, exp.Distinct)
+        for agg in select.find_all(exp.Count, exp.Avg)
+    )
+
+
+def _apply(plan: SummaryPlan, table: SummaryTable) -> str:
+    # Se trabaja sobre una copia; las columnas resueltas se emparejan por orden
+    tree = plan.tree.copy()
+    originals = list(plan.tree.find_all(exp.Column))
+    copies = list(tree.find_all(exp.Column))
+    resolved = {id(new): plan.resolved.get(id(old)) for old, new in zip(originals, copies)}
+
+    v = _ventas_alias(plan.aliases)
+    alias_of = {t: a for a, t in plan.aliases.items()}
+
+    # Las expresiones del SELECT que cambian conservan su nombre de columna
+    names = {
+        i: select.sql(dialect="oracle").upper()
+        for i, select in enumerate(tree.expressions)
+        if not isinstance(select, exp.Alias) and _changes(select)
+    }
+
+    # Todas las columnas cualificadas: con la tabla resumen unida a productos
+    # (si se mantiene) un categoria_id suelto sería ambiguo.
+    for column in copies:
+        source = resolved.get(id(column))
+        if not source:
+            continue
+        if source == "productos" and column.name.lower() == "categoria_id" and plan.drop_productos:
+            source = "ventas"
+        column.set("table", exp.to_identifier(v if source == "ventas" else alias_of[source]))
+
+    for agg in list(tree.find_all(exp.Count, exp.Avg)):
+        if isinstance(agg, exp.Count) and isinstance(agg.this, exp.Distinct):
+            continue
+        num_ventas = exp.Sum(this=exp.column("num_ventas", table=v))
+        if isinstance(agg, exp.Count):
+            agg.replace(exp.Coalesce(this=num_ventas, expressions=[exp.Literal.number(0)]))
+        else:
+            measure = exp.column(agg.this.name, table=v)
+            agg.replace(exp.Div(this=exp.Sum(this=measure), expression=num_ventas))
+
+    if plan.drop_productos:
+        for join in list(tree.args.get("joins") or []):
+            if plan.aliases[(join.this.alias or join.this.name).lower()] == "productos":
+                join.pop()
+
+    expressions = list(tree.expressions)
+    for i, name in names.items():
+        expressions[i] = exp.alias_(expressions[i], name, quoted=True)
+    tree.set("expressions", expressions)
+
+    ventas_node = next(t for t in tree.find_all(exp.Table) if t.name.lower() == "ventas")
+    ventas_node.replace(exp.alias_(exp.to_table(table.name), v, table=True))
+    return tree.sql(dialect="oracle")
+
+
+def rewrite_to_summary(sql: str, available: Optional[Iterable[str]] = None) -> Optional[Tuple[str, str]]:
+    """
+    (SQL reescrita, tabla resumen) o None si no es elegible o no hay tabla
+    resumen disponible (`available`: nombres de las tablas al día).
+    """
+    plan = plan_summary_rewrite(sql)
+    if plan is None:
+        return None
+    table = plan.choose(available)
+    if table is None:
+        return None
+    return plan.apply(table), table.name
@@ -0,0 +1,126 @@
+# src/data/summary_tables.py
+
+"""
+Tablas resumen de ventas (agregados diarios) y el SQL para mantenerlas.
+
+Cada tabla agrega ventas por día (TRUNC(fecha)) y unas dimensiones, con las
+medidas `num_ventas` (COUNT(*)), `cantidad` (SUM) y `total` (SUM). Las
+medidas se llaman igual que las columnas de ventas para que SUM(v.total)
+siga valiendo tal cual sobre la tabla resumen.
+
+Se refrescan de forma incremental con una marca de agua por tabla (el
+último ventas.id agregado, en `resumen_watermark`): cada pasada solo agrega
+las ventas con id > marca. Se asume que ventas solo recibe inserciones;
+tras borrados o cambios hay que reconstruir (scripts/summary_tables.py
+--full).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Set, Tuple
+
+WATERMARK_TABLE = "resumen_watermark"
+
+
+@dataclass(frozen=True)
+class SummaryTable:
+    name: str
+    # Dimensiones además de la fecha: producto_id, categoria_id, tienda_id
+    dims: Tuple[str, ...]
+
+
+# De menor a mayor número de filas: la reescritura usa la primera que cubra
+# las dimensiones de la consulta.
+SUMMARY_TABLES = (
+    SummaryTable("resumen_dia", ()),
+    SummaryTable("resumen_dia_categoria", ("categoria_id",)),
+    SummaryTable("resumen_dia_tienda", ("tienda_id",)),
+    SummaryTable("resumen_dia_categoria_tienda", ("categoria_id", "tienda_id")),
+    SummaryTable("resumen_dia_producto", ("producto_id", "categoria_id")),
+    SummaryTable("resumen_dia_producto_tienda", ("producto_id", "categoria_id", "tienda_id")),
+)
+
+MEASURES = ("num_ventas", "cantidad", "total")
+
+# Origen de cada dimensión en la consulta de agregación
+_DIM_SOURCE = {"producto_id": "v.producto_id", "tienda_id": "v.tienda_id", "categoria_id": "p.categoria_id"}
+
+# Marca de agua de cada tabla y último id de ventas, en una sola consulta
+FRESHNESS_SQL = f"SELECT w.tabla, w.ultimo_id, (SELECT NVL(MAX(id), 0) FROM ventas) AS max_id FROM {WATERMARK_TABLE} w"
+
+
+def create_table_sql(table: SummaryTable) -> str:
+    columns = ["fecha DATE NOT NULL"]
+    columns += [f"{dim} NUMBER" for dim in table.dims]
+    columns += ["num_ventas NUMBER NOT NULL", "cantidad NUMBER NOT NULL", "total NUMBER(14,2) NOT NULL"]
+    return f"CREATE TABLE {table.name} (\n    " + ",\n    ".join(columns) + "\n)"
+
+
+def create_index_sql(table: SummaryTable) -> str:
+    short = table.name.replace("resumen_", "ix_", 1)
+    return f"CREATE INDEX {short} ON {table.name} ({', '.join(('fecha',) + table.dims)})"
+
+
+def create_watermark_sql() -> str:
+    return (
+        f"CREATE TABLE {WATERMARK_TABLE} (\n"
+        "    tabla VARCHAR2(30) PRIMARY KEY,\n"
+        "    ultimo_id NUMBER NOT NULL,\n"
+        "    actualizado TIMESTAMP NOT NULL\n"
+        ")"
+    )
+
+
+def delta_sql(table: SummaryTable) -> str:
+    """
+    Agregado de las ventas con id en (:desde, :hasta].
+    """
+    dims = [f"{_DIM_SOURCE[dim]} AS {dim}" for dim in table.dims]
+    group = ["TRUNC(v.fecha)"] + [_DIM_SOURCE[dim] for dim in table.dims]
+    # LEFT JOIN: una venta con producto desconocido cuenta igual (categoría NULL)
+    join = " LEFT JOIN productos p ON p.id = v.producto_id" if "categoria_id" in table.dims else ""
+    return (
+        "SELECT "
+        + ", ".join(["TRUNC(v.fecha) AS fecha"] + dims)
+        + ", COUNT(*) AS num_ventas, SUM(v.cantidad) AS cantidad, SUM(v.total) AS total"
+        + f" FROM ventas v{join}"
+        + " WHERE v.id > :desde AND v.id <= :hasta"
+        + " GROUP BY "
+        + ", ".join(group)
+    )
+
+
+def merge_sql(table: SummaryTable) -> str:
+    """
+    Suma el delta a las filas existentes (mismo día y dimensiones) o las crea.
+    DECODE compara NULL con NULL como iguales.
+    """
+    keys = ["r.fecha = d.fecha"] + [f"DECODE(r.{dim}, d.{dim}, 1, 0) = 1" for dim in table.dims]
+    columns = ("fecha",) + table.dims + MEASURES
+    return (
+        f"MERGE INTO {table.name} r USING ({delta_sql(table)}) d ON ({' AND '.join(keys)})"
+        " WHEN MATCHED THEN UPDATE SET "
+        + ", ".join(f"r.{m} = r.{m} + d.{m}" for m in MEASURES)
+        + f" WHEN NOT MATCHED THEN INSERT ({', '.join(columns)})"
+        + f" VALUES ({', '.join('d.' + c for c in columns)})"
+    )
+
+
+def watermark_sql() -> str:
+    return (
+        f"MERGE INTO {WATERMARK_TABLE} w USING (SELECT :tabla AS tabla, :hasta AS ultimo_id FROM dual) s"
+        " ON (w.tabla = s.tabla)"
+        " WHEN MATCHED THEN UPDATE SET w.ultimo_id = s.ultimo_id, w.actualizado = SYSTIMESTAMP"
+        " WHEN NOT MATCHED THEN INSERT (tabla, ultimo_id, actualizado) VALUES (s.tabla, s.ultimo_id, SYSTIMESTAMP)"
+    )
+
+
+def fresh_tables(rows: Iterable[Any]) -> Set[str]:
+    """
+    Tablas resumen al día (marca de agua >= último id de ventas), a partir de
+    las filas de FRESHNESS_SQL.
+    """
+    fresh = set()
+    for row in rows:
+        if row["ultimo_id"] >= row["max_id"]:
+            fresh.add(str(row["tabla"]).lower())
+    return fresh
@@ -0,0 +1,451 @@
+# src/data/synthetic.py
+
+"""
+Conjunto de datos retail sintético, reproducible y generado con NumPy.
+
+Todo sale de una semilla (DatasetSpec.seed): mismas categorías, tiendas,
+productos y ventas en cada ejecución, sin Faker ni random por fila. Las
+ventas se generan en bloques de BLOCK_ROWS filas, cada uno con su propio
+generador (semilla, bloque): el resultado no depende de cómo se trocee la
+salida y un bloque se puede generar sin los anteriores.
+
+Distribuciones:
+- estacionalidad: más ventas en fin de semana, en diciembre y en enero
+  (rebajas), menos en agosto, y una tendencia creciente suave;
+- sesgo: unas pocas tiendas y productos concentran la mayoría de las ventas
+  (pesos tipo Zipf), y las categorías tienen pesos y precios distintos.
+
+Los bloques de NumPy pueden variar entre versiones de NumPy; para comparar
+benchmarks entre máquinas, exportar una vez (Parquet o CSV, por trozos) y
+cargar esos ficheros en Oracle o en la réplica local (SQLite).
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from itertools import chain, count, islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Self, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from src.data.bulk_load import batches
+from src.data.columnar import ColumnarResult
+from src.data.replica import REPLICA_TABLES, Replica
+
+logger = logging.getLogger(__name__)
+
+# Parte de la definición del conjunto: cambiarlo cambia las ventas
+BLOCK_ROWS = 100_000
+
+# En orden de dependencias (claves ajenas), como la réplica
+TABLES = tuple(REPLICA_TABLES)
+
+DTYPES = {
+    "id": np.int64,
+    "nombre": object,
+    "ciudad": object,
+    "categoria_id": np.int64,
+    "producto_id": np.int64,
+    "tienda_id": np.int64,
+    "precio": np.float64,
+    "fecha": "datetime64[D]",
+    "cantidad": np.int64,
+    "total": np.float64,
+}
+
+# Categoría -> (peso en las ventas, precio mediano)
+CATEGORIAS = {
+    "Bebidas": (0.25, 1.5),
+    "Comida": (0.30, 3.5),
+    "Limpieza": (0.12, 4.0),
+    "Higiene": (0.12, 5.0),
+    "Snacks": (0.15, 2.0),
+    "Mascotas": (0.06, 12.0),
+}
+
+CIUDADES = (
+    "Madrid",
+    "Barcelona",
+    "Valencia",
+    "Sevilla",
+    "Zaragoza",
+    "Málaga",
+    "Murcia",
+    "Palma",
+    "Bilbao",
+    "Alicante",
+    "Córdoba",
+    "Valladolid",
+    "Vigo",
+    "Gijón",
+    "Granada",
+    "Oviedo",
+)
+
+# Lunes..domingo y enero..diciembre
+_WEEKDAY = np.array([0.85, 0.85, 0.9, 0.95, 1.15, 1.35, 0.95])
+_MONTH = np.array([1.1, 0.85, 0.9, 0.95, 1.0, 1.0, 1.05, 0.8, 0.95, 1.0, 1.1, 1.5])
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    seed: int = 42
+    ventas: int = 8000
+    productos: int = 80
+    tiendas: int = 12
+    start: date = date(2023, 1, 1)
+    days: int = 450
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "start": self.start.isoformat(), "block_rows": BLOCK_ROWS}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DatasetSpec":
+        fields = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**{**fields, "start": date.fromisoformat(fields["start"])})
+
+
+def _cdf(weights: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(weights, dtype=np.float64)
+    return cdf / cdf[-1]
+
+
+def _sample(cdf: np.ndarray, u: np.ndarray) -> np.ndarray:
+    # Índices según los pesos acumulados (searchsorted sobre uniformes)
+    return np.minimum(np.searchsorted(cdf, u, side="right"), len(cdf) - 1)
+
+
+def _zipf(rng: np.random.Generator, n: int, exponent: float) -> np.ndarray:
+    # Pesos 1/rango^s con el rango repartido al azar
+    return 1.0 / (rng.permutation(n) + 1.0) ** exponent
+
+
+def day_weights(spec: DatasetSpec) -> np.ndarray:
+    """
+    Peso relativo de cada día (estacionalidad semanal, mensual y tendencia).
+    """
+    days = np.datetime64(spec.start, "D") + np.arange(spec.days + 1)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+    month = days.astype("datetime64[M]").astype(np.int64) % 12
+    trend = 1.0 + 0.15 * np.arange(spec.days + 1) / max(spec.days, 1)
+    return _WEEKDAY[weekday] * _MONTH[month] * trend
+
+
+class SyntheticDataset:
+    """
+    Tablas del conjunto definido por `spec`. Las dimensiones (pequeñas) se
+    generan al crear el objeto; las ventas, bloque a bloque en chunks().
+    """
+
+    def __init__(self, spec: Optional[DatasetSpec] = None):
+        spec = spec or DatasetSpec()
+        self.spec = spec
+        rng = np.random.default_rng([spec.seed, 0])
+        names = list(CATEGORIAS)
+        weights = np.array([CATEGORIAS[n][0] for n in names])
+        medians = np.array([CATEGORIAS[n][1] for n in names])
+
+        self._dims: Dict[str, ColumnarResult] = {}
+        self._dims["categorias"] = ColumnarResult(
+            ["id", "nombre"], [np.arange(1, len(names) + 1), np.array(names, dtype=object)]
+        )
+
+        categoria = _sample(_cdf(weights), rng.random(spec.productos))
+        precio = np.clip(np.round(medians[categoria] * rng.lognormal(0.0, 0.5, spec.productos), 2), 0.5, 60.0)
+        # "Bebidas 001", "Bebidas 002"...: número dentro de su categoría
+        seen = np.zeros(len(names), dtype=np.int64)
+        product_names = []
+        for c in categoria:
+            seen[c] += 1
+            product_names.append(f"{names[c]} {seen[c]:03d}")
+        self._dims["productos"] = ColumnarResult(
+            ["id", "nombre", "categoria_id", "precio"],
+            [np.arange(1, spec.productos + 1), np.array(product_names, dtype=object), categoria + 1, precio],
+        )
+
+        ciudad = np.array([CIUDADES[i % len(CIUDADES)] for i in range(spec.tiendas)], dtype=object)
+        self._dims["tiendas"] = ColumnarResult(
+            ["id", "nombre", "ciudad"],
+            [
+                np.arange(1, spec.tiendas + 1),
+                np.array([f"Tienda {c} {i // len(CIUDADES) + 1}" for i, c in enumerate(ciudad)], dtype=object),
+                ciudad,
+            ],
+        )
+
+        self._precio = precio
+        self._day_cdf = _cdf(day_weights(spec))
+        self._store_cdf = _cdf(_zipf(rng, spec.tiendas, 0.9))
+        # Popularidad del producto: peso de su categoría x Zipf
+        self._product_cdf = _cdf(weights[categoria] * _zipf(rng, spec.productos, 1.1))
+
+    @property
+    def blocks(self) -> int:
+        return -(-self.spec.ventas // BLOCK_ROWS)
+
+    def ventas_block(self, block: int) -> ColumnarResult:
+        first = block * BLOCK_ROWS
+        n = min(BLOCK_ROWS, self.spec.ventas - first)
+        rng = np.random.default_rng([self.spec.seed, 1, block])
+        fecha = np.datetime64(self.spec.start, "D") + _sample(self._day_cdf, rng.random(n))
+        producto = _sample(self._product_cdf, rng.random(n))
+        tienda = _sample(self._store_cdf, rng.random(n))
+        cantidad = np.minimum(1 + rng.poisson(1.2, n), 12)
+        total = np.round(cantidad * self._precio[producto] * rng.uniform(0.9, 1.1, n), 2)
+        return ColumnarResult(
+            list(REPLICA_TABLES["ventas"]),
+            [np.arange(first + 1, first + n + 1), fecha, producto + 1, tienda + 1, cantidad, total],
+        )
+
+    def chunks(self, table: str) -> Iterator[ColumnarResult]:
+        if table != "ventas":
+            yield self._dims[table]
+            return
+        for block in range(self.blocks):
+            yield self.ventas_block(block)
+
+
+# ---- ficheros ----
+
+SPEC_FILE = "dataset.json"
+
+
+def _csv_column(array: np.ndarray) -> List[str]:
+    if array.dtype.kind == "M":
+        return np.datetime_as_string(array, unit="D").tolist()
+    return [str(v) for v in array.tolist()]
+
+
+def _typed(table: str, columns: Dict[str, Sequence]) -> ColumnarResult:
+    names = list(REPLICA_TABLES[table])
+    return ColumnarResult(names, [np.asarray(columns[name], dtype=DTYPES[name]) for name in names])
+
+
+def _check_format(fmt: str) -> None:
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow)") from e
+    elif fmt != "csv":
+        raise ValueError(f"Formato no soportado: {fmt} (parquet o csv)")
+
+
+def _open(path: Path, fmt: str) -> "_OutputFile":
+    return _ParquetFile(path) if fmt == "parquet" else _CsvFile(path)
+
+
+def _export_path(directory: Path, table: str, fmt: str, part: int) -> Path:
+    if table == "ventas":
+        return directory / "ventas" / f"part-{part:05d}.{fmt}"
+    return directory / f"{table}.{fmt}"
+
+
+class _OutputFile:
+    """
+    Fichero de export_dataset como context manager: se escribe en un
+    temporal junto al destino y solo se renombra al salir sin error. Si la
+    escritura falla, se cierra y se borra: ni descriptores abiertos ni
+    ficheros a medias con el nombre definitivo.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp_path = path.with_name(f".{path.name}.tmp")
+
+    def write(self, chunk: ColumnarResult) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        ok = exc_type is None
+        try:
+            self.close()
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            if ok:
+                os.replace(self.tmp_path, self.path)
+            else:
+                self.tmp_path.unlink(missing_ok=True)
+
+
+class _CsvFile(_OutputFile):
+    def __init__(self, path: Path):
+        super().__init__(path)
+        # Se cierra en close(), al salir del bloque with de export_dataset
+        self._file = open(self.tmp_path, "w", newline="", encoding="utf-8")  # noqa: SIM115
+        self._writer = csv.writer(self._file)
+        self._header = False
+
+    def write(self, chunk: ColumnarResult) -> None:
+        if not self._header:
+            self._writer.writerow(chunk.columns)
+            self._header = True
+        self._writer.writerows(zip(*(_csv_column(a) for a in chunk.arrays)))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetFile(_OutputFile):
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._writer = None
+
+    def write(self, chunk: ColumnarResult) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({name: array for name, array in zip(chunk.columns, chunk.arrays)})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.tmp_path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def export_dataset(
+    dataset: SyntheticDataset, directory: str | Path, fmt: str = "parquet", rows_per_file: int = 1_000_000
+) -> Dict[str, int]:
+    """
+    Escribe el conjunto en `directory` (Parquet o CSV) y su definición en
+    dataset.json. Un fichero por tabla de dimensiones; las ventas en
+    ventas/part-NNNNN con hasta rows_per_file filas cada uno (en Parquet, un
+    row group por bloque). Devuelve las filas escritas por tabla.
+    """
+    directory = Path(directory)
+    _check_format(fmt)
+    written: Dict[str, int] = {}
+    ventas_total = 0.0
+    blocks_per_file = max(1, rows_per_file // BLOCK_ROWS)
+    for table in TABLES:
+        start = time.perf_counter()
+        written[table] = 0
+        # Un solo fichero por dimensión; las ventas, en partes de
+        # blocks_per_file bloques
+        chunks = iter(dataset.chunks(table))
+        for part in count():
+            first = next(chunks, None)
+            if first is None:
+                break
+            rest = islice(chunks, blocks_per_file - 1) if table == "ventas" else chunks
+            with _open(_export_path(directory, table, fmt, part), fmt) as out:
+                for chunk in chain([first], rest):
+                    out.write(chunk)
+                    written[table] += len(chunk)
+                    if table == "ventas":
+                        ventas_total += float(chunk.column("total").sum())
+        logger.info("%s: %d filas en %.2fs", table, written[table], time.perf_counter() - start)
+    # Suma de ventas.total: para comprobar que otra máquina generó lo mismo
+    spec = {**dataset.spec.to_dict(), "format": fmt, "rows": written, "ventas_total": round(ventas_total, 2)}
+    (directory / SPEC_FILE).write_text(json.dumps(spec, indent=2), encoding="utf-8")
+    return written
+
+
+class DatasetFiles:
+    """
+    Conjunto exportado con export_dataset, leído por trozos: la misma
+    interfaz chunks(table) que SyntheticDataset.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / SPEC_FILE).read_text(encoding="utf-8"))
+        self.fmt = meta["format"]
+        self.rows: Dict[str, int] = meta["rows"]
+        self.spec = DatasetSpec.from_dict(meta)
+
+    def _files(self, table: str) -> List[Path]:
+        if table == "ventas":
+            return sorted((self.directory / "ventas").glob(f"part-*.{self.fmt}"))
+        return [self.directory / f"{table}.{self.fmt}"]
+
+    def chunks(self, table: str) -> Iterator[ColumnarResult]:
+        for path in self._files(table):
+            yield from self._read_parquet(table, path) if self.fmt == "parquet" else self._read_csv(table, path)
+
+    @staticmethod
+    def _read_parquet(table: str, path: Path) -> Iterator[ColumnarResult]:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=BLOCK_ROWS):
+            yield _typed(
+                table, {name: batch.column(name).to_numpy(zero_copy_only=False) for name in batch.schema.names}
+            )
+
+    @staticmethod
+    def _read_csv(table: str, path: Path) -> Iterator[ColumnarResult]:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for rows in batches(reader, BLOCK_ROWS):
+                yield _typed(table, dict(zip(header, zip(*rows))))
+
+
+# ---- carga ----
+
+
+def load_replica(source, replica: Replica) -> Dict[str, int]:
+    """
+    Sustituye el contenido de la réplica por el del conjunto (generado o
+    leído de ficheros) y la marca como sincronizada hasta el último id.
+    """
+    loaded: Dict[str, int] = {}
+    for table in TABLES:
+        last_id, loaded[table] = 0, 0
+        with replica.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {table}"))
+            for chunk in source.chunks(table):
+                loaded[table] += replica.write(table, chunk.to_tuples(), conn=conn)
+                if len(chunk):
+                    last_id = int(chunk.column("id")[-1])
+            replica.mark_synced(table, last_id, conn=conn)
+    return loaded
+
+
+def insert_sql(table: str) -> str:
+    columns = REPLICA_TABLES[table]
+    values = ", ".join(f":{i}" for i in range(1, len(columns) + 1))
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+
+
+def load_oracle(source, conn, batch_size: int = 10_000) -> Dict[str, int]:
+    """
+    Vacía las tablas retail de Oracle y carga el conjunto con sus ids, con
+    executemany por lotes y un commit por trozo. Al final las columnas
+    identidad siguen desde el id más alto cargado.
+    """
+    cur = conn.cursor()
+    cur.execute("TRUNCATE TABLE ventas")
+    for table in reversed(TABLES[:-1]):
+        cur.execute(f"DELETE FROM {table}")
+    conn.commit()
+
+    loaded: Dict[str, int] = {}
+    for table in TABLES:
+        loaded[table] = 0
+        statement = insert_sql(table)
+        for chunk in source.chunks(table):
+            for batch in batches(chunk.to_tuples(), batch_size):
+                cur.executemany(statement, batch)
+                loaded[table] += len(batch)
+            conn.commit()
+        cur.execute(f"ALTER TABLE {table} MODIFY id GENERATED BY DEFAULT AS IDENTITY (START WITH LIMIT VALUE)")
+    cur.close()
+    return loaded
@@ -0,0 +1,253 @@
+# src/data/table_format.py
+
+"""
+Tablas markdown de resultados de consultas: una sola implementación para el
+grafo SQL, la tool query_retail_database, ColumnarResult y la demo.
+
+Las filas se formatean por bloques de BLOCK_ROWS, con un map(str) por
+bloque y las líneas montadas con joins (sin str() y row.get() por celda), y
+iter_markdown() devuelve la tabla por trozos de líneas: una tabla grande se
+puede escribir o enviar sin construir nunca un único string con todo.
+
+Opciones (TableFormat):
+- max_rows: filas como máximo; si había más, una fila final de "…".
+- max_width: caracteres por celda; lo que sobra se corta con "…".
+- locale: "es" (1.234,56 €) o "en" (€1,234.56) para los números; las
+  columnas de importes (total, importe, precio...) llevan el símbolo €.
+  Sin locale, los valores se muestran con str() como siempre.
+
+Las barras verticales y los saltos de línea dentro de un valor se escapan
+para no romper la tabla.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+BLOCK_ROWS = 1024
+ELLIPSIS = "…"
+
+# Separador de miles y de decimales de cada locale
+LOCALES = {"es": (".", ","), "en": (",", ".")}
+# Del formato de Python (1,234.56) al de cada locale
+_TRANSLATIONS = {name: str.maketrans({",": thousands, ".": decimal}) for name, (thousands, decimal) in LOCALES.items()}
+
+# Columnas de importes (en euros) cuando no se indican: total, importe,
+# precio, ingresos, facturación... pero no num_ventas ni cantidad
+_MONEY_NAME = re.compile(r"total|importe|precio|ingreso|factura", re.IGNORECASE)
+_COUNT_NAME = re.compile(r"^(num|n|cantidad|unidades)(_|$)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TableFormat:
+    max_rows: Optional[int] = None
+    max_width: Optional[int] = None
+    locale: Optional[str] = None
+    # None: las columnas de importes se detectan por el nombre
+    money_columns: Optional[Tuple[str, ...]] = None
+    empty: str = "No hay resultados."
+
+    def __post_init__(self):
+        if self.locale and self.locale not in LOCALES:
+            raise ValueError(f"Locale no soportado: {self.locale!r} (opciones: {', '.join(LOCALES)})")
+        if self.max_width is not None and self.max_width < 2:
+            raise ValueError("max_width tiene que ser al menos 2")
+
+    def is_money(self, column: str) -> bool:
+        if self.money_columns is not None:
+            return column in self.money_columns
+        return bool(_MONEY_NAME.search(column)) and not _COUNT_NAME.search(column)
+
+
+def table_format_from_settings(**overrides: Any) -> TableFormat:
+    """
+    TableFormat con TABLE_LOCALE y TABLE_MAX_WIDTH (0 = sin límite).
+    """
+    from src.config.settings import get_settings
+
+    settings = get_settings()
+    options: Dict[str, Any] = {
+        "locale": settings.table_locale or None,
+        "max_width": settings.table_max_width or None,
+    }
+    options.update(overrides)
+    return TableFormat(**options)
+
+
+def format_number(value: Any, locale: str, money: bool = False) -> str:
+    """
+    Número con separador de miles y dos decimales (los enteros, sin
+    decimales salvo en importes) según `locale`; None y NaN, vacío.
+    """
+    if value is None or isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+        return "" if value is None else str(value)
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    text = f"{value:,}" if isinstance(value, int) and not money else f"{value:,.2f}"
+    text = text.translate(_TRANSLATIONS[locale])
+    if not money:
+        return text
+    return f"{text} €" if locale == "es" else f"€{text}"
+
+
+def format_cells(values: Sequence[Any]) -> List[str]:
+    """
+    str() de cada valor (None = celda vacía), sin escapar ni recortar (eso
+    lo hace finish_cells).
+    """
+    texts = list(map(str, values))
+    # Buscar "None" entre los textos es más rápido que None entre los valores
+    # (Decimal.__eq__ es lento)
+    if "None" in texts:
+        texts = ["" if value is None else text for value, text in zip(values, texts)]
+    return texts
+
+
+def format_column(values: Sequence[Any], column: str, fmt: TableFormat) -> List[str]:
+    """
+    Textos de una columna de valores Python, con el locale de `fmt`.
+    """
+    if fmt.locale:
+        money = fmt.is_money(column)
+        return [format_number(value, fmt.locale, money) for value in values]
+    return format_cells(values)
+
+
+def interleave(text_columns: Sequence[List[str]]) -> List[str]:
+    """
+    De textos por columna a textos fila a fila (la forma de block_lines).
+    """
+    return list(chain.from_iterable(zip(*text_columns)))
+
+
+def format_block(block: Sequence[Sequence[Any]], columns: Sequence[str], fmt: TableFormat) -> List[str]:
+    """
+    Textos de un bloque de filas-tupla, fila a fila. Sin locale, todas las
+    celdas en un solo map(str); con locale, columna a columna (importes).
+    """
+    if fmt.locale:
+        return interleave([format_column(list(values), name, fmt) for values, name in zip(zip(*block), columns)])
+    return format_cells(list(chain.from_iterable(block)))
+
+
+def finish_cells(texts: List[str], fmt: TableFormat) -> List[str]:
+    """
+    Escapa | y saltos de línea y recorta a max_width. Solo se recorre celda
+    a celda si alguna lo necesita.
+    """
+    joined = "\x00".join(texts)
+    if "|" in joined or "\n" in joined or "\r" in joined:
+        texts = [_escape(text) for text in texts]
+    width = fmt.max_width
+    if width and texts and max(map(len, texts)) > width:
+        texts = [text if len(text) <= width else text[: width - 1] + ELLIPSIS for text in texts]
+    return texts
+
+
+def _escape(text: str) -> str:
+    return text.replace("|", "\\|").replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _line(cells: Sequence[str]) -> str:
+    return f"| {' | '.join(cells)} |"
+
+
+def header_lines(columns: Sequence[str], fmt: TableFormat) -> str:
+    return f"{_line(finish_cells(list(columns), fmt))}\n{_line(['---'] * len(columns))}"
+
+
+def marker_line(n_columns: int) -> str:
+    """
+    Fila final de "…": la tabla tiene más filas que las mostradas.
+    """
+    return _line([ELLIPSIS] * n_columns)
+
+
+def block_lines(texts: List[str], n_columns: int, fmt: TableFormat) -> str:
+    """
+    Líneas de un bloque a partir de los textos fila a fila, unidas por
+    saltos de línea (todo en joins, sin un paso de Python por fila).
+    """
+    cells = iter(finish_cells(texts, fmt))
+    return "| " + " |\n| ".join(map(" | ".join, zip(*[cells] * n_columns))) + " |"
+
+
+def iter_markdown(
+    columns: Sequence[str], rows: Iterable[Sequence[Any]], fmt: Optional[TableFormat] = None
+) -> Iterator[str]:
+    """
+    Tabla markdown por trozos a partir de filas-tupla en el orden de
+    `columns`: la cabecera, un trozo por bloque de BLOCK_ROWS filas y la
+    marca de corte. Cada trozo son líneas completas sin el salto final, así
+    que "\\n".join(...) da la tabla entera. Lee las filas por bloques: el
+    iterador puede ser un cursor. Sin filas, solo fmt.empty.
+    """
+    fmt = fmt or TableFormat()
+    columns = list(columns)
+    if not columns:
+        yield fmt.empty
+        return
+    rows = iter(rows)
+    if fmt.max_rows is not None:
+        # Una fila de más para saber si hay que marcar la tabla como cortada
+        rows = islice(rows, fmt.max_rows + 1)
+    shown = 0
+    more = False
+    started = False
+    while True:
+        block = list(islice(rows, BLOCK_ROWS))
+        if not block:
+            break
+        if not started:
+            yield header_lines(columns, fmt)
+            started = True
+        if fmt.max_rows is not None and shown + len(block) > fmt.max_rows:
+            block = block[: fmt.max_rows - shown]
+            more = True
+        if block:
+            yield block_lines(format_block(block, columns, fmt), len(columns), fmt)
+            shown += len(block)
+    if not started:
+        yield fmt.empty
+    elif more:
+        yield marker_line(len(columns))
+
+
+def iter_markdown_dicts(rows: Iterable[Dict[str, Any]], fmt: Optional[TableFormat] = None) -> Iterator[str]:
+    """
+    Como iter_markdown para filas-dict: las columnas son las claves de la
+    primera fila; las que falten en otra fila quedan vacías.
+    """
+    fmt = fmt or TableFormat()
+    rows = iter(rows)
+    first = next(rows, None)
+    if not first:
+        yield fmt.empty
+        return
+    columns = list(first)
+    getter = itemgetter(*columns)
+    single = len(columns) == 1
+
+    def values(row: Dict[str, Any]) -> tuple:
+        try:
+            found = getter(row)
+        except KeyError:
+            return tuple(row.get(column) for column in columns)
+        return (found,) if single else found
+
+    yield from iter_markdown(columns, map(values, chain([first], rows)), fmt)
+
+
+def render_markdown(columns: Sequence[str], rows: Iterable[Sequence[Any]], fmt: Optional[TableFormat] = None) -> str:
+    return "\n".join(iter_markdown(columns, rows, fmt))
+
+
+def rows_to_markdown(rows: Iterable[Dict[str, Any]], fmt: Optional[TableFormat] = None) -> str:
+    """
+    Tabla markdown de una lista de dicts (la forma de run_query).
+    """
+    return "\n".join(iter_markdown_dicts(rows, fmt))
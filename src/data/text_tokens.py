@@ -0,0 +1,36 @@
+# src/data/text_tokens.py
+
+"""
+Normalización de texto compartida por el clasificador de intención y el
+índice BM25 de la documentación: minúsculas, sin tildes (salvo ñ), sin
+palabras vacías y con bigramas.
+"""
+
+import re
+import unicodedata
+from itertools import pairwise
+from typing import AbstractSet, List
+
+# El guion bajo es parte del token: identificadores como num_ventas no se
+# parten, y por eso los bigramas se unen con "__"
+_TOKEN_RE = re.compile(r"[a-z0-9ñ_]+")
+
+BIGRAM_SEPARATOR = "__"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minúsculas y sin tildes, conservando la ñ.
+    """
+    text = text.lower().replace("ñ", "\0")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).replace("\0", "ñ")
+
+
+def tokenize(text: str, stopwords: AbstractSet[str] = frozenset()) -> List[str]:
+    """
+    Palabras normalizadas sin `stopwords`, seguidas de sus bigramas para que
+    las coincidencias de frase ("ticket medio") cuenten más.
+    """
+    words = [w for w in _TOKEN_RE.findall(normalize_text(text)) if w not in stopwords]
+    return words + [f"{a}{BIGRAM_SEPARATOR}{b}" for a, b in pairwise(words)]
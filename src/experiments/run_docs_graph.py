@@ -12,6 +12,8 @@ def main():
     print("\n=== ESTADO FINAL DOCS AGENT ===")
     print("question:", result.get("question"))
     print("retrieved_docs:", len(result.get("retrieved_docs", [])))
+    timings = result.get("retrieval_timings", {})
+    print("retrieval_ms:", {stage: round(1000 * t, 2) for stage, t in timings.items()})
     print("\n=== RESPUESTA ===")
     print(result.get("answer", ""))
 
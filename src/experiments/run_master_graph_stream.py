@@ -0,0 +1,42 @@
+# src/experiments/run_master_graph_stream.py
+
+import time
+
+from src.graphs.master_graph import stream_master_graph
+
+
+def main():
+    question = (
+        "Quiero entender qué categoría vende más en términos de importe total y "
+        "además que me expliques el contexto de negocio de esas categorías."
+    )
+
+    start = time.perf_counter()
+    first_byte = None
+    current_node = None
+
+    for event in stream_master_graph(question):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+
+        kind = event["event"]
+        if kind == "token":
+            if event["node"] != current_node:
+                current_node = event["node"]
+                print(f"\n\n--- {current_node} ---")
+            print(event["content"], end="", flush=True)
+        elif kind == "intent":
+            print(f"intent: {event['intent']} ({event['reason']})")
+        elif kind == "sql":
+            print(f"\n--- SQL ---\n{event['sql_query']}")
+        elif kind == "sql_table":
+            print(f"\n--- TABLA ---\n{event['markdown']}")
+        elif kind == "pdf":
+            print(f"\n\n--- PDF PATH ---\n{event['pdf_path']}")
+
+    total = time.perf_counter() - start
+    print(f"\n\nPrimer evento: {first_byte:.2f}s | Total: {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
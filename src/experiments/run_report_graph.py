@@ -2,6 +2,7 @@
 
 from src.graphs.report_agent_graph import build_report_agent_graph
 
+
 def main():
     app = build_report_agent_graph()
 
@@ -10,7 +11,7 @@ def main():
         "intent": "mixed",
         "sql_answer": "La categoría con más ventas es Limpieza con 220.326 €.",
         "sql_markdown": "| categoria | total |\n|---|---|\n| Limpieza | 220326 |",
-        "docs_answer": "La categoría Limpieza incluye productos domésticos esenciales."
+        "docs_answer": "La categoría Limpieza incluye productos domésticos esenciales.",
     }
 
     result = app.invoke(test_state)
@@ -21,5 +22,6 @@ def main():
     print("\n=== PDF GENERADO ===")
     print(result.get("pdf_path"))
 
+
 if __name__ == "__main__":
     main()
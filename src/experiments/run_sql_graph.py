@@ -11,8 +11,8 @@ def main():
 
     print("\n=== ESTADO FINAL DEL GRAFO ===")
     for k, v in result_state.items():
-        if k in ("sql_rows",):
-            print(f"{k}: {type(v)} (len={len(v)})")
+        if k in ("sql_result",):
+            print(f"{k}: {v.columns} (filas={len(v)}, {v.nbytes} bytes)")
         else:
             print(f"{k}: {v if len(str(v)) < 500 else str(v)[:500] + '...'}")
 
@@ -3,12 +3,13 @@
 # src/experiments/sql_agent_demo.py
 
 import re
-from typing import List, Dict, Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from src.config.llm import get_llm
 from src.data.db import run_query
+from src.data.sql_sanitizer import DEFAULT_ROW_LIMIT, SQLValidationError, sanitize_select
+from src.data.table_format import rows_to_markdown, table_format_from_settings
 
 
 def extract_sql(text: str) -> str:
@@ -22,40 +23,6 @@ def extract_sql(text: str) -> str:
     return text.strip()
 
 
-def rows_to_markdown(rows: List[Dict[str, Any]]) -> str:
-    if not rows:
-        return "No hay resultados."
-
-    headers = list(rows[0].keys())
-    header_line = "| " + " | ".join(headers) + " |"
-    separator_line = "| " + " | ".join(["---"] * len(headers)) + " |"
-
-    row_lines = []
-    for row in rows:
-        values = [str(row.get(h, "")) for h in headers]
-        row_lines.append("| " + " | ".join(values) + " |")
-
-    return "\n".join([header_line, separator_line] + row_lines)
-
-def sanitize_sql_for_oracle(sql: str) -> str:
-    """
-    Limpia la query:
-    - Quita punto y coma final.
-    - Opcionalmente añade FETCH FIRST n ROWS ONLY si no está.
-    """
-    cleaned = sql.strip()
-
-    # Quitar ; final si lo hay
-    if cleaned.endswith(";"):
-        cleaned = cleaned[:-1].strip()
-
-    # Si no hay FETCH FIRST, añadimos un límite de seguridad
-    lower = cleaned.lower()
-    if "fetch first" not in lower:
-        cleaned = f"{cleaned}\nFETCH FIRST 50 ROWS ONLY"
-
-    return cleaned
-
 def run_simple_sql_agent(question: str):
     llm = get_llm()
 
@@ -84,7 +51,13 @@ def run_simple_sql_agent(question: str):
     print("\n=== SQL EXTRAÍDO ===")
     print(sql_query_raw)
 
-    sql_query = sanitize_sql_for_oracle(sql_query_raw)
+    try:
+        # Una fila más de las que se muestran, para marcar la tabla como cortada
+        sql_query = sanitize_select(sql_query_raw, row_limit=DEFAULT_ROW_LIMIT + 1)
+    except SQLValidationError as e:
+        print("\n❌ SQL rechazado antes de ejecutarlo:")
+        print(e)
+        return
     print("\n=== SQL TRAS SANEADO ===")
     print(sql_query)
 
@@ -97,15 +70,14 @@ def run_simple_sql_agent(question: str):
         return
 
     print(f"\n=== Nº DE FILAS DEVUELTAS: {len(rows)} ===")
-    md_table = rows_to_markdown(rows[:50])
+    md_table = rows_to_markdown(rows, table_format_from_settings(max_rows=DEFAULT_ROW_LIMIT))
     print("\n=== TABLA MARKDOWN (PREVISUALIZACIÓN) ===")
     print(md_table)
 
     # 3) Le pedimos al LLM que explique el resultado
     system_explain = SystemMessage(
         content=(
-            "Eres un analista de datos retail. "
-            "Explicas resultados de consultas SQL de forma clara y en castellano."
+            "Eres un analista de datos retail. " "Explicas resultados de consultas SQL de forma clara y en castellano."
         )
     )
 
@@ -124,7 +96,6 @@ def run_simple_sql_agent(question: str):
     print(final_response.content)
 
 
-
 if __name__ == "__main__":
     pregunta = "Dame las ventas totales por categoría, ordenadas de mayor a menor."
     run_simple_sql_agent(pregunta)
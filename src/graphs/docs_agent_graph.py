@@ -1,17 +1,22 @@
 # src/graphs/docs_agent_graph.py
 
-from typing import TypedDict, List
+from typing import Dict, TypedDict, List, Tuple
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from langgraph.graph import StateGraph, END
-from langchain_ollama import ChatOllama
-from langchain_community.document_loaders import TextLoader
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
 
+from src.config.embeddings import get_embeddings, get_embeddings_id
+from src.config.lazy import LazyResource
+from src.config.llm import get_llm
+from src.config.settings import get_settings
+from src.data.docs_index import load_or_update_index
+from src.data.hybrid_retrieval import HybridRetriever
 
 DOCS_DIR = Path("docs")
 
@@ -19,45 +24,88 @@ DOCS_DIR = Path("docs")
 class DocsAgentState(TypedDict, total=False):
     question: str
     retrieved_docs: List[Document]
+    retrieval_timings: Dict[str, float]
     answer: str
 
 
-# ---- Cargar documentos y vectorstore (simple, en memoria) ----
+# ---- Vectorstore (persistido en disco) ----
 
-def load_docs() -> List[Document]:
-    docs: List[Document] = []
-    for path in DOCS_DIR.glob("*.md"):
-        loader = TextLoader(str(path), encoding="utf-8")
-        docs.extend(loader.load())
-    return docs
+
+def _build_retriever():
+    # El índice se carga de disco y solo se re-embeben los ficheros de docs/
+    # que han cambiado desde la última vez.
+    settings = get_settings()
+    vectorstore, _ = load_or_update_index(
+        DOCS_DIR,
+        Path(settings.docs_index_dir),
+        get_embeddings(),
+        embeddings_id=get_embeddings_id(),
+        chunk_size=settings.docs_chunk_size,
+        chunk_overlap=settings.docs_chunk_overlap,
+    )
+    # BM25 + FAISS (o solo uno de los dos, según DOCS_RETRIEVAL_MODE)
+    return HybridRetriever(
+        vectorstore,
+        mode=settings.docs_retrieval_mode,
+        k=settings.docs_retrieval_k,
+        candidates=settings.docs_retrieval_candidates,
+    )
 
 
-# Embeddings y vectorstore globales (en memoria)
-_docs = load_docs()
-_embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-_vectorstore = FAISS.from_documents(_docs, _embeddings)
-_retriever = _vectorstore.as_retriever(search_kwargs={"k": 4})
+# Retriever global, creado en la primera pregunta (o en warmup()): cargar el
+# modelo de embeddings y el índice FAISS cuesta varios segundos y no debe
+# pagarse solo por importar el módulo.
+_retriever = LazyResource(_build_retriever, name="docs_retriever")
 
+# Pool de hilos para la parte CPU (embedding de la pregunta + búsqueda FAISS)
+# en la ruta async, así no se bloquea el event loop.
+_retrieval_executor: ThreadPoolExecutor | None = None
 
-def get_llm():
-    # reutilizamos el mismo modelo local
-    return ChatOllama(model="mistral", base_url="http://localhost:11434", temperature=0)
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    global _retrieval_executor
+    if _retrieval_executor is None:
+        _retrieval_executor = ThreadPoolExecutor(
+            max_workers=get_settings().retrieval_executor_workers,
+            thread_name_prefix="docs-retrieval",
+        )
+    return _retrieval_executor
 
 
 # ---- Nodos del grafo ----
 
+
+def _retrieve(question: str) -> Tuple[List[Document], Dict[str, float]]:
+    # Documentos + segundos de cada etapa (lexical / dense / fusion)
+    return _retriever.search(question)
+
+
 def retrieve_docs_node(state: DocsAgentState) -> DocsAgentState:
     question = state["question"]
-    # En las versiones nuevas de LangChain, los retrievers son Runnable:
-    docs = _retriever.invoke(question)
-    return {**state, "retrieved_docs": docs}
+    docs, timings = _retrieve(question)
+    return {**state, "retrieved_docs": docs, "retrieval_timings": timings}
 
-def answer_from_docs_node(state: DocsAgentState) -> DocsAgentState:
-    llm = get_llm()
+
+async def aretrieve_docs_node(state: DocsAgentState) -> DocsAgentState:
+    question = state["question"]
+    loop = asyncio.get_running_loop()
+    # La primera vez también construye el retriever, fuera del event loop
+    docs, timings = await loop.run_in_executor(get_retrieval_executor(), _retrieve, question)
+    return {**state, "retrieved_docs": docs, "retrieval_timings": timings}
+
+
+def _doc_label(doc: Document) -> str:
+    # Origen del fragmento, para que el LLM pueda citarlo
+    label = Path(doc.metadata.get("source", "")).name
+    section = doc.metadata.get("section")
+    return f"({label} § {section})" if section else f"({label})"
+
+
+def _answer_messages(state: DocsAgentState):
     question = state["question"]
     docs = state.get("retrieved_docs", [])
 
-    context = "\n\n".join([f"[{i}] {d.page_content}" for i, d in enumerate(docs)])
+    context = "\n\n".join([f"[{i}] {_doc_label(d)}\n{d.page_content}" for i, d in enumerate(docs)])
 
     system_msg = SystemMessage(
         content=(
@@ -74,15 +122,26 @@ def answer_from_docs_node(state: DocsAgentState) -> DocsAgentState:
         )
     )
 
-    resp = llm.invoke([system_msg, user_msg])
+    return [system_msg, user_msg]
+
+
+def answer_from_docs_node(state: DocsAgentState) -> DocsAgentState:
+    llm = get_llm("answer_from_docs")
+    resp = llm.invoke(_answer_messages(state))
+    return {**state, "answer": resp.content}
+
+
+async def aanswer_from_docs_node(state: DocsAgentState) -> DocsAgentState:
+    llm = get_llm("answer_from_docs")
+    resp = await llm.ainvoke(_answer_messages(state))
     return {**state, "answer": resp.content}
 
 
 def build_docs_agent_graph():
     graph = StateGraph(DocsAgentState)
 
-    graph.add_node("retrieve_docs", retrieve_docs_node)
-    graph.add_node("answer_from_docs", answer_from_docs_node)
+    graph.add_node("retrieve_docs", RunnableLambda(retrieve_docs_node, afunc=aretrieve_docs_node))
+    graph.add_node("answer_from_docs", RunnableLambda(answer_from_docs_node, afunc=aanswer_from_docs_node))
 
     graph.set_entry_point("retrieve_docs")
     graph.add_edge("retrieve_docs", "answer_from_docs")
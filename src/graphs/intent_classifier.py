@@ -0,0 +1,175 @@
+# src/graphs/intent_classifier.py
+
+"""
+Clasificador local de intención (sql / docs / mixed) que va por delante del
+router LLM.
+
+Es un Naive Bayes multinomial sobre unigramas y bigramas normalizados,
+entrenado al arrancar con el fichero etiquetado de ejemplos (CSV
+question,intent). Responde en microsegundos; si la confianza no supera el
+umbral configurado, el router escala la decisión al LLM.
+"""
+
+import csv
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config.lazy import thread_safe_cache
+from src.config.settings import get_settings
+from src.data.text_tokens import tokenize as _tokenize
+
+logger = logging.getLogger(__name__)
+
+# Palabras vacías frecuentes que no aportan a la intención
+_STOPWORDS = {"el", "la", "los", "las", "un", "una", "de", "del", "a", "en", "al", "lo", "se"}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens del clasificador (src/data/text_tokens.py) con sus stopwords.
+    """
+    return _tokenize(text, _STOPWORDS)
+
+
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float
+    scores: Dict[str, float]
+
+    @property
+    def reason(self) -> str:
+        return f"Clasificador local (confianza {self.confidence:.2f})"
+
+
+class IntentClassifier:
+    """
+    Naive Bayes multinomial con suavizado de Laplace.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self._log_prior: Dict[str, float] = {}
+        self._log_likelihood: Dict[str, Dict[str, float]] = {}
+        self._log_unknown: Dict[str, float] = {}
+        self.vocabulary: set = set()
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "IntentClassifier":
+        token_counts: Dict[str, Counter] = defaultdict(Counter)
+        doc_counts: Counter = Counter()
+        for question, intent in examples:
+            doc_counts[intent] += 1
+            token_counts[intent].update(tokenize(question))
+
+        self.labels = sorted(doc_counts)
+        self.vocabulary = set().union(*token_counts.values()) if token_counts else set()
+        total_docs = sum(doc_counts.values())
+        vocab_size = len(self.vocabulary)
+
+        for label in self.labels:
+            counts = token_counts[label]
+            denom = sum(counts.values()) + self.alpha * vocab_size
+            self._log_prior[label] = math.log(doc_counts[label] / total_docs)
+            self._log_likelihood[label] = {tok: math.log((n + self.alpha) / denom) for tok, n in counts.items()}
+            self._log_unknown[label] = math.log(self.alpha / denom)
+        return self
+
+    def predict(self, question: str) -> IntentPrediction:
+        labels = self.labels
+        tokens = [tok for tok in tokenize(question) if tok in self.vocabulary]
+        if not labels or not tokens:
+            # Sin vocabulario conocido no hay base para decidir
+            return IntentPrediction(intent=labels[0] if labels else "", confidence=0.0, scores={})
+
+        log_scores = {
+            label: self._log_prior[label]
+            + sum(self._log_likelihood[label].get(tok, self._log_unknown[label]) for tok in tokens)
+            for label in labels
+        }
+        top = max(log_scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in log_scores.items()}
+        total = sum(exp_scores.values())
+        probs = {label: value / total for label, value in exp_scores.items()}
+        best = max(probs, key=probs.get)
+        return IntentPrediction(intent=best, confidence=probs[best], scores=probs)
+
+
+def load_examples(path: str | Path) -> List[Tuple[str, str]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return [(row["question"], row["intent"].strip()) for row in csv.DictReader(f)]
+
+
+@dataclass
+class RouterStats:
+    local_decisions: int = 0
+    llm_escalations: int = 0
+    local_seconds: float = 0.0
+    by_intent: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, intent: Optional[str], elapsed: float) -> None:
+        with self._lock:
+            self.local_seconds += elapsed
+            if intent is None:
+                self.llm_escalations += 1
+            else:
+                self.local_decisions += 1
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+
+    def as_dict(self) -> Dict[str, object]:
+        total = self.local_decisions + self.llm_escalations
+        return {
+            "local_decisions": self.local_decisions,
+            "llm_escalations": self.llm_escalations,
+            "llm_skip_rate": self.local_decisions / total if total else 0.0,
+            "avg_local_ms": 1000 * self.local_seconds / total if total else 0.0,
+            "by_intent": dict(self.by_intent),
+        }
+
+
+_stats = RouterStats()
+
+
+def get_router_stats() -> Dict[str, object]:
+    """
+    Cuántas veces el clasificador local evitó la llamada al router LLM.
+    """
+    return _stats.as_dict()
+
+
+@thread_safe_cache
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    settings = get_settings()
+    if not settings.router_classifier_enabled:
+        return None
+    try:
+        examples = load_examples(settings.intent_examples_path)
+    except OSError as e:
+        logger.warning("Clasificador de intención desactivado: %s", e)
+        return None
+    return IntentClassifier().fit(examples)
+
+
+def classify_intent(question: str, allowed: Sequence[str]) -> Optional[IntentPrediction]:
+    """
+    Devuelve la predicción si es lo bastante fiable; None si hay que
+    preguntar al router LLM.
+    """
+    start = time.perf_counter()
+    prediction = None
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        candidate = classifier.predict(question)
+        # Si la mejor intención no está permitida (p.ej. 'mixed' en el router
+        # simple), no la forzamos: decide el LLM.
+        if candidate.intent in allowed and candidate.confidence >= get_settings().router_confidence_threshold:
+            prediction = candidate
+    _stats.record(prediction.intent if prediction else None, time.perf_counter() - start)
+    return prediction
@@ -1,16 +1,26 @@
 # src/graphs/master_graph.py
 
-from typing import TypedDict, Literal
+import logging
+import time
+from typing import TypedDict, Literal, Any, AsyncIterator, Dict, Iterable, Iterator, List
 
 from langgraph.graph import StateGraph, END
 
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 
+from src.config.embeddings import get_embeddings
+from src.config.lazy import LazyResource
 from src.config.llm import get_llm
+from src.data.db import get_engine, warm_pool
+from src.graphs.intent_classifier import classify_intent, get_intent_classifier
 from src.graphs.sql_agent_graph import build_sql_agent_graph
 from src.graphs.docs_agent_graph import build_docs_agent_graph
+from src.graphs import docs_agent_graph
 from src.graphs.report_agent_graph import build_report_agent_graph
 
+logger = logging.getLogger(__name__)
+
 
 class MasterState(TypedDict, total=False):
     question: str
@@ -25,21 +35,25 @@ class MasterState(TypedDict, total=False):
     # Resultados Docs
     docs_answer: str
 
+    # Errores de cada rama (en 'mixed' una rama puede fallar sin tirar la otra)
+    sql_error: str
+    docs_error: str
+
     # Informe final
     report_markdown: str
     pdf_path: str
 
 
-# Subgrafos ya compilados
-_sql_app = build_sql_agent_graph()
-_docs_app = build_docs_agent_graph()
-_report_app = build_report_agent_graph()
+# Subgrafos compilados en el primer uso (o en warmup())
+_sql_app = LazyResource(build_sql_agent_graph, name="sql_app")
+_docs_app = LazyResource(build_docs_agent_graph, name="docs_app")
+_report_app = LazyResource(build_report_agent_graph, name="report_app")
 
 
 # ---------- NODOS ----------
 
-def router_node(state: MasterState) -> MasterState:
-    llm = get_llm()
+
+def _router_messages(state: MasterState):
     system_msg = SystemMessage(
         content=(
             "Eres un enrutador de intenciones para un sistema analítico retail.\n"
@@ -48,14 +62,16 @@ def router_node(state: MasterState) -> MasterState:
             "- 'docs': cuando pide definiciones, contexto, explicaciones del esquema o negocio.\n"
             "- 'mixed': cuando claramente necesita datos + contexto.\n"
             "Responde SOLO con un JSON como:\n"
-            "{ \"intent\": \"sql|docs|mixed\", \"reason\": \"explicación breve\" }"
+            '{ "intent": "sql|docs|mixed", "reason": "explicación breve" }'
         )
     )
     user_msg = HumanMessage(content=f"Pregunta del usuario:\n{state['question']}")
+    return [system_msg, user_msg]
 
-    resp = llm.invoke([system_msg, user_msg])
 
+def _parse_router_response(state: MasterState, resp) -> MasterState:
     import json
+
     try:
         data = json.loads(resp.content)
         intent = data.get("intent", "docs")
@@ -69,46 +85,115 @@ def router_node(state: MasterState) -> MasterState:
     return {**state, "intent": intent, "route_reason": reason}
 
 
-def sql_flow_node(state: MasterState) -> MasterState:
-    question = state["question"]
-    sql_state = _sql_app.invoke({"question": question})
+def _local_route(state: MasterState) -> MasterState | None:
+    # Primera etapa: clasificador local; solo si no está seguro se llama al LLM
+    prediction = classify_intent(state["question"], allowed=("sql", "docs", "mixed"))
+    if prediction is None:
+        return None
+    return {**state, "intent": prediction.intent, "route_reason": prediction.reason}
+
+
+def router_node(state: MasterState) -> MasterState:
+    routed = _local_route(state)
+    if routed is not None:
+        return routed
+    llm = get_llm("router")
+    resp = llm.invoke(_router_messages(state))
+    return _parse_router_response(state, resp)
+
+
+async def arouter_node(state: MasterState) -> MasterState:
+    routed = _local_route(state)
+    if routed is not None:
+        return routed
+    llm = get_llm("router")
+    resp = await llm.ainvoke(_router_messages(state))
+    return _parse_router_response(state, resp)
+
 
+# Las ramas SQL y Docs pueden ejecutarse en paralelo (intención 'mixed'), así
+# que solo devuelven sus propias claves: si ambas devolvieran el estado
+# completo, LangGraph recibiría dos escrituras de 'question' en el mismo paso.
+
+
+def _branch_error(state: MasterState, error_key: str, error: Exception) -> MasterState:
+    # Las ramas capturan cualquier error para que falle solo su parte del
+    # informe. Con una sola rama no hay nada que salvar: propagamos el error
+    if state.get("intent") != "mixed":
+        raise error
+    return {error_key: f"{type(error).__name__}: {error}"}
+
+
+def _sql_result(sql_state: dict) -> MasterState:
     return {
-        **state,
         "sql_answer": sql_state.get("answer", ""),
         "sql_markdown": sql_state.get("sql_markdown", ""),
     }
 
 
-def docs_flow_node(state: MasterState) -> MasterState:
+def sql_flow_node(state: MasterState) -> MasterState:
     question = state["question"]
-    docs_state = _docs_app.invoke({"question": question})
+    try:
+        sql_state = _sql_app.invoke({"question": question})
+    except Exception as e:  # noqa: BLE001
+        return _branch_error(state, "sql_error", e)
+    return _sql_result(sql_state)
 
-    return {
-        **state,
-        "docs_answer": docs_state.get("answer", ""),
-    }
+
+async def asql_flow_node(state: MasterState) -> MasterState:
+    try:
+        sql_state = await _sql_app.ainvoke({"question": state["question"]})
+    except Exception as e:  # noqa: BLE001
+        return _branch_error(state, "sql_error", e)
+    return _sql_result(sql_state)
 
 
-def sql_and_docs_flow_node(state: MasterState) -> MasterState:
-    # Primero SQL
-    state_after_sql = sql_flow_node(state)
-    # Luego Docs (usando ya el state enriquecido)
-    state_after_docs = docs_flow_node(state_after_sql)
-    return state_after_docs
+def docs_flow_node(state: MasterState) -> MasterState:
+    question = state["question"]
+    try:
+        docs_state = _docs_app.invoke({"question": question})
+    except Exception as e:  # noqa: BLE001
+        return _branch_error(state, "docs_error", e)
+    return {"docs_answer": docs_state.get("answer", "")}
 
 
-def report_flow_node(state: MasterState) -> MasterState:
+async def adocs_flow_node(state: MasterState) -> MasterState:
+    try:
+        docs_state = await _docs_app.ainvoke({"question": state["question"]})
+    except Exception as e:  # noqa: BLE001
+        return _branch_error(state, "docs_error", e)
+    return {"docs_answer": docs_state.get("answer", "")}
+
+
+def _report_input(state: MasterState) -> dict:
     # Preparamos el estado que espera el ReportAgent
-    report_input = {
+    return {
         "question": state.get("question", ""),
         "intent": state.get("intent", ""),
-        "sql_answer": state.get("sql_answer", ""),
+        "sql_answer": state.get("sql_answer") or _error_note(state.get("sql_error")),
         "sql_markdown": state.get("sql_markdown", ""),
-        "docs_answer": state.get("docs_answer", ""),
+        "docs_answer": state.get("docs_answer") or _error_note(state.get("docs_error")),
     }
 
-    report_state = _report_app.invoke(report_input)
+
+def _error_note(error: str | None) -> str:
+    if not error:
+        return ""
+    return f"(No disponible: esta parte del análisis falló con el error: {error})"
+
+
+def report_flow_node(state: MasterState) -> MasterState:
+    report_state = _report_app.invoke(_report_input(state))
+
+    return {
+        **state,
+        "report_markdown": report_state.get("report_markdown", ""),
+        "pdf_path": report_state.get("pdf_path", ""),
+    }
+
+
+async def areport_flow_node(state: MasterState) -> MasterState:
+    report_state = await _report_app.ainvoke(_report_input(state))
 
     return {
         **state,
@@ -120,39 +205,174 @@ def report_flow_node(state: MasterState) -> MasterState:
 def build_master_graph():
     graph = StateGraph(MasterState)
 
-    graph.add_node("router", router_node)
-    graph.add_node("sql_flow", sql_flow_node)
-    graph.add_node("docs_flow", docs_flow_node)
-    graph.add_node("sql_and_docs_flow", sql_and_docs_flow_node)
-    graph.add_node("report_flow", report_flow_node)
+    # Nodos sync + async: app.invoke / app.ainvoke eligen la versión adecuada
+    graph.add_node("router", RunnableLambda(router_node, afunc=arouter_node))
+    graph.add_node("sql_flow", RunnableLambda(sql_flow_node, afunc=asql_flow_node))
+    graph.add_node("docs_flow", RunnableLambda(docs_flow_node, afunc=adocs_flow_node))
+    graph.add_node("report_flow", RunnableLambda(report_flow_node, afunc=areport_flow_node))
 
     graph.set_entry_point("router")
 
-    # Condicional desde router
+    # Condicional desde router. En 'mixed' se lanzan las dos ramas a la vez
+    # (fan-out): ambas se ejecutan en el mismo paso y report_flow espera a
+    # que terminen las dos (join).
     def route_after_router(state: MasterState):
         intent = state.get("intent", "docs")
         if intent == "sql":
-            return "sql_flow"
+            return ["sql_flow"]
         elif intent == "docs":
-            return "docs_flow"
+            return ["docs_flow"]
         else:
-            return "sql_and_docs_flow"
-
-    graph.add_conditional_edges(
-        "router",
-        route_after_router,
-        {
-            "sql_flow": "sql_flow",
-            "docs_flow": "docs_flow",
-            "sql_and_docs_flow": "sql_and_docs_flow",
-        },
-    )
+            return ["sql_flow", "docs_flow"]
+
+    graph.add_conditional_edges("router", route_after_router, ["sql_flow", "docs_flow"])
 
     # Tras cualquier flujo → report
     graph.add_edge("sql_flow", "report_flow")
     graph.add_edge("docs_flow", "report_flow")
-    graph.add_edge("sql_and_docs_flow", "report_flow")
 
     graph.add_edge("report_flow", END)
 
     return graph.compile()
+
+
+# ---------- WARMUP ----------
+
+# Nodos que piden un LLM a get_llm (cada uno tiene su instancia cacheada)
+_LLM_NODES = ("router", "generate_sql", "repair_sql", "explain_sql", "answer_from_docs", "generate_report_markdown")
+
+# Recursos que se inicializan de forma perezosa, en el orden en que conviene
+# precargarlos. Cada uno se construye una sola vez por proceso.
+_WARMUP_STEPS = {
+    "intent_classifier": get_intent_classifier,
+    "llm": lambda: [get_llm(node) for node in _LLM_NODES],
+    "embeddings": get_embeddings,
+    "docs_index": docs_agent_graph._retriever.get,
+    "graphs": lambda: [app.get() for app in (_sql_app, _docs_app, _report_app)],
+    "db_engine": get_engine,
+    # Abre conexiones a Oracle: falla si la BD no está disponible
+    "db_pool": warm_pool,
+}
+
+
+def warmup(components: Iterable[str] | None = None) -> Dict[str, float]:
+    """
+    Precarga los recursos pesados (modelo de embeddings, índice FAISS,
+    grafos, engine y pool de conexiones de BD...) para que la primera pregunta no pague su coste.
+    Pensado para servidores: llamar una vez al arrancar, antes de aceptar
+    peticiones. Sin `components` se precarga todo.
+
+    Devuelve los segundos que ha costado cada componente (casi 0 si ya
+    estaba cargado).
+    """
+    names = list(components) if components is not None else list(_WARMUP_STEPS)
+    unknown = [name for name in names if name not in _WARMUP_STEPS]
+    if unknown:
+        raise ValueError(f"Componentes desconocidos: {unknown}. Válidos: {list(_WARMUP_STEPS)}")
+
+    timings: Dict[str, float] = {}
+    for name in names:
+        start = time.perf_counter()
+        _WARMUP_STEPS[name]()
+        timings[name] = time.perf_counter() - start
+        logger.info("warmup %s: %.2fs", name, timings[name])
+    return timings
+
+
+# ---------- STREAMING ----------
+
+# Nodos (de los subgrafos) cuyos tokens se reenvían al cliente
+TOKEN_NODES = ("explain_sql", "answer_from_docs", "generate_markdown")
+
+
+def _artifact_events(node: str, update: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Traduce la actualización de un nodo en eventos de artefactos intermedios.
+    """
+    if node == "router":
+        yield {"event": "intent", "intent": update.get("intent"), "reason": update.get("route_reason", "")}
+    elif node == "sanitize_sql":
+        yield {"event": "sql", "sql_query": update.get("sql_query", "")}
+    elif node == "repair_sql":
+        attempt = update.get("sql_attempt") or {}
+        yield {"event": "sql_repair", "attempt": update.get("sql_repairs"), "source": attempt.get("source", "")}
+    elif node == "execute_sql":
+        yield {"event": "sql_table", "markdown": update.get("sql_markdown", "")}
+    elif node == "generate_pdf":
+        yield {"event": "pdf", "pdf_path": update.get("pdf_path", "")}
+
+
+class _StreamTranslator:
+    """
+    Convierte la salida de app.stream / app.astream en eventos para el cliente.
+    Compartido por la versión sync y la async.
+    """
+
+    def __init__(self, question: str):
+        self.final_state: Dict[str, Any] = {"question": question}
+        self.streamed_nodes = set()
+
+    def feed(self, namespace, mode: str, payload) -> List[Dict[str, Any]]:
+        if mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            if node in TOKEN_NODES and chunk.content:
+                self.streamed_nodes.add(node)
+                return [{"event": "token", "node": node, "content": chunk.content}]
+            return []
+
+        events: List[Dict[str, Any]] = []
+        for node, update in payload.items():
+            if not update:
+                continue
+            events.extend(_artifact_events(node, update))
+
+            # Respuestas servidas desde caché no generan tokens: las
+            # enviamos de golpe para que el cliente vea el mismo flujo.
+            if node in TOKEN_NODES and node not in self.streamed_nodes:
+                text = update.get("report_markdown") if node == "generate_markdown" else update.get("answer")
+                if text:
+                    self.streamed_nodes.add(node)
+                    events.append({"event": "token", "node": node, "content": text})
+
+            if not namespace:
+                self.final_state.update(update)
+        return events
+
+    def end(self) -> Dict[str, Any]:
+        return {"event": "end", "state": self.final_state}
+
+
+_STREAM_KWARGS = {"stream_mode": ["messages", "updates"], "subgraphs": True}
+
+
+def stream_master_graph(question: str, app=None) -> Iterator[Dict[str, Any]]:
+    """
+    Ejecuta el master graph emitiendo eventos según se producen:
+
+    - {"event": "intent", ...}      intención elegida por el router
+    - {"event": "sql", ...}         SQL generado y saneado
+    - {"event": "sql_table", ...}   tabla markdown con los resultados
+    - {"event": "token", "node", "content"}  tokens de explain_sql,
+      answer_from_docs y del informe (generate_markdown)
+    - {"event": "pdf", ...}         ruta del PDF generado
+    - {"event": "end", "state"}     estado final (igual que app.invoke)
+    """
+    app = app or build_master_graph()
+    translator = _StreamTranslator(question)
+    for namespace, mode, payload in app.stream({"question": question}, **_STREAM_KWARGS):
+        yield from translator.feed(namespace, mode, payload)
+    yield translator.end()
+
+
+async def astream_master_graph(question: str, app=None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Versión asíncrona de stream_master_graph (mismos eventos). Permite atender
+    muchas conversaciones concurrentes desde un único proceso.
+    """
+    app = app or build_master_graph()
+    translator = _StreamTranslator(question)
+    async for namespace, mode, payload in app.astream({"question": question}, **_STREAM_KWARGS):
+        for event in translator.feed(namespace, mode, payload):
+            yield event
+    yield translator.end()
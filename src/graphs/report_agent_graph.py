@@ -1,12 +1,19 @@
 # src/graphs/report_agent_graph.py
 
 from typing import TypedDict
+import asyncio
+import uuid
+from pathlib import Path
+
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 
 from src.config.llm import get_llm
 from src.reports.pdf_generator import markdown_to_pdf
 
+REPORTS_DIR = Path("reports")
+
 
 class ReportState(TypedDict, total=False):
     question: str
@@ -19,9 +26,8 @@ class ReportState(TypedDict, total=False):
     report_markdown: str
     pdf_path: str
 
-def generate_report_markdown_node(state: ReportState) -> ReportState:
-    llm = get_llm()
 
+def _report_messages(state: ReportState):
     system_msg = SystemMessage(
         content=(
             "Eres un analista senior que redacta informes ejecutivos en formato Markdown. "
@@ -47,28 +53,47 @@ def generate_report_markdown_node(state: ReportState) -> ReportState:
         )
     )
 
-    resp = llm.invoke([system_msg, user_msg])
+    return [system_msg, user_msg]
+
+
+def generate_report_markdown_node(state: ReportState) -> ReportState:
+    llm = get_llm("generate_report_markdown")
+    resp = llm.invoke(_report_messages(state))
+
+    return {**state, "report_markdown": resp.content}
+
+
+async def agenerate_report_markdown_node(state: ReportState) -> ReportState:
+    llm = get_llm("generate_report_markdown")
+    resp = await llm.ainvoke(_report_messages(state))
+
+    return {**state, "report_markdown": resp.content}
 
-    return {
-        **state,
-        "report_markdown": resp.content
-    }
 
 def generate_pdf_node(state: ReportState) -> ReportState:
     markdown = state["report_markdown"]
-    pdf_path = markdown_to_pdf(markdown, output_path="final_report.pdf")
+    # Un fichero por informe: con varias conversaciones a la vez (ruta async)
+    # un nombre fijo haría que unas sobrescribieran el PDF de otras
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = REPORTS_DIR / f"final_report_{uuid.uuid4().hex}.pdf"
+    pdf_path = markdown_to_pdf(markdown, output_path=str(output_path))
 
-    return {
-        **state,
-        "pdf_path": pdf_path
-    }
+    return {**state, "pdf_path": pdf_path}
+
+
+async def agenerate_pdf_node(state: ReportState) -> ReportState:
+    # reportlab es CPU + disco: lo sacamos del event loop
+    return await asyncio.to_thread(generate_pdf_node, state)
 
 
 def build_report_agent_graph():
     graph = StateGraph(ReportState)
 
-    graph.add_node("generate_markdown", generate_report_markdown_node)
-    graph.add_node("generate_pdf", generate_pdf_node)
+    graph.add_node(
+        "generate_markdown",
+        RunnableLambda(generate_report_markdown_node, afunc=agenerate_report_markdown_node),
+    )
+    graph.add_node("generate_pdf", RunnableLambda(generate_pdf_node, afunc=agenerate_pdf_node))
 
     graph.set_entry_point("generate_markdown")
     graph.add_edge("generate_markdown", "generate_pdf")
@@ -3,8 +3,11 @@
 from typing import TypedDict, Literal
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 
+from src.config.lazy import LazyResource
 from src.config.llm import get_llm
+from src.graphs.intent_classifier import classify_intent
 from src.graphs.sql_agent_graph import build_sql_agent_graph
 from src.graphs.docs_agent_graph import build_docs_agent_graph
 
@@ -24,12 +27,11 @@ class GlobalState(TypedDict, total=False):
 
 # --- Nodos de sub-flujos (usamos los graphs ya compilados) ---
 
-_sql_app = build_sql_agent_graph()
-_docs_app = build_docs_agent_graph()
+_sql_app = LazyResource(build_sql_agent_graph, name="sql_app")
+_docs_app = LazyResource(build_docs_agent_graph, name="docs_app")
 
 
-def router_node(state: GlobalState) -> GlobalState:
-    llm = get_llm()
+def _router_messages(state: GlobalState):
     system_msg = SystemMessage(
         content=(
             "Eres un enrutador de intenciones para un sistema de ayuda analítica retail. "
@@ -37,14 +39,17 @@ def router_node(state: GlobalState) -> GlobalState:
             "- 'sql': cuando pide números, métricas, agregados, comparaciones basadas en datos de la BD.\n"
             "- 'docs': cuando pide definiciones, contexto de negocio, explicaciones de tablas, métricas o procesos.\n"
             "Responde SOLO con un JSON de la forma:\n"
-            "{ \"intent\": \"sql|docs\", \"reason\": \"explicación breve\" }"
+            '{ "intent": "sql|docs", "reason": "explicación breve" }'
         )
     )
     user_msg = HumanMessage(content=f"Pregunta del usuario:\n{state['question']}")
-    resp = llm.invoke([system_msg, user_msg])
+    return [system_msg, user_msg]
+
 
+def _parse_router_response(state: GlobalState, resp) -> GlobalState:
     # Nos fiamos de que devuelva algo tipo JSON; si no, lo parcheas luego.
     import json
+
     try:
         data = json.loads(resp.content)
         intent = data.get("intent", "docs")
@@ -56,6 +61,32 @@ def router_node(state: GlobalState) -> GlobalState:
     return {**state, "intent": intent, "route_reason": reason}
 
 
+def _local_route(state: GlobalState) -> GlobalState | None:
+    # Primera etapa: clasificador local; solo si no está seguro se llama al LLM
+    prediction = classify_intent(state["question"], allowed=("sql", "docs"))
+    if prediction is None:
+        return None
+    return {**state, "intent": prediction.intent, "route_reason": prediction.reason}
+
+
+def router_node(state: GlobalState) -> GlobalState:
+    routed = _local_route(state)
+    if routed is not None:
+        return routed
+    llm = get_llm("router")
+    resp = llm.invoke(_router_messages(state))
+    return _parse_router_response(state, resp)
+
+
+async def arouter_node(state: GlobalState) -> GlobalState:
+    routed = _local_route(state)
+    if routed is not None:
+        return routed
+    llm = get_llm("router")
+    resp = await llm.ainvoke(_router_messages(state))
+    return _parse_router_response(state, resp)
+
+
 def sql_flow_node(state: GlobalState) -> GlobalState:
     # delegamos en el SQLAgentGraph
     question = state["question"]
@@ -68,6 +99,16 @@ def sql_flow_node(state: GlobalState) -> GlobalState:
     }
 
 
+async def asql_flow_node(state: GlobalState) -> GlobalState:
+    sql_state = await _sql_app.ainvoke({"question": state["question"]})
+
+    return {
+        **state,
+        "sql_answer": sql_state.get("answer", ""),
+        "sql_markdown": sql_state.get("sql_markdown", ""),
+    }
+
+
 def docs_flow_node(state: GlobalState) -> GlobalState:
     question = state["question"]
     docs_state = _docs_app.invoke({"question": question})
@@ -78,12 +119,21 @@ def docs_flow_node(state: GlobalState) -> GlobalState:
     }
 
 
+async def adocs_flow_node(state: GlobalState) -> GlobalState:
+    docs_state = await _docs_app.ainvoke({"question": state["question"]})
+
+    return {
+        **state,
+        "docs_answer": docs_state.get("answer", ""),
+    }
+
+
 def build_router_graph():
     graph = StateGraph(GlobalState)
 
-    graph.add_node("router", router_node)
-    graph.add_node("sql_flow", sql_flow_node)
-    graph.add_node("docs_flow", docs_flow_node)
+    graph.add_node("router", RunnableLambda(router_node, afunc=arouter_node))
+    graph.add_node("sql_flow", RunnableLambda(sql_flow_node, afunc=asql_flow_node))
+    graph.add_node("docs_flow", RunnableLambda(docs_flow_node, afunc=adocs_flow_node))
 
     graph.set_entry_point("router")
 
@@ -1,21 +1,58 @@
 # src/graphs/sql_agent_graph.py
 
 from typing import TypedDict, List, Dict, Any
+import logging
 import re
+import time
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 
 from src.config.llm import get_llm
-from src.data.db import run_query
+from src.config.settings import get_settings
+from src.data.columnar import ColumnarResult, as_columnar
+from src.data.db import run_query, arun_query
+from src.data.query_cache import canonicalize_sql
+from src.data.query_guard import QueryTimeoutError, QueryTooExpensiveError
+from src.data.sql_binds import parametrize_sql
+from src.data.sql_sanitizer import DEFAULT_ROW_LIMIT, SQLValidationError, sanitize_select
+from src.data.summary_rewrite import SummaryPlan, plan_summary_rewrite
+from src.data.summary_tables import FRESHNESS_SQL, fresh_tables
+from src.data.table_format import table_format_from_settings
+from src.graphs.sql_repair import describe_error, error_signature, get_repair_cache
+
+logger = logging.getLogger(__name__)
 
 
 class SQLAgentState(TypedDict, total=False):
     question: str
     sql_raw: str
     sql_query: str
-    sql_rows: List[Dict[str, Any]]
+    # Si la consulta se reescribió a una tabla resumen: SQL generada y tabla
+    sql_original: str
+    sql_summary_table: str
+    # SQL que se ejecuta, con los valores como binds (:b1...), y sus valores
+    sql_bound: str
+    sql_params: Dict[str, Any]
+    # Resultado columnar (nombres de columna + arrays NumPy tipados)
+    sql_result: ColumnarResult
+    # True si la consulta devolvía más filas de las leídas (DEFAULT_ROW_LIMIT,
+    # SQL_MAX_ROWS si es menor, o SQL_MAX_BYTES)
+    sql_truncated: bool
     sql_markdown: str
+    # Consulta rechazada (no válida, por coste o por timeout): sin explain_sql
+    sql_error: str
+    # Intentos (generación y reparaciones) con su SQL, error, origen
+    # ("generate", "llm", "cache", "rule") y segundos de generación/ejecución
+    sql_attempts: List[Dict[str, Any]]
+    sql_attempt: Dict[str, Any]
+    sql_repairs: int
+    # Último fallo pendiente de reparar: error (ORA-xxxxx: ...) y SQL
+    sql_failure: str
+    sql_failed_sql: str
+    # Reparación a guardar en la caché si la SQL corregida funciona
+    sql_pending_repair: Dict[str, str]
     answer: str
 
 
@@ -27,29 +64,14 @@ def extract_sql(text: str) -> str:
 
 
 def sanitize_sql_for_oracle(sql: str) -> str:
-    cleaned = sql.strip()
-    if cleaned.endswith(";"):
-        cleaned = cleaned[:-1].strip()
-    lower = cleaned.lower()
-    if "fetch first" not in lower:
-        cleaned = f"{cleaned}\nFETCH FIRST 50 ROWS ONLY"
-    return cleaned
-
-
-def rows_to_markdown(rows: List[Dict[str, Any]]) -> str:
-    if not rows:
-        return "No hay resultados."
-    headers = list(rows[0].keys())
-    header_line = "| " + " | ".join(headers) + " |"
-    separator_line = "| " + " | ".join(["---"] * len(headers)) + " |"
-    row_lines = []
-    for row in rows:
-        values = [str(row.get(h, "")) for h in headers]
-        row_lines.append("| " + " | ".join(values) + " |")
-    return "\n".join([header_line, separator_line] + [*row_lines])
+    # Valida (una sola consulta de lectura, sintaxis) y limita las filas de
+    # la consulta exterior; SQLValidationError si no se puede ejecutar. Una
+    # fila más de las que se muestran: run_query (max_rows=DEFAULT_ROW_LIMIT)
+    # la descarta y marca el resultado como truncado.
+    return sanitize_select(sql, row_limit=DEFAULT_ROW_LIMIT + 1)
 
-def generate_sql_node(state: SQLAgentState) -> SQLAgentState:
-    llm = get_llm()
+
+def _generate_sql_messages(state: SQLAgentState):
     system_sql = SystemMessage(
         content=(
             "Eres un generador de SQL para Oracle. "
@@ -65,27 +87,275 @@ def generate_sql_node(state: SQLAgentState) -> SQLAgentState:
             "Puedes devolverla dentro de un bloque ```sql``` si quieres."
         )
     )
-    resp = llm.invoke([system_sql, user_sql])
+    return [system_sql, user_sql]
+
+
+def _new_attempt(state: SQLAgentState, source: str, seconds: float) -> Dict[str, Any]:
+    number = len(state.get("sql_attempts") or []) + 1
+    return {"attempt": number, "source": source, "generate_seconds": round(seconds, 4)}
+
+
+def _record_attempt(state: SQLAgentState, sql: str, error: str, seconds: float) -> List[Dict[str, Any]]:
+    attempt = {**(state.get("sql_attempt") or _new_attempt(state, "generate", 0.0))}
+    attempt.update({"sql": sql, "error": error, "execute_seconds": round(seconds, 4)})
+    if error:
+        logger.info("Intento %d de SQL (%s) fallido: %s", attempt["attempt"], attempt["source"], error)
+    return [*(state.get("sql_attempts") or []), attempt]
+
+
+def generate_sql_node(state: SQLAgentState) -> SQLAgentState:
+    llm = get_llm("generate_sql")
+    start = time.perf_counter()
+    resp = llm.invoke(_generate_sql_messages(state))
+    sql_raw = extract_sql(resp.content)
+    return {**state, "sql_raw": sql_raw, "sql_attempt": _new_attempt(state, "generate", time.perf_counter() - start)}
+
+
+async def agenerate_sql_node(state: SQLAgentState) -> SQLAgentState:
+    llm = get_llm("generate_sql")
+    start = time.perf_counter()
+    resp = await llm.ainvoke(_generate_sql_messages(state))
     sql_raw = extract_sql(resp.content)
-    return {**state, "sql_raw": sql_raw}
+    return {**state, "sql_raw": sql_raw, "sql_attempt": _new_attempt(state, "generate", time.perf_counter() - start)}
+
 
 def sanitize_sql_node(state: SQLAgentState) -> SQLAgentState:
     sql_raw = state["sql_raw"]
-    sql_query = sanitize_sql_for_oracle(sql_raw)
+    try:
+        sql_query = sanitize_sql_for_oracle(sql_raw)
+    except SQLValidationError as e:
+        # Se detecta sin pasar por la base de datos
+        return _failed({**state, "sql_query": sql_raw}, str(e), sql_raw, 0.0)
     return {**state, "sql_query": sql_query}
 
+
+def _failed(state: SQLAgentState, error: str, sql: str, seconds: float) -> SQLAgentState:
+    """
+    Intento fallido: a reparar si quedan intentos; si no, respuesta directa.
+    """
+    attempts = _record_attempt(state, sql, error, seconds)
+    if (state.get("sql_repairs") or 0) < get_settings().sql_repair_attempts:
+        return {**state, "sql_attempts": attempts, "sql_failure": error, "sql_failed_sql": sql}
+    answer = f"No he podido ejecutar la consulta generada: {error}. Prueba a reformular la pregunta."
+    return {
+        **state,
+        "sql_attempts": attempts,
+        "sql_failure": "",
+        "sql_error": error,
+        "sql_markdown": "",
+        "answer": answer,
+    }
+
+
+def _succeeded(state: SQLAgentState, seconds: float) -> SQLAgentState:
+    executed = state.get("sql_original") or state["sql_query"]
+    pending = state.get("sql_pending_repair")
+    if pending:
+        # La corrección funcionó: la próxima vez no hace falta el LLM
+        get_repair_cache().record(pending["signature"], pending["failed_sql"], executed)
+    attempts = _record_attempt(state, executed, "", seconds)
+    return {**state, "sql_attempts": attempts, "sql_failure": "", "sql_pending_repair": {}}
+
+
+def _after_sanitize(state: SQLAgentState) -> str:
+    if state.get("sql_error"):
+        return END
+    return "repair_sql" if state.get("sql_failure") else "rewrite_sql"
+
+
+def _summary_plan(state: SQLAgentState) -> SummaryPlan | None:
+    if not get_settings().summary_rewrite_enabled:
+        return None
+    return plan_summary_rewrite(state["sql_query"])
+
+
+def _rewritten(state: SQLAgentState, plan: SummaryPlan, freshness_rows) -> SQLAgentState:
+    # Solo tablas resumen al día: con ventas nuevas sin agregar, la tabla
+    # resumen daría otra respuesta que la consulta original
+    table = plan.choose(fresh_tables(freshness_rows))
+    if table is None:
+        return state
+    return {
+        **state,
+        "sql_original": state["sql_query"],
+        "sql_query": plan.apply(table),
+        "sql_summary_table": table.name,
+    }
+
+
+def rewrite_sql_node(state: SQLAgentState) -> SQLAgentState:
+    # Agregados sobre ventas -> la tabla resumen más pequeña que los cubre.
+    # La marca de agua solo se consulta si la SQL es elegible.
+    plan = _summary_plan(state)
+    if plan is None:
+        return state
+    try:
+        rows = run_query(FRESHNESS_SQL)
+    except RuntimeError:
+        # Sin tablas resumen creadas: se ejecuta la consulta original
+        return state
+    return _rewritten(state, plan, rows)
+
+
+async def arewrite_sql_node(state: SQLAgentState) -> SQLAgentState:
+    plan = _summary_plan(state)
+    if plan is None:
+        return state
+    try:
+        rows = await arun_query(FRESHNESS_SQL)
+    except RuntimeError:
+        return state
+    return _rewritten(state, plan, rows)
+
+
+def bind_sql_node(state: SQLAgentState) -> SQLAgentState:
+    # Valores -> binds: Oracle comparte el cursor entre preguntas que solo
+    # cambian en la fecha, la tienda o el importe. sql_query queda con los
+    # literales (explain_sql, intentos, caché de reparaciones).
+    sql_query = state["sql_query"]
+    if not get_settings().sql_bind_literals:
+        return {**state, "sql_bound": sql_query, "sql_params": {}}
+    sql_bound, params = parametrize_sql(sql_query)
+    return {**state, "sql_bound": sql_bound, "sql_params": params}
+
+
+def _query_options() -> Dict[str, Any]:
+    settings = get_settings()
+    return {
+        "max_rows": min(settings.sql_max_rows, DEFAULT_ROW_LIMIT),
+        "max_bytes": settings.sql_max_bytes,
+        "columnar": True,
+        "timeout": settings.sql_timeout_seconds,
+        "max_cost": settings.sql_max_cost,
+        "max_cardinality": settings.sql_max_cardinality,
+    }
+
+
+def _sql_result(state: SQLAgentState, rows) -> SQLAgentState:
+    result = as_columnar(rows)
+    markdown = result.to_markdown(fmt=table_format_from_settings(max_rows=DEFAULT_ROW_LIMIT))
+    if result.truncated:
+        markdown += f"\n\n_Resultado truncado: la consulta devolvía más de {len(result)} filas._"
+    return {**state, "sql_result": result, "sql_truncated": result.truncated, "sql_markdown": markdown}
+
+
+def _rejected_result(state: SQLAgentState, error: Exception) -> SQLAgentState:
+    if isinstance(error, QueryTooExpensiveError):
+        answer = (
+            "La consulta generada es demasiado costosa para ejecutarla "
+            f"(coste estimado {error.estimate.cost:.0f}, ~{error.estimate.cardinality} filas). "
+        )
+    else:
+        answer = f"La consulta tardó más de {error.timeout:g} s y se canceló. "
+    answer += "Prueba a acotar la pregunta: un periodo, una tienda o una categoría concretos."
+    return {**state, "sql_error": str(error), "sql_markdown": "", "answer": answer}
+
+
+def _bound_query(state: SQLAgentState):
+    return state.get("sql_bound") or state["sql_query"], state.get("sql_params") or None
+
+
 def execute_sql_node(state: SQLAgentState) -> SQLAgentState:
     sql_query = state["sql_query"]
-    rows = run_query(sql_query)
-    markdown = rows_to_markdown(rows[:50])
-    return {**state, "sql_rows": rows, "sql_markdown": markdown}
+    sql_bound, params = _bound_query(state)
+    # Lectura por lotes con tope de filas/bytes: una consulta sin límite no
+    # puede traerse millones de filas a memoria. Las demasiado costosas (plan
+    # estimado) o lentas (timeout) se rechazan con una respuesta directa; los
+    # errores de Oracle pasan a repair_sql.
+    start = time.perf_counter()
+    try:
+        rows = run_query(sql_bound, params=params, **_query_options())
+    except (QueryTooExpensiveError, QueryTimeoutError) as e:
+        return _rejected_result(state, e)
+    except RuntimeError as e:
+        return _failed(state, describe_error(e), state.get("sql_original") or sql_query, time.perf_counter() - start)
+    return _sql_result(_succeeded(state, time.perf_counter() - start), rows)
 
-def explain_sql_node(state: SQLAgentState) -> SQLAgentState:
-    llm = get_llm()
+
+async def aexecute_sql_node(state: SQLAgentState) -> SQLAgentState:
+    sql_query = state["sql_query"]
+    sql_bound, params = _bound_query(state)
+    start = time.perf_counter()
+    try:
+        rows = await arun_query(sql_bound, params=params, **_query_options())
+    except (QueryTooExpensiveError, QueryTimeoutError) as e:
+        return _rejected_result(state, e)
+    except RuntimeError as e:
+        return _failed(state, describe_error(e), state.get("sql_original") or sql_query, time.perf_counter() - start)
+    return _sql_result(_succeeded(state, time.perf_counter() - start), rows)
+
+
+def _after_execute(state: SQLAgentState) -> str:
+    # Una consulta rechazada ya trae su respuesta: no hay nada que explicar
+    if state.get("sql_error"):
+        return END
+    return "repair_sql" if state.get("sql_failure") else "explain_sql"
+
+
+def _repair_sql_messages(state: SQLAgentState):
+    messages = _generate_sql_messages(state)
+    messages.append(
+        HumanMessage(
+            content=(
+                f"Esta consulta ha fallado:\n```sql\n{state['sql_failed_sql']}\n```\n\n"
+                f"Error: {state['sql_failure']}\n\n"
+                "Devuelve ÚNICAMENTE la consulta SQL corregida para Oracle."
+            )
+        )
+    )
+    return messages
+
+
+def _cached_repair(state: SQLAgentState, signature: str):
+    found = get_repair_cache().lookup(signature, state["sql_failed_sql"])
+    if found is None:
+        return None
+    # Una corrección guardada que ya se probó en esta pregunta no se repite
+    tried = {canonicalize_sql(a["sql"]) for a in state.get("sql_attempts") or []}
+    return None if canonicalize_sql(found[0]) in tried else found
+
+
+def _repaired(state: SQLAgentState, sql_raw: str, source: str, signature: str, seconds: float) -> SQLAgentState:
+    # La SQL corregida vuelve a pasar por sanitize_sql / rewrite_sql
+    clean = {
+        k: v for k, v in state.items() if k not in ("sql_original", "sql_summary_table", "sql_bound", "sql_params")
+    }
+    return {
+        **clean,
+        "sql_raw": sql_raw,
+        "sql_failure": "",
+        "sql_repairs": (state.get("sql_repairs") or 0) + 1,
+        "sql_pending_repair": {"signature": signature, "failed_sql": state["sql_failed_sql"]},
+        "sql_attempt": _new_attempt(state, source, seconds),
+    }
+
+
+def repair_sql_node(state: SQLAgentState) -> SQLAgentState:
+    # Primero la caché de reparaciones (por firma del error); si no, el LLM
+    # con la SQL fallida y el error de Oracle
+    signature = error_signature(state["sql_failure"])
+    start = time.perf_counter()
+    found = _cached_repair(state, signature)
+    if found is None:
+        resp = get_llm("repair_sql").invoke(_repair_sql_messages(state))
+        found = (extract_sql(resp.content), "llm")
+    return _repaired(state, *found, signature, time.perf_counter() - start)
+
+
+async def arepair_sql_node(state: SQLAgentState) -> SQLAgentState:
+    signature = error_signature(state["sql_failure"])
+    start = time.perf_counter()
+    found = _cached_repair(state, signature)
+    if found is None:
+        resp = await get_llm("repair_sql").ainvoke(_repair_sql_messages(state))
+        found = (extract_sql(resp.content), "llm")
+    return _repaired(state, *found, signature, time.perf_counter() - start)
+
+
+def _explain_sql_messages(state: SQLAgentState):
     system_explain = SystemMessage(
         content=(
-            "Eres un analista de datos retail. "
-            "Explicas resultados de consultas SQL de forma clara y en castellano."
+            "Eres un analista de datos retail. " "Explicas resultados de consultas SQL de forma clara y en castellano."
         )
     )
 
@@ -99,21 +369,42 @@ def explain_sql_node(state: SQLAgentState) -> SQLAgentState:
         )
     )
 
-    resp = llm.invoke([system_explain, explain_msg])
+    return [system_explain, explain_msg]
+
+
+def explain_sql_node(state: SQLAgentState) -> SQLAgentState:
+    llm = get_llm("explain_sql")
+    resp = llm.invoke(_explain_sql_messages(state))
+    return {**state, "answer": resp.content}
+
+
+async def aexplain_sql_node(state: SQLAgentState) -> SQLAgentState:
+    llm = get_llm("explain_sql")
+    resp = await llm.ainvoke(_explain_sql_messages(state))
     return {**state, "answer": resp.content}
 
+
 def build_sql_agent_graph():
     graph = StateGraph(SQLAgentState)
 
-    graph.add_node("generate_sql", generate_sql_node)
+    # Cada nodo tiene versión sync y async: app.invoke usa la primera y
+    # app.ainvoke / app.astream la segunda.
+    graph.add_node("generate_sql", RunnableLambda(generate_sql_node, afunc=agenerate_sql_node))
     graph.add_node("sanitize_sql", sanitize_sql_node)
-    graph.add_node("execute_sql", execute_sql_node)
-    graph.add_node("explain_sql", explain_sql_node)
+    graph.add_node("rewrite_sql", RunnableLambda(rewrite_sql_node, afunc=arewrite_sql_node))
+    graph.add_node("bind_sql", bind_sql_node)
+    graph.add_node("execute_sql", RunnableLambda(execute_sql_node, afunc=aexecute_sql_node))
+    graph.add_node("repair_sql", RunnableLambda(repair_sql_node, afunc=arepair_sql_node))
+    graph.add_node("explain_sql", RunnableLambda(explain_sql_node, afunc=aexplain_sql_node))
 
     graph.set_entry_point("generate_sql")
     graph.add_edge("generate_sql", "sanitize_sql")
-    graph.add_edge("sanitize_sql", "execute_sql")
-    graph.add_edge("execute_sql", "explain_sql")
+    graph.add_conditional_edges("sanitize_sql", _after_sanitize, ["rewrite_sql", "repair_sql", END])
+    graph.add_edge("rewrite_sql", "bind_sql")
+    graph.add_edge("bind_sql", "execute_sql")
+    graph.add_conditional_edges("execute_sql", _after_execute, ["explain_sql", "repair_sql", END])
+    # Bucle acotado por SQL_REPAIR_ATTEMPTS
+    graph.add_edge("repair_sql", "sanitize_sql")
     graph.add_edge("explain_sql", END)
 
     return graph.compile()
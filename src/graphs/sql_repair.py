@@ -0,0 +1,188 @@
+# src/graphs/sql_repair.py
+
+"""
+Reparación de la SQL generada que falla (error de Oracle o SQL rechazada
+por el validador).
+
+El error se resume en una firma (código ORA + identificador citado, p.ej.
+`ORA-00904:IMPORTE`). Cuando una reparación funciona se guarda:
+- exacta: (firma, SQL fallida normalizada) -> SQL corregida. La misma
+  pregunta suele generar la misma SQL (caché del LLM), así que el mismo
+  fallo se corrige sin volver a llamar al LLM;
+- como regla, si el error nombraba un identificador que la corrección
+  sustituyó por otro (ORA-00904 "IMPORTE" -> total): se aplica a cualquier
+  SQL que falle con esa firma.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError, TokenError
+
+from src.config.lazy import thread_safe_cache
+from src.config.settings import get_settings
+from src.data.query_cache import canonicalize_sql
+
+_ORA_ERROR = re.compile(r"\b(ORA-\d{5}): ([^\n]*)")
+_QUOTED = re.compile(r'"([^"]+)"')
+# ORA-00904: "V"."IMPORTE": invalid identifier
+_IDENTIFIER_ERRORS = {"ORA-00904"}
+
+
+def describe_error(error: Exception | str) -> str:
+    """
+    Error en una línea para el LLM: "ORA-00904: ..." si lo hay; si no, la
+    primera línea del mensaje sin el envoltorio de run_query.
+    """
+    message = str(error)
+    match = _ORA_ERROR.search(message)
+    if match:
+        return f"{match.group(1)}: {match.group(2).strip()}"
+    message = message.removeprefix("Database error: ")
+    message = re.sub(r"^\([\w.]+\) ", "", message)
+    return message.split("\n[SQL:")[0].splitlines()[0].strip() if message.strip() else message
+
+
+def error_signature(description: str) -> str:
+    """
+    Firma estable del error: código + identificadores citados (en
+    mayúsculas); sin código ORA, el mensaje sin números ni literales.
+    """
+    match = _ORA_ERROR.search(description)
+    if match:
+        quoted = [q.upper() for q in _QUOTED.findall(match.group(2))]
+        # "V"."IMPORTE" -> IMPORTE: el alias de tabla cambia entre consultas
+        return f"{match.group(1)}:{quoted[-1]}" if quoted else match.group(1)
+    return re.sub(r"'[^']*'|\d+", "?", description).strip()
+
+
+def _columns(sql: str) -> Optional[set]:
+    try:
+        tree = sqlglot.parse_one(sql, read="oracle")
+    except (ParseError, TokenError):
+        return None
+    return {column.name.lower() for column in tree.find_all(exp.Column)}
+
+
+def _rename_column(sql: str, old: str, new: str) -> Optional[str]:
+    try:
+        tree = sqlglot.parse_one(sql, read="oracle")
+    except (ParseError, TokenError):
+        return None
+    renamed = False
+    for column in tree.find_all(exp.Column):
+        if column.name.lower() == old:
+            column.set("this", exp.to_identifier(new))
+            renamed = True
+    return tree.sql(dialect="oracle") if renamed else None
+
+
+@dataclass
+class RepairStats:
+    exact_hits: int = 0
+    rule_hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "exact_hits": self.exact_hits,
+            "rule_hits": self.rule_hits,
+            "misses": self.misses,
+            "stored": self.stored,
+        }
+
+
+class RepairCache:
+    """
+    Reparaciones que funcionaron (LRU en memoria).
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.stats = RepairStats()
+        self._lock = threading.Lock()
+        self._exact: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        # firma -> (identificador erróneo, identificador correcto)
+        self._rules: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+
+    def _put(self, store: OrderedDict, key, value) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def lookup(self, signature: str, failed_sql: str) -> Optional[Tuple[str, str]]:
+        """
+        (SQL corregida, "cache" | "rule") o None si hay que preguntar al LLM.
+        """
+        key = (signature, canonicalize_sql(failed_sql))
+        with self._lock:
+            fixed = self._exact.get(key)
+            if fixed is not None:
+                self._exact.move_to_end(key)
+            rule = self._rules.get(signature)
+        if fixed is not None:
+            self.stats.count("exact_hits")
+            return fixed, "cache"
+        if rule is not None:
+            renamed = _rename_column(failed_sql, *rule)
+            if renamed is not None:
+                self.stats.count("rule_hits")
+                return renamed, "rule"
+        self.stats.count("misses")
+        return None
+
+    def record(self, signature: str, failed_sql: str, fixed_sql: str) -> None:
+        """
+        Guarda una reparación que se ejecutó bien.
+        """
+        if self.max_entries <= 0:
+            return
+        rule = self._learn_rule(signature, failed_sql, fixed_sql)
+        with self._lock:
+            self._put(self._exact, (signature, canonicalize_sql(failed_sql)), fixed_sql)
+            if rule is not None:
+                self._put(self._rules, signature, rule)
+        self.stats.count("stored")
+
+    @staticmethod
+    def _learn_rule(signature: str, failed_sql: str, fixed_sql: str) -> Optional[Tuple[str, str]]:
+        # Solo "identificador no válido" sustituido por exactamente otro
+        code, _, identifier = signature.partition(":")
+        if code not in _IDENTIFIER_ERRORS or not identifier:
+            return None
+        old = identifier.lower()
+        before, after = _columns(failed_sql), _columns(fixed_sql)
+        if before is None or after is None or old not in before or old in after:
+            return None
+        added = after - before
+        return (old, added.pop()) if len(added) == 1 else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exact.clear()
+            self._rules.clear()
+
+
+@thread_safe_cache
+def get_repair_cache() -> RepairCache:
+    return RepairCache(get_settings().sql_repair_cache_entries)
+
+
+def get_repair_stats() -> Dict[str, Any]:
+    """
+    Reparaciones resueltas con la caché (exactas o por regla) y las que
+    necesitaron al LLM.
+    """
+    return get_repair_cache().stats.as_dict()
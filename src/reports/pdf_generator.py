@@ -19,4 +19,4 @@ def markdown_to_pdf(markdown_text: str, output_path: str = "report.pdf") -> str:
     doc = SimpleDocTemplate(output_path, pagesize=A4)
     doc.build(elements)
 
-    return output_path
\ No newline at end of file
+    return output_path
@@ -1,42 +1,61 @@
 # src/tools/sql_tool.py
 
+from dataclasses import replace
 from typing import Any, Dict, List
 import json
 
 from langchain_core.tools import tool
 
+from src.config.settings import Settings, get_settings
+from src.data.columnar import ColumnarResult, as_columnar
 from src.data.db import run_query
+from src.data.query_guard import QueryTimeoutError, QueryTooExpensiveError
+from src.data.sql_sanitizer import SQLValidationError, sanitize_select
+from src.data.table_format import rows_to_markdown, table_format_from_settings
 
-
-def _truncate_rows(rows: List[Dict[str, Any]], max_rows: int = 50) -> List[Dict[str, Any]]:
-    """
-    Limita el número de filas para no devolver tochos gigantes al modelo.
-    """
-    if len(rows) <= max_rows:
-        return rows
-    return rows[:max_rows]
+# Filas como máximo en la respuesta de la tool
+MAX_ROWS = 50
 
 
 def _rows_to_markdown(rows: List[Dict[str, Any]]) -> str:
     """
-    Convierte una lista de dicts en una tabla markdown simple.
-    Útil para que el modelo lo lea y lo explique al usuario.
+    Convierte una lista de dicts en una tabla markdown simple
+    (src/data/table_format.py). Útil para que el modelo lo lea y lo explique
+    al usuario.
     """
-    if not rows:
-        return "No results."
+    return rows_to_markdown(rows, table_format_from_settings(empty="No results."))
+
+
+def _error_response(message: str) -> str:
+    if get_settings().sql_tool_format == "compact":
+        return ColumnarResult([], []).to_compact_json(error=message)
+    return json.dumps(
+        {
+            "error": message,
+            "rows": [],
+            "markdown_table": "",
+        },
+        ensure_ascii=False,
+    )
 
-    headers = list(rows[0].keys())
-    # Encabezados
-    header_line = "| " + " | ".join(headers) + " |"
-    separator_line = "| " + " | ".join(["---"] * len(headers)) + " |"
 
-    # Filas
-    row_lines = []
-    for row in rows:
-        values = [str(row.get(h, "")) for h in headers]
-        row_lines.append("| " + " | ".join(values) + " |")
+def _markdown(result: ColumnarResult) -> str:
+    return result.to_markdown(fmt=table_format_from_settings(empty="No results."))
 
-    return "\n".join([header_line, separator_line] + row_lines)
+
+def _response(result: ColumnarResult, settings: Settings) -> str:
+    if settings.sql_tool_format == "compact":
+        # Un solo volcado (orjson) y la tabla markdown solo si se pide
+        if settings.sql_tool_markdown:
+            return result.to_compact_json(markdown_table=_markdown(result))
+        return result.to_compact_json()
+    return json.dumps(
+        {
+            "rows": result.to_rows(),
+            "markdown_table": _markdown(result),
+        },
+        default=str,  # fechas y lo que quede como objeto
+    )
 
 
 @tool("query_retail_database")
@@ -49,38 +68,42 @@ def query_retail_database(sql_query: str) -> str:
     - Utiliza las tablas del esquema retail (por ejemplo: ventas, tiendas, productos, regiones, clientes, etc.).
     - Intenta ser lo más específico posible con columnas y condiciones.
 
-    Devuelve:
-    - Un JSON con dos campos:
-        - "rows": lista de filas (máx. 50) en formato dict.
+    Devuelve un JSON (máx. 50 filas) con uno de estos formatos:
+    - Por defecto, dos campos:
+        - "rows": lista de filas en formato dict.
         - "markdown_table": representación en tabla markdown de los resultados.
+    - Compacto (SQL_TOOL_FORMAT=compact):
+        - "columns": nombres de las columnas, en orden.
+        - "rows": una lista de valores por fila, en el orden de "columns".
+        - "truncated": si había más filas que las devueltas.
+        - "markdown_table": solo con SQL_TOOL_MARKDOWN=true.
+    - Si la consulta es demasiado costosa (plan estimado) o supera el tiempo
+      máximo, "error" lo indica y no hay filas.
     """
-    # Seguridad básica: no permitimos nada que no sea SELECT
-    lower_sql = sql_query.strip().lower()
-    if not lower_sql.startswith("select"):
-        return json.dumps(
-            {
-                "error": "Only SELECT queries are allowed.",
-                "rows": [],
-                "markdown_table": "",
-            }
-        )
+    # Solo una consulta de lectura, validada antes de tocar la base de datos.
+    # El límite va en la propia consulta, con una fila más de las 50 que se
+    # devuelven: run_query la descarta y marca el resultado como truncado.
+    try:
+        sql_query = sanitize_select(sql_query, row_limit=MAX_ROWS + 1)
+    except SQLValidationError as e:
+        message = "Only SELECT queries are allowed." if e.kind != "syntax" else "Invalid SQL."
+        return _error_response(f"{message} {e}")
 
     try:
-        rows = run_query(sql_query)
-        rows_trunc = _truncate_rows(rows, max_rows=50)
-        markdown = _rows_to_markdown(rows_trunc)
-        return json.dumps(
-            {
-                "rows": rows_trunc,
-                "markdown_table": markdown,
-            },
-            default=str,  # por si hay tipos raros (Decimal, datetime, etc.)
+        settings = get_settings()
+        rows = run_query(
+            sql_query,
+            max_rows=MAX_ROWS,
+            columnar=True,
+            timeout=settings.sql_timeout_seconds,
+            max_cost=settings.sql_max_cost,
+            max_cardinality=settings.sql_max_cardinality,
         )
+        result = as_columnar(rows)
+        # Nunca más de MAX_ROWS filas en la respuesta, venga lo que venga
+        result = replace(result.head(MAX_ROWS), truncated=result.truncated or len(result) > MAX_ROWS)
+        return _response(result, settings)
+    except (QueryTooExpensiveError, QueryTimeoutError) as e:
+        return _error_response(f"Query rejected: {e}")
     except Exception as e:
-        return json.dumps(
-            {
-                "error": f"Database error: {e}",
-                "rows": [],
-                "markdown_table": "",
-            }
-        )
+        return _error_response(f"Database error: {e}")
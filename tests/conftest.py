@@ -39,6 +39,34 @@ def mock_llm():
     return llm
 
 
+@pytest.fixture
+def fake_embeddings(tmp_path, monkeypatch):
+    """
+    Sustituye el modelo HuggingFace por embeddings deterministas (sin descargas)
+    y guarda el índice de docs en un directorio temporal.
+    """
+    from unittest.mock import patch
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src.config import embeddings
+    from src.config.settings import get_settings
+
+    monkeypatch.setenv("DOCS_INDEX_DIR", str(tmp_path / "docs_index"))
+    get_settings.cache_clear()
+    embeddings.get_embeddings.cache_clear()
+    from src.graphs import docs_agent_graph
+
+    # El retriever se construye en la primera pregunta: lo descartamos para
+    # que use estos embeddings y el índice temporal.
+    docs_agent_graph._retriever.reset()
+    with patch.object(
+        embeddings, "_build_embeddings", lambda backend="torch": (DeterministicFakeEmbedding(size=16), backend)
+    ):
+        yield embeddings.get_embeddings()
+    docs_agent_graph._retriever.reset()
+    embeddings.get_embeddings.cache_clear()
+    get_settings.cache_clear()
+
+
 def pytest_configure(config):
     """Hook de configuración de pytest"""
     # Aquí se pueden agregar configuraciones globales si es necesario
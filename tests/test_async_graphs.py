@@ -0,0 +1,132 @@
+"""
+Tests para la ruta asíncrona de los grafos (ainvoke / astream)
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from sqlalchemy import text
+
+
+def _fake_llm(content):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=content)] * 100))
+
+
+class TestArunQuery:
+    """Tests para arun_query (src/data/db.py)"""
+
+    def test_arun_query_basic_select(self, tmp_path):
+        """Verifica que arun_query devuelva lista de dicts"""
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from src.data.db import arun_query
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+        async def scenario():
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (id INTEGER, name TEXT)"))
+                await conn.execute(text("INSERT INTO t VALUES (1, 'Alice'), (2, 'Bob')"))
+            with patch("src.data.db.get_async_engine", return_value=engine):
+                rows = await arun_query("SELECT * FROM t WHERE id = :id", {"id": 2})
+            await engine.dispose()
+            return rows
+
+        assert asyncio.run(scenario()) == [{"id": 2, "name": "Bob"}]
+
+    def test_arun_query_max_rows(self, tmp_path):
+        """Verifica que arun_query respeta el límite de filas y marca el truncado"""
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from src.data.db import arun_query
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+        async def scenario():
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (id INTEGER)"))
+                await conn.execute(text("INSERT INTO t VALUES (1), (2), (3), (4)"))
+            with patch("src.data.db.get_async_engine", return_value=engine):
+                rows = await arun_query("SELECT * FROM t ORDER BY id", max_rows=2, arraysize=1)
+            await engine.dispose()
+            return rows
+
+        rows = asyncio.run(scenario())
+        assert rows == [{"id": 1}, {"id": 2}]
+        assert rows.truncated
+
+
+class TestAsyncSQLGraph:
+    """Tests para el SQL graph en modo async"""
+
+    def test_sql_graph_ainvoke_uses_async_nodes(self):
+        """Verifica que ainvoke use arun_query en lugar de run_query"""
+        from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+        llms = {"generate_sql": _fake_llm("SELECT 1 AS n FROM dual"), "explain_sql": _fake_llm("Hay 1")}
+        with patch("src.graphs.sql_agent_graph.get_llm", side_effect=llms.get), patch(
+            "src.graphs.sql_agent_graph.arun_query", new=AsyncMock(return_value=[{"n": 1}])
+        ) as mock_arun, patch("src.graphs.sql_agent_graph.run_query") as mock_run:
+            result = asyncio.run(build_sql_agent_graph().ainvoke({"question": "¿Cuántas?"}))
+
+        mock_arun.assert_awaited_once()
+        mock_run.assert_not_called()
+        assert result["answer"] == "Hay 1"
+        assert "FETCH FIRST 51 ROWS ONLY" in result["sql_query"]
+
+
+class TestAsyncReportGraph:
+    """Tests para los nodos async del report graph"""
+
+    def test_concurrent_reports_write_distinct_pdfs(self, tmp_path):
+        """Verifica que informes concurrentes no compartan el fichero PDF"""
+        from src.graphs import report_agent_graph
+
+        async def scenario():
+            states = [{"question": f"q{i}", "report_markdown": f"# Informe {i}"} for i in range(3)]
+            return await asyncio.gather(*(report_agent_graph.agenerate_pdf_node(s) for s in states))
+
+        with patch.object(report_agent_graph, "REPORTS_DIR", tmp_path / "reports"):
+            results = asyncio.run(scenario())
+
+        paths = [r["pdf_path"] for r in results]
+        assert len(set(paths)) == 3
+        assert all(Path(p).exists() and Path(p).parent == tmp_path / "reports" for p in paths)
+
+
+class TestAsyncMasterGraph:
+    """Tests para el master graph en modo async"""
+
+    def test_concurrent_conversations(self, fake_embeddings):
+        """Verifica que varias conversaciones se ejecuten concurrentemente"""
+        from src.graphs import master_graph
+
+        async def slow_docs(question):
+            await asyncio.sleep(0.2)
+            return {"answer": f"docs: {question['question']}"}
+
+        router_llm = _fake_llm(json.dumps({"intent": "docs", "reason": "definición"}))
+        with patch.object(master_graph, "get_llm", return_value=router_llm), patch.object(
+            master_graph._docs_app, "ainvoke", side_effect=slow_docs
+        ), patch.object(master_graph._report_app, "ainvoke", new=AsyncMock(return_value={"report_markdown": "# R"})):
+            app = master_graph.build_master_graph()
+
+            async def scenario():
+                questions = [f"pregunta {i}" for i in range(10)]
+                return await asyncio.gather(*(app.ainvoke({"question": q}) for q in questions))
+
+            start = time.perf_counter()
+            results = asyncio.run(scenario())
+            elapsed = time.perf_counter() - start
+
+        assert [r["docs_answer"] for r in results] == [f"docs: pregunta {i}" for i in range(10)]
+        # 10 conversaciones de 0.2s cada una, solapadas
+        assert elapsed < 1.0
@@ -0,0 +1,178 @@
+"""
+Tests para la carga masiva de ventas (src/data/bulk_load.py)
+"""
+
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.data.bulk_load import (
+    LoadStats,
+    LoadTask,
+    VentasSpec,
+    batches,
+    disable_indexes,
+    generate_ventas,
+    load_worker,
+    parallel_load,
+    plan_tasks,
+    rebuild_statements,
+    split_rows,
+)
+
+SPEC = VentasSpec(productos=(1, 80), tiendas=(1, 12))
+
+
+class FakeCursor:
+    """Cursor de python-oracledb: executemany con batcherrors y consultas al diccionario"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._errors = []
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        source = sql.split(" FROM ")[1].split()[0] if " FROM " in sql else None
+        self._rows = self.conn.query_results.get(source, [])
+
+    def executemany(self, sql, rows, batcherrors=False):
+        assert batcherrors
+        # Un producto que no existe: la fila se rechaza, el resto del lote entra
+        self._errors = [
+            SimpleNamespace(offset=i, message="ORA-02291: integrity constraint violated")
+            for i, row in enumerate(rows)
+            if row[1] == self.conn.bad_producto
+        ]
+        with self.conn.lock:
+            self.conn.batch_sizes.append(len(rows))
+
+    def getbatcherrors(self):
+        return self._errors
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, bad_producto=None, query_results=None):
+        self.bad_producto = bad_producto
+        self.query_results = query_results or {}
+        self.executed = []
+        self.batch_sizes = []
+        self.commits = 0
+        self.closed = 0
+        self.lock = threading.Lock()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        with self.lock:
+            self.commits += 1
+
+    def close(self):
+        self.closed += 1
+
+
+class TestGeneration:
+    """Tests para la generación y el reparto de filas"""
+
+    def test_rows_are_in_range_and_reproducible(self):
+        """Verifica rangos de ids, fechas y total, y que la semilla repite las filas"""
+        rows = list(generate_ventas(500, SPEC, seed=7))
+
+        assert rows == list(generate_ventas(500, SPEC, seed=7))
+        assert rows != list(generate_ventas(500, SPEC, seed=8))
+        for fecha, producto_id, tienda_id, cantidad, total in rows:
+            assert datetime(2023, 1, 1) <= fecha <= datetime(2024, 3, 26)
+            assert 1 <= producto_id <= 80 and 1 <= tienda_id <= 12
+            assert 1 <= cantidad <= 12 and 0 < total <= 360
+
+    def test_bounded_batches(self):
+        """Verifica que los lotes no pasan del tamaño pedido"""
+        assert [len(b) for b in batches(range(25), 10)] == [10, 10, 5]
+
+    def test_split_rows(self):
+        """Verifica el reparto de filas entre workers"""
+        assert split_rows(10, 3) == [4, 3, 3]
+        assert sum(split_rows(50_000_001, 8)) == 50_000_001
+
+    def test_plan_tasks(self):
+        """Verifica una semilla distinta por worker y que no hay workers sin filas"""
+        tasks = plan_tasks(3, 5, SPEC, FakeConnection, seed=10)
+
+        assert [(t.worker, t.rows, t.seed) for t in tasks] == [(0, 1, 10), (1, 1, 11), (2, 1, 12)]
+
+
+class TestLoad:
+    """Tests para los workers de carga"""
+
+    def test_worker_inserts_in_batches_with_errors(self):
+        """Verifica lotes acotados, commit por lote y filas rechazadas contadas sin abortar"""
+        conn = FakeConnection(bad_producto=3)
+        task = LoadTask(worker=0, rows=2_500, spec=VentasSpec((1, 5), (1, 2)), connect=lambda: conn, batch_size=1_000)
+
+        stats = load_worker(task)
+
+        assert conn.batch_sizes == [1_000, 1_000, 500]
+        assert conn.commits == 3 and conn.closed == 1
+        assert stats.batches == 3
+        assert stats.errors > 0 and stats.rows + stats.errors == 2_500
+        assert len(stats.error_samples) == 5 and "ORA-02291" in stats.error_samples[0]
+        assert stats.rows_per_second > 0
+
+    def test_skip_unusable_indexes(self):
+        """Verifica que con índices UNUSABLE la sesión los ignora"""
+        conn = FakeConnection()
+        load_worker(LoadTask(worker=0, rows=1, spec=SPEC, connect=lambda: conn, skip_unusable_indexes=True))
+
+        assert conn.executed == ["ALTER SESSION SET skip_unusable_indexes = TRUE"]
+
+    def test_parallel_load_uses_one_connection_per_worker(self):
+        """Verifica que cada worker abre su conexión y el total suma todos"""
+        conns = []
+
+        def connect():
+            conn = FakeConnection()
+            conns.append(conn)
+            return conn
+
+        tasks = plan_tasks(10_000, 4, SPEC, connect, batch_size=1_000, seed=1)
+        stats = parallel_load(tasks)
+        total = LoadStats.total(stats, seconds=2.0)
+
+        assert len(conns) == 4
+        assert total.rows == 10_000 and total.batches == 12
+        assert total.rows_per_second == 5_000
+
+
+class TestIndexes:
+    """Tests para desactivar y reconstruir índices"""
+
+    def test_disable_nonunique_indexes(self):
+        """Verifica que los índices no únicos se marcan UNUSABLE"""
+        conn = FakeConnection(query_results={"user_indexes": [("IX_VENTAS_FECHA",), ("IX_VENTAS_TIENDA",)]})
+
+        names = disable_indexes(conn.cursor())
+
+        assert names == ["IX_VENTAS_FECHA", "IX_VENTAS_TIENDA"]
+        assert conn.executed[1:] == [
+            'ALTER INDEX "IX_VENTAS_FECHA" UNUSABLE',
+            'ALTER INDEX "IX_VENTAS_TIENDA" UNUSABLE',
+        ]
+
+    def test_rebuild_statements(self):
+        """Verifica la reconstrucción entera o por partición, y que se quita el paralelismo"""
+        plain = FakeConnection()
+        partitioned = FakeConnection(query_results={"user_ind_partitions": [("P2023",), ("P2024",)]})
+
+        assert rebuild_statements(plain.cursor(), "IX_A") == ['ALTER INDEX "IX_A" REBUILD']
+        assert rebuild_statements(partitioned.cursor(), "IX_B", parallel=4) == [
+            'ALTER INDEX "IX_B" REBUILD PARTITION "P2023" PARALLEL 4',
+            'ALTER INDEX "IX_B" REBUILD PARTITION "P2024" PARALLEL 4',
+            'ALTER INDEX "IX_B" NOPARALLEL',
+        ]
@@ -0,0 +1,154 @@
+"""
+Tests para el resultado columnar (src/data/columnar.py)
+"""
+
+import datetime as dt
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.data.columnar import ColumnarResult, as_columnar
+
+ROWS = [
+    {"id": 1, "tienda": "Madrid", "total": Decimal("220326.08"), "fecha": dt.date(2024, 1, 5)},
+    {"id": 2, "tienda": None, "total": None, "fecha": None},
+]
+
+
+class TestColumnarResult:
+    """Tests para ColumnarResult"""
+
+    def test_typed_arrays(self):
+        """Verifica los tipos de cada columna (int, objeto, Decimal exacto, fecha con NaT, float con NaN)"""
+        result = ColumnarResult.from_rows(ROWS)
+        floats = ColumnarResult.from_tuples(["v"], [(1.5,), (None,), (2,)])
+
+        assert result.columns == ["id", "tienda", "total", "fecha"]
+        assert [a.dtype.kind for a in result.arrays] == ["i", "O", "O", "M"]
+        assert result.column("total")[0] == Decimal("220326.08")
+        assert np.isnat(result.column("fecha")[1])
+        assert len(result) == 2
+        assert floats.arrays[0].dtype == np.float64 and np.isnan(floats.arrays[0][1])
+
+    def test_nullable_int_stays_int(self):
+        """Verifica que un entero con NULL no pasa a float (3, no 3.0) en filas, markdown y JSON"""
+        result = ColumnarResult.from_tuples(["tienda", "n"], [("A", 3), ("B", None)])
+
+        assert result.to_rows() == [{"tienda": "A", "n": 3}, {"tienda": "B", "n": None}]
+        assert type(result.to_rows()[0]["n"]) is int
+        assert result.to_markdown().splitlines()[2:] == ["| A | 3 |", "| B |  |"]
+        assert result.to_compact_json() == '{"columns":["tienda","n"],"rows":[["A",3],["B",null]],"truncated":false}'
+
+    def test_decimal_keeps_precision(self):
+        """Verifica que un NUMBER grande no pierde cifras ni sale en notación científica"""
+        big = Decimal("12345678901234567.89")
+        result = ColumnarResult.from_tuples(["total"], [(big,), (None,)])
+
+        assert result.to_rows()[0]["total"] == big
+        assert result.to_markdown().splitlines()[2] == "| 12345678901234567.89 |"
+        assert '"rows":[[12345678901234567.89],[null]]' in result.to_compact_json()
+        assert json.loads(result.to_compact_json(), parse_float=Decimal)["rows"][0] == [big]
+
+    def test_to_rows_roundtrip(self):
+        """Verifica la conversión a lista de dicts con tipos Python y None"""
+        rows = ColumnarResult.from_rows(ROWS).to_rows()
+
+        assert rows[0] == {"id": 1, "tienda": "Madrid", "total": Decimal("220326.08"), "fecha": dt.date(2024, 1, 5)}
+        assert rows[1] == {"id": 2, "tienda": None, "total": None, "fecha": None}
+        assert type(rows[0]["id"]) is int
+
+    def test_to_markdown(self):
+        """Verifica la tabla markdown (NULL como celda vacía)"""
+        markdown = ColumnarResult.from_rows(ROWS).to_markdown()
+
+        assert markdown.splitlines() == [
+            "| id | tienda | total | fecha |",
+            "| --- | --- | --- | --- |",
+            "| 1 | Madrid | 220326.08 | 2024-01-05 |",
+            "| 2 |  |  |  |",
+        ]
+
+    def test_to_markdown_empty_and_limit(self):
+        """Verifica el mensaje sin resultados y el límite de filas (con fila final de "…")"""
+        empty = ColumnarResult.from_tuples(["id"], [])
+        many = ColumnarResult.from_tuples(["id"], [(i,) for i in range(10)])
+
+        assert empty.to_markdown(empty="No results.") == "No results."
+        lines = many.to_markdown(max_rows=3).splitlines()
+        assert len(lines) == 6 and lines[-1] == "| … |"
+        assert len(many.to_markdown(max_rows=10).splitlines()) == 12
+
+    def test_to_json_is_columnar(self):
+        """Verifica que el JSON lleva los nombres de columna una sola vez"""
+        data = json.loads(ColumnarResult.from_rows(ROWS, truncated=True).to_json())
+
+        assert data["columns"] == ["id", "tienda", "total", "fecha"]
+        assert data["data"]["total"] == [220326.08, None]
+        assert data["data"]["fecha"] == ["2024-01-05", None]
+        assert data["truncated"] is True
+
+    def test_to_compact_json(self):
+        """Verifica columnas una vez, filas como arrays y números como números JSON"""
+        mixed = ColumnarResult.from_tuples(["v"], [(Decimal("1.5"),), ("x",)])
+
+        data = json.loads(ColumnarResult.from_rows(ROWS, truncated=True).to_compact_json(extra="ok"))
+
+        assert data == {
+            "columns": ["id", "tienda", "total", "fecha"],
+            "rows": [[1, "Madrid", 220326.08, "2024-01-05"], [2, None, None, None]],
+            "truncated": True,
+            "extra": "ok",
+        }
+        # Decimal en una columna de tipos mezclados: número, no texto
+        assert json.loads(mixed.to_compact_json())["rows"] == [[1.5], ["x"]]
+
+    def test_head_does_not_copy(self):
+        """Verifica que head devuelve vistas de los mismos arrays"""
+        result = ColumnarResult.from_tuples(["id"], [(i,) for i in range(10)])
+
+        assert np.shares_memory(result.head(3).arrays[0], result.arrays[0])
+
+    def test_to_dataframe(self):
+        """Verifica la conversión a DataFrame"""
+        pytest.importorskip("pandas")
+        df = ColumnarResult.from_rows(ROWS).to_dataframe()
+
+        assert list(df.columns) == ["id", "tienda", "total", "fecha"]
+        assert df["id"].tolist() == [1, 2]
+
+    def test_as_columnar_accepts_rows(self):
+        """Verifica que as_columnar convierte listas de dicts y respeta truncated"""
+        from src.data.db import QueryRows
+
+        rows = QueryRows(ROWS)
+        rows.truncated = True
+        result = as_columnar(rows)
+
+        assert result.truncated
+        assert as_columnar(result) is result
+
+
+class TestRunQueryColumnar:
+    """Tests para run_query(columnar=True)"""
+
+    def test_run_query_columnar(self):
+        """Verifica que run_query devuelve un ColumnarResult tipado"""
+        from src.data.db import run_query
+
+        engine = create_engine("sqlite:///:memory:")
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER, nombre TEXT, total REAL)"))
+            conn.execute(text("INSERT INTO t VALUES (1, 'a', 1.5), (2, 'b', 2.5), (3, 'c', 3.5)"))
+            conn.commit()
+
+        with patch("src.data.db.get_engine", return_value=engine):
+            result = run_query("SELECT * FROM t ORDER BY id", max_rows=2, columnar=True)
+
+        assert isinstance(result, ColumnarResult)
+        assert result.columns == ["id", "nombre", "total"]
+        assert result.column("total").tolist() == [1.5, 2.5]
+        assert result.truncated
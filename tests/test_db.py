@@ -7,7 +7,8 @@ from unittest.mock import Mock, patch, MagicMock
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
-from src.data.db import get_engine, run_query
+from src.data import db
+from src.data.db import get_engine, get_pool_stats, iter_query, run_query, warm_pool
 
 
 class TestGetEngine:
@@ -16,6 +17,7 @@ class TestGetEngine:
     def setup_method(self):
         """Limpia el estado global entre tests"""
         import src.data.db
+
         src.data.db._engine = None
 
     def test_get_engine_returns_engine(self):
@@ -40,6 +42,7 @@ class TestRunQuery:
     def setup_method(self):
         """Configura un motor de base de datos en memoria para tests"""
         import src.data.db
+
         src.data.db._engine = None
         self.test_engine = create_engine("sqlite:///:memory:")
         # Crear tabla de prueba
@@ -59,9 +62,7 @@ class TestRunQuery:
     def test_run_query_with_params(self):
         """Verifica que run_query acepte parámetros"""
         with patch("src.data.db.get_engine", return_value=self.test_engine):
-            result = run_query(
-                "SELECT * FROM test_table WHERE id = :id", {"id": 1}
-            )
+            result = run_query("SELECT * FROM test_table WHERE id = :id", {"id": 1})
             assert len(result) == 1
             assert result[0]["id"] == 1
 
@@ -94,3 +95,160 @@ class TestRunQuery:
             result = run_query("SELECT COUNT(*) as count FROM test_table")
             assert len(result) == 1
             assert result[0]["count"] == 2
+
+
+def _pool_settings(url, **overrides):
+    settings = MagicMock()
+    settings.oracle_sqlalchemy_url = url
+    settings.oracle_user = "retail"
+    settings.oracle_password = "secret"
+    settings.oracle_dsn = "localhost:1521/XEPDB1"
+    settings.db_pool_size = 3
+    settings.db_pool_max_overflow = 2
+    settings.db_pool_timeout = 5.0
+    settings.db_pool_recycle = 600
+    settings.db_pool_pre_ping = True
+    settings.db_pool_warm = 2
+    settings.db_native_pool = False
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    return settings
+
+
+class TestPoolConfig:
+    """Tests para la configuración del pool de conexiones"""
+
+    def setup_method(self):
+        db._engine = None
+        db._native_pool = None
+
+    def teardown_method(self):
+        db._engine = None
+        db._native_pool = None
+
+    def test_pool_settings_applied(self):
+        """Verifica que tamaño, overflow, timeout, recycle y pre-ping llegan al pool"""
+        settings = _pool_settings("oracle+oracledb://u:p@localhost:1521/?service_name=XEPDB1")
+        with patch("src.data.db.get_settings", return_value=settings):
+            engine = get_engine()
+
+        assert engine.pool.size() == 3
+        assert engine.pool._max_overflow == 2
+        assert engine.pool._timeout == 5.0
+        assert engine.pool._recycle == 600
+        assert engine.pool._pre_ping
+
+    def test_native_pool_mode(self):
+        """Verifica que con db_native_pool las conexiones salen del pool de oracledb"""
+        settings = _pool_settings("oracle+oracledb://u:p@localhost:1521/?service_name=XEPDB1", db_native_pool=True)
+        native = MagicMock()
+        with patch("src.data.db.get_settings", return_value=settings), patch(
+            "oracledb.create_pool", return_value=native
+        ) as create_pool:
+            engine = get_engine()
+
+        kwargs = create_pool.call_args.kwargs
+        assert kwargs["min"] == 2
+        assert kwargs["max"] == 5
+        assert kwargs["wait_timeout"] == 5000
+        assert engine.pool.__class__.__name__ == "NullPool"
+        assert db._native_pool is native
+
+    def test_warm_pool_opens_connections(self, tmp_path):
+        """Verifica que warm_pool deja conexiones abiertas en el pool"""
+        url = f"sqlite:///{tmp_path / 'warm.db'}"
+        with patch("src.data.db.get_settings", return_value=_pool_settings(url)):
+            opened = warm_pool()
+            stats = get_pool_stats()
+
+        assert opened == 2
+        assert stats["mode"] == "sqlalchemy"
+        assert stats["open"] == 2
+        assert stats["in_use"] == 0
+
+
+class TestPoolStats:
+    """Tests para las métricas del pool"""
+
+    def test_checkout_wait_recorded(self):
+        """Verifica que run_query registra la espera de checkout"""
+        engine = create_engine("sqlite:///:memory:")
+        before = get_pool_stats()["checkouts"]
+        with patch("src.data.db.get_engine", return_value=engine):
+            run_query("SELECT 1 AS uno")
+
+        stats = get_pool_stats()
+        assert stats["checkouts"] == before + 1
+        assert stats["max_wait_ms"] >= 0
+
+    def test_pool_timeout_counted(self):
+        """Verifica que un timeout del pool se cuenta y se traduce a RuntimeError"""
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+        engine = MagicMock()
+        engine.connect.side_effect = PoolTimeoutError("QueuePool limit reached")
+        before = get_pool_stats()["timeouts"]
+        with patch("src.data.db.get_engine", return_value=engine), pytest.raises(RuntimeError, match="Database error"):
+            run_query("SELECT 1")
+
+        assert get_pool_stats()["timeouts"] == before + 1
+
+
+class TestRunQueryLimits:
+    """Tests para la lectura por lotes con límite de filas/bytes"""
+
+    def setup_method(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        with self.engine.connect() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER, name TEXT)"))
+            for i in range(25):
+                conn.execute(text("INSERT INTO t VALUES (:id, :name)"), {"id": i, "name": f"fila{i:02d}"})
+            conn.commit()
+
+    def test_no_limits_reads_everything(self):
+        """Verifica que sin límites se leen todas las filas en varios lotes"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            rows = run_query("SELECT * FROM t ORDER BY id", arraysize=4)
+
+        assert len(rows) == 25
+        assert not rows.truncated
+
+    def test_max_rows_truncates(self):
+        """Verifica que se deja de leer al superar max_rows"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            rows = run_query("SELECT * FROM t ORDER BY id", max_rows=10, arraysize=4)
+
+        assert [r["id"] for r in rows] == list(range(10))
+        assert rows.truncated
+
+    def test_exact_max_rows_is_not_truncated(self):
+        """Verifica que un resultado justo del tamaño del límite no se marca truncado"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            rows = run_query("SELECT * FROM t", max_rows=25)
+
+        assert len(rows) == 25
+        assert not rows.truncated
+
+    def test_max_bytes_truncates(self):
+        """Verifica el límite de bytes aproximado"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            rows = run_query("SELECT name FROM t ORDER BY id", max_bytes=30)
+
+        # Cada fila son 6 caracteres ("fila00")
+        assert len(rows) == 5
+        assert rows.approx_bytes == 30
+        assert rows.truncated
+
+    def test_iter_query_yields_batches(self):
+        """Verifica que iter_query devuelve lotes de arraysize filas"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            sizes = [len(batch) for batch in iter_query("SELECT * FROM t", arraysize=10)]
+
+        assert sizes == [10, 10, 5]
+
+    def test_iter_query_database_error(self):
+        """Verifica que los errores SQL se traducen a RuntimeError"""
+        with patch("src.data.db.get_engine", return_value=self.engine), pytest.raises(
+            RuntimeError, match="Database error"
+        ):
+            list(iter_query("SELECT * FROM no_existe"))
@@ -0,0 +1,91 @@
+"""
+Tests para el troceado de documentación markdown (src/data/docs_chunking.py)
+"""
+
+from src.data.docs_chunking import chunk_markdown, split_markdown_sections
+
+MANUAL = """# Manual
+
+Introducción al manual.
+
+## Ventas
+
+La tabla ventas guarda cada ticket.
+
+## Tiendas
+
+### Madrid
+
+Tienda principal.
+
+```sql
+# esto no es un encabezado
+SELECT 1 FROM dual
+```
+"""
+
+
+class TestSplitMarkdownSections:
+    """Tests para split_markdown_sections"""
+
+    def test_splits_by_headings_with_section_path(self):
+        """Verifica que cada sección lleva la ruta de sus encabezados"""
+        sections = [section for section, _ in split_markdown_sections(MANUAL)]
+
+        assert sections == ["Manual", "Manual > Ventas", "Manual > Tiendas > Madrid"]
+
+    def test_keeps_heading_in_text(self):
+        """Verifica que el texto conserva el encabezado de la sección"""
+        _, text = split_markdown_sections(MANUAL)[1]
+
+        assert text == "## Ventas\n\nLa tabla ventas guarda cada ticket."
+
+    def test_heading_without_body_joins_subsection(self):
+        """Verifica que un encabezado vacío no queda como fragmento suelto"""
+        _, text = split_markdown_sections(MANUAL)[2]
+
+        assert text.startswith("## Tiendas\n\n### Madrid")
+
+    def test_ignores_headings_inside_code_blocks(self):
+        """Verifica que un '#' dentro de un bloque de código no parte la sección"""
+        _, text = split_markdown_sections(MANUAL)[-1]
+
+        assert "# esto no es un encabezado" in text
+        assert "SELECT 1 FROM dual" in text
+
+    def test_text_without_headings(self):
+        """Verifica que un texto sin encabezados es una sola sección sin ruta"""
+        assert split_markdown_sections("Solo texto.") == [("", "Solo texto.")]
+
+
+class TestChunkMarkdown:
+    """Tests para chunk_markdown"""
+
+    def test_metadata(self):
+        """Verifica los metadatos source/section/chunk"""
+        docs = chunk_markdown(MANUAL, source="docs/manual.md")
+
+        assert [d.metadata["chunk"] for d in docs] == [0, 1, 2]
+        assert all(d.metadata["source"] == "docs/manual.md" for d in docs)
+        assert docs[1].metadata["section"] == "Manual > Ventas"
+
+    def test_long_sections_split_by_size_with_overlap(self):
+        """Verifica que una sección larga se divide respetando tamaño y solape"""
+        body = " ".join(f"palabra{i}" for i in range(200))
+        docs = chunk_markdown(f"# Larga\n\n{body}", source="x.md", chunk_size=200, chunk_overlap=50)
+
+        assert len(docs) > 1
+        assert all(len(d.page_content) <= 200 for d in docs)
+        assert all(d.metadata["section"] == "Larga" for d in docs)
+        # Cada trozo conserva el encabezado de su sección
+        assert all(d.page_content.startswith("# Larga\n\npalabra") for d in docs)
+        # El final de un fragmento se repite al principio del siguiente
+        last_word = docs[0].page_content.split()[-1]
+        assert last_word in docs[1].page_content
+
+    def test_chunk_size_zero_only_splits_sections(self):
+        """Verifica que con chunk_size=0 solo se parte por secciones"""
+        body = "x " * 2000
+        docs = chunk_markdown(f"# A\n\n{body}\n\n# B\n\ntexto", source="x.md", chunk_size=0)
+
+        assert [d.metadata["section"] for d in docs] == ["A", "B"]
@@ -0,0 +1,137 @@
+"""
+Tests para el índice persistente de documentación (src/data/docs_index.py)
+"""
+
+from pathlib import Path
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import Field
+
+from src.data.docs_index import load_or_update_index
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Embeddings deterministas que cuentan los textos embebidos"""
+
+    embedded: list = Field(default_factory=list)
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings(size=8)
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "ventas.md").write_text("# Ventas\nTabla de ventas", encoding="utf-8")
+    (docs / "tiendas.md").write_text("# Tiendas\nTabla de tiendas", encoding="utf-8")
+    return docs
+
+
+def _load(docs_dir, index_dir, embeddings, embeddings_id="fake"):
+    return load_or_update_index(docs_dir, index_dir, embeddings, embeddings_id=embeddings_id)
+
+
+class TestLoadOrUpdateIndex:
+    """Tests para load_or_update_index"""
+
+    def test_first_run_builds_and_persists(self, docs_dir, tmp_path, embeddings):
+        """Verifica que la primera vez se indexa todo y se guarda en disco"""
+        index_dir = tmp_path / "index"
+        vectorstore, update = _load(docs_dir, index_dir, embeddings)
+
+        assert update.rebuilt
+        assert len(update.added) == 2
+        assert vectorstore.index.ntotal == 2
+        assert (index_dir / "index.faiss").exists()
+        assert (index_dir / "manifest.json").exists()
+
+    def test_restart_without_changes_does_not_embed(self, docs_dir, tmp_path, embeddings):
+        """Verifica que al rearrancar sin cambios no se re-embebe nada"""
+        index_dir = tmp_path / "index"
+        _load(docs_dir, index_dir, embeddings)
+        embeddings.embedded.clear()
+
+        vectorstore, update = _load(docs_dir, index_dir, embeddings)
+
+        assert not update.has_changes
+        assert embeddings.embedded == []
+        assert vectorstore.index.ntotal == 2
+
+    def test_only_changed_and_added_files_are_embedded(self, docs_dir, tmp_path, embeddings):
+        """Verifica la actualización incremental"""
+        index_dir = tmp_path / "index"
+        _load(docs_dir, index_dir, embeddings)
+        embeddings.embedded.clear()
+
+        (docs_dir / "ventas.md").write_text("# Ventas\nTabla de ventas v2", encoding="utf-8")
+        (docs_dir / "kpis.md").write_text("# KPIs\nTicket medio", encoding="utf-8")
+        (docs_dir / "tiendas.md").unlink()
+
+        vectorstore, update = _load(docs_dir, index_dir, embeddings)
+
+        assert [p.split("/")[-1] for p in update.changed] == ["ventas.md"]
+        assert [p.split("/")[-1] for p in update.added] == ["kpis.md"]
+        assert [p.split("/")[-1] for p in update.removed] == ["tiendas.md"]
+        assert len(embeddings.embedded) == 2
+        contents = sorted(d.page_content for d in vectorstore.docstore._dict.values())
+        assert contents == ["# KPIs\nTicket medio", "# Ventas\nTabla de ventas v2"]
+
+    def test_embeddings_change_forces_rebuild(self, docs_dir, tmp_path, embeddings):
+        """Verifica que cambiar de modelo de embeddings reconstruye el índice"""
+        index_dir = tmp_path / "index"
+        _load(docs_dir, index_dir, embeddings, embeddings_id="modelo-a")
+
+        _, update = _load(docs_dir, index_dir, embeddings, embeddings_id="modelo-b")
+
+        assert update.rebuilt
+        assert len(update.added) == 2
+
+    def test_chunking_change_forces_rebuild(self, docs_dir, tmp_path, embeddings):
+        """Verifica que cambiar el tamaño de fragmento reconstruye el índice"""
+        index_dir = tmp_path / "index"
+        load_or_update_index(docs_dir, index_dir, embeddings, embeddings_id="fake", chunk_size=500)
+
+        _, update = load_or_update_index(docs_dir, index_dir, embeddings, embeddings_id="fake", chunk_size=300)
+
+        assert update.rebuilt
+        assert len(update.added) == 2
+
+    def test_interrupted_save_forces_rebuild(self, docs_dir, tmp_path, embeddings, monkeypatch):
+        """Verifica que si el guardado de FAISS falla a medias no queda manifiesto y se reconstruye"""
+        from langchain_community.vectorstores import FAISS
+
+        index_dir = tmp_path / "index"
+        _load(docs_dir, index_dir, embeddings)
+        (docs_dir / "kpis.md").write_text("# KPIs\nTicket medio", encoding="utf-8")
+
+        def fail(self, folder_path, index_name="index"):
+            (Path(folder_path) / f"{index_name}.faiss").write_bytes(b"a medias")
+            raise OSError("disco lleno")
+
+        with monkeypatch.context() as m:
+            m.setattr(FAISS, "save_local", fail)
+            with pytest.raises(OSError):
+                _load(docs_dir, index_dir, embeddings)
+
+        assert not (index_dir / "manifest.json").exists()
+        assert sorted(p.name for p in index_dir.iterdir()) == ["index.faiss", "index.pkl"]
+        vectorstore, update = _load(docs_dir, index_dir, embeddings)
+        assert update.rebuilt
+        assert vectorstore.index.ntotal == 3
+
+    def test_documents_carry_source_and_section(self, docs_dir, tmp_path, embeddings):
+        """Verifica que los fragmentos indexados llevan fichero y sección"""
+        vectorstore, _ = _load(docs_dir, tmp_path / "index", embeddings)
+
+        metadata = sorted(
+            (d.metadata["source"].split("/")[-1], d.metadata["section"]) for d in vectorstore.docstore._dict.values()
+        )
+        assert metadata == [("tiendas.md", "Tiendas"), ("ventas.md", "Ventas")]
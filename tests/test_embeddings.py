@@ -0,0 +1,157 @@
+"""
+Tests para el modelo de embeddings (src/config/embeddings.py)
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import Field
+
+from src.config import embeddings
+from src.config.embeddings import CachedQueryEmbeddings, normalize_query
+from src.config.settings import get_settings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Embeddings deterministas que cuentan las llamadas a embed_query"""
+
+    calls: list = Field(default_factory=list)
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def base():
+    return CountingEmbeddings(size=8)
+
+
+class TestCachedQueryEmbeddings:
+    """Tests para la caché LRU de embeddings de preguntas"""
+
+    def test_normalized_repeats_hit_cache(self, base):
+        """Verifica que mayúsculas y espacios no provocan otra llamada al modelo"""
+        cached = CachedQueryEmbeddings(base, max_entries=10)
+
+        first = cached.embed_query("¿Qué es el ticket medio?")
+        second = cached.embed_query("  ¿qué es el   TICKET medio? ")
+
+        assert first == second
+        assert base.calls == ["¿qué es el ticket medio?"]
+        assert cached.cache_stats()["hits"] == 1
+        assert cached.cache_stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self, base):
+        """Verifica que al superar el tamaño se descarta la menos usada"""
+        cached = CachedQueryEmbeddings(base, max_entries=2)
+        cached.embed_query("a")
+        cached.embed_query("b")
+        cached.embed_query("a")
+        cached.embed_query("c")  # expulsa "b"
+        base.calls.clear()
+
+        cached.embed_query("a")
+        cached.embed_query("b")
+
+        assert base.calls == ["b"]
+        assert cached.cache_stats()["size"] == 2
+
+    def test_embed_documents_bypasses_cache(self, base):
+        """Verifica que el indexado no pasa por la caché"""
+        cached = CachedQueryEmbeddings(base)
+
+        vectors = cached.embed_documents(["uno", "dos"])
+
+        assert len(vectors) == 2
+        assert cached.cache_stats()["size"] == 0
+
+    def test_returned_vectors_are_copies(self, base):
+        """Verifica que modificar un vector devuelto no altera la caché"""
+        cached = CachedQueryEmbeddings(base)
+        vector = cached.embed_query("ventas")
+        vector[0] = 99.0
+
+        assert cached.embed_query("ventas")[0] != 99.0
+
+
+class TestNormalizeQuery:
+    """Tests para normalize_query"""
+
+    def test_normalize(self):
+        """Verifica minúsculas y espacios colapsados"""
+        assert normalize_query("  Ventas   POR\ttienda ") == "ventas por tienda"
+
+
+class TestGetEmbeddings:
+    """Tests para get_embeddings y la elección de backend"""
+
+    def setup_method(self):
+        get_settings.cache_clear()
+        embeddings.get_embeddings.cache_clear()
+
+    def teardown_method(self):
+        get_settings.cache_clear()
+        embeddings.get_embeddings.cache_clear()
+
+    def test_wraps_with_query_cache(self, monkeypatch):
+        """Verifica que por defecto el modelo va envuelto en la caché"""
+        monkeypatch.delenv("EMBEDDINGS_QUERY_CACHE_SIZE", raising=False)
+        with patch.object(embeddings, "_build_embeddings", return_value=(DeterministicFakeEmbedding(size=4), "torch")):
+            emb = embeddings.get_embeddings()
+
+        assert isinstance(emb, CachedQueryEmbeddings)
+
+    def test_cache_disabled(self, monkeypatch):
+        """Verifica que con tamaño 0 no se envuelve el modelo"""
+        monkeypatch.setenv("EMBEDDINGS_QUERY_CACHE_SIZE", "0")
+        with patch.object(embeddings, "_build_embeddings", return_value=(DeterministicFakeEmbedding(size=4), "torch")):
+            emb = embeddings.get_embeddings()
+
+        assert isinstance(emb, DeterministicFakeEmbedding)
+
+    def test_backend_is_passed_and_identifies_index(self, monkeypatch):
+        """Verifica que el backend llega al constructor y cambia el id del índice"""
+        monkeypatch.setenv("EMBEDDINGS_BACKEND", "int8")
+        with patch.object(
+            embeddings, "_build_embeddings", return_value=(DeterministicFakeEmbedding(size=4), "int8")
+        ) as build:
+            embeddings.get_embeddings()
+
+        build.assert_called_once_with("int8")
+        assert embeddings.get_embeddings_id() == f"{embeddings.EMBEDDINGS_MODEL}:int8"
+
+    def test_unknown_backend(self, monkeypatch):
+        """Verifica que un backend desconocido da un error claro"""
+        monkeypatch.setenv("EMBEDDINGS_BACKEND", "tpu")
+
+        with pytest.raises(ValueError, match="EMBEDDINGS_BACKEND"):
+            embeddings.get_embeddings()
+
+    def test_onnx_falls_back_to_torch(self):
+        """Verifica que sin ONNX Runtime se usa el modelo PyTorch"""
+        torch_model = MagicMock()
+
+        def fake_hf(model_name, model_kwargs=None):
+            if model_kwargs:
+                raise ImportError("optimum no instalado")
+            return torch_model
+
+        with patch("langchain_community.embeddings.HuggingFaceEmbeddings", side_effect=fake_hf):
+            assert embeddings._build_embeddings("onnx") == (torch_model, "torch")
+
+    @pytest.mark.parametrize("backend", ["onnx", "int8"])
+    def test_id_after_fallback_is_torch(self, monkeypatch, backend):
+        """Verifica que si ONNX o int8 no cargan, el id del índice es el de PyTorch"""
+        monkeypatch.setenv("EMBEDDINGS_BACKEND", backend)
+
+        def fake_hf(model_name, model_kwargs=None):
+            if model_kwargs:
+                raise ImportError("optimum no instalado")
+            return DeterministicFakeEmbedding(size=4)
+
+        with patch("langchain_community.embeddings.HuggingFaceEmbeddings", side_effect=fake_hf), patch.object(
+            embeddings, "_quantize_int8", side_effect=RuntimeError("sin motor de cuantización")
+        ):
+            assert embeddings.get_embeddings_id() == embeddings.EMBEDDINGS_MODEL
@@ -0,0 +1,131 @@
+"""
+Tests para la recuperación híbrida BM25 + FAISS (src/data/hybrid_retrieval.py)
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.data.hybrid_retrieval import (
+    BM25Index,
+    HybridRetriever,
+    RetrievalStats,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+DOCS = {
+    "kpis#0": "El ticket medio es el importe total dividido entre el número de tickets.",
+    "ventas#0": "La tabla ventas guarda una fila por línea de ticket con fecha y tienda.",
+    "tiendas#0": "La tabla tiendas contiene la ciudad y la superficie de cada tienda.",
+    "negocio#0": "Las categorías principales son Bebidas, Comida y Limpieza.",
+}
+
+
+@pytest.fixture
+def vectorstore():
+    from langchain_community.vectorstores import FAISS
+
+    docs = [Document(page_content=text) for text in DOCS.values()]
+    return FAISS.from_documents(docs, DeterministicFakeEmbedding(size=8), ids=list(DOCS))
+
+
+class TestTokenize:
+    """Tests para tokenize"""
+
+    def test_normalizes_and_adds_bigrams(self):
+        """Verifica minúsculas, sin tildes ni stopwords y con bigramas"""
+        assert tokenize("El Ticket Médio") == ["ticket", "medio", "ticket__medio"]
+
+    def test_same_tokens_as_intent_classifier(self):
+        """Verifica que el clasificador de intención normaliza igual (solo cambian las stopwords)"""
+        from src.graphs.intent_classifier import tokenize as intent_tokenize
+
+        tokens = ["ticket", "medio", "num_ventas", "ticket__medio", "medio__num_ventas"]
+        assert intent_tokenize("Ticket Médio num_ventas") == tokenize("Ticket Médio num_ventas") == tokens
+
+
+class TestBM25Index:
+    """Tests para BM25Index"""
+
+    def test_exact_terms_rank_first(self):
+        """Verifica que el documento con el término exacto sale primero"""
+        index = BM25Index([(doc_id, Document(page_content=text)) for doc_id, text in DOCS.items()])
+
+        assert index.search("¿Qué es el ticket medio?", k=2)[0][0] == "kpis#0"
+        assert index.search("tabla tiendas", k=1)[0][0] == "tiendas#0"
+
+    def test_unknown_terms_return_nothing(self):
+        """Verifica que sin términos conocidos no hay resultados"""
+        index = BM25Index([("a", Document(page_content="ventas"))])
+
+        assert index.search("xyz", k=3) == []
+
+
+class TestReciprocalRankFusion:
+    """Tests para reciprocal_rank_fusion"""
+
+    def test_documents_in_both_lists_win(self):
+        """Verifica que un documento presente en ambas listas sube al primer puesto"""
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "b"]])
+
+        assert [doc_id for doc_id, _ in fused][:2] == ["c", "b"]
+        assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
+
+
+class TestHybridRetriever:
+    """Tests para HybridRetriever"""
+
+    def test_lexical_mode(self, vectorstore):
+        """Verifica el modo solo BM25 y su medición de latencia"""
+        retriever = HybridRetriever(vectorstore, mode="lexical", k=1, stats=RetrievalStats())
+
+        docs, timings = retriever.search("ticket medio")
+
+        assert docs[0].page_content == DOCS["kpis#0"]
+        assert set(timings) == {"lexical"}
+
+    def test_uses_public_docstore_api(self, vectorstore):
+        """Verifica que los fragmentos se leen por id (get_by_ids), sin el dict interno del docstore"""
+
+        class Docstore:
+            def __init__(self, docs):
+                self.docs = docs
+
+            def search(self, doc_id):
+                return self.docs.get(doc_id, f"ID {doc_id} not found.")
+
+        vectorstore.docstore = Docstore({doc.id: doc for doc in vectorstore.docstore._dict.values()})
+        retriever = HybridRetriever(vectorstore, mode="lexical", k=1, stats=RetrievalStats())
+
+        assert len(retriever.bm25) == len(DOCS)
+        assert retriever.invoke("ticket medio")[0].page_content == DOCS["kpis#0"]
+
+    def test_dense_mode_skips_bm25(self, vectorstore):
+        """Verifica que el modo denso no construye el índice BM25"""
+        retriever = HybridRetriever(vectorstore, mode="dense", k=2, stats=RetrievalStats())
+
+        docs, timings = retriever.search("ticket medio")
+
+        assert retriever.bm25 is None
+        assert len(docs) == 2
+        assert set(timings) == {"dense"}
+
+    def test_hybrid_mode_fuses_and_times_each_stage(self, vectorstore):
+        """Verifica la fusión y la latencia por etapa en modo híbrido"""
+        stats = RetrievalStats()
+        retriever = HybridRetriever(vectorstore, mode="hybrid", k=3, stats=stats)
+
+        docs = retriever.invoke("ticket medio")
+        _, timings = retriever.search("tabla ventas")
+
+        assert len(docs) == 3
+        assert DOCS["kpis#0"] in [d.page_content for d in docs]
+        assert set(timings) == {"lexical", "dense", "fusion"}
+        assert stats.as_dict()["queries"] == 2
+        assert set(stats.as_dict()["avg_ms"]) == {"lexical", "dense", "fusion"}
+
+    def test_unknown_mode(self, vectorstore):
+        """Verifica que un modo desconocido da un error claro"""
+        with pytest.raises(ValueError, match="Modo de recuperación desconocido"):
+            HybridRetriever(vectorstore, mode="semantic")
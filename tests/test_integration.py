@@ -16,14 +16,10 @@ class TestRouterGraph:
         from src.graphs.router_graph import router_node, GlobalState
 
         mock_llm = MagicMock()
-        mock_llm.invoke.return_value.content = json.dumps(
-            {"intent": "sql", "reason": "request contains metrics"}
-        )
+        mock_llm.invoke.return_value.content = json.dumps({"intent": "sql", "reason": "request contains metrics"})
         mock_get_llm.return_value = mock_llm
 
-        state: GlobalState = {
-            "question": "¿Cuáles fueron las ventas totales en 2023?"
-        }
+        state: GlobalState = {"question": "¿Cuáles fueron las ventas totales en 2023?"}
         result = router_node(state)
 
         assert result["intent"] == "sql"
@@ -35,14 +31,10 @@ class TestRouterGraph:
         from src.graphs.router_graph import router_node, GlobalState
 
         mock_llm = MagicMock()
-        mock_llm.invoke.return_value.content = json.dumps(
-            {"intent": "docs", "reason": "request is about definitions"}
-        )
+        mock_llm.invoke.return_value.content = json.dumps({"intent": "docs", "reason": "request is about definitions"})
         mock_get_llm.return_value = mock_llm
 
-        state: GlobalState = {
-            "question": "¿Qué es una región de ventas?"
-        }
+        state: GlobalState = {"question": "¿Qué es una región de ventas?"}
         result = router_node(state)
 
         assert result["intent"] == "docs"
@@ -83,6 +75,22 @@ class TestSQLFlow:
         assert "sql_answer" in result
         assert result["sql_answer"] == "Total ventas: 100000"
 
+    def test_execute_sql_node_passes_limits_and_flags_truncation(self):
+        """Verifica que execute_sql_node aplica los límites y avisa del truncado"""
+        from src.data.db import QueryRows
+        from src.graphs.sql_agent_graph import execute_sql_node
+
+        rows = QueryRows({"n": i} for i in range(3))
+        rows.truncated = True
+        with patch("src.graphs.sql_agent_graph.run_query", return_value=rows) as mock_run:
+            result = execute_sql_node({"question": "q", "sql_query": "SELECT n FROM t"})
+
+        kwargs = mock_run.call_args.kwargs
+        assert set(kwargs) == {"params", "max_rows", "max_bytes", "columnar", "timeout", "max_cost", "max_cardinality"}
+        assert result["sql_truncated"] is True
+        assert result["sql_result"].columns == ["n"]
+        assert "Resultado truncado" in result["sql_markdown"]
+
 
 class TestDocsFlow:
     """Tests para el flujo de documentos"""
@@ -115,3 +123,63 @@ class TestMasterGraph:
         required_keys = ["question", "intent"]
         for key in required_keys:
             assert key in GlobalState.__annotations__
+
+
+class TestMasterGraphMixed:
+    """Tests para la ejecución en paralelo de las ramas SQL y Docs"""
+
+    def _run(self, master_graph, sql_side_effect, docs_side_effect, intent="mixed"):
+        router_llm = MagicMock()
+        router_llm.invoke.return_value.content = json.dumps({"intent": intent, "reason": "test"})
+        with patch.object(master_graph, "get_llm", return_value=router_llm), patch.object(
+            master_graph, "_sql_app"
+        ) as sql_app, patch.object(master_graph, "_docs_app") as docs_app, patch.object(
+            master_graph, "_report_app"
+        ) as report_app, patch.object(
+            master_graph, "classify_intent", return_value=None
+        ):
+            sql_app.invoke.side_effect = sql_side_effect
+            docs_app.invoke.side_effect = docs_side_effect
+            report_app.invoke.return_value = {"report_markdown": "# Informe", "pdf_path": "x.pdf"}
+            result = master_graph.build_master_graph().invoke({"question": "Ventas y contexto"})
+        return result, report_app.invoke.call_args
+
+    def test_mixed_branches_run_in_parallel(self, fake_embeddings):
+        """Verifica que SQL y Docs se solapan en el tiempo"""
+        import time
+        from src.graphs import master_graph
+
+        def slow(answer):
+            def run(_):
+                time.sleep(0.3)
+                return {"answer": answer, "sql_markdown": "| a |"}
+
+            return run
+
+        start = time.perf_counter()
+        result, _ = self._run(master_graph, slow("datos"), slow("contexto"))
+        elapsed = time.perf_counter() - start
+
+        assert result["sql_answer"] == "datos"
+        assert result["docs_answer"] == "contexto"
+        assert result["report_markdown"] == "# Informe"
+        assert elapsed < 0.55
+
+    def test_mixed_branch_failure_keeps_other_branch(self, fake_embeddings):
+        """Verifica que si falla SQL se conserva la respuesta de Docs"""
+        from src.graphs import master_graph
+
+        result, report_call = self._run(master_graph, RuntimeError("ORA-00942"), lambda _: {"answer": "contexto"})
+
+        assert result["docs_answer"] == "contexto"
+        assert "ORA-00942" in result["sql_error"]
+        report_input = report_call.args[0]
+        assert report_input["docs_answer"] == "contexto"
+        assert "ORA-00942" in report_input["sql_answer"]
+
+    def test_single_branch_failure_propagates(self, fake_embeddings):
+        """Verifica que con intención 'sql' el error no se oculta"""
+        from src.graphs import master_graph
+
+        with pytest.raises(RuntimeError, match="ORA-00942"):
+            self._run(master_graph, RuntimeError("ORA-00942"), None, intent="sql")
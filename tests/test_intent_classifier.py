@@ -0,0 +1,135 @@
+"""
+Tests para el clasificador local de intención (src/graphs/intent_classifier.py)
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.graphs import intent_classifier
+from src.graphs.intent_classifier import IntentClassifier, classify_intent, tokenize
+
+EXAMPLES = [
+    ("Dame las ventas totales por categoría", "sql"),
+    ("¿Cuánto vendimos el mes pasado?", "sql"),
+    ("Top 10 productos más vendidos por importe", "sql"),
+    ("Ventas por tienda en 2023", "sql"),
+    ("¿Qué significa ticket medio?", "docs"),
+    ("¿Qué es un cliente activo?", "docs"),
+    ("Explícame el esquema de la base de datos", "docs"),
+    ("¿Cómo se define el margen?", "docs"),
+]
+
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier().fit(EXAMPLES)
+
+
+class TestTokenize:
+    """Tests para la normalización de texto"""
+
+    def test_tokenize_removes_accents_and_stopwords(self):
+        """Verifica minúsculas, tildes y stopwords"""
+        tokens = tokenize("¿Qué CATEGORÍA vende más en España?")
+        assert "categoria" in tokens
+        assert "españa" in tokens
+        assert "en" not in tokens
+
+    def test_tokenize_adds_bigrams(self):
+        """Verifica que se generan bigramas"""
+        assert "ticket__medio" in tokenize("ticket medio")
+
+
+class TestIntentClassifier:
+    """Tests para el Naive Bayes"""
+
+    def test_predict_sql(self, classifier):
+        """Verifica una pregunta claramente de datos"""
+        prediction = classifier.predict("ventas totales por tienda")
+        assert prediction.intent == "sql"
+        assert prediction.confidence > 0.5
+
+    def test_predict_docs(self, classifier):
+        """Verifica una pregunta claramente de definiciones"""
+        assert classifier.predict("¿Qué significa margen?").intent == "docs"
+
+    def test_unknown_vocabulary_has_zero_confidence(self, classifier):
+        """Verifica que sin palabras conocidas la confianza es 0"""
+        assert classifier.predict("xyzzy plugh").confidence == 0.0
+
+    def test_probabilities_sum_to_one(self, classifier):
+        """Verifica que las probabilidades están normalizadas"""
+        scores = classifier.predict("ventas del mes").scores
+        assert sum(scores.values()) == pytest.approx(1.0)
+
+
+class TestClassifyIntent:
+    """Tests para la primera etapa del router"""
+
+    def setup_method(self):
+        intent_classifier._stats = intent_classifier.RouterStats()
+
+    def _settings(self, threshold):
+        settings = MagicMock()
+        settings.router_confidence_threshold = threshold
+        return settings
+
+    def test_confident_prediction_skips_llm(self, classifier):
+        """Verifica que una predicción fiable se devuelve y cuenta como local"""
+        with patch.object(intent_classifier, "get_intent_classifier", return_value=classifier), patch.object(
+            intent_classifier, "get_settings", return_value=self._settings(0.5)
+        ):
+            prediction = classify_intent("ventas totales por tienda", allowed=("sql", "docs"))
+
+        assert prediction.intent == "sql"
+        stats = intent_classifier.get_router_stats()
+        assert stats["local_decisions"] == 1
+        assert stats["llm_skip_rate"] == 1.0
+
+    def test_low_confidence_escalates(self, classifier):
+        """Verifica que por debajo del umbral se escala al LLM"""
+        with patch.object(intent_classifier, "get_intent_classifier", return_value=classifier), patch.object(
+            intent_classifier, "get_settings", return_value=self._settings(1.01)
+        ):
+            assert classify_intent("ventas totales", allowed=("sql", "docs")) is None
+
+        assert intent_classifier.get_router_stats()["llm_escalations"] == 1
+
+    def test_disallowed_intent_escalates(self):
+        """Verifica que una intención no permitida (mixed) se escala"""
+        mixed = IntentClassifier().fit([("ventas y contexto", "mixed"), ("definición", "docs")])
+        with patch.object(intent_classifier, "get_intent_classifier", return_value=mixed), patch.object(
+            intent_classifier, "get_settings", return_value=self._settings(0.0)
+        ):
+            assert classify_intent("ventas y contexto", allowed=("sql", "docs")) is None
+
+
+class TestRouterNodeWithClassifier:
+    """Tests para la integración en el router"""
+
+    @patch("src.graphs.router_graph.get_llm")
+    def test_router_node_uses_local_prediction(self, mock_get_llm, fake_embeddings):
+        """Verifica que el router no llama al LLM si el clasificador está seguro"""
+        from src.graphs import router_graph
+
+        prediction = intent_classifier.IntentPrediction("sql", 0.99, {"sql": 0.99})
+        with patch.object(router_graph, "classify_intent", return_value=prediction):
+            result = router_graph.router_node({"question": "ventas por tienda"})
+
+        assert result["intent"] == "sql"
+        assert "Clasificador local" in result["route_reason"]
+        mock_get_llm.assert_not_called()
+
+    @patch("src.graphs.router_graph.get_llm")
+    def test_router_node_escalates_to_llm(self, mock_get_llm, fake_embeddings):
+        """Verifica que si el clasificador duda decide el LLM"""
+        from src.graphs import router_graph
+
+        mock_get_llm.return_value.invoke.return_value.content = json.dumps({"intent": "docs", "reason": "llm"})
+        with patch.object(router_graph, "classify_intent", return_value=None):
+            result = router_graph.router_node({"question": "algo ambiguo"})
+
+        assert result["intent"] == "docs"
+        assert result["route_reason"] == "llm"
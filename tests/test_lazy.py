@@ -0,0 +1,195 @@
+"""
+Tests para la inicialización perezosa (src/config/lazy.py) y warmup()
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config.lazy import LazyResource, thread_safe_cache
+
+
+class TestLazyResource:
+    """Tests para LazyResource"""
+
+    def test_builds_on_first_use(self):
+        """Verifica que el objeto no se construye hasta que se usa"""
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return "valor"
+
+        resource = LazyResource(factory, name="test")
+
+        assert not resource.initialized
+        assert calls == []
+        assert resource.upper() == "VALOR"
+        assert resource.get() == "valor"
+        assert resource.initialized
+        assert calls == [1]
+
+    def test_delegates_attributes(self):
+        """Verifica que los atributos se delegan al objeto real"""
+        resource = LazyResource(lambda: [3, 1, 2])
+
+        assert resource.count(1) == 1
+        assert resource.index(2) == 2
+
+    def test_concurrent_first_use_builds_once(self):
+        """Verifica que varios hilos a la vez solo construyen el recurso una vez"""
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        resource = LazyResource(slow_factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+
+    def test_reset_rebuilds(self):
+        """Verifica que reset() descarta el objeto y se vuelve a construir"""
+        resource = LazyResource(object)
+        first = resource.get()
+        resource.reset()
+
+        assert not resource.initialized
+        assert resource.get() is not first
+
+
+class TestThreadSafeCache:
+    """Tests para thread_safe_cache"""
+
+    def test_concurrent_calls_build_once(self):
+        """Verifica que llamadas concurrentes comparten una única construcción"""
+        calls = []
+
+        @thread_safe_cache
+        def build(name):
+            calls.append(name)
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(build("x"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == ["x"]
+        assert all(r is results[0] for r in results)
+
+    def test_cache_clear(self):
+        """Verifica que cache_clear fuerza una nueva construcción"""
+
+        @thread_safe_cache
+        def build():
+            return object()
+
+        first = build()
+        build.cache_clear()
+        assert build() is not first
+
+    def test_hit_does_not_wait_for_construction(self):
+        """Verifica que un valor ya construido se devuelve sin esperar a otra construcción en curso"""
+        building = threading.Event()
+        release = threading.Event()
+
+        @thread_safe_cache
+        def build(name):
+            if name == "lento":
+                building.set()
+                release.wait(5)
+            return name.upper()
+
+        assert build("rápido") == "RÁPIDO"
+        slow = threading.Thread(target=build, args=("lento",))
+        slow.start()
+        building.wait(5)
+        try:
+            start = time.perf_counter()
+            assert build("rápido") == "RÁPIDO"
+            assert time.perf_counter() - start < 1
+        finally:
+            release.set()
+            slow.join()
+        assert build("lento") == "LENTO"
+
+    def test_kwargs_are_part_of_the_key(self):
+        """Verifica que los argumentos por nombre se distinguen como en lru_cache"""
+
+        @thread_safe_cache
+        def build(name, size=1):
+            return object()
+
+        assert build("x") is build("x")
+        assert build("x", size=2) is build("x", size=2)
+        assert build("x", size=2) is not build("x", size=3)
+
+
+class TestLazyImports:
+    """Tests de que importar los grafos no carga recursos pesados"""
+
+    def test_import_master_graph_is_lazy(self):
+        """Verifica que importar el master graph no carga embeddings ni FAISS"""
+        code = (
+            "import sys\n"
+            "from src.graphs import master_graph, docs_agent_graph\n"
+            "assert not docs_agent_graph._retriever.initialized\n"
+            "assert not master_graph._sql_app.initialized\n"
+            "heavy = [m for m in ('sentence_transformers', 'faiss', 'langchain_community.vectorstores')"
+            " if m in sys.modules]\n"
+            "assert not heavy, heavy\n"
+        )
+        root = Path(__file__).resolve().parents[1]
+        proc = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=False)
+        assert proc.returncode == 0, proc.stderr
+
+
+class TestWarmup:
+    """Tests para master_graph.warmup"""
+
+    def test_warmup_selected_components(self, fake_embeddings):
+        """Verifica que warmup precarga los componentes pedidos y mide su tiempo"""
+        from src.graphs import docs_agent_graph, master_graph
+
+        get_engine = MagicMock()
+        with patch.dict(master_graph._WARMUP_STEPS, {"db_engine": get_engine}):
+            timings = master_graph.warmup(["docs_index", "graphs", "db_engine"])
+
+        assert set(timings) == {"docs_index", "graphs", "db_engine"}
+        assert docs_agent_graph._retriever.initialized
+        assert master_graph._docs_app.initialized
+        get_engine.assert_called_once()
+
+    def test_warmup_llm_covers_every_node(self):
+        """Verifica que warmup("llm") precarga también el LLM de repair_sql"""
+        from src.graphs import master_graph
+
+        with patch.object(master_graph, "get_llm") as get_llm:
+            master_graph.warmup(["llm"])
+
+        nodes = [c.args[0] for c in get_llm.call_args_list]
+        assert "repair_sql" in nodes and "generate_sql" in nodes
+
+    def test_warmup_unknown_component(self):
+        """Verifica que un componente desconocido da un error claro"""
+        from src.graphs import master_graph
+
+        with pytest.raises(ValueError, match="Componentes desconocidos"):
+            master_graph.warmup(["gpu"])
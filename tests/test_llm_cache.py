@@ -0,0 +1,195 @@
+"""
+Tests para la caché de respuestas del LLM (src/config/llm_cache.py)
+"""
+
+import asyncio
+import os
+import tempfile
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    SystemMessage,
+)
+
+from src.config.llm_cache import CachedChatModel, LLMResponseCache
+
+
+class FakeEmbeddings:
+    """Embeddings deterministas: vector de frecuencias de letras"""
+
+    def embed_query(self, text):
+        vec = np.zeros(26, dtype=np.float32)
+        for ch in text.lower():
+            if "a" <= ch <= "z":
+                vec[ord(ch) - ord("a")] += 1
+        return vec.tolist()
+
+
+def _messages(question):
+    return [SystemMessage(content="Eres un router"), HumanMessage(content=question)]
+
+
+@pytest.fixture
+def cache_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "llm_cache.sqlite")
+
+
+@pytest.fixture
+def base_llm():
+    llm = MagicMock()
+    llm.model = "mistral"
+    llm.invoke.side_effect = lambda messages, **kwargs: AIMessage(content=f"respuesta a {messages[-1].content}")
+    return llm
+
+
+class TestLLMResponseCache:
+    """Tests para el almacén persistente"""
+
+    def test_exact_hit_skips_llm(self, cache_path, base_llm):
+        """Verifica que un prompt repetido no vuelve a llamar al modelo"""
+        cache = LLMResponseCache(cache_path)
+        llm = CachedChatModel(base_llm, cache, node="router")
+
+        first = llm.invoke(_messages("ventas por tienda"))
+        second = llm.invoke(_messages("ventas por tienda"))
+
+        assert first.content == second.content
+        assert base_llm.invoke.call_count == 1
+        assert second.response_metadata["cache"] == "exact"
+        stats = cache.stats.as_dict()
+        assert stats["exact_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["by_node"]["router"]["exact"] == 1
+
+    def test_semantic_hit(self, cache_path, base_llm):
+        """Verifica que una pregunta casi idéntica se sirve por similitud"""
+        cache = LLMResponseCache(cache_path)
+        llm = CachedChatModel(
+            base_llm,
+            cache,
+            node="router",
+            semantic=True,
+            similarity_threshold=0.95,
+            embeddings=FakeEmbeddings,
+        )
+
+        llm.invoke(_messages("Dame las ventas por categoria"))
+        resp = llm.invoke(_messages("dame las ventas por categoria?"))
+
+        assert base_llm.invoke.call_count == 1
+        assert resp.response_metadata["cache"] == "semantic"
+        assert cache.stats.semantic_hits == 1
+
+    def test_semantic_requires_same_context(self, cache_path, base_llm):
+        """Verifica que no hay acierto semántico con otro mensaje de sistema"""
+        cache = LLMResponseCache(cache_path)
+        llm = CachedChatModel(base_llm, cache, node="router", semantic=True, embeddings=FakeEmbeddings)
+
+        llm.invoke(_messages("ventas por categoria"))
+        llm.invoke([SystemMessage(content="Otro nodo"), HumanMessage(content="ventas por categoria")])
+
+        assert base_llm.invoke.call_count == 2
+
+    def test_persistence_on_disk(self, cache_path, base_llm):
+        """Verifica que las respuestas sobreviven a un reinicio del proceso"""
+        CachedChatModel(base_llm, LLMResponseCache(cache_path)).invoke(_messages("hola"))
+
+        reopened = LLMResponseCache(cache_path)
+        resp = CachedChatModel(base_llm, reopened).invoke(_messages("hola"))
+
+        assert base_llm.invoke.call_count == 1
+        assert resp.content == "respuesta a hola"
+
+    def test_ttl_expiration(self, cache_path, base_llm):
+        """Verifica que las entradas caducadas no se sirven"""
+        cache = LLMResponseCache(cache_path, ttl_seconds=1)
+        llm = CachedChatModel(base_llm, cache)
+        llm.invoke(_messages("hola"))
+
+        cache._connect().execute("UPDATE llm_cache SET created_at = created_at - 10")
+        llm.invoke(_messages("hola"))
+
+        assert base_llm.invoke.call_count == 2
+
+    def test_max_entries_eviction(self, cache_path, base_llm):
+        """Verifica que se respeta el número máximo de entradas"""
+        cache = LLMResponseCache(cache_path, max_entries=3)
+        llm = CachedChatModel(base_llm, cache)
+        for i in range(5):
+            llm.invoke(_messages(f"pregunta {i}"))
+
+        assert len(cache) == 3
+
+    def test_ainvoke_uses_cache(self, cache_path, base_llm):
+        """Verifica que la ruta async comparte la caché con la sync"""
+        base_llm.ainvoke = AsyncMock(return_value=AIMessage(content="async"))
+        llm = CachedChatModel(base_llm, LLMResponseCache(cache_path))
+
+        first = asyncio.run(llm.ainvoke(_messages("hola")))
+        second = llm.invoke(_messages("hola"))
+
+        assert first.content == second.content == "async"
+        base_llm.ainvoke.assert_awaited_once()
+        base_llm.invoke.assert_not_called()
+
+    def test_stream_uses_cache(self, cache_path, base_llm):
+        """Verifica que stream guarda la respuesta completa y que un acierto sale en un trozo"""
+        base_llm.stream.side_effect = lambda messages, **kwargs: iter(
+            [AIMessageChunk(content="res"), AIMessageChunk(content="puesta")]
+        )
+        llm = CachedChatModel(base_llm, LLMResponseCache(cache_path))
+
+        first = [chunk.content for chunk in llm.stream(_messages("hola"))]
+        second = list(llm.stream(_messages("hola")))
+
+        assert first == ["res", "puesta"]
+        assert [c.content for c in second] == ["respuesta"] and second[0].response_metadata["cache"] == "exact"
+        assert llm.invoke(_messages("hola")).content == "respuesta"
+        assert base_llm.stream.call_count == 1
+        base_llm.invoke.assert_not_called()
+
+    def test_astream_uses_cache(self, cache_path, base_llm):
+        """Verifica la ruta async de stream y que una respuesta a medias no se guarda"""
+
+        async def astream(messages, **kwargs):
+            for part in ("a", "sync"):
+                yield AIMessageChunk(content=part)
+
+        base_llm.astream = astream
+        llm = CachedChatModel(base_llm, LLMResponseCache(cache_path))
+
+        async def scenario():
+            partial = llm.astream(_messages("corta"))
+            await partial.__anext__()
+            await partial.aclose()
+            return [c.content async for c in llm.astream(_messages("hola"))]
+
+        assert asyncio.run(scenario()) == ["a", "sync"]
+        assert llm.invoke(_messages("hola")).content == "async"
+        assert llm.invoke(_messages("corta")).content == "respuesta a corta"
+
+
+class TestSemanticNodes:
+    """Tests para los nodos con aciertos semánticos por defecto"""
+
+    def test_generate_sql_is_exact_only(self, cache_path, monkeypatch):
+        """Verifica que generate_sql solo tiene aciertos exactos salvo que se pida"""
+        from src.config import llm as llm_config
+        from src.config.settings import get_settings
+
+        monkeypatch.setenv("LLM_CACHE_PATH", cache_path)
+        for cached in (get_settings, llm_config.get_llm, llm_config.get_llm_cache):
+            cached.cache_clear()
+        try:
+            assert llm_config.get_llm("router").semantic
+            assert not llm_config.get_llm("generate_sql").semantic
+            assert not llm_config.get_llm("answer_from_docs").semantic
+        finally:
+            for cached in (get_settings, llm_config.get_llm, llm_config.get_llm_cache):
+                cached.cache_clear()
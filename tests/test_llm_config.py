@@ -5,7 +5,11 @@ Tests para el módulo de configuración del LLM (src/config/llm.py)
 import pytest
 from unittest.mock import patch, MagicMock
 
+import os
+
 from src.config.llm import get_llm
+from src.config.llm_cache import CachedChatModel
+from src.config.settings import get_settings
 
 
 class TestGetLLM:
@@ -30,12 +34,12 @@ class TestGetLLM:
 
         # Limpiar cache para este test
         get_llm.cache_clear()
-        
+
         llm = get_llm()
 
         # Verificar que ChatOllama fue llamado
         assert mock_chat_ollama.called
-        
+
         # Limpiar cache
         get_llm.cache_clear()
 
@@ -47,13 +51,50 @@ class TestGetLLM:
 
         # Limpiar cache para este test
         get_llm.cache_clear()
-        
+
         llm1 = get_llm()
         llm2 = get_llm()
 
         assert llm1 is llm2
         # ChatOllama debe ser llamado solo una vez debido al caching
         mock_chat_ollama.assert_called_once()
-        
+
         # Limpiar cache
         get_llm.cache_clear()
+
+
+class TestGetLLMCache:
+    """Tests para la caché delante de get_llm"""
+
+    def setup_method(self):
+        get_llm.cache_clear()
+
+    def teardown_method(self):
+        get_llm.cache_clear()
+        get_settings.cache_clear()
+
+    @patch("src.config.llm.ChatOllama")
+    def test_get_llm_wrapped_in_cache(self, mock_chat_ollama):
+        """Verifica que por defecto el LLM va envuelto en la caché"""
+        llm = get_llm("router")
+
+        assert isinstance(llm, CachedChatModel)
+        assert llm.node == "router"
+        assert llm.llm is mock_chat_ollama.return_value
+
+    @patch.dict(os.environ, {"LLM_CACHE_DISABLED_NODES": "explain_sql"})
+    @patch("src.config.llm.ChatOllama")
+    def test_get_llm_node_opt_out(self, mock_chat_ollama):
+        """Verifica que un nodo puede desactivar la caché"""
+        get_settings.cache_clear()
+
+        assert get_llm("explain_sql") is mock_chat_ollama.return_value
+        assert isinstance(get_llm("router"), CachedChatModel)
+
+    @patch.dict(os.environ, {"LLM_CACHE_ENABLED": "false"})
+    @patch("src.config.llm.ChatOllama")
+    def test_get_llm_cache_disabled(self, mock_chat_ollama):
+        """Verifica que la caché se puede desactivar globalmente"""
+        get_settings.cache_clear()
+
+        assert get_llm("router") is mock_chat_ollama.return_value
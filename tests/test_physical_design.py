@@ -0,0 +1,137 @@
+"""
+Tests para el perfil de diseño físico (src/data/physical_design.py)
+"""
+
+from types import SimpleNamespace
+
+import oracledb
+import pytest
+
+from src.data.physical_design import (
+    INDEXES,
+    apply_physical_design,
+    design_statements,
+    gather_stats,
+    gather_stats_statements,
+    summarize_plan,
+)
+
+
+class FakeCursor:
+    """Cursor de python-oracledb: user_tables.partitioned y errores ORA- por sentencia"""
+
+    def __init__(self, partitioned="NO", errors=None):
+        self.partitioned = partitioned
+        self.errors = errors or {}
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        for fragment, code in self.errors.items():
+            if fragment in sql:
+                raise oracledb.DatabaseError(SimpleNamespace(code=code, message=f"ORA-{code:05d}"))
+
+    def fetchone(self):
+        return (self.partitioned,)
+
+
+class TestDesign:
+    """Tests para las sentencias del perfil"""
+
+    def test_partition_first_then_local_indexes(self):
+        """Verifica que ventas se particiona antes de crear sus índices, y que estos son locales"""
+        statements = design_statements(partitioned=False)
+
+        assert statements[0].startswith("ALTER TABLE ventas MODIFY PARTITION BY RANGE (fecha) INTERVAL")
+        assert statements[0].endswith("ONLINE UPDATE INDEXES")
+        assert "CREATE INDEX ix_ventas_tienda_fecha ON ventas (tienda_id, fecha, total) LOCAL" in statements
+        assert "CREATE INDEX ix_productos_categoria ON productos (categoria_id)" in statements
+        assert len(statements) == 1 + len(INDEXES)
+
+    def test_already_partitioned_or_without_partitioning(self):
+        """Verifica que no se reparticiona, y que sin particionar los índices son globales"""
+        assert not any(s.startswith("ALTER TABLE") for s in design_statements(partitioned=True))
+
+        statements = design_statements(partitioned=False, partition=False)
+        assert not any(s.startswith("ALTER TABLE") or s.endswith("LOCAL") for s in statements)
+
+    def test_foreign_keys_are_leading_columns(self):
+        """Verifica que cada clave ajena es la primera columna de algún índice"""
+        leading = {(index.table, index.columns[0]) for index in INDEXES}
+
+        assert {("ventas", "producto_id"), ("ventas", "tienda_id"), ("productos", "categoria_id")} <= leading
+
+    def test_apply_skips_existing_indexes(self):
+        """Verifica que los índices que ya existen (ORA-00955/01408) se omiten y se sigue"""
+        cur = FakeCursor(partitioned="YES", errors={"ix_ventas_fecha": 955, "ix_productos_categoria": 1408})
+
+        executed = apply_physical_design(cur)
+
+        assert [s.split()[2] for s in executed] == ["ix_ventas_tienda_fecha", "ix_ventas_producto_fecha"]
+        assert len(cur.executed) == 1 + len(INDEXES)
+
+    def test_apply_raises_other_errors(self):
+        """Verifica que otros errores (p.ej. sin espacio) no se ocultan"""
+        cur = FakeCursor(errors={"ALTER TABLE ventas": 1652})
+
+        with pytest.raises(oracledb.DatabaseError):
+            apply_physical_design(cur)
+
+
+class TestStats:
+    """Tests para la recogida de estadísticas"""
+
+    def test_incremental_only_when_partitioned(self):
+        """Verifica la preferencia INCREMENTAL de ventas solo si está particionada"""
+        partitioned = gather_stats_statements(["productos", "ventas"], partitioned=True)
+        plain = gather_stats_statements(["productos", "ventas"], partitioned=False)
+
+        assert "'INCREMENTAL', 'TRUE'" in partitioned[0][0]
+        assert len(partitioned) == 3 and len(plain) == 2
+        assert [params["tabla"] for _, params in plain] == ["PRODUCTOS", "VENTAS"]
+
+    def test_gather_all_tables(self):
+        """Verifica que se recogen las cuatro tablas con cascade y el grado pedido"""
+        cur = FakeCursor(partitioned="YES")
+
+        gather_stats(cur, degree=4)
+
+        gathers = [params for sql, params in cur.executed if "GATHER_TABLE_STATS" in sql]
+        assert [p["tabla"] for p in gathers] == ["CATEGORIAS", "PRODUCTOS", "TIENDAS", "VENTAS"]
+        assert all(p["grado"] == 4 for p in gathers)
+        assert "cascade => TRUE" in cur.executed[-1][0]
+
+
+class TestPlan:
+    """Tests para el resumen de PLAN_TABLE"""
+
+    def test_full_scan_before(self):
+        """Verifica coste y recorrido completo de ventas sin índices"""
+        rows = [
+            ("SELECT STATEMENT", None, None, 1520, None, None),
+            ("SORT", "AGGREGATE", None, None, None, None),
+            ("TABLE ACCESS", "FULL", "VENTAS", 1520, None, None),
+        ]
+
+        summary = summarize_plan(rows)
+
+        assert summary.cost == 1520
+        assert summary.full_scans == ["VENTAS"] and summary.indexes == []
+        assert summary.partitions is None
+
+    def test_pruned_index_access_after(self):
+        """Verifica índices usados y particiones leídas con el perfil aplicado"""
+        rows = [
+            ("SELECT STATEMENT", None, None, 12, None, None),
+            ("HASH", "GROUP BY", None, 12, None, None),
+            ("PARTITION RANGE", "ITERATOR", None, 11, "4", "6"),
+            ("INDEX", "RANGE SCAN", "IX_VENTAS_TIENDA_FECHA", 11, "4", "6"),
+            ("TABLE ACCESS", "FULL", "TIENDAS", 3, None, None),
+        ]
+
+        summary = summarize_plan(rows)
+
+        assert summary.indexes == ["IX_VENTAS_TIENDA_FECHA"]
+        assert summary.full_scans == ["TIENDAS"]
+        assert summary.partitions == "ITERATOR 4-6"
+        assert summary.to_dict()["cost"] == 12
@@ -0,0 +1,265 @@
+"""
+Tests para la caché de resultados de consultas (src/data/query_cache.py)
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config.settings import get_settings
+from src.data.columnar import ColumnarResult
+from src.data.db import arun_query, run_query
+from src.data.query_cache import (
+    QueryResultCache,
+    cache_key,
+    cacheable_tables,
+    canonicalize_sql,
+    get_query_cache,
+    get_query_cache_stats,
+    parse_versions,
+    version_probe_sql,
+)
+
+TABLES = ["ventas", "productos", "categorias", "tiendas"]
+
+
+class TestCanonicalSql:
+    """Tests para la normalización de la consulta y la detección de tablas"""
+
+    def test_whitespace_case_and_comments(self):
+        """Verifica que espacios, mayúsculas, comentarios y ';' no cambian la clave"""
+        a = canonicalize_sql("SELECT  SUM(total)\n  FROM ventas -- total\n WHERE tienda_id = 1;")
+        b = canonicalize_sql("select sum( total ) from VENTAS where tienda_id = 1")
+
+        assert a == b
+
+    def test_literals_are_preserved(self):
+        """Verifica que los literales no se tocan"""
+        canonical = canonicalize_sql("SELECT * FROM tiendas WHERE ciudad = 'San  Sebastián'")
+
+        assert "'San  Sebastián'" in canonical
+        assert canonical != canonicalize_sql("SELECT * FROM tiendas WHERE ciudad = 'san sebastián'")
+
+    def test_cacheable_tables(self):
+        """Verifica las tablas a sondear (JOIN, comas, esquema, subconsultas)"""
+        sql = (
+            "SELECT c.nombre, SUM(v.total) FROM retail.ventas v "
+            "JOIN productos p ON p.id = v.producto_id, categorias c GROUP BY c.nombre"
+        )
+        nested = "SELECT * FROM (SELECT * FROM ventas) x, tiendas t"
+
+        assert cacheable_tables(canonicalize_sql(sql), TABLES) == ["categorias", "productos", "ventas"]
+        assert cacheable_tables(canonicalize_sql(nested), TABLES) == ["tiendas", "ventas"]
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT 1",
+            "SELECT SYSDATE FROM dual",
+            "SELECT * FROM ventas WHERE fecha > SYSDATE - 7",
+            "SELECT * FROM ventas v JOIN clientes c ON c.id = v.cliente_id",
+            "DELETE FROM ventas",
+        ],
+    )
+    def test_not_cacheable(self, sql):
+        """Verifica que no se cachean consultas sin tablas conocidas, no deterministas o que no son SELECT"""
+        assert cacheable_tables(canonicalize_sql(sql), TABLES) is None
+
+    def test_key_includes_binds_and_options(self):
+        """Verifica que binds y opciones de lectura forman parte de la clave"""
+        sql = canonicalize_sql("SELECT * FROM ventas WHERE id = :id")
+
+        assert cache_key(sql, {"id": 1}, {}) != cache_key(sql, {"id": 2}, {})
+        assert cache_key(sql, {"id": 1}, {"max_rows": 10}) != cache_key(sql, {"id": 1}, {})
+
+
+class TestQueryResultCache:
+    """Tests para los niveles de memoria y disco"""
+
+    def test_version_mismatch_invalidates(self):
+        """Verifica que un cambio de versión de datos descarta la entrada"""
+        cache = QueryResultCache()
+        cache.put("k", {"ventas": (10, 10)}, [{"n": 1}])
+
+        assert cache.get("k", {"ventas": (10, 10)}) == [{"n": 1}]
+        assert cache.get("k", {"ventas": (11, 11)}) is None
+        assert cache.stats.invalidated == 1
+
+    def test_hits_do_not_share_objects(self):
+        """Verifica que cada acierto es una copia propia (dicts, arrays) y que put guarda una foto"""
+        rows = [{"n": 1}]
+        cache = QueryResultCache()
+        cache.put("k", {}, rows)
+        rows[0]["n"] = 99
+
+        first = cache.get("k", {})
+        first[0]["n"] = 2
+        assert cache.get("k", {}) == [{"n": 1}]
+
+        cache.put("c", {}, ColumnarResult.from_tuples(["n"], [(1,), (2,)]))
+        cache.get("c", {}).arrays[0][0] = 100
+        assert cache.get("c", {}).arrays[0].tolist() == [1, 2]
+
+    def test_version_probe_is_max_id_only(self):
+        """Verifica que la sonda solo pide MAX(id) (sin COUNT(*), que recorre la tabla)"""
+        sql = version_probe_sql(["ventas", "tiendas"])
+
+        assert "count" not in sql.lower()
+        assert sql == (
+            "SELECT 'ventas' AS tabla, MAX(id) AS max_id FROM ventas UNION ALL "
+            "SELECT 'tiendas' AS tabla, MAX(id) AS max_id FROM tiendas"
+        )
+        assert parse_versions([("ventas", 10), ("tiendas", None)]) == {"ventas": 10, "tiendas": None}
+
+    def test_memory_lru_eviction(self):
+        """Verifica que el nivel de memoria expulsa la entrada menos usada"""
+        cache = QueryResultCache(memory_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, {}, [key])
+        cache.get("a", {})
+        cache.put("c", {}, ["c"])
+
+        assert cache.get("b", {}) is None
+        assert cache.get("a", {}) == ["a"]
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Verifica que el nivel de disco sobrevive a otra instancia y sube a memoria"""
+        path = str(tmp_path / "qc.sqlite")
+        QueryResultCache(disk_path=path).put("k", {"ventas": (1, 1)}, [{"n": 1}], latency=0.5)
+
+        cache = QueryResultCache(disk_path=path)
+        assert cache.get("k", {"ventas": (1, 1)}) == [{"n": 1}]
+        assert cache.get("k", {"ventas": (1, 1)}) == [{"n": 1}]
+        assert cache.stats.disk_hits == 1
+        assert cache.stats.memory_hits == 1
+        assert cache.stats.saved_seconds == pytest.approx(1.0)
+
+    def test_disk_eviction(self, tmp_path):
+        """Verifica el número máximo de entradas en disco"""
+        cache = QueryResultCache(memory_entries=0, disk_path=str(tmp_path / "qc.sqlite"), disk_entries=3)
+        for i in range(5):
+            cache.put(f"k{i}", {}, [i])
+
+        assert cache.sizes() == {"memory": 0, "disk": 3}
+
+    def test_ttl_expiry(self):
+        """Verifica que las entradas caducan pasado el TTL"""
+        cache = QueryResultCache(ttl_seconds=10)
+        with patch("src.data.query_cache.time.time", return_value=1000.0):
+            cache.put("k", {}, [1])
+        with patch("src.data.query_cache.time.time", return_value=1011.0):
+            assert cache.get("k", {}) is None
+
+    def test_probe_ttl(self):
+        """Verifica que las versiones sondeadas se reutilizan solo durante probe_ttl"""
+        cache = QueryResultCache(probe_ttl=5)
+        with patch("src.data.query_cache.time.monotonic", return_value=100.0):
+            cache.remember_versions({"ventas": (1, 1)})
+        with patch("src.data.query_cache.time.monotonic", return_value=104.0):
+            assert cache.known_versions(["ventas"]) == {"ventas": (1, 1)}
+            assert cache.known_versions(["ventas", "tiendas"]) is None
+        with patch("src.data.query_cache.time.monotonic", return_value=106.0):
+            assert cache.known_versions(["ventas"]) is None
+
+
+@pytest.fixture
+def cache_env(tmp_path, monkeypatch):
+    """Caché en un directorio temporal y sin reutilizar la sonda de versiones"""
+    monkeypatch.setenv("QUERY_CACHE_DISK_PATH", str(tmp_path / "query_cache.sqlite"))
+    monkeypatch.setenv("QUERY_CACHE_PROBE_TTL", "0")
+    get_settings.cache_clear()
+    get_query_cache.cache_clear()
+    yield tmp_path
+    get_query_cache().close()
+    get_query_cache.cache_clear()
+    get_settings.cache_clear()
+
+
+def _create_ventas(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE ventas (id INTEGER PRIMARY KEY, total REAL)"))
+        conn.execute(text("INSERT INTO ventas VALUES (1, 10.0), (2, 20.0)"))
+        conn.commit()
+    return engine
+
+
+class TestRunQueryCache:
+    """Tests para la caché por debajo de run_query/arun_query"""
+
+    def test_hit_and_invalidation_on_new_sales(self, cache_env):
+        """Verifica que se sirve de caché y que una venta nueva invalida el resultado"""
+        engine = _create_ventas(f"sqlite:///{cache_env / 'retail.db'}")
+        sql = "SELECT SUM(total) AS total FROM ventas"
+
+        with patch("src.data.db.get_engine", return_value=engine):
+            assert run_query(sql)[0]["total"] == 30.0
+            assert run_query(sql.lower() + " ;")[0]["total"] == 30.0
+            assert get_query_cache_stats()["memory_hits"] == 1
+
+            with engine.connect() as conn:
+                conn.execute(text("INSERT INTO ventas VALUES (3, 5.0)"))
+                conn.commit()
+
+            assert run_query(sql)[0]["total"] == 35.0
+
+        stats = get_query_cache_stats()
+        assert stats["invalidated"] == 1
+        assert stats["misses"] == 2
+
+    def test_cached_result_keeps_flags(self, cache_env):
+        """Verifica que el resultado cacheado conserva truncated y el formato columnar"""
+        engine = _create_ventas(f"sqlite:///{cache_env / 'retail.db'}")
+
+        with patch("src.data.db.get_engine", return_value=engine):
+            run_query("SELECT * FROM ventas", max_rows=1)
+            rows = run_query("SELECT * FROM ventas", max_rows=1)
+            columnar = run_query("SELECT * FROM ventas", columnar=True)
+
+        assert rows.truncated and len(rows) == 1
+        assert columnar.columns == ["id", "total"]
+        assert get_query_cache_stats()["memory_hits"] == 1
+
+    def test_disabled(self, cache_env, monkeypatch):
+        """Verifica que QUERY_CACHE_ENABLED=false ejecuta siempre la consulta"""
+        monkeypatch.setenv("QUERY_CACHE_ENABLED", "false")
+        get_settings.cache_clear()
+        engine = _create_ventas(f"sqlite:///{cache_env / 'retail.db'}")
+
+        with patch("src.data.db.get_engine", return_value=engine):
+            run_query("SELECT * FROM ventas")
+            run_query("SELECT * FROM ventas")
+
+        assert get_query_cache_stats()["misses"] == 0
+
+    def test_probe_error_runs_uncached(self, cache_env):
+        """Verifica que si la sonda falla (tabla sin id) la consulta se ejecuta igual"""
+        engine = create_engine(f"sqlite:///{cache_env / 'retail.db'}")
+        with engine.connect() as conn:
+            conn.execute(text("CREATE TABLE tiendas (nombre TEXT)"))
+            conn.execute(text("INSERT INTO tiendas VALUES ('Centro')"))
+            conn.commit()
+
+        with patch("src.data.db.get_engine", return_value=engine):
+            assert run_query("SELECT nombre FROM tiendas") == [{"nombre": "Centro"}]
+
+    def test_arun_query_uses_cache(self, cache_env):
+        """Verifica que la versión async comparte la caché"""
+        pytest.importorskip("aiosqlite")
+        path = cache_env / "retail.db"
+        _create_ventas(f"sqlite:///{path}")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+        async def scenario():
+            with patch("src.data.db.get_async_engine", return_value=engine):
+                first = await arun_query("SELECT SUM(total) AS total FROM ventas")
+                second = await arun_query("SELECT SUM(total) AS total FROM ventas")
+            await engine.dispose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == [{"total": 30.0}]
+        assert get_query_cache_stats()["memory_hits"] == 1
@@ -0,0 +1,201 @@
+"""
+Tests para los timeouts y la guarda de coste (src/data/query_guard.py)
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DatabaseError
+
+from src.data.db import run_query
+from src.data.query_guard import (
+    PlanEstimate,
+    QueryTimeoutError,
+    QueryTooExpensiveError,
+    check_estimate,
+    cost_guard_enabled,
+    guard_cost,
+    limit_rewrite,
+)
+from src.data.sql_binds import parametrize_sql
+
+# Cuenta hasta 50 millones: tarda bastante más que los timeouts del test
+SLOW_SQL = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 50000000) " "SELECT COUNT(*) AS c FROM n"
+)
+
+
+class TestCallTimeout:
+    """Tests para la cancelación por timeout"""
+
+    def setup_method(self):
+        self.engine = create_engine("sqlite:///:memory:")
+
+    def test_slow_query_is_cancelled(self):
+        """Verifica que una consulta lenta se cancela con QueryTimeoutError"""
+        with patch("src.data.db.get_engine", return_value=self.engine), pytest.raises(QueryTimeoutError, match="0.2 s"):
+            run_query(SLOW_SQL, timeout=0.2)
+
+    def test_engine_usable_after_timeout(self):
+        """Verifica que tras cancelar se puede seguir consultando"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            with pytest.raises(QueryTimeoutError):
+                run_query(SLOW_SQL, timeout=0.2)
+            assert run_query("SELECT 1 AS n", timeout=5) == [{"n": 1}]
+
+    def test_fast_query_unaffected(self):
+        """Verifica que una consulta rápida no se ve afectada y no queda handler colgado"""
+        with patch("src.data.db.get_engine", return_value=self.engine):
+            assert run_query("SELECT 1 AS n", timeout=5) == [{"n": 1}]
+            # Sin timeout, la conexión del pool ya no tiene el handler anterior
+            assert run_query("SELECT 2 AS n") == [{"n": 2}]
+
+    def test_other_errors_are_database_errors(self):
+        """Verifica que los errores que no son de timeout siguen siendo RuntimeError"""
+        with patch("src.data.db.get_engine", return_value=self.engine), pytest.raises(
+            RuntimeError, match="Database error"
+        ):
+            run_query("SELECT * FROM no_existe", timeout=5)
+
+
+def _oracle_conn(*estimates):
+    """
+    Conexión falsa de Oracle cuyo PLAN_TABLE devuelve las estimaciones dadas.
+    Como Oracle, EXPLAIN PLAN con valores para los binds falla (ORA-01036).
+    """
+    conn = MagicMock()
+    conn.dialect.name = "oracle"
+    rows = iter(estimates)
+
+    def execute(statement, parameters=None):
+        if statement.startswith("EXPLAIN PLAN") and parameters:
+            raise DatabaseError(statement, parameters, Exception("ORA-01036: illegal variable name/number"))
+        result = MagicMock()
+        if "plan_table" in statement:
+            result.fetchone.return_value = next(rows)
+        return result
+
+    conn.exec_driver_sql.side_effect = execute
+    conn.execute.side_effect = AssertionError("EXPLAIN PLAN no pasa por text()")
+    return conn
+
+
+class TestCostGuard:
+    """Tests para la estimación de coste con EXPLAIN PLAN"""
+
+    def test_only_on_oracle(self):
+        """Verifica que la guarda solo se aplica en Oracle y con algún umbral"""
+        conn = MagicMock()
+        conn.dialect.name = "sqlite"
+        assert not cost_guard_enabled(conn, 1000, None)
+        conn.dialect.name = "oracle"
+        assert cost_guard_enabled(conn, 1000, None)
+        assert not cost_guard_enabled(conn, 0, 0)
+
+    def test_cheap_query_passes(self):
+        """Verifica que una consulta barata se ejecuta tal cual"""
+        conn = _oracle_conn((120, 10))
+        sql = "SELECT * FROM tiendas"
+
+        assert guard_cost(conn, sql, 1000, 1000, 51) == sql
+        explain = conn.exec_driver_sql.call_args_list[0].args[0]
+        assert explain.startswith("EXPLAIN PLAN SET STATEMENT_ID") and explain.endswith(sql)
+
+    def test_expensive_query_rejected(self):
+        """Verifica que un producto cartesiano por encima del coste se rechaza"""
+        conn = _oracle_conn((5e9, 1e12), (5e9, 51))
+
+        with pytest.raises(QueryTooExpensiveError) as excinfo:
+            guard_cost(conn, "SELECT * FROM ventas a, ventas b", 1_000_000, 1_000_000, 51)
+
+        assert excinfo.value.estimate.cost == 5e9
+        assert "demasiado costosa" in str(excinfo.value)
+
+    def test_many_rows_rewritten_with_fetch_first(self):
+        """Verifica que una consulta con demasiadas filas se acota con FETCH FIRST"""
+        conn = _oracle_conn((9000, 5_000_000), (40, 51))
+
+        sql = guard_cost(conn, "SELECT * FROM ventas", 1_000_000, 1_000_000, 51)
+
+        assert sql.endswith("FETCH FIRST 51 ROWS ONLY")
+
+    def test_bound_query_explained_without_values(self):
+        """Verifica que una consulta con binds (:b1...) se explica sin pasarle sus valores"""
+        sql, params = parametrize_sql("SELECT SUM(total) FROM ventas WHERE tienda_id = 3 AND total > 100")
+        conn = _oracle_conn((9000, 5_000_000), (40, 51))
+
+        rewritten = guard_cost(conn, sql, 1_000_000, 1_000_000, 51)
+
+        assert params and ":b1" in sql
+        explains = [c for c in conn.exec_driver_sql.call_args_list if c.args[0].startswith("EXPLAIN PLAN")]
+        assert len(explains) == 2
+        assert all(len(c.args) == 1 and not c.kwargs for c in explains)
+        assert explains[0].args[0].endswith(f"FOR {sql}")
+        assert ":b1" in rewritten and rewritten.endswith("FETCH FIRST 51 ROWS ONLY")
+
+    def test_limit_rewrite_after_line_comment(self):
+        """Verifica que FETCH FIRST no queda dentro de un comentario de línea al final"""
+        estimate = PlanEstimate(10, 5_000_000)
+
+        sql = limit_rewrite(estimate, "SELECT * FROM ventas\n-- todas las ventas", 1000, 51)
+
+        assert sql == "SELECT * FROM ventas /* todas las ventas */ FETCH FIRST 51 ROWS ONLY"
+
+    def test_limit_rewrite_skips_limited_queries(self):
+        """Verifica que no se reescribe si ya hay límite o no hay umbral de filas"""
+        estimate = PlanEstimate(10, 5_000_000)
+
+        assert limit_rewrite(estimate, "SELECT * FROM ventas FETCH FIRST 10 ROWS ONLY", 1000, 51) is None
+        assert limit_rewrite(estimate, "SELECT * FROM ventas", 0, 51) is None
+        assert limit_rewrite(estimate, "SELECT * FROM ventas", 1000, None) is None
+        assert limit_rewrite(estimate, "SELECT * FROM ventas WHERE ROWNUM <= 10", 1000, 51) is None
+
+    def test_check_estimate_thresholds(self):
+        """Verifica los umbrales de coste y filas (0/None = sin límite)"""
+        check_estimate(PlanEstimate(10, 10), None, None)
+        check_estimate(PlanEstimate(10, 10), 10, 10)
+        with pytest.raises(QueryTooExpensiveError):
+            check_estimate(PlanEstimate(11, 10), 10, None)
+        with pytest.raises(QueryTooExpensiveError):
+            check_estimate(PlanEstimate(1, 11), None, 10)
+
+
+class TestRejectedAnswers:
+    """Tests para la respuesta al usuario cuando se rechaza una consulta"""
+
+    def test_execute_sql_node_answers_too_expensive(self):
+        """Verifica que el nodo responde directamente sin propagar el error"""
+        from src.graphs.sql_agent_graph import execute_sql_node
+
+        error = QueryTooExpensiveError(PlanEstimate(5e9, 10**12), 1e6, 10**6)
+        with patch("src.graphs.sql_agent_graph.run_query", side_effect=error):
+            result = execute_sql_node({"question": "q", "sql_query": "SELECT * FROM ventas a, ventas b"})
+
+        assert "demasiado costosa" in result["answer"]
+        assert result["sql_error"]
+
+    def test_graph_skips_explanation_on_timeout(self):
+        """Verifica que el grafo termina tras el rechazo sin llamar al LLM de explicación"""
+        from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+        llm = MagicMock()
+        llm.invoke.return_value.content = "SELECT * FROM ventas"
+        with patch("src.graphs.sql_agent_graph.get_llm", return_value=llm) as get_llm, patch(
+            "src.graphs.sql_agent_graph.run_query", side_effect=QueryTimeoutError(30)
+        ):
+            result = build_sql_agent_graph().invoke({"question": "Todas las ventas"})
+
+        assert "30 s" in result["answer"]
+        assert [c.args[0] for c in get_llm.call_args_list] == ["generate_sql"]
+
+    def test_tool_reports_rejection(self):
+        """Verifica que la tool devuelve un error claro"""
+        from src.tools.sql_tool import query_retail_database
+
+        with patch("src.tools.sql_tool.run_query", side_effect=QueryTimeoutError(30)):
+            data = json.loads(query_retail_database.invoke({"sql_query": "SELECT * FROM ventas"}))
+
+        assert data["error"].startswith("Query rejected")
+        assert data["rows"] == []
@@ -0,0 +1,299 @@
+"""
+Tests para la réplica local de las tablas retail (src/data/replica.py)
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from src.config.settings import get_settings
+from src.data.db import arun_query, run_query
+from src.data.replica import (
+    REPLICA_TABLES,
+    Replica,
+    get_replica,
+    get_replica_stats,
+    replica_route,
+    replica_sql,
+)
+
+
+def _oracle_stand_in(path):
+    """SQLite con el esquema retail que hace de Oracle (origen de la sincronización)"""
+    engine = create_engine(f"sqlite:///{path}")
+    # Función que la réplica no tiene: obliga a repetir la consulta aquí
+    event.listen(engine, "connect", lambda conn, _: conn.create_function("INITCAP", 1, str.title))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE categorias (id INTEGER PRIMARY KEY, nombre TEXT)"))
+        conn.execute(
+            text("CREATE TABLE productos (id INTEGER PRIMARY KEY, nombre TEXT, categoria_id INTEGER, precio REAL)")
+        )
+        conn.execute(text("CREATE TABLE tiendas (id INTEGER PRIMARY KEY, nombre TEXT, ciudad TEXT)"))
+        conn.execute(
+            text(
+                "CREATE TABLE ventas (id INTEGER PRIMARY KEY, fecha TEXT, producto_id INTEGER, "
+                "tienda_id INTEGER, cantidad INTEGER, total REAL)"
+            )
+        )
+        conn.execute(text("INSERT INTO categorias VALUES (1, 'Bebidas'), (2, 'Snacks')"))
+        conn.execute(text("INSERT INTO productos VALUES (1, 'Agua', 1, 1.0), (2, 'Patatas', 2, 1.8)"))
+        conn.execute(text("INSERT INTO tiendas VALUES (1, 'centro', 'Madrid'), (2, 'puerto', 'Vigo')"))
+        for i in range(1, 11):
+            conn.execute(
+                text("INSERT INTO ventas VALUES (:id, :fecha, :p, :t, 1, :total)"),
+                {"id": i, "fecha": f"2023-0{1 + i % 3}-15 00:00:00", "p": 1 + i % 2, "t": 1 + i % 2, "total": 2.0 * i},
+            )
+    return engine
+
+
+@pytest.fixture
+def source(tmp_path):
+    engine = _oracle_stand_in(tmp_path / "oracle.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPLICA_ENABLED", "true")
+    monkeypatch.setenv("REPLICA_PATH", str(tmp_path / "replica.sqlite"))
+    monkeypatch.setenv("REPLICA_MAX_STALENESS_SECONDS", "0")
+    monkeypatch.setenv("QUERY_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    get_replica.cache_clear()
+    yield
+    get_replica().close()
+    get_settings.cache_clear()
+    get_replica.cache_clear()
+
+
+class TestReplicaSql:
+    """Tests para la traducción de Oracle a SQLite"""
+
+    @pytest.mark.parametrize(
+        "sql,expected",
+        [
+            (
+                "SELECT nombre FROM retail.tiendas ORDER BY nombre FETCH FIRST 5 ROWS ONLY",
+                "SELECT nombre FROM tiendas ORDER BY nombre NULLS LAST LIMIT 5",
+            ),
+            (
+                "SELECT TO_CHAR(fecha, 'YYYY-MM') AS mes, NVL(SUM(total), 0) FROM ventas GROUP BY TO_CHAR(fecha, 'YYYY-MM')",
+                (
+                    "SELECT STRFTIME('%Y-%m', fecha) AS mes, COALESCE(SUM(total), 0) FROM ventas "
+                    "GROUP BY STRFTIME('%Y-%m', fecha)"
+                ),
+            ),
+            (
+                (
+                    "SELECT COUNT(*) FROM ventas WHERE fecha >= DATE '2023-02-01' "
+                    "AND fecha < TO_DATE('2023-03-01', 'YYYY-MM-DD')"
+                ),
+                "SELECT COUNT(*) FROM ventas WHERE fecha >= '2023-02-01 00:00:00' AND fecha < '2023-03-01 00:00:00'",
+            ),
+            (
+                "SELECT EXTRACT(YEAR FROM fecha) FROM ventas",
+                "SELECT CAST(STRFTIME('%Y', fecha) AS INTEGER) FROM ventas",
+            ),
+        ],
+    )
+    def test_translation(self, sql, expected):
+        """Verifica la traducción de las construcciones típicas de Oracle"""
+        assert replica_sql(sql) == expected
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "DELETE FROM ventas",
+            "SELECT 1 FROM dual; DELETE FROM ventas",
+            "SELECT 1 FROM dual",
+            "SELECT * FROM resumen_dia",
+            "SELECT * FROM ventas WHERE ROWNUM <= 5",
+            "SELECT * FROM ventas WHERE fecha > SYSDATE - 30",
+            "SELECT TO_CHAR(total, '999G999') FROM ventas",
+            "SELECT * FROM ventas v, productos p WHERE v.producto_id = p.id(+)",
+            "SELECT EXTRACT(HOUR FROM fecha) FROM ventas",
+            "SELEC nombre FROM tiendas",
+        ],
+    )
+    def test_not_routable(self, sql):
+        """Verifica que las consultas que SQLite no resolvería igual se quedan en Oracle"""
+        assert replica_sql(sql) is None
+
+    @pytest.mark.parametrize(
+        "where,expected",
+        [
+            ("fecha = DATE '2024-01-15'", 1),
+            ("fecha BETWEEN DATE '2024-01-01' AND DATE '2024-01-31'", 2),
+            ("TRUNC(fecha, 'MM') = DATE '2024-01-01'", 2),
+            ("TRUNC(fecha) = TO_DATE('2024-01-31', 'YYYY-MM-DD')", 1),
+        ],
+    )
+    def test_date_literals_match_stored_dates(self, tmp_path, where, expected):
+        """Verifica que los literales DATE cuentan las mismas filas que en Oracle"""
+        replica = Replica(str(tmp_path / "replica.sqlite"))
+        replica.write("ventas", [(1, datetime(2024, 1, 15), 1, 1, 1, 5), (2, datetime(2024, 1, 31), 1, 1, 1, 5)])
+
+        with replica.engine.connect() as conn:
+            count = conn.execute(text(replica_sql(f"SELECT COUNT(*) FROM ventas WHERE {where}"))).scalar()
+
+        assert count == expected
+        replica.close()
+
+
+class TestReplicaSync:
+    """Tests para la sincronización incremental por marca de agua"""
+
+    def test_incremental_sync(self, tmp_path, source):
+        """Verifica que la segunda pasada solo copia las filas nuevas"""
+        replica = Replica(str(tmp_path / "replica.sqlite"))
+
+        first = replica.sync(source, batch_size=3)
+        with source.begin() as conn:
+            conn.execute(text("INSERT INTO ventas VALUES (11, '2023-04-01 00:00:00', 1, 1, 2, 5.0)"))
+        second = replica.sync(source, batch_size=3)
+
+        assert first == {"categorias": 2, "productos": 2, "tiendas": 2, "ventas": 10}
+        assert second == {"categorias": 0, "productos": 0, "tiendas": 0, "ventas": 1}
+        assert replica.watermarks()["ventas"][0] == 11
+        with replica.engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*), SUM(total) FROM ventas")).fetchone() == (11, 115.0)
+        replica.close()
+
+    def test_full_sync_reloads(self, tmp_path, source):
+        """Verifica que full=True vuelve a copiarlo todo (p.ej. tras borrados en Oracle)"""
+        replica = Replica(str(tmp_path / "replica.sqlite"))
+        replica.sync(source)
+        with source.begin() as conn:
+            conn.execute(text("DELETE FROM ventas WHERE id > 5"))
+
+        copied = replica.sync(source, full=True)
+
+        assert copied["ventas"] == 5
+        with replica.engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM ventas")).scalar() == 5
+        replica.close()
+
+    def test_oracle_types_are_stored_as_text_and_float(self, tmp_path):
+        """Verifica que DATE y NUMBER de Oracle se guardan como texto ISO y REAL"""
+        replica = Replica(str(tmp_path / "replica.sqlite"))
+
+        replica.write("ventas", [(1, datetime(2023, 5, 2, 10, 30), 1, 1, 3, Decimal("7.50"))])
+
+        with replica.engine.connect() as conn:
+            row = conn.execute(text("SELECT fecha, total, TRUNC(fecha) FROM ventas")).fetchone()
+        assert tuple(row) == ("2023-05-02 10:30:00", 7.5, "2023-05-02 00:00:00")
+        replica.close()
+
+    def test_freshness(self, tmp_path):
+        """Verifica que la réplica solo está al día si todas las tablas se sincronizaron hace poco"""
+        replica = Replica(str(tmp_path / "replica.sqlite"))
+        assert not replica.is_fresh(0)
+
+        for table in REPLICA_TABLES:
+            replica.mark_synced(table, 0)
+        assert replica.is_fresh(60)
+
+        with patch("src.data.replica.time.time", return_value=time.time() + 120):
+            assert not replica.is_fresh(60)
+            assert replica.is_fresh(0)
+        replica.close()
+
+
+class TestReplicaRouting:
+    """Tests para el enrutado de run_query / arun_query a la réplica"""
+
+    def test_routed_to_replica(self, replica_env, source):
+        """Verifica que una consulta apta se responde desde la réplica sin tocar Oracle"""
+        get_replica().sync(source)
+
+        with patch("src.data.db.get_engine", side_effect=AssertionError("Oracle no debería usarse")):
+            rows = run_query(
+                "SELECT TO_CHAR(fecha, 'YYYY-MM') AS mes, SUM(total) AS total FROM ventas "
+                "GROUP BY TO_CHAR(fecha, 'YYYY-MM') ORDER BY mes FETCH FIRST 2 ROWS ONLY"
+            )
+
+        assert rows == [{"mes": "2023-01", "total": 36.0}, {"mes": "2023-02", "total": 44.0}]
+        assert get_replica_stats()["routed"] == 1
+
+    def test_async_routed_to_replica(self, replica_env, source):
+        """Verifica que arun_query también usa la réplica"""
+        get_replica().sync(source)
+
+        with patch("src.data.db.get_async_engine", side_effect=AssertionError("Oracle no debería usarse")):
+            rows = asyncio.run(arun_query("SELECT COUNT(*) AS n FROM ventas", columnar=True))
+
+        assert rows.to_rows() == [{"n": 10}]
+
+    def test_bound_query_routed_to_replica(self, replica_env, source):
+        """Verifica que una consulta con binds (fechas, Decimal) da lo mismo que con literales"""
+        from src.data.sql_binds import parametrize_sql
+
+        get_replica().sync(source)
+        sql = (
+            "SELECT COUNT(*) AS n, SUM(total) AS total FROM ventas "
+            "WHERE fecha >= DATE '2023-02-01' AND total > 4.5 AND tienda_id IN (1, 2)"
+        )
+        bound, params = parametrize_sql(sql)
+
+        with patch("src.data.db.get_engine", side_effect=AssertionError("Oracle no debería usarse")):
+            assert run_query(bound, params) == run_query(sql) == [{"n": 5, "total": 68.0}]
+
+        assert get_replica_stats()["routed"] == 2
+
+    def test_replica_results_skip_query_cache(self, replica_env, source, monkeypatch):
+        """Verifica que los resultados de la réplica (float, fechas en texto) no entran en la caché de Oracle"""
+        from src.data.query_cache import get_query_cache, get_query_cache_stats
+
+        monkeypatch.setenv("QUERY_CACHE_ENABLED", "true")
+        monkeypatch.setenv("QUERY_CACHE_DISK_PATH", "")
+        get_settings.cache_clear()
+        get_query_cache.cache_clear()
+        get_replica().sync(source)
+        sql = "SELECT SUM(total) AS total FROM ventas"
+
+        try:
+            with patch("src.data.db.get_engine", side_effect=AssertionError("Oracle no debería usarse")):
+                assert run_query(sql) == [{"total": 110.0}]
+            stats = get_query_cache_stats()
+            monkeypatch.setenv("REPLICA_ENABLED", "false")
+            get_settings.cache_clear()
+            with patch("src.data.db.get_engine", return_value=source):
+                run_query(sql)
+            after = get_query_cache_stats()
+        finally:
+            get_query_cache.cache_clear()
+
+        assert stats["misses"] == 0 and stats["memory_hits"] == 0
+        assert after["misses"] == 1 and after["memory_hits"] == 0
+
+    def test_fallback_to_oracle(self, replica_env, source):
+        """Verifica que si la réplica no puede ejecutarla, la consulta se repite en Oracle"""
+        get_replica().sync(source)
+
+        with patch("src.data.db.get_engine", return_value=source):
+            rows = run_query("SELECT INITCAP(nombre) AS nombre FROM tiendas ORDER BY id")
+
+        assert rows == [{"nombre": "Centro"}, {"nombre": "Puerto"}]
+        assert get_replica_stats()["fallbacks"] == 1
+
+    def test_stale_replica_is_skipped(self, replica_env, source, monkeypatch):
+        """Verifica que con la réplica desactualizada las consultas van a Oracle"""
+        get_replica().sync(source)
+        monkeypatch.setenv("REPLICA_MAX_STALENESS_SECONDS", "60")
+        get_settings.cache_clear()
+
+        with patch("src.data.replica.time.time", return_value=time.time() + 120):
+            assert replica_route("SELECT COUNT(*) FROM ventas") is None
+
+        assert get_replica_stats()["stale"] == 1
+
+    def test_disabled_by_default(self, source):
+        """Verifica que sin REPLICA_ENABLED no se consulta la réplica"""
+        with patch("src.data.replica.get_replica", side_effect=AssertionError("réplica desactivada")):
+            assert replica_route("SELECT COUNT(*) FROM ventas") is None
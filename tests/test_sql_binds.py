@@ -0,0 +1,170 @@
+"""
+Tests para el paso de literales a variables de enlace (src/data/sql_binds.py,
+nodo bind_sql) y los contadores de parse de Oracle (get_parse_stats)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.config.settings import get_settings
+from src.data.db import get_parse_stats, parse_stats_delta
+from src.data.sql_binds import parametrize_sql
+
+
+class TestParametrize:
+    """Tests para la sustitución de literales por binds"""
+
+    def test_predicate_values_are_bound(self):
+        """Verifica que los valores del WHERE, HAVING y ON pasan a binds en orden"""
+        sql, params = parametrize_sql(
+            "SELECT t.ciudad, SUM(v.total) FROM ventas v JOIN tiendas t ON t.id = v.tienda_id AND t.ciudad = 'Madrid' "
+            "WHERE v.total > 10.5 AND v.tienda_id IN (1, 2) AND v.cantidad BETWEEN 2 AND 5 "
+            "GROUP BY t.ciudad HAVING COUNT(*) > 3"
+        )
+
+        assert sql == (
+            "SELECT t.ciudad, SUM(v.total) FROM ventas v JOIN tiendas t ON t.id = v.tienda_id AND t.ciudad = :b1 "
+            "WHERE v.total > :b2 AND v.tienda_id IN (:b3, :b4) AND v.cantidad BETWEEN :b4 AND :b5 "
+            "GROUP BY t.ciudad HAVING COUNT(*) > :b6"
+        )
+        assert params == {"b1": "Madrid", "b2": Decimal("10.5"), "b3": 1, "b4": 2, "b5": 5, "b6": 3}
+
+    def test_dates_are_bound_as_datetime(self):
+        """Verifica que DATE '...' y TO_DATE('...', formato) se enlazan como datetime"""
+        sql, params = parametrize_sql(
+            "SELECT id FROM ventas WHERE fecha >= DATE '2023-01-01' " "AND fecha < TO_DATE('01/02/2023', 'DD/MM/YYYY')"
+        )
+
+        assert sql == "SELECT id FROM ventas WHERE fecha >= :b1 AND fecha < :b2"
+        assert params == {"b1": datetime(2023, 1, 1), "b2": datetime(2023, 2, 1)}
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            # SELECT / GROUP BY tienen que coincidir; ORDER BY 2 es una posición
+            "SELECT SUBSTR(nombre, 1, 3) AS p, COUNT(*) FROM productos GROUP BY SUBSTR(nombre, 1, 3) ORDER BY 2",
+            "SELECT CASE WHEN total > 100 THEN 'alto' ELSE 'bajo' END AS tramo FROM ventas",
+            # Límites de filas
+            "SELECT id FROM ventas FETCH FIRST 50 ROWS ONLY",
+            "SELECT id FROM ventas WHERE ROWNUM <= 5",
+            # Formatos y unidades
+            "SELECT id FROM ventas WHERE fecha > SYSDATE - INTERVAL '7' DAY",
+            # La consulta ya trae sus binds
+            "SELECT id FROM ventas WHERE tienda_id = :tienda AND total > 5",
+        ],
+    )
+    def test_shape_literals_are_kept(self, sql):
+        """Verifica que los literales que forman parte de la consulta no se enlazan"""
+        assert parametrize_sql(sql) == (sql, {})
+
+    def test_format_is_kept_and_value_bound(self):
+        """Verifica que en TO_CHAR(fecha, 'YYYY') = '2023' solo se enlaza el valor"""
+        sql, params = parametrize_sql("SELECT id FROM ventas WHERE TO_CHAR(fecha, 'YYYY') = '2023'")
+
+        assert sql == "SELECT id FROM ventas WHERE TO_CHAR(fecha, 'YYYY') = :b1"
+        assert params == {"b1": "2023"}
+
+    def test_unparseable_sql_is_returned_as_is(self):
+        """Verifica que una SQL que no se puede analizar no se toca"""
+        assert parametrize_sql("SELEC id FROM ventas WHERE id = 1") == ("SELEC id FROM ventas WHERE id = 1", {})
+
+    def test_same_shape_same_text(self):
+        """Verifica que dos preguntas que solo cambian en los valores dan el mismo texto (mismo cursor)"""
+        first, _ = parametrize_sql("SELECT SUM(total) FROM ventas WHERE tienda_id = 3 AND fecha >= DATE '2023-01-01'")
+        second, _ = parametrize_sql("SELECT SUM(total) FROM ventas WHERE tienda_id = 7 AND fecha >= DATE '2024-06-01'")
+
+        assert first == second
+
+
+@pytest.fixture
+def bind_env(monkeypatch):
+    monkeypatch.setenv("SUMMARY_REWRITE_ENABLED", "false")
+    get_settings.cache_clear()
+    yield monkeypatch
+    get_settings.cache_clear()
+
+
+def _llm(*contents):
+    llm = MagicMock()
+    llm.invoke.side_effect = [MagicMock(content=c) for c in contents]
+    return llm
+
+
+class TestBindNode:
+    """Tests para el nodo bind_sql del agente SQL"""
+
+    def _run(self, sql):
+        from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+        llms = {"generate_sql": _llm(sql), "explain_sql": _llm("ok")}
+        with patch("src.graphs.sql_agent_graph.get_llm", side_effect=llms.get), patch(
+            "src.graphs.sql_agent_graph.run_query", return_value=[{"n": 1}]
+        ) as mock_run:
+            result = build_sql_agent_graph().invoke({"question": "¿Cuántas ventas en la tienda 3?"})
+        return result, mock_run
+
+    def test_execute_receives_binds(self, bind_env):
+        """Verifica que execute_sql recibe la SQL con binds y sus valores"""
+        result, mock_run = self._run("SELECT COUNT(*) AS n FROM ventas WHERE tienda_id = 3")
+
+        assert (
+            mock_run.call_args.args[0]
+            == "SELECT COUNT(*) AS n FROM ventas WHERE tienda_id = :b1 FETCH FIRST 51 ROWS ONLY"
+        )
+        assert mock_run.call_args.kwargs["params"] == {"b1": 3}
+        # Para el LLM y los intentos, la SQL sigue con sus valores
+        assert result["sql_query"] == "SELECT COUNT(*) AS n FROM ventas WHERE tienda_id = 3 FETCH FIRST 51 ROWS ONLY"
+        assert result["sql_attempts"][0]["sql"] == result["sql_query"]
+
+    def test_disabled(self, bind_env):
+        """Verifica que con SQL_BIND_LITERALS=false se ejecuta la SQL con literales"""
+        bind_env.setenv("SQL_BIND_LITERALS", "false")
+        get_settings.cache_clear()
+
+        _, mock_run = self._run("SELECT COUNT(*) AS n FROM ventas WHERE tienda_id = 3")
+
+        assert mock_run.call_args.args[0].endswith("WHERE tienda_id = 3 FETCH FIRST 51 ROWS ONLY")
+        assert mock_run.call_args.kwargs["params"] is None
+
+
+class TestParseStats:
+    """Tests para los contadores de parse de v$sysstat"""
+
+    def test_oracle(self):
+        """Verifica que se leen los contadores y se calcula el soft parse"""
+        engine = MagicMock()
+        engine.dialect.name = "oracle"
+        conn = engine.connect.return_value.__enter__.return_value
+        conn.execute.return_value.fetchall.return_value = [
+            ("parse count (total)", 120),
+            ("parse count (hard)", 20),
+            ("execute count", 300),
+        ]
+        with patch("src.data.db.get_engine", return_value=engine):
+            stats = get_parse_stats()
+
+        assert stats == {"parse_total": 120, "parse_hard": 20, "parse_soft": 100, "executions": 300}
+        assert "v$sysstat" in str(conn.execute.call_args.args[0])
+
+    def test_unavailable(self):
+        """Verifica que sin Oracle o sin permiso sobre las vistas v$ se devuelve None"""
+        from sqlalchemy import create_engine
+
+        with patch("src.data.db.get_engine", return_value=create_engine("sqlite://")):
+            assert get_parse_stats() is None
+
+        engine = create_engine("sqlite://")
+        engine.dialect.name = "oracle"
+        # SQLite no tiene v$sysstat: mismo camino que un ORA-00942
+        with patch("src.data.db.get_engine", return_value=engine):
+            assert get_parse_stats() is None
+
+    def test_delta(self):
+        """Verifica la diferencia entre dos lecturas"""
+        before = {"parse_total": 100, "parse_hard": 40}
+        after = {"parse_total": 150, "parse_hard": 41, "executions": 9}
+
+        assert parse_stats_delta(before, after) == {"parse_total": 50, "parse_hard": 1}
@@ -0,0 +1,202 @@
+"""
+Tests para la reparación de SQL fallida (src/graphs/sql_repair.py y el
+bucle repair_sql del agente SQL)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.config.settings import get_settings
+from src.graphs.sql_repair import (
+    RepairCache,
+    describe_error,
+    error_signature,
+    get_repair_cache,
+)
+
+ORA_00904 = RuntimeError(
+    'Database error: (oracledb.exceptions.DatabaseError) ORA-00904: "V"."IMPORTE": invalid identifier\n'
+    "Help: https://docs.oracle.com/error-help/db/ora-00904/\n"
+    "[SQL: SELECT v.importe FROM ventas v]"
+)
+
+
+class TestErrorSignature:
+    """Tests para la descripción y la firma de los errores"""
+
+    def test_oracle_error(self):
+        """Verifica que se extrae el código ORA y el mensaje sin el envoltorio"""
+        description = describe_error(ORA_00904)
+
+        assert description == 'ORA-00904: "V"."IMPORTE": invalid identifier'
+        assert error_signature(description) == "ORA-00904:IMPORTE"
+
+    def test_other_errors(self):
+        """Verifica errores sin identificador y de otros motores"""
+        sqlite_error = RuntimeError("Database error: (sqlite3.OperationalError) no such column: importe\n[SQL: x]")
+
+        assert error_signature("ORA-00937: not a single-group group function") == "ORA-00937"
+        assert describe_error(sqlite_error) == "no such column: importe"
+        assert error_signature("Expecting ) (línea 1, columna 14)") == "Expecting ) (línea ?, columna ?)"
+
+
+class TestRepairCache:
+    """Tests para la caché de reparaciones"""
+
+    def test_exact_repair(self):
+        """Verifica que la misma SQL fallida con el mismo error se repara sin LLM"""
+        cache = RepairCache()
+        cache.record("ORA-00942", "SELECT * FROM venta", "SELECT * FROM ventas")
+
+        assert cache.lookup("ORA-00942", "select *  from VENTA") == ("SELECT * FROM ventas", "cache")
+        assert cache.lookup("ORA-00942", "SELECT * FROM tienda") is None
+        assert cache.stats.as_dict() == {"exact_hits": 1, "rule_hits": 0, "misses": 1, "stored": 1}
+
+    def test_identifier_rule(self):
+        """Verifica que un identificador corregido se aplica a otras consultas con el mismo error"""
+        cache = RepairCache()
+        cache.record("ORA-00904:IMPORTE", "SELECT SUM(importe) FROM ventas", "SELECT SUM(total) FROM ventas")
+
+        fixed, source = cache.lookup(
+            "ORA-00904:IMPORTE", "SELECT v.tienda_id, AVG(v.importe) FROM ventas v GROUP BY v.tienda_id"
+        )
+
+        assert source == "rule"
+        assert fixed == "SELECT v.tienda_id, AVG(v.total) FROM ventas v GROUP BY v.tienda_id"
+
+    def test_no_rule_when_fix_is_ambiguous(self):
+        """Verifica que no se aprende regla si la corrección cambió más de una columna"""
+        cache = RepairCache()
+        cache.record("ORA-00904:IMPORTE", "SELECT importe FROM ventas", "SELECT total, cantidad FROM ventas")
+
+        assert cache.lookup("ORA-00904:IMPORTE", "SELECT MAX(importe) FROM ventas") is None
+
+    def test_bounded(self):
+        """Verifica que la caché no crece por encima de max_entries"""
+        cache = RepairCache(max_entries=2)
+        for i in range(3):
+            cache.record("ORA-00942", f"SELECT * FROM t{i}", "SELECT * FROM ventas")
+
+        assert cache.lookup("ORA-00942", "SELECT * FROM t0") is None
+        assert cache.lookup("ORA-00942", "SELECT * FROM t2") is not None
+
+
+def _llm(*contents):
+    llm = MagicMock()
+    llm.invoke.side_effect = [MagicMock(content=c) for c in contents]
+    llm.ainvoke = AsyncMock(side_effect=[MagicMock(content=c) for c in contents])
+    return llm
+
+
+@pytest.fixture
+def repair_env(monkeypatch):
+    monkeypatch.setenv("SUMMARY_REWRITE_ENABLED", "false")
+    monkeypatch.setenv("SQL_REPAIR_ATTEMPTS", "2")
+    get_settings.cache_clear()
+    get_repair_cache.cache_clear()
+    yield
+    get_settings.cache_clear()
+    get_repair_cache.cache_clear()
+
+
+def _run_graph(llms, run_query_effects):
+    from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+    with patch("src.graphs.sql_agent_graph.get_llm", side_effect=llms.get), patch(
+        "src.graphs.sql_agent_graph.run_query", side_effect=run_query_effects
+    ) as mock_run:
+        result = build_sql_agent_graph().invoke({"question": "¿Cuánto se vendió?"})
+    return result, mock_run
+
+
+class TestRepairLoop:
+    """Tests para el bucle repair_sql del agente SQL"""
+
+    def test_repair_then_explain(self, repair_env):
+        """Verifica que el error de Oracle vuelve al LLM y la consulta corregida se explica"""
+        llms = {
+            "generate_sql": _llm("SELECT importe FROM ventas"),
+            "repair_sql": _llm("SELECT total FROM ventas"),
+            "explain_sql": _llm("Se vendió 10"),
+        }
+
+        result, mock_run = _run_graph(llms, [ORA_00904, [{"total": 10}]])
+
+        assert result["answer"] == "Se vendió 10"
+        assert result["sql_repairs"] == 1
+        assert [a["source"] for a in result["sql_attempts"]] == ["generate", "llm"]
+        assert result["sql_attempts"][0]["error"].startswith("ORA-00904")
+        assert result["sql_attempts"][1]["error"] == ""
+        assert all(a["execute_seconds"] >= 0 and a["generate_seconds"] >= 0 for a in result["sql_attempts"])
+        # El LLM de reparación recibe la SQL fallida y el error
+        prompt = llms["repair_sql"].invoke.call_args.args[0][-1].content
+        assert "SELECT importe FROM ventas" in prompt and "ORA-00904" in prompt
+        assert mock_run.call_count == 2
+
+    def test_cached_repair_skips_llm(self, repair_env):
+        """Verifica que un fallo ya reparado se corrige sin llamar al LLM"""
+        first = {
+            "generate_sql": _llm("SELECT importe FROM ventas"),
+            "repair_sql": _llm("SELECT total FROM ventas"),
+            "explain_sql": _llm("ok"),
+        }
+        _run_graph(first, [ORA_00904, [{"total": 10}]])
+
+        second = {
+            "generate_sql": _llm("SELECT importe FROM ventas"),
+            "repair_sql": _llm(),
+            "explain_sql": _llm("ok"),
+        }
+        result, _ = _run_graph(second, [ORA_00904, [{"total": 10}]])
+
+        second["repair_sql"].invoke.assert_not_called()
+        assert [a["source"] for a in result["sql_attempts"]] == ["generate", "cache"]
+
+    def test_attempts_are_bounded(self, repair_env):
+        """Verifica que tras SQL_REPAIR_ATTEMPTS reparaciones fallidas se responde sin explain_sql"""
+        llms = {
+            "generate_sql": _llm("SELECT importe FROM ventas"),
+            "repair_sql": _llm("SELECT importe2 FROM ventas", "SELECT importe3 FROM ventas"),
+            "explain_sql": _llm(),
+        }
+
+        result, mock_run = _run_graph(llms, [ORA_00904] * 3)
+
+        assert mock_run.call_count == 3
+        assert result["sql_repairs"] == 2
+        assert result["sql_error"].startswith("ORA-00904")
+        assert "No he podido ejecutar la consulta" in result["answer"]
+        llms["explain_sql"].invoke.assert_not_called()
+
+    def test_validation_error_is_repaired(self, repair_env):
+        """Verifica que una SQL rechazada por el validador también se repara"""
+        llms = {
+            "generate_sql": _llm("SELEC total FROM ventas"),
+            "repair_sql": _llm("SELECT total FROM ventas"),
+            "explain_sql": _llm("ok"),
+        }
+
+        result, mock_run = _run_graph(llms, [[{"total": 1}]])
+
+        assert mock_run.call_count == 1
+        assert result["sql_attempts"][0]["error"].startswith("Error de sintaxis")
+        assert result["answer"] == "ok"
+
+    def test_async_repair(self, repair_env):
+        """Verifica el bucle de reparación en modo async"""
+        from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+        llms = {
+            "generate_sql": _llm("SELECT importe FROM ventas"),
+            "repair_sql": _llm("SELECT total FROM ventas"),
+            "explain_sql": _llm("ok"),
+        }
+        with patch("src.graphs.sql_agent_graph.get_llm", side_effect=llms.get), patch(
+            "src.graphs.sql_agent_graph.arun_query", new=AsyncMock(side_effect=[ORA_00904, [{"total": 1}]])
+        ):
+            result = asyncio.run(build_sql_agent_graph().ainvoke({"question": "¿Cuánto?"}))
+
+        llms["repair_sql"].ainvoke.assert_awaited_once()
+        assert result["answer"] == "ok"
@@ -0,0 +1,185 @@
+"""
+Tests para la validación y el saneado de la SQL generada (src/data/sql_sanitizer.py)
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import sqlglot
+from sqlalchemy import create_engine, event, text
+
+from src.config.settings import get_settings
+from src.data.sql_sanitizer import SQLValidationError, parse_select, sanitize_select
+
+
+class TestRowLimit:
+    """Tests para el límite de filas en la consulta exterior"""
+
+    @pytest.mark.parametrize(
+        "sql,expected",
+        [
+            ("SELECT id FROM ventas;", "SELECT id FROM ventas FETCH FIRST 50 ROWS ONLY"),
+            ("SELECT id FROM ventas FETCH FIRST 10 ROWS ONLY", "SELECT id FROM ventas FETCH FIRST 10 ROWS ONLY"),
+            ("SELECT id FROM ventas FETCH FIRST 500 ROWS ONLY", "SELECT id FROM ventas FETCH FIRST 50 ROWS ONLY"),
+            ("SELECT id FROM ventas LIMIT 10", "SELECT id FROM ventas FETCH FIRST 10 ROWS ONLY"),
+            (
+                "SELECT id FROM ventas ORDER BY total DESC OFFSET 10 ROWS",
+                "SELECT id FROM ventas ORDER BY total DESC OFFSET 10 ROWS FETCH FIRST 50 ROWS ONLY",
+            ),
+            (
+                "SELECT id FROM ventas WHERE ROWNUM <= 1000 AND total > 1",
+                "SELECT id FROM ventas WHERE ROWNUM <= 50 AND total > 1",
+            ),
+            (
+                "SELECT * FROM (SELECT * FROM ventas ORDER BY total DESC) WHERE ROWNUM <= 5",
+                "SELECT * FROM (SELECT * FROM ventas ORDER BY total DESC) WHERE ROWNUM <= 5",
+            ),
+            (
+                "SELECT id FROM ventas WHERE id IN (SELECT id FROM ventas FETCH FIRST 500 ROWS ONLY)",
+                (
+                    "SELECT id FROM ventas WHERE id IN (SELECT id FROM ventas FETCH FIRST 500 ROWS ONLY) "
+                    "FETCH FIRST 50 ROWS ONLY"
+                ),
+            ),
+            (
+                "SELECT 1 AS n FROM dual UNION ALL SELECT 2 FROM dual",
+                "SELECT 1 AS n FROM dual UNION ALL SELECT 2 FROM dual FETCH FIRST 50 ROWS ONLY",
+            ),
+            ("SELECT 'a;b' AS s FROM dual", "SELECT 'a;b' AS s FROM dual FETCH FIRST 50 ROWS ONLY"),
+        ],
+    )
+    def test_limit_is_pushed_to_outer_query(self, sql, expected):
+        """Verifica que el límite se añade o se rebaja solo en la consulta exterior"""
+        assert sanitize_select(sql) == expected
+
+    def test_bind_and_percent_limits_are_kept(self):
+        """Verifica que FETCH FIRST :n y n PERCENT se dejan como están"""
+        assert sanitize_select("SELECT id FROM ventas FETCH FIRST :n ROWS ONLY").endswith("FETCH FIRST :n ROWS ONLY")
+        assert sanitize_select("SELECT id FROM ventas FETCH FIRST 10 PERCENT ROWS ONLY").endswith(
+            "FETCH FIRST 10 PERCENT ROWS ONLY"
+        )
+
+    def test_without_limit(self):
+        """Verifica que row_limit=None solo valida"""
+        assert sanitize_select("SELECT id FROM ventas", row_limit=None) == "SELECT id FROM ventas"
+
+
+class TestReadOnly:
+    """Tests para el rechazo local de lo que no es una consulta de lectura"""
+
+    @pytest.mark.parametrize(
+        "sql,kind",
+        [
+            ("INSERT INTO productos VALUES (1, 'test')", "not_select"),
+            ("UPDATE productos SET nombre = 'x'", "not_select"),
+            ("DELETE FROM ventas", "not_select"),
+            ("DROP TABLE productos", "not_select"),
+            ("TRUNCATE TABLE ventas", "not_select"),
+            ("WITH x AS (DELETE FROM ventas) SELECT * FROM x", "not_select"),
+            ("SELECT * FROM ventas FOR UPDATE", "not_select"),
+            ("SELECT 1 FROM dual; DELETE FROM ventas", "multiple"),
+            ("SELEC id FROM ventas", "syntax"),
+            ("SELECT (id FROM ventas", "syntax"),
+            ("SELECT 'abc FROM dual", "syntax"),
+            ("  ;  ", "syntax"),
+        ],
+    )
+    def test_rejected(self, sql, kind):
+        """Verifica que se rechaza con el motivo correcto"""
+        with pytest.raises(SQLValidationError) as excinfo:
+            parse_select(sql)
+
+        assert excinfo.value.kind == kind
+
+    def test_syntax_error_has_position(self):
+        """Verifica que el error de sintaxis indica la posición y no lleva códigos de terminal"""
+        with pytest.raises(SQLValidationError) as excinfo:
+            parse_select("SELEC id FROM ventas")
+
+        assert "línea 1" in str(excinfo.value)
+        assert "\x1b" not in str(excinfo.value)
+
+
+class TestSanitizeNode:
+    """Tests para el nodo sanitize_sql del agente SQL"""
+
+    def test_invalid_sql_never_reaches_the_database(self):
+        """Verifica que una SQL no válida termina el grafo sin ejecutar nada"""
+        from src.graphs.sql_agent_graph import build_sql_agent_graph
+
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content="SELECT 1 FROM dual; DROP TABLE ventas")
+        with patch("src.graphs.sql_agent_graph.get_llm", return_value=llm), patch(
+            "src.graphs.sql_agent_graph.run_query"
+        ) as mock_run:
+            result = build_sql_agent_graph().invoke({"question": "¿Cuántas ventas?"})
+
+        mock_run.assert_not_called()
+        assert result["sql_error"] == "Solo se permite una sentencia SQL"
+        assert "No he podido ejecutar la consulta" in result["answer"]
+        # Generación + reparaciones (que repiten el fallo); nunca explain_sql
+        assert llm.invoke.call_count == 1 + get_settings().sql_repair_attempts
+
+
+def _oracle_on_sqlite(path, n_rows):
+    """SQLite con ventas que ejecuta la SQL de Oracle (traducida con sqlglot al vuelo)"""
+    engine = create_engine(f"sqlite:///{path}")
+
+    def translate(conn, cursor, statement, parameters, context, executemany):
+        return sqlglot.transpile(statement, read="oracle", write="sqlite")[0], parameters
+
+    event.listen(engine, "before_cursor_execute", translate, retval=True)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ventas (id INTEGER PRIMARY KEY, tienda_id INTEGER, total REAL)"))
+        conn.execute(
+            text("INSERT INTO ventas VALUES (:id, :tienda, :total)"),
+            [{"id": i, "tienda": 1 + i % 3, "total": 10.0 * i} for i in range(1, n_rows + 1)],
+        )
+    return engine
+
+
+@pytest.fixture
+def no_query_cache(monkeypatch):
+    monkeypatch.setenv("QUERY_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+class TestTruncationEndToEnd:
+    """Tests del corte a 50 filas con el saneado y run_query reales (sin mockear la consulta)"""
+
+    @pytest.mark.parametrize("n_rows,truncated", [(50, False), (51, True), (120, True)])
+    def test_tool_compact_truncated(self, tmp_path, no_query_cache, monkeypatch, n_rows, truncated):
+        """Verifica que la tool detecta si había más de 50 filas"""
+        from src.tools.sql_tool import query_retail_database
+
+        monkeypatch.setenv("SQL_TOOL_FORMAT", "compact")
+        get_settings.cache_clear()
+        engine = _oracle_on_sqlite(tmp_path / "retail.db", n_rows)
+        with patch("src.data.db.get_engine", return_value=engine):
+            data = json.loads(query_retail_database.invoke({"sql_query": "SELECT id FROM ventas ORDER BY id"}))
+        engine.dispose()
+
+        assert len(data["rows"]) == 50
+        assert data["truncated"] is truncated
+
+    @pytest.mark.parametrize("n_rows,truncated", [(50, False), (120, True)])
+    def test_graph_truncation_note(self, tmp_path, no_query_cache, n_rows, truncated):
+        """Verifica sql_truncated y la nota bajo la tabla en el agente SQL"""
+        from src.graphs.sql_agent_graph import (
+            bind_sql_node,
+            execute_sql_node,
+            sanitize_sql_node,
+        )
+
+        engine = _oracle_on_sqlite(tmp_path / "retail.db", n_rows)
+        state = {"question": "ventas", "sql_raw": "SELECT id, total FROM ventas WHERE tienda_id > 0 ORDER BY id"}
+        with patch("src.data.db.get_engine", return_value=engine):
+            state = execute_sql_node(bind_sql_node(sanitize_sql_node(state)))
+        engine.dispose()
+
+        assert len(state["sql_result"]) == 50
+        assert state["sql_truncated"] is truncated
+        assert ("_Resultado truncado" in state["sql_markdown"]) is truncated
@@ -4,47 +4,17 @@ Tests para el módulo de herramientas SQL (src/tools/sql_tool.py)
 
 import pytest
 import json
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
+from src.config.settings import get_settings
+
 from src.tools.sql_tool import (
     query_retail_database,
-    _truncate_rows,
     _rows_to_markdown,
 )
 
 
-class TestTruncateRows:
-    """Tests para la función _truncate_rows"""
-
-    def test_truncate_rows_no_truncation_needed(self):
-        """Verifica que no se truncen filas cuando hay menos del máximo"""
-        rows = [
-            {"id": 1, "name": "Alice"},
-            {"id": 2, "name": "Bob"},
-        ]
-        result = _truncate_rows(rows, max_rows=10)
-        assert result == rows
-        assert len(result) == 2
-
-    def test_truncate_rows_truncation_needed(self):
-        """Verifica que se truncen filas cuando se excede el máximo"""
-        rows = [{"id": i, "name": f"Person{i}"} for i in range(100)]
-        result = _truncate_rows(rows, max_rows=50)
-        assert len(result) == 50
-        assert result == rows[:50]
-
-    def test_truncate_rows_empty_list(self):
-        """Verifica que _truncate_rows maneje listas vacías"""
-        result = _truncate_rows([], max_rows=50)
-        assert result == []
-
-    def test_truncate_rows_default_max(self):
-        """Verifica que el máximo por defecto sea 50"""
-        rows = [{"id": i} for i in range(100)]
-        result = _truncate_rows(rows)
-        assert len(result) == 50
-
-
 class TestRowsToMarkdown:
     """Tests para la función _rows_to_markdown"""
 
@@ -185,11 +155,72 @@ class TestQueryRetailDatabase:
     def test_query_special_characters_in_values(self):
         """Verifica que se manejen caracteres especiales en los datos"""
         with patch("src.tools.sql_tool.run_query") as mock_run_query:
-            mock_run_query.return_value = [
-                {"id": 1, "text": "Valor con 'comillas' y \"dobles\""}
-            ]
+            mock_run_query.return_value = [{"id": 1, "text": "Valor con 'comillas' y \"dobles\""}]
             result = query_retail_database.invoke({"sql_query": "SELECT * FROM table"})
             data = json.loads(result)
 
             assert len(data["rows"]) == 1
             assert "Valor con 'comillas'" in data["rows"][0]["text"]
+
+    def test_query_limit_pushed_into_sql(self):
+        """Verifica que el límite de 50 filas va en la consulta que se ejecuta"""
+        with patch("src.tools.sql_tool.run_query", return_value=[]) as mock_run_query:
+            query_retail_database.invoke({"sql_query": "SELECT * FROM ventas FETCH FIRST 500 ROWS ONLY;"})
+
+        assert mock_run_query.call_args.args[0] == "SELECT * FROM ventas FETCH FIRST 51 ROWS ONLY"
+
+    def test_query_multiple_statements_denied(self):
+        """Verifica que una SELECT seguida de otra sentencia se rechace sin ejecutarla"""
+        with patch("src.tools.sql_tool.run_query") as mock_run_query:
+            result = query_retail_database.invoke({"sql_query": "SELECT * FROM ventas; DELETE FROM ventas"})
+            data = json.loads(result)
+
+        mock_run_query.assert_not_called()
+        assert "Only SELECT queries are allowed" in data["error"]
+
+    def test_query_syntax_error_detected_locally(self):
+        """Verifica que una SQL mal formada se rechace sin ir a la base de datos"""
+        with patch("src.tools.sql_tool.run_query") as mock_run_query:
+            result = query_retail_database.invoke({"sql_query": "SELECT (id FROM ventas"})
+            data = json.loads(result)
+
+        mock_run_query.assert_not_called()
+        assert data["error"].startswith("Invalid SQL.")
+
+
+@pytest.fixture
+def compact_format(monkeypatch):
+    monkeypatch.setenv("SQL_TOOL_FORMAT", "compact")
+    get_settings.cache_clear()
+    yield monkeypatch
+    get_settings.cache_clear()
+
+
+class TestCompactFormat:
+    """Tests para la respuesta compacta (SQL_TOOL_FORMAT=compact)"""
+
+    def test_columns_once_and_typed_rows(self, compact_format):
+        """Verifica columnas una vez, filas como arrays y Decimal como número"""
+        with patch("src.tools.sql_tool.run_query") as mock_run_query:
+            mock_run_query.return_value = [{"tienda": "Madrid", "total": Decimal("10.50")}]
+            data = json.loads(query_retail_database.invoke({"sql_query": "SELECT * FROM ventas"}))
+
+        assert data == {"columns": ["tienda", "total"], "rows": [["Madrid", 10.5]], "truncated": False}
+
+    def test_markdown_only_when_requested(self, compact_format):
+        """Verifica que la tabla markdown solo se genera con SQL_TOOL_MARKDOWN"""
+        compact_format.setenv("SQL_TOOL_MARKDOWN", "true")
+        get_settings.cache_clear()
+        with patch("src.tools.sql_tool.run_query", return_value=[{"id": 1}]):
+            data = json.loads(query_retail_database.invoke({"sql_query": "SELECT id FROM ventas"}))
+
+        assert data["markdown_table"] == "| id |\n| --- |\n| 1 |"
+
+    def test_truncated_and_errors(self, compact_format):
+        """Verifica la marca de truncado y los errores en el formato compacto"""
+        with patch("src.tools.sql_tool.run_query", return_value=[{"id": i} for i in range(100)]):
+            data = json.loads(query_retail_database.invoke({"sql_query": "SELECT id FROM ventas"}))
+        rejected = json.loads(query_retail_database.invoke({"sql_query": "DELETE FROM ventas"}))
+
+        assert len(data["rows"]) == 50 and data["truncated"] is True
+        assert rejected["rows"] == [] and "Only SELECT queries are allowed" in rejected["error"]
@@ -0,0 +1,77 @@
+"""
+Tests para el modo streaming del master graph (src/graphs/master_graph.py)
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+
+def _fake_llm(content):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=content)] * 10))
+
+
+@pytest.fixture
+def master_graph(fake_embeddings):
+    """Importa el master graph sin descargar el modelo de embeddings"""
+    from src.graphs import master_graph
+
+    return master_graph
+
+
+class TestStreamMasterGraph:
+    """Tests para stream_master_graph"""
+
+    def test_stream_sql_flow_events(self, master_graph, tmp_path):
+        """Verifica el orden de eventos y los tokens en un flujo SQL"""
+        router_llm = _fake_llm(json.dumps({"intent": "sql", "reason": "métricas"}))
+        sql_llm = _fake_llm("SELECT 1 AS total FROM dual")
+        explain_llm = _fake_llm("Las ventas suben mucho")
+        report_llm = _fake_llm("# Informe de análisis")
+
+        def fake_sql_llm(node=None):
+            return sql_llm if node == "generate_sql" else explain_llm
+
+        pdf_path = str(tmp_path / "final_report.pdf")
+        with patch("src.graphs.master_graph.get_llm", return_value=router_llm), patch(
+            "src.graphs.sql_agent_graph.get_llm", side_effect=fake_sql_llm
+        ), patch("src.graphs.sql_agent_graph.run_query", return_value=[{"total": 1}]), patch(
+            "src.graphs.report_agent_graph.get_llm", return_value=report_llm
+        ), patch(
+            "src.graphs.report_agent_graph.markdown_to_pdf", return_value=pdf_path
+        ), patch(
+            "src.graphs.report_agent_graph.REPORTS_DIR", tmp_path
+        ):
+            events = list(master_graph.stream_master_graph("Ventas totales"))
+
+        kinds = [e["event"] for e in events]
+        assert kinds[0] == "intent"
+        assert kinds.index("sql") < kinds.index("sql_table") < kinds.index("token")
+        assert kinds[-2:] == ["pdf", "end"]
+
+        explain_tokens = [e["content"] for e in events if e.get("node") == "explain_sql"]
+        report_tokens = [e["content"] for e in events if e.get("node") == "generate_markdown"]
+        assert len(explain_tokens) > 1
+        assert "".join(explain_tokens) == "Las ventas suben mucho"
+        assert "".join(report_tokens) == "# Informe de análisis"
+
+        final_state = events[-1]["state"]
+        assert final_state["intent"] == "sql"
+        assert final_state["sql_answer"] == "Las ventas suben mucho"
+        assert final_state["pdf_path"] == pdf_path
+
+    def test_stream_emits_cached_answer_as_single_token(self, master_graph):
+        """Verifica que una respuesta sin tokens (p.ej. de caché) se emite entera"""
+
+        class NoStreamApp:
+            def stream(self, *args, **kwargs):
+                yield (("docs_flow:1",), "updates", {"answer_from_docs": {"answer": "Respuesta"}})
+                yield ((), "updates", {"docs_flow": {"docs_answer": "Respuesta"}})
+
+        events = list(master_graph.stream_master_graph("¿Qué es?", app=NoStreamApp()))
+
+        assert events[0] == {"event": "token", "node": "answer_from_docs", "content": "Respuesta"}
+        assert events[-1]["state"]["docs_answer"] == "Respuesta"
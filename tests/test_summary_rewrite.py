@@ -0,0 +1,222 @@
+"""
+Tests para las tablas resumen de ventas y la reescritura de consultas
+(src/data/summary_tables.py, src/data/summary_rewrite.py)
+"""
+
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+import sqlglot
+
+from src.config.settings import get_settings
+from src.data.summary_rewrite import plan_summary_rewrite, rewrite_to_summary
+from src.data.summary_tables import (
+    SUMMARY_TABLES,
+    create_table_sql,
+    delta_sql,
+    fresh_tables,
+)
+from src.graphs import sql_agent_graph
+
+CATEGORY_SQL = (
+    "SELECT c.nombre, SUM(v.total) AS total, COUNT(*) "
+    "FROM ventas v JOIN productos p ON v.producto_id = p.id JOIN categorias c ON p.categoria_id = c.id "
+    "GROUP BY c.nombre ORDER BY total DESC"
+)
+
+ELIGIBLE = {
+    "SELECT SUM(total) FROM ventas": "resumen_dia",
+    CATEGORY_SQL: "resumen_dia_categoria",
+    "SELECT p.categoria_id, COUNT(v.id) AS n FROM ventas v JOIN productos p ON p.id = v.producto_id "
+    "GROUP BY p.categoria_id": "resumen_dia_categoria",
+    "SELECT t.ciudad, AVG(v.total) AS media FROM ventas v JOIN tiendas t ON t.id = v.tienda_id "
+    "WHERE v.fecha >= '2023-03-01' GROUP BY t.ciudad": "resumen_dia_tienda",
+    "SELECT t.nombre, c.nombre AS categoria, SUM(v.cantidad) AS uds FROM ventas v "
+    "JOIN tiendas t ON t.id = v.tienda_id JOIN productos p ON p.id = v.producto_id "
+    "JOIN categorias c ON c.id = p.categoria_id GROUP BY t.nombre, c.nombre": "resumen_dia_categoria_tienda",
+    "SELECT p.nombre, SUM(v.total) AS total FROM ventas v JOIN productos p ON p.id = v.producto_id "
+    "GROUP BY p.nombre": "resumen_dia_producto",
+    "SELECT fecha, COUNT(DISTINCT producto_id) AS productos, MAX(fecha) AS ultima FROM ventas "
+    "WHERE tienda_id = 2 GROUP BY fecha": "resumen_dia_producto_tienda",
+}
+
+
+class TestSummaryRewrite:
+    """Tests para la elección de tabla resumen y la SQL reescrita"""
+
+    @pytest.mark.parametrize("sql,table", ELIGIBLE.items())
+    def test_smallest_covering_table(self, sql, table):
+        """Verifica que se elige la tabla resumen más pequeña que cubre la consulta"""
+        rewritten, name = rewrite_to_summary(sql)
+
+        assert name == table
+        assert f"FROM {table}" in rewritten
+
+    def test_bridge_join_and_aggregates_are_rewritten(self):
+        """Verifica que sobra el join a productos y COUNT(*) pasa a sumar num_ventas"""
+        rewritten, _ = rewrite_to_summary(CATEGORY_SQL)
+
+        assert "productos" not in rewritten
+        assert 'COALESCE(SUM(v.num_ventas), 0) AS "COUNT(*)"' in rewritten
+        assert "ON v.categoria_id = c.id" in rewritten
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM ventas",
+            "SELECT fecha, total FROM ventas WHERE total > 100",
+            "SELECT SUM(cantidad * 2) FROM ventas",
+            "SELECT SUM(v.total) FROM ventas v LEFT JOIN tiendas t ON t.id = v.tienda_id",
+            "SELECT SUM(v.total) FROM ventas v JOIN tiendas t ON t.nombre = v.tienda_id",
+            "SELECT SUM(total) FROM ventas WHERE cantidad > 1",
+            "SELECT COUNT(DISTINCT total) FROM ventas",
+            "SELECT MAX(total) FROM ventas",
+            "SELECT COUNT(id) FROM ventas v JOIN productos p ON p.id = v.producto_id",
+            "SELECT producto_id, SUM(total) FROM (SELECT * FROM ventas) GROUP BY producto_id",
+            "SELECT SUM(precio) FROM productos",
+            "DELETE FROM ventas",
+        ],
+    )
+    def test_ineligible_queries(self, sql):
+        """Verifica que las consultas que la tabla resumen no puede responder no se tocan"""
+        assert plan_summary_rewrite(sql) is None
+
+    def test_only_fresh_tables_are_used(self):
+        """Verifica que se salta a la siguiente tabla que cubre la consulta si la primera no está al día"""
+        rows = [
+            {"tabla": "RESUMEN_DIA_CATEGORIA", "ultimo_id": 90, "max_id": 100},
+            {"tabla": "RESUMEN_DIA_CATEGORIA_TIENDA", "ultimo_id": 100, "max_id": 100},
+        ]
+
+        fresh = fresh_tables(rows)
+
+        assert fresh == {"resumen_dia_categoria_tienda"}
+        assert rewrite_to_summary(CATEGORY_SQL, fresh)[1] == "resumen_dia_categoria_tienda"
+        assert rewrite_to_summary(CATEGORY_SQL, set()) is None
+
+
+def _trunc(value):
+    return value[:10] if value else value
+
+
+@pytest.fixture
+def retail_db():
+    """SQLite con el esquema retail, algunas ventas y las tablas resumen llenas"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.create_function("TRUNC", 1, _trunc)
+    conn.executescript("""
+        CREATE TABLE categorias (id INTEGER PRIMARY KEY, nombre TEXT);
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, nombre TEXT, categoria_id INTEGER, precio REAL);
+        CREATE TABLE tiendas (id INTEGER PRIMARY KEY, nombre TEXT, ciudad TEXT);
+        CREATE TABLE ventas (
+            id INTEGER PRIMARY KEY, fecha TEXT, producto_id INTEGER, tienda_id INTEGER,
+            cantidad INTEGER, total REAL
+        );
+        INSERT INTO categorias VALUES (1, 'Bebidas'), (2, 'Snacks');
+        INSERT INTO productos VALUES (1, 'Agua', 1, 1.0), (2, 'Zumo', 1, 2.5), (3, 'Patatas', 2, 1.8);
+        INSERT INTO tiendas VALUES (1, 'Centro', 'Madrid'), (2, 'Puerto', 'Vigo'), (3, 'Feria', 'Madrid');
+        """)
+    ventas = [
+        (i, f"2023-0{1 + i % 4}-{10 + i % 3}", 1 + i % 3, 1 + i % 3 if i % 5 else 2, 1 + i % 4, 2.5 * (1 + i % 7))
+        for i in range(1, 61)
+    ]
+    conn.executemany("INSERT INTO ventas VALUES (?, ?, ?, ?, ?, ?)", ventas)
+    for table in SUMMARY_TABLES:
+        conn.execute(sqlglot.transpile(create_table_sql(table), read="oracle", write="sqlite")[0])
+        delta = sqlglot.transpile(delta_sql(table), read="oracle", write="sqlite")[0]
+        conn.execute(f"INSERT INTO {table.name} {delta}", {"desde": 0, "hasta": len(ventas)})
+    yield conn
+    conn.close()
+
+
+def _run(conn, sql):
+    rows = conn.execute(sqlglot.transpile(sql, read="oracle", write="sqlite")[0]).fetchall()
+    return sorted(tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows)
+
+
+class TestSummaryEquivalence:
+    """Tests que comparan el resultado de la consulta original y la reescrita"""
+
+    @pytest.mark.parametrize("sql", ELIGIBLE)
+    def test_same_result(self, retail_db, sql):
+        """Verifica que la tabla resumen devuelve las mismas filas que ventas"""
+        rewritten, _ = rewrite_to_summary(sql)
+
+        assert _run(retail_db, rewritten) == _run(retail_db, sql)
+
+    @pytest.mark.parametrize("sql", list(ELIGIBLE)[:3])
+    def test_same_result_on_every_covering_table(self, retail_db, sql):
+        """Verifica que cualquier tabla resumen que cubre la consulta da el mismo resultado"""
+        plan = plan_summary_rewrite(sql)
+
+        for table in plan.candidates:
+            assert _run(retail_db, plan.apply(table)) == _run(retail_db, sql), table.name
+
+
+@pytest.fixture
+def rewrite_settings(monkeypatch):
+    monkeypatch.setenv("SUMMARY_REWRITE_ENABLED", "true")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+class TestRewriteNode:
+    """Tests para el nodo rewrite_sql del agente SQL"""
+
+    def test_ineligible_query_skips_watermark_check(self, rewrite_settings):
+        """Verifica que una consulta no elegible no consulta la marca de agua"""
+        state = {"sql_query": "SELECT 1 AS total FROM dual"}
+
+        with patch.object(sql_agent_graph, "run_query") as mock_run:
+            result = sql_agent_graph.rewrite_sql_node(state)
+
+        mock_run.assert_not_called()
+        assert result == state
+
+    def test_fresh_summary_table(self, rewrite_settings):
+        """Verifica que con la tabla resumen al día se ejecuta la consulta reescrita"""
+        rows = [{"tabla": "RESUMEN_DIA", "ultimo_id": 10, "max_id": 10}]
+
+        with patch.object(sql_agent_graph, "run_query", return_value=rows):
+            result = sql_agent_graph.rewrite_sql_node({"sql_query": "SELECT SUM(total) FROM ventas"})
+
+        assert result["sql_summary_table"] == "resumen_dia"
+        assert result["sql_original"] == "SELECT SUM(total) FROM ventas"
+        assert "FROM resumen_dia ventas" in result["sql_query"]
+
+    def test_stale_or_missing_summary_tables(self, rewrite_settings):
+        """Verifica que sin tablas al día (o sin tablas creadas) no se reescribe"""
+        state = {"sql_query": "SELECT SUM(total) FROM ventas"}
+        stale = [{"tabla": "RESUMEN_DIA", "ultimo_id": 9, "max_id": 10}]
+
+        with patch.object(sql_agent_graph, "run_query", return_value=stale):
+            assert sql_agent_graph.rewrite_sql_node(state) == state
+        with patch.object(sql_agent_graph, "run_query", side_effect=RuntimeError("ORA-00942")):
+            assert sql_agent_graph.rewrite_sql_node(state) == state
+
+    def test_async_node(self, rewrite_settings):
+        """Verifica que la versión async también reescribe"""
+        rows = [{"tabla": "resumen_dia_tienda", "ultimo_id": 10, "max_id": 10}]
+        sql = "SELECT tienda_id, SUM(total) AS total FROM ventas GROUP BY tienda_id"
+
+        with patch.object(sql_agent_graph, "arun_query", return_value=rows):
+            result = asyncio.run(sql_agent_graph.arewrite_sql_node({"sql_query": sql}))
+
+        assert result["sql_summary_table"] == "resumen_dia_tienda"
+
+    def test_disabled(self, monkeypatch):
+        """Verifica que SUMMARY_REWRITE_ENABLED=false desactiva la reescritura"""
+        monkeypatch.setenv("SUMMARY_REWRITE_ENABLED", "false")
+        get_settings.cache_clear()
+        state = {"sql_query": "SELECT SUM(total) FROM ventas"}
+
+        try:
+            with patch.object(sql_agent_graph, "run_query") as mock_run:
+                assert sql_agent_graph.rewrite_sql_node(state) == state
+            mock_run.assert_not_called()
+        finally:
+            get_settings.cache_clear()
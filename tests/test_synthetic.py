@@ -0,0 +1,177 @@
+"""
+Tests para el conjunto retail sintético (src/data/synthetic.py)
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from src.data.replica import Replica
+from src.data.synthetic import (
+    BLOCK_ROWS,
+    DatasetFiles,
+    DatasetSpec,
+    SyntheticDataset,
+    export_dataset,
+    load_oracle,
+    load_replica,
+)
+
+SPEC = DatasetSpec(seed=7, ventas=BLOCK_ROWS + 5_000)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return SyntheticDataset(SPEC)
+
+
+def _all(source, table):
+    chunks = list(source.chunks(table))
+    return [np.concatenate([c.arrays[i] for c in chunks]) for i in range(len(chunks[0].columns))]
+
+
+def _assert_same(a, b):
+    for table in ("categorias", "productos", "tiendas", "ventas"):
+        for x, y in zip(_all(a, table), _all(b, table)):
+            assert x.dtype == y.dtype
+            assert np.array_equal(x, y)
+
+
+class TestGeneration:
+    """Tests para la generación vectorizada"""
+
+    def test_deterministic(self, dataset):
+        """Verifica que la misma semilla da los mismos datos y otra semilla, otros"""
+        _assert_same(dataset, SyntheticDataset(SPEC))
+
+        other = SyntheticDataset(DatasetSpec(seed=8, ventas=SPEC.ventas))
+        assert not np.array_equal(dataset.ventas_block(0).column("total"), other.ventas_block(0).column("total"))
+
+    def test_blocks_are_independent(self, dataset):
+        """Verifica que un bloque se genera igual sin generar los anteriores"""
+        block = SyntheticDataset(SPEC).ventas_block(1)
+
+        assert len(block) == 5_000
+        assert block.column("id")[0] == BLOCK_ROWS + 1
+        assert np.array_equal(block.column("total"), list(dataset.chunks("ventas"))[1].column("total"))
+
+    def test_foreign_keys_and_ranges(self, dataset):
+        """Verifica ids de productos/tiendas existentes, fechas en rango y totales positivos"""
+        ids, fecha, producto, tienda, cantidad, total = _all(dataset, "ventas")
+        categoria_ids = _all(dataset, "productos")[2]
+
+        assert np.array_equal(ids, np.arange(1, SPEC.ventas + 1))
+        assert producto.min() >= 1 and producto.max() <= SPEC.productos
+        assert tienda.min() >= 1 and tienda.max() <= SPEC.tiendas
+        assert categoria_ids.min() >= 1 and categoria_ids.max() <= 6
+        assert fecha.min() >= np.datetime64("2023-01-01") and fecha.max() <= np.datetime64("2024-03-26")
+        assert cantidad.min() >= 1 and cantidad.max() <= 12
+        assert (total > 0).all()
+
+    def test_seasonality(self, dataset):
+        """Verifica más ventas en diciembre que en febrero y en sábado que en lunes"""
+        fecha = _all(dataset, "ventas")[1]
+        month = fecha.astype("datetime64[M]").astype(int) % 12
+        weekday = (fecha.astype(int) + 3) % 7
+
+        # Ventas por día: diciembre de 2023 frente a febrero de 2023 y 2024
+        assert (month == 11).sum() / 31 > 1.4 * (month == 1).sum() / (28 + 29)
+        assert (weekday == 5).sum() > 1.3 * (weekday == 0).sum()
+
+    def test_store_skew(self, dataset):
+        """Verifica que las ventas no se reparten por igual entre tiendas"""
+        tienda = _all(dataset, "ventas")[3]
+        share = np.bincount(tienda)[1:] / len(tienda)
+
+        assert share.max() > 2.5 / SPEC.tiendas
+        assert share.min() < 0.6 / SPEC.tiendas
+
+
+class TestFiles:
+    """Tests para la exportación por trozos y la lectura"""
+
+    def test_csv_roundtrip(self, dataset, tmp_path):
+        """Verifica que los CSV exportados se leen con los mismos valores y tipos"""
+        written = export_dataset(dataset, tmp_path, fmt="csv", rows_per_file=BLOCK_ROWS)
+
+        assert written["ventas"] == SPEC.ventas
+        assert sorted(p.name for p in (tmp_path / "ventas").iterdir()) == ["part-00000.csv", "part-00001.csv"]
+        meta = json.loads((tmp_path / "dataset.json").read_text())
+        assert meta["seed"] == 7 and meta["rows"]["ventas"] == SPEC.ventas
+
+        files = DatasetFiles(tmp_path)
+        assert files.spec == SPEC
+        _assert_same(dataset, files)
+
+    def test_parquet_roundtrip(self, dataset, tmp_path):
+        """Verifica la exportación a Parquet (un row group por bloque)"""
+        pytest.importorskip("pyarrow")
+
+        export_dataset(dataset, tmp_path, fmt="parquet")
+
+        assert [p.name for p in (tmp_path / "ventas").iterdir()] == ["part-00000.parquet"]
+        _assert_same(dataset, DatasetFiles(tmp_path))
+
+    @pytest.mark.parametrize("rows_per_file, parts", [(BLOCK_ROWS, ["part-00000.csv"]), (2 * BLOCK_ROWS, [])])
+    def test_failed_write_leaves_no_partial_file(self, dataset, tmp_path, rows_per_file, parts):
+        """Verifica que si una parte falla a medias no queda ese fichero (ni su temporal) ni dataset.json"""
+
+        class Failing:
+            spec = dataset.spec
+
+            def chunks(self, table):
+                for i, chunk in enumerate(dataset.chunks(table)):
+                    if table == "ventas" and i == 1:
+                        raise OSError("disco lleno")
+                    yield chunk
+
+        with pytest.raises(OSError):
+            export_dataset(Failing(), tmp_path, fmt="csv", rows_per_file=rows_per_file)
+
+        assert [p.name for p in (tmp_path / "ventas").iterdir()] == parts
+        assert not list(tmp_path.rglob("*.tmp"))
+        assert not (tmp_path / "dataset.json").exists()
+
+    def test_unknown_format(self, dataset, tmp_path):
+        """Verifica que un formato desconocido se rechaza antes de escribir"""
+        with pytest.raises(ValueError):
+            export_dataset(dataset, tmp_path, fmt="xlsx")
+
+
+class TestLoad:
+    """Tests para la carga en la réplica y en Oracle"""
+
+    def test_replica_from_generator_and_files_match(self, tmp_path):
+        """Verifica que generar y cargar, o cargar los ficheros exportados, deja los mismos datos"""
+        small = SyntheticDataset(DatasetSpec(seed=3, ventas=2_000))
+        export_dataset(small, tmp_path / "files", fmt="csv")
+        sums = []
+        for name, source in (("a", small), ("b", DatasetFiles(tmp_path / "files"))):
+            replica = Replica(str(tmp_path / f"{name}.sqlite"))
+            loaded = load_replica(source, replica)
+            with replica.engine.connect() as conn:
+                sums.append(conn.execute(text("SELECT COUNT(*), SUM(total), MAX(fecha) FROM ventas")).fetchone())
+            assert loaded["ventas"] == 2_000
+            assert replica.is_fresh(0)
+            assert replica.watermarks()["ventas"][0] == 2_000
+            replica.close()
+
+        assert sums[0] == sums[1]
+
+    def test_oracle(self):
+        """Verifica vaciado, inserción por lotes con ids y ajuste de las columnas identidad"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value
+
+        loaded = load_oracle(SyntheticDataset(DatasetSpec(ventas=2_500)), conn, batch_size=1_000)
+
+        assert loaded == {"categorias": 6, "productos": 80, "tiendas": 12, "ventas": 2_500}
+        ventas_batches = [c for c in cur.executemany.call_args_list if c.args[0].startswith("INSERT INTO ventas")]
+        assert [len(c.args[1]) for c in ventas_batches] == [1_000, 1_000, 500]
+        assert ventas_batches[0].args[1][0][0] == 1
+        executed = [c.args[0] for c in cur.execute.call_args_list]
+        assert executed[0] == "TRUNCATE TABLE ventas"
+        assert "ALTER TABLE ventas MODIFY id GENERATED BY DEFAULT AS IDENTITY (START WITH LIMIT VALUE)" in executed
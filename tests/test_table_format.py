@@ -0,0 +1,145 @@
+"""
+Tests para las tablas markdown de resultados (src/data/table_format.py)
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.data import table_format
+from src.data.columnar import ColumnarResult
+from src.data.table_format import (
+    TableFormat,
+    format_number,
+    iter_markdown,
+    render_markdown,
+    rows_to_markdown,
+    table_format_from_settings,
+)
+
+
+def _legacy(rows):
+    # Implementación anterior (str() y row.get() por celda), como referencia
+    headers = list(rows[0].keys())
+    lines = ["| " + " | ".join(headers) + " |", "| " + " | ".join(["---"] * len(headers)) + " |"]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row.get(h, "")) for h in headers) + " |")
+    return "\n".join(lines)
+
+
+class TestRender:
+    """Tests para el formato por defecto"""
+
+    def test_same_output_as_legacy(self):
+        """Verifica la misma tabla que la implementación anterior sin NULL"""
+        rows = [
+            {"id": i, "tienda": f"Tienda {i}", "total": Decimal(f"{i}.50"), "fecha": date(2024, 1, 1 + i % 28)}
+            for i in range(50)
+        ]
+
+        assert rows_to_markdown(rows) == _legacy(rows)
+
+    def test_nulls_missing_keys_and_empty(self):
+        """Verifica celdas vacías para NULL y claves que faltan, y el mensaje sin filas"""
+        rows = [{"id": 1, "email": None}, {"id": 2}]
+
+        assert rows_to_markdown(rows).splitlines()[2:] == ["| 1 |  |", "| 2 |  |"]
+        assert rows_to_markdown([]) == "No hay resultados."
+        assert rows_to_markdown([], TableFormat(empty="No results.")) == "No results."
+
+    def test_escapes_pipes_and_newlines(self):
+        """Verifica que una barra o un salto de línea en un valor no rompen la tabla"""
+        markdown = render_markdown(["nombre"], [("A|B",), ("línea 1\nlínea 2",)])
+
+        assert markdown.splitlines()[2:] == ["| A\\|B |", "| línea 1 línea 2 |"]
+
+    def test_width_cap(self):
+        """Verifica que las celdas (y cabeceras) largas se cortan con "…" """
+        fmt = TableFormat(max_width=8)
+
+        lines = render_markdown(["descripcion_larga"], [("corto",), ("un texto muy largo",)], fmt).splitlines()
+
+        assert lines[0] == "| descrip… |"
+        assert lines[2:] == ["| corto |", "| un text… |"]
+        with pytest.raises(ValueError):
+            TableFormat(max_width=1)
+
+
+class TestIncremental:
+    """Tests para el renderizado por bloques desde un iterador"""
+
+    def test_reads_only_what_it_shows(self):
+        """Verifica que con max_rows solo se consume una fila de más y se marca el corte"""
+        consumed = []
+
+        def rows():
+            for i in range(1_000_000):
+                consumed.append(i)
+                yield (i,)
+
+        chunks = list(iter_markdown(["id"], rows(), TableFormat(max_rows=3)))
+
+        assert "\n".join(chunks).splitlines() == ["| id |", "| --- |", "| 0 |", "| 1 |", "| 2 |", "| … |"]
+        assert len(consumed) == 4
+
+    def test_blocks(self, monkeypatch):
+        """Verifica un trozo por bloque de filas, con la misma tabla y sin marca si no sobran filas"""
+        monkeypatch.setattr(table_format, "BLOCK_ROWS", 3)
+        rows = [(i, f"t{i}") for i in range(10)]
+
+        chunks = list(iter_markdown(["id", "t"], iter(rows), TableFormat(max_rows=10)))
+
+        assert len(chunks) == 1 + 4
+        assert chunks[1] == "| 0 | t0 |\n| 1 | t1 |\n| 2 | t2 |"
+        assert "\n".join(chunks) == render_markdown(["id", "t"], rows)
+        assert chunks[-1] == "| 9 | t9 |"
+
+    def test_columnar_matches_rows(self):
+        """Verifica que ColumnarResult y las filas-dict dan la misma tabla"""
+        rows = [
+            {"tienda": "Madrid", "total": 1234.5, "num_ventas": 1200},
+            {"tienda": None, "total": None, "num_ventas": 3},
+        ]
+        fmt = TableFormat(locale="es", max_rows=1)
+
+        assert ColumnarResult.from_rows(rows).to_markdown(fmt=fmt) == rows_to_markdown(rows, fmt)
+
+
+class TestLocale:
+    """Tests para el formato de números por locale"""
+
+    def test_format_number(self):
+        """Verifica separadores, decimales y € en importes"""
+        assert format_number(Decimal("1234567.891"), "es", money=True) == "1.234.567,89 €"
+        assert format_number(1234567, "es") == "1.234.567"
+        assert format_number(0.5, "es") == "0,50"
+        assert format_number(1234.5, "en", money=True) == "€1,234.50"
+        assert format_number(None, "es") == "" and format_number(float("nan"), "es") == ""
+        assert format_number("Madrid", "es") == "Madrid"
+
+    def test_money_columns_by_name(self):
+        """Verifica que total/importe/precio llevan € y num_ventas/cantidad no"""
+        rows = [{"tienda": "Madrid", "total_ventas": Decimal(2500), "num_ventas": 1200, "cantidad": 3}]
+
+        markdown = rows_to_markdown(rows, TableFormat(locale="es"))
+
+        assert markdown.splitlines()[2] == "| Madrid | 2.500,00 € | 1.200 | 3 |"
+        explicit = rows_to_markdown(rows, TableFormat(locale="es", money_columns=("cantidad",)))
+        assert explicit.splitlines()[2] == "| Madrid | 2.500,00 | 1.200 | 3,00 € |"
+
+    def test_from_settings(self, monkeypatch):
+        """Verifica TABLE_LOCALE y TABLE_MAX_WIDTH y el rechazo de un locale desconocido"""
+        from src.config.settings import get_settings
+
+        monkeypatch.setenv("TABLE_LOCALE", "es")
+        monkeypatch.setenv("TABLE_MAX_WIDTH", "40")
+        get_settings.cache_clear()
+        try:
+            fmt = table_format_from_settings(max_rows=50)
+        finally:
+            get_settings.cache_clear()
+
+        assert (fmt.locale, fmt.max_width, fmt.max_rows) == ("es", 40, 50)
+        with pytest.raises(ValueError):
+            TableFormat(locale="fr")
@@ -119,31 +119,12 @@ class TestErrorHandling:
 class TestPerformance:
     """Tests de rendimiento básicos"""
 
-    def test_truncation_performance(self):
-        """Verifica que truncar 1000 filas sea rápido"""
-        from src.tools.sql_tool import _truncate_rows
-        import time
-
-        # Crear 10000 filas
-        rows = [{"id": i, "value": f"value_{i}"} for i in range(10000)]
-
-        start = time.time()
-        result = _truncate_rows(rows, max_rows=50)
-        elapsed = time.time() - start
-
-        assert len(result) == 50
-        # Debería ser casi instantáneo (< 1 segundo)
-        assert elapsed < 1.0
-
     def test_markdown_conversion_performance(self):
         """Verifica que convertir 1000 filas a markdown sea rápido"""
         from src.tools.sql_tool import _rows_to_markdown
         import time
 
-        rows = [
-            {"id": i, "name": f"Product_{i}", "price": 99.99 + i}
-            for i in range(1000)
-        ]
+        rows = [{"id": i, "name": f"Product_{i}", "price": 99.99 + i} for i in range(1000)]
 
         start = time.time()
         result = _rows_to_markdown(rows)